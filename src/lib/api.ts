@@ -140,18 +140,27 @@ export async function syncGoogleUser(): Promise<{
   access_token: string; 
   refresh_token: string; 
   user_id: string; 
+  username: string;
   role: string; 
   profile_completed: boolean;
 }> {
-  // apiFetch will still attach the Supabase token (from setAuthTokens) initially
-  const res = await apiFetch(`${API_BASE}/api/auth/google-sync`, {
-    method: 'POST',
-    body: JSON.stringify({}) 
-  });
-  
-  const data = await res.json();
-  if (!res.ok) throw new Error(data.msg || 'Failed to sync Google user');
-  return data;
+  // apiFetch will still attach the Supabase token (from setAuthTokens) initially.
+  // 503 means the backend is still fetching the signing keys (e.g. just after a key rotation).
+  for (let attempt = 0; ; attempt++) {
+    const res = await apiFetch(`${API_BASE}/api/auth/google-sync`, {
+      method: 'POST',
+      body: JSON.stringify({}) 
+    });
+
+    const data = await res.json();
+    if (res.status === 503 && attempt < 3) {
+      const retryAfter = Number(res.headers.get('Retry-After')) || 1;
+      await new Promise(resolve => setTimeout(resolve, Math.min(retryAfter, 10) * 1000));
+      continue;
+    }
+    if (!res.ok) throw new Error(data.msg || 'Failed to sync Google user');
+    return data;
+  }
 }
 
 
@@ -287,6 +296,28 @@ export async function updateCampaignImage(id: number, payload: { image_url: stri
   return data;
 }
 
+export interface UploadCampaignImageFileResponse {
+  msg: string;
+  image_url: string;            // largest resized variant (or the original)
+  asset_link: string;           // the original upload
+  variants: Record<string, string>;  // 'original', 'w320', 'w640', 'w1280' -> URL
+  hash: string;
+  bytes: number;
+  deduplicated: boolean;
+}
+
+// Uploads the file as the raw request body so the server can stream it to disk
+export async function uploadCampaignImageFile(id: number, file: Blob): Promise<UploadCampaignImageFileResponse> {
+  const res = await apiFetch(`${API_BASE}/api/brand/campaigns/${id}/image`, {
+    method: 'POST',
+    headers: { 'Content-Type': file.type || 'application/octet-stream' },
+    body: file
+  });
+  const data = await res.json();
+  if (!res.ok) throw new Error(data.msg || 'Failed to upload campaign image');
+  return data;
+}
+
 export interface ClipData { // New interface to combine submitted and accepted clip data
   id: number;
   campaign_id: number;
@@ -425,12 +456,58 @@ export async function fetchAllCampaigns(): Promise<Campaign[]> {
   return res.json();
 }
 
+export interface CampaignSearchResponse {
+  results: Array<Campaign & { score: number | null }>;
+  total: number;
+  facets: {
+    category: Record<string, number>;
+    platform: Record<string, number>;
+  };
+  limit: number;
+  offset: number;
+  took_ms: number;
+}
+
+export async function searchCampaigns(params: { q?: string; category?: string; platform?: string; limit?: number; offset?: number }): Promise<CampaignSearchResponse> {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value !== undefined && value !== '') query.append(key, String(value));
+  });
+  const res = await apiFetch(`${API_BASE}/api/campaigns/search?${query}`);
+  if (!res.ok) throw new Error('Failed to search campaigns');
+  return res.json();
+}
+
+export async function fetchRecommendedCampaigns(): Promise<{ campaigns: Array<Campaign & { expected_earnings: number }>; computed_at: string | null }> {
+  const res = await apiFetch(`${API_BASE}/api/creator/recommended-campaigns`);
+  if (!res.ok) throw new Error('Failed to fetch recommended campaigns');
+  return res.json();
+}
+
 export async function fetchCampaignById(id: number): Promise<Campaign> {
   const res = await apiFetch(`${API_BASE}/api/campaigns/${id}`);
   if (!res.ok) throw new Error('Failed to fetch campaign');
   return res.json();
 }
 
+// Normalise campaign data coming from backend for frontend expectations
+function normalizeCreatorCampaign(campaign: any): Campaign {
+  // Provide default category if missing
+  if (!campaign.category) {
+    campaign.category = 'fashion_clothing';
+  }
+
+  // Convert backend 'pending' status to frontend 'in_review'
+  if (Array.isArray(campaign.submitted_clips)) {
+    campaign.submitted_clips = campaign.submitted_clips.map((clip: any) => ({
+      ...clip,
+      status: clip.status === 'pending' ? 'in_review' : clip.status
+    }));
+  }
+
+  return campaign;
+}
+
 export async function fetchCreatorCampaigns(): Promise<Campaign[]> {
   try {
     const res = await apiFetch(`${API_BASE}/api/creator/your-campaigns`);
@@ -440,27 +517,8 @@ export async function fetchCreatorCampaigns(): Promise<Campaign[]> {
       throw new Error(errorData.msg || 'Failed to fetch your campaigns');
     }
 
-    let campaigns: Campaign[] = await res.json();
-
-    // Normalise data coming from backend for frontend expectations
-    campaigns = campaigns.map((campaign: any) => {
-      // Provide default category if missing
-      if (!campaign.category) {
-        campaign.category = 'fashion_clothing';
-      }
-
-      // Convert backend 'pending' status to frontend 'in_review'
-      if (Array.isArray(campaign.submitted_clips)) {
-        campaign.submitted_clips = campaign.submitted_clips.map((clip: any) => ({
-          ...clip,
-          status: clip.status === 'pending' ? 'in_review' : clip.status
-        }));
-      }
-
-      return campaign;
-    });
-
-    return campaigns;
+    const campaigns: Campaign[] = await res.json();
+    return campaigns.map(normalizeCreatorCampaign);
   } catch (error) {
     console.error('Error in fetchCreatorCampaigns:', error);
     throw error;
@@ -1076,13 +1134,20 @@ export async function bulkDistribute(distributions: Array<{
 
 // --- PHASE 4: VIEW COUNT TRACKING & PERFORMANCE LOOP ---
 
+// `held` is true (HTTP 202) when the sync was flagged as anomalous: nothing was written and the
+// count waits in the view anomaly queue; only the held_* fields and anomaly_id are set then.
 export interface UpdateViewCountResponse {
   msg: string;
+  held: boolean;
   clip_id: number;
   campaign_id: number;
-  old_view_count: number;
-  new_view_count: number;
-  view_count_diff: number;
+  old_view_count?: number;
+  new_view_count?: number;
+  view_count_diff?: number;
+  budget_paused?: boolean;
+  anomaly_id?: number;
+  counted_view_count?: number;
+  held_view_count?: number;
 }
 
 export async function updateClipViewCount(clipId: number, viewCount: number): Promise<UpdateViewCountResponse> {
@@ -1096,6 +1161,53 @@ export async function updateClipViewCount(clipId: number, viewCount: number): Pr
   return data;
 }
 
+export interface ViewAnomaly {
+  id: number;
+  clip_id: number;
+  clip_url: string | null;
+  campaign_id: number;
+  campaign_name: string | null;
+  creator_id: number;
+  creator_name: string | null;
+  counted_views: number;
+  held_views: number;
+  held_earnings: number;
+  rate: number;
+  score: number | null;
+  baseline: 'clip' | 'creator' | 'campaign' | null;
+  status: 'open' | 'approved' | 'rejected';
+  created_at: string;
+  updated_at: string;
+  reviewed_at: string | null;
+}
+
+export interface ViewAnomaliesResponse {
+  anomalies: ViewAnomaly[];
+  count: number;
+  limit: number;
+  next_cursor: number | null;
+}
+
+export async function fetchViewAnomalies(params: { status?: ViewAnomaly['status']; limit?: number; cursor?: number } = {}): Promise<ViewAnomaliesResponse> {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value !== undefined) query.append(key, String(value));
+  });
+  const res = await apiFetch(`${API_BASE}/api/admin/view-anomalies?${query}`);
+  const data = await res.json();
+  if (!res.ok) throw new Error(data.msg || 'Failed to fetch view anomalies');
+  return data;
+}
+
+export async function resolveViewAnomaly(anomalyId: number, action: 'approve' | 'reject'): Promise<{ msg: string; anomaly_id: number; clip_id: number; status: string; view_count: number; budget_paused: boolean }> {
+  const res = await apiFetch(`${API_BASE}/api/admin/view-anomalies/${anomalyId}/${action}`, {
+    method: 'POST'
+  });
+  const data = await res.json();
+  if (!res.ok) throw new Error(data.msg || 'Failed to review view anomaly');
+  return data;
+}
+
 export interface UpdateCampaignViewsResponse {
   msg: string;
   campaign_id: number;
@@ -1121,14 +1233,38 @@ export async function updateCampaignViewCount(campaignId: number, totalViewCount
   return data;
 }
 
+export interface ViewHistoryResponse {
+  campaign_id: number;
+  clip_id: number | null;
+  start: number; // unix seconds
+  end: number;
+  mode: 'lttb' | 'buckets';
+  points: Array<{ t: number; views: number }>;
+}
+
+export async function getCampaignViewHistory(
+  campaignId: number,
+  options: { start?: number; end?: number; points?: number; mode?: 'lttb' | 'buckets'; clipId?: number } = {}
+): Promise<ViewHistoryResponse> {
+  const params = new URLSearchParams();
+  if (options.start !== undefined) params.append('start', options.start.toString());
+  if (options.end !== undefined) params.append('end', options.end.toString());
+  if (options.points !== undefined) params.append('points', options.points.toString());
+  if (options.mode) params.append('mode', options.mode);
+  if (options.clipId !== undefined) params.append('clip_id', options.clipId.toString());
+
+  const res = await apiFetch(`${API_BASE}/api/brand/campaigns/${campaignId}/view-history?${params}`);
+  const data = await res.json();
+  if (!res.ok) throw new Error(data.msg || 'Failed to fetch view history');
+  return data;
+}
+
 export interface CreatorPerformanceMetric {
   creator_id: string;
   creator_name: string;
   total_views: number;
   clips: number;
   total_earned: number;
-  total_paid: number;
-  pending: number;
 }
 
 export interface CampaignPerformanceAnalytics {
@@ -1141,6 +1277,9 @@ export interface CampaignPerformanceAnalytics {
     milestones_reached: number;
     cpv: number;
     view_threshold: number;
+    rejected_clips?: number;
+    acceptance_rate?: number | null;  // accepted / (accepted + rejected)
+    effective_cpv?: number | null;    // actual spend per view, below cpv once the budget caps spend
   };
   financial: {
     funds_allocated: number;
@@ -1150,7 +1289,9 @@ export interface CampaignPerformanceAnalytics {
     utilization_percentage: number;
     remaining_budget: number;
   };
+  daily_views?: { date: string; views: number }[];  // views gained per day, last 90 days
   creator_performance: CreatorPerformanceMetric[];
+  updated_at?: string | null;
 }
 
 export async function getCampaignPerformanceAnalytics(campaignId: number): Promise<CampaignPerformanceAnalytics> {
@@ -1230,11 +1371,13 @@ export async function verifyPayoutDetails(): Promise<VerifyPayoutDetailsResponse
 export interface WithdrawalRecord {
   id: number;
   amount: number;
-  status: 'pending' | 'success' | 'failed';
+  status: 'pending' | 'success' | 'failed' | 'reverted';
   payout_method: 'upi' | 'bank';
   reference_id?: string;
   utr?: string;
+  failure_reason?: string;
   created_at: string;
+  completed_at?: string;
   type: string;
 }
 
@@ -1244,17 +1387,21 @@ export interface WithdrawalHistoryResponse {
   count: number;
   limit: number;
   offset: number;
+  // Pass as `cursor` to fetch the next (older) page; null on the last page
+  next_cursor: number | null;
 }
 
 export async function getWithdrawalHistory(
-  status?: 'pending' | 'success' | 'failed',
+  status?: 'pending' | 'success' | 'failed' | 'reverted',
   limit = 20,
-  offset = 0
+  offset = 0,
+  cursor?: number
 ): Promise<WithdrawalHistoryResponse> {
   const params = new URLSearchParams();
   if (status) params.append('status', status);
   params.append('limit', limit.toString());
-  params.append('offset', offset.toString());
+  if (cursor !== undefined) params.append('cursor', cursor.toString());
+  else params.append('offset', offset.toString());
 
   const res = await apiFetch(`${API_BASE}/api/payments/creator/withdrawals?${params}`, {
       });
@@ -1273,6 +1420,7 @@ export interface Notification {
   clip_id?: number;
   amount?: number;
   payout_method?: string;
+  feedback?: string | null;  // clip_rejected only
   // Add other fields as needed based on the notification data in backend
 }
 
@@ -1292,6 +1440,95 @@ export async function getCreatorNotifications(creatorId: string): Promise<Notifi
   return data;
 }
 
+// Everything a dashboard loads on mount, in one request. Sections that failed on the server are
+// missing from `sections` and listed in `errors` with a message, so render what did arrive.
+export interface BrandProfile {
+  id: number;
+  username: string;
+  email: string;
+}
+
+export interface CreatorBootstrapSections {
+  profile: CreatorProfile | null;
+  campaigns: Campaign[];
+  wallet: Omit<WalletBalanceResponse, 'role'>;
+  notifications: Notification[];
+}
+
+export interface BrandBootstrapSections {
+  profile: BrandProfile | null;
+  campaigns: Campaign[];
+  wallet: Omit<WalletBalanceResponse, 'role'>;
+}
+
+export interface BootstrapResponse<S> {
+  role: 'creator' | 'brand';
+  user_id: number;
+  sections: Partial<S>;
+  errors: Partial<Record<keyof S, string>>;
+  timings_ms: Partial<Record<keyof S, number>>;
+  took_ms: number;
+  msg?: string;
+}
+
+export async function getBootstrap<S extends CreatorBootstrapSections | BrandBootstrapSections>(): Promise<BootstrapResponse<S>> {
+  const res = await apiFetch(`${API_BASE}/api/bootstrap`);
+  const data = await res.json();
+  if (!res.ok) throw new Error(data.msg || 'Failed to load dashboard');
+  if (data.role === 'creator' && Array.isArray(data.sections.campaigns)) {
+    data.sections.campaigns = data.sections.campaigns.map(normalizeCreatorCampaign);
+  }
+  return data;
+}
+
+// Live push channel (Server-Sent Events). EventSource can't send headers, so the stream is opened with a
+// short-lived token from /api/stream/token in the query string, never with the access token itself.
+export type StreamEventType = Notification['type'] | 'view_count_updated' | 'budget_exhausted' | 'deposit_credited' | 'withdrawal_completed' | 'withdrawal_reverted' | 'view_anomaly_flagged';
+
+export interface EventSubscription {
+  close: () => void;
+}
+
+export function subscribeToEvents(onEvent: (type: StreamEventType, data: any) => void): EventSubscription {
+  const types: StreamEventType[] = ['clip_approved', 'clip_rejected', 'earning_payout', 'withdrawal_initiated', 'view_count_updated', 'budget_exhausted', 'deposit_credited', 'withdrawal_completed', 'withdrawal_reverted', 'view_anomaly_flagged'];
+  let source: EventSource | null = null;
+  let retry: ReturnType<typeof setTimeout> | undefined;
+  let closed = false;
+
+  const reconnect = () => {
+    if (!closed) retry = setTimeout(connect, 5000);
+  };
+  const connect = async () => {
+    try {
+      const res = await apiFetch(`${API_BASE}/api/stream/token`, { method: 'POST' });
+      const data = await res.json();
+      if (!res.ok) throw new Error(data.msg || 'Failed to open event stream');
+      if (closed) return;
+      source = new EventSource(`${API_BASE}/api/stream?jwt=${encodeURIComponent(data.token)}`);
+      types.forEach(type => {
+        source!.addEventListener(type, (e) => onEvent(type, JSON.parse((e as MessageEvent).data)));
+      });
+      // The token expires within a minute, so EventSource's own reconnect would be refused: start over with a new one
+      source.onerror = () => {
+        source?.close();
+        reconnect();
+      };
+    } catch (error) {
+      console.error('Event stream unavailable, retrying', error);
+      reconnect();
+    }
+  };
+
+  connect();
+  return {
+    close: () => {
+      closed = true;
+      clearTimeout(retry);
+      source?.close();
+    }
+  };
+}
+
 // --- PHASE 6: COMPREHENSIVE REFUND FLOW ---
 
 export interface RefundRequest {
@@ -1,13 +1,42 @@
 import React, { useEffect, useState } from "react";
-import { fetchAdminCampaigns, adminUpdateClip, deleteClipAdmin, Campaign, SubmittedClipData, AcceptedClipData } from "@/lib/api";
+import { fetchAdminCampaigns, adminUpdateClip, deleteClipAdmin, Campaign, SubmittedClipData, AcceptedClipData, fetchViewAnomalies, resolveViewAnomaly, subscribeToEvents, ViewAnomaly } from "@/lib/api";
 import { Badge } from "@/components/ui/badge";
 import { Separator } from "@/components/ui/separator";
-import { ChevronDown, Trash2, XCircle, CheckCircle, Clock, ExternalLink, Eye, Calendar, Hash, MessageCircle } from "lucide-react";
+import { ChevronDown, Trash2, XCircle, CheckCircle, Clock, ExternalLink, Eye, Calendar, Hash, MessageCircle, AlertTriangle } from "lucide-react";
 
 const AdminPage = () => {
   const [campaigns, setCampaigns] = useState<Campaign[]>([]);
   const [expandedId, setExpandedId] = useState<number | null>(null);
   const [error, setError] = useState("");
+  // Open flags, newest first, and the cursor of the next page (null once the oldest is loaded)
+  const [anomalyQueue, setAnomalyQueue] = useState<{ items: ViewAnomaly[]; cursor: number | null }>({ items: [], cursor: null });
+  const [loadingMoreAnomalies, setLoadingMoreAnomalies] = useState(false);
+  const anomalies = anomalyQueue.items;
+
+  // (Re)load the newest page, keeping the older pages the admin already loaded
+  const loadAnomalies = () => {
+    fetchViewAnomalies({ status: 'open' })
+      .then(res => {
+        const oldestOnPage = res.next_cursor;
+        setAnomalyQueue(prev => {
+          const older = oldestOnPage === null ? [] : prev.items.filter(a => a.id < oldestOnPage);
+          return { items: [...res.anomalies, ...older], cursor: older.length > 0 ? prev.cursor : oldestOnPage };
+        });
+      })
+      .catch((err: unknown) => console.error('Error fetching view anomalies:', err));
+  };
+
+  const loadMoreAnomalies = () => {
+    if (anomalyQueue.cursor === null || loadingMoreAnomalies) return;
+    setLoadingMoreAnomalies(true);
+    fetchViewAnomalies({ status: 'open', cursor: anomalyQueue.cursor })
+      .then(res => setAnomalyQueue(prev => {
+        const seen = new Set(prev.items.map(a => a.id));
+        return { items: [...prev.items, ...res.anomalies.filter(a => !seen.has(a.id))], cursor: res.next_cursor };
+      }))
+      .catch((err: unknown) => console.error('Error fetching more view anomalies:', err))
+      .finally(() => setLoadingMoreAnomalies(false));
+  };
 
   useEffect(() => {
     fetchAdminCampaigns()
@@ -19,8 +48,33 @@ const AdminPage = () => {
           setError("An unknown error occurred");
         }
       });
+    loadAnomalies();
+
+    // New flags are pushed over the event stream
+    const source = subscribeToEvents(type => {
+      if (type === 'view_anomaly_flagged') loadAnomalies();
+    });
+    return () => source.close();
   }, []);
 
+  const handleAnomaly = async (anomaly: ViewAnomaly, action: "approve" | "reject") => {
+    const question = action === "approve"
+      ? `Count ${anomaly.held_views.toLocaleString()} views for this clip?`
+      : `Discard the ${(anomaly.held_views - anomaly.counted_views).toLocaleString()} held views for good?`;
+    if (!window.confirm(question)) return;
+    try {
+      await resolveViewAnomaly(anomaly.id, action);
+      setAnomalyQueue(prev => ({ ...prev, items: prev.items.filter(a => a.id !== anomaly.id) }));
+      if (action === "approve") setCampaigns(await fetchAdminCampaigns());
+    } catch (err: unknown) {
+      if (err instanceof Error) {
+        alert(err.message);
+      } else {
+        alert("An unknown error occurred");
+      }
+    }
+  };
+
   const toggle = (id: number) => {
     setExpandedId(prev => (prev === id ? null : id));
   };
@@ -89,6 +143,82 @@ const AdminPage = () => {
           </div>
         )}
 
+        {/* Flagged view syncs: held out of earnings until reviewed */}
+        {(anomalies.length > 0 || anomalyQueue.cursor !== null) && (
+          <div className="mb-8 bg-white rounded-xl shadow-sm border border-amber-200 overflow-hidden">
+            <div className="flex items-center space-x-2 px-6 py-4 bg-amber-50 border-b border-amber-200">
+              <AlertTriangle className="w-5 h-5 text-amber-600" />
+              <h2 className="text-xl font-semibold text-gray-900">Flagged View Counts</h2>
+              <Badge variant="secondary" className="bg-amber-100 text-amber-800">{anomalies.length}{anomalyQueue.cursor !== null ? '+' : ''}</Badge>
+            </div>
+            <div className="divide-y divide-gray-100">
+              {anomalies.map(anomaly => (
+                <div key={anomaly.id} className="px-6 py-4 flex flex-col lg:flex-row lg:items-center lg:justify-between gap-3">
+                  <div className="space-y-1 text-sm">
+                    <div className="font-medium text-gray-900">
+                      {anomaly.campaign_name || `Campaign ${anomaly.campaign_id}`} · {anomaly.creator_name || `Creator ${anomaly.creator_id}`}
+                    </div>
+                    {anomaly.clip_url && (
+                      <a
+                        href={anomaly.clip_url}
+                        target="_blank"
+                        rel="noopener noreferrer"
+                        className="inline-flex items-center space-x-1 text-blue-600 hover:text-blue-800 text-xs"
+                      >
+                        <ExternalLink className="w-3 h-3" />
+                        <span className="break-all">{formatUrl(anomaly.clip_url)}</span>
+                      </a>
+                    )}
+                    <div className="flex flex-wrap items-center gap-x-4 gap-y-1 text-xs text-gray-600">
+                      <span className="flex items-center space-x-1">
+                        <Eye className="w-3 h-3" />
+                        <span>{anomaly.counted_views.toLocaleString()} → {anomaly.held_views.toLocaleString()} views</span>
+                      </span>
+                      <span>Held earnings: ₹{anomaly.held_earnings.toFixed(2)}</span>
+                      <span>
+                        {anomaly.score !== null
+                          ? `${anomaly.score.toFixed(1)}σ above ${anomaly.baseline} baseline`
+                          : 'No baseline yet'}
+                      </span>
+                      <span className="flex items-center space-x-1">
+                        <Calendar className="w-3 h-3" />
+                        <span>Flagged: {formatDate(anomaly.created_at)}</span>
+                      </span>
+                    </div>
+                  </div>
+                  <div className="flex space-x-2">
+                    <button
+                      className="inline-flex items-center px-3 py-1.5 rounded-md text-sm bg-green-600 text-white hover:bg-green-700 transition-colors"
+                      onClick={() => handleAnomaly(anomaly, "approve")}
+                    >
+                      <CheckCircle className="w-4 h-4 mr-1" />
+                      Approve
+                    </button>
+                    <button
+                      className="inline-flex items-center px-3 py-1.5 rounded-md text-sm bg-red-600 text-white hover:bg-red-700 transition-colors"
+                      onClick={() => handleAnomaly(anomaly, "reject")}
+                    >
+                      <XCircle className="w-4 h-4 mr-1" />
+                      Reject
+                    </button>
+                  </div>
+                </div>
+              ))}
+            </div>
+            {anomalyQueue.cursor !== null && (
+              <div className="px-6 py-3 border-t border-amber-100 text-center">
+                <button
+                  className="text-sm text-amber-700 hover:text-amber-900 disabled:opacity-50"
+                  onClick={loadMoreAnomalies}
+                  disabled={loadingMoreAnomalies}
+                >
+                  {loadingMoreAnomalies ? 'Loading…' : 'Load more'}
+                </button>
+              </div>
+            )}
+          </div>
+        )}
+
         {/* Campaigns */}
         <div className="space-y-6">
           {campaigns.map(camp => (
@@ -1,7 +1,7 @@
 import { useEffect, useState } from "react";
 import BrandLayout from "@/layouts/BrandLayout";
 import { Link, useSearchParams, useNavigate } from "react-router-dom";
-import { fetchBrandCampaigns, deleteCampaign, Campaign, verifyDeposit, getWalletBalance } from "@/lib/api";
+import { deleteCampaign, Campaign, verifyDeposit, getWalletBalance, getBootstrap, BrandBootstrapSections } from "@/lib/api";
 import WalletOverview from "@/components/brand/WalletOverview";
 import { Button } from "@/components/ui/button";
 import { BarChart3 } from "lucide-react";
@@ -53,14 +53,12 @@ const BrandDashboard = () => {
       try {
         setLoading(true);
         
-        // Wait for all essential data to be fetched concurrently
-        const [campaignData, balanceData] = await Promise.all([
-          fetchBrandCampaigns(),
-          getWalletBalance()
-        ]);
-        
-        setCampaigns(campaignData);
-        setWalletBalance(balanceData.balance);
+        // Campaigns and wallet arrive together; a failed section is reported in `errors`
+        const { sections, errors } = await getBootstrap<BrandBootstrapSections>();
+        if (!sections.campaigns) throw new Error(errors.campaigns || 'Failed to fetch campaigns');
+        setCampaigns(sections.campaigns);
+        if (sections.wallet) setWalletBalance(sections.wallet.balance);
+        else console.error('Error fetching wallet balance:', errors.wallet);
 
         // After data is loaded, check for any pending transaction to verify
         const orderId = searchParams.get("order_id");
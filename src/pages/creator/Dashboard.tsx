@@ -3,7 +3,7 @@ import CreatorLayout from "@/layouts/CreatorLayout";
 import CampaignCard from "@/components/creator/CampaignCard";
 import QuickStats from "@/components/creator/QuickStats";
 import { Button } from "@/components/ui/button";
-import { fetchCreatorCampaigns, Campaign, getCreatorNotifications, Notification as ApiNotification, getWalletBalance, getUserId } from "@/lib/api";
+import { Campaign, Notification as ApiNotification, getBootstrap, CreatorBootstrapSections } from "@/lib/api";
 import { useNavigate } from "react-router-dom";
 import Notifications, { DisplayNotification } from "@/components/creator/Notifications";
 import { useToast } from '@/hooks/use-toast';
@@ -18,7 +18,6 @@ const CreatorDashboard = () => {
   const [walletBalance, setWalletBalance] = useState<number>(0);
   const [activeSubmissions, setActiveSubmissions] = useState<number>(0);
   const navigate = useNavigate();
-  const creatorId = getUserId();
   const { toast } = useToast();
 
   const [processedNotifications, setProcessedNotifications] = useState<DisplayNotification[]>([]);
@@ -60,37 +59,34 @@ const CreatorDashboard = () => {
 
   useEffect(() => {
     setLoading(true);
-    const dataFetches = Promise.all([fetchCreatorCampaigns(), getWalletBalance()])
-      .then(([yours, walletRes]) => {
-        setYourCampaigns(yours);
-        setWalletBalance(walletRes.balance);
+    getBootstrap<CreatorBootstrapSections>()
+      .then(({ sections, errors }) => {
+        if (sections.campaigns) {
+          const yours = sections.campaigns;
+          setYourCampaigns(yours);
+          const totalActiveSubmissions = yours.reduce((acc, campaign) => {
+              return acc + (campaign.submitted_clips?.length || 0) + (campaign.accepted_clips?.length || 0);
+          }, 0);
+          setActiveSubmissions(totalActiveSubmissions);
+        } else {
+          setError(errors.campaigns || 'Failed to fetch your campaigns');
+        }
+
+        if (sections.wallet) setWalletBalance(sections.wallet.balance);
+        else console.error('Error fetching wallet balance:', errors.wallet);
 
-        const totalActiveSubmissions = yours.reduce((acc, campaign) => {
-            return acc + (campaign.submitted_clips?.length || 0) + (campaign.accepted_clips?.length || 0);
-        }, 0);
-        setActiveSubmissions(totalActiveSubmissions);
+        if (sections.notifications) setProcessedNotifications(processNotifications(sections.notifications));
+        else setNotificationsError(errors.notifications || 'Failed to load recent activities.');
       })
       .catch((err: unknown) => {
         console.error('Error fetching dashboard data:', err);
         setError(err instanceof Error ? err.message : "An unknown error occurred");
-      });
-
-    const notificationFetches = async () => {
-      if (!creatorId) { setNotificationsLoading(false); return; }
-      try {
-        const response = await getCreatorNotifications(creatorId);
-        setProcessedNotifications(processNotifications(response.notifications || []));
-      } catch (err: any) {
-        console.error("Error fetching notifications:", err);
-        setNotificationsError(err.message || 'Failed to load recent activities.');
-      } finally {
+      })
+      .finally(() => {
         setNotificationsLoading(false);
-      }
-    };
-
-    Promise.all([dataFetches, notificationFetches()]).finally(() => setLoading(false));
-    
-  }, [creatorId, toast]);
+        setLoading(false);
+      });
+  }, []);
 
   const handleCardClick = (id: number) => navigate(`/creator/dashboard/${id}`);
 
@@ -0,0 +1,126 @@
+"""Streaming anomaly detection on view syncs, so bought or overwritten views are not paid out.
+
+Every view sync goes through `observe()` before it is written. `observe_clip_views()` (see
+migrations/0010_view_anomalies.sql) turns the jump since the clip's last sync into a growth rate,
+ln(1 + views per hour), and scores it against three exponentially weighted baselines: the clip's
+own, its creator's and its campaign's. Each keeps a mean, a variance and a sample count, so a sync
+costs a few row updates however long the history is.
+
+A jump is held when it is an outlier against every baseline that is warm (the most lenient one
+decides, so a creator whose clips always take off is not flagged for it). A held sync is recorded
+in `view_anomaly` and not written to accepted_clips.view_count, which keeps it out of the rollups,
+the campaign total and the budget guard. Later syncs of a held clip only update the flag. An admin
+then approves the flag (the held count is applied like a normal sync) or rejects it (every view
+synced while it was held is excluded from that clip for good).
+
+Tunables (environment):
+  VIEW_ANOMALY_ALPHA         EWMA weight of the newest sample (default 0.2)
+  VIEW_ANOMALY_THRESHOLD     z-score above which a jump is an outlier (default 4)
+  VIEW_ANOMALY_MIN_SAMPLES   samples before a baseline is trusted (default 5)
+  VIEW_ANOMALY_MIN_JUMP      smaller jumps are never held (default 1000 views)
+  VIEW_ANOMALY_COLD_MAX_JUMP with no warm baseline, larger jumps are held (default 100000 views)
+"""
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+ALPHA = float(os.getenv('VIEW_ANOMALY_ALPHA', '0.2'))
+THRESHOLD = float(os.getenv('VIEW_ANOMALY_THRESHOLD', '4'))
+MIN_SAMPLES = int(os.getenv('VIEW_ANOMALY_MIN_SAMPLES', '5'))
+MIN_JUMP = int(os.getenv('VIEW_ANOMALY_MIN_JUMP', '1000'))
+COLD_MAX_JUMP = int(os.getenv('VIEW_ANOMALY_COLD_MAX_JUMP', '100000'))
+# Floor on a baseline's standard deviation (in log-rate units, ~1.6x) so a perfectly steady
+# clip does not flag every small wobble, and on the hours between syncs so back-to-back syncs
+# do not turn a modest gain into a huge rate
+MIN_STD = 0.5
+MIN_HOURS = 0.25
+
+MAX_PAGE_SIZE = 100
+
+
+class NotOpen(Exception):
+    pass
+
+
+def observe(clip, views, captured_at):
+    """Score a sync of `clip` (an accepted_clips row) to `views`.
+
+    Returns {'views', 'held', 'anomaly_id', 'rate', 'score'}. When `held` is false, store `views`
+    (the synced count minus any views rejected earlier); when true, store nothing.
+    """
+    from extensions import supabase
+    rows = supabase.rpc('observe_clip_views', {
+        'p_clip_id': clip['id'],
+        'p_campaign_id': clip['campaign_id'],
+        'p_creator_id': clip['creator_id'],
+        'p_previous_views': clip.get('view_count') or 0,
+        'p_previous_at': clip.get('submitted_at') or captured_at,
+        'p_views': views,
+        'p_at': captured_at,
+        'p_alpha': ALPHA,
+        'p_threshold': THRESHOLD,
+        'p_min_samples': MIN_SAMPLES,
+        'p_min_jump': MIN_JUMP,
+        'p_cold_max_jump': COLD_MAX_JUMP,
+        'p_min_std': MIN_STD,
+        'p_min_hours': MIN_HOURS
+    }).execute().data
+    result = rows[0]
+    if result['held']:
+        log.warning("Held view sync of clip %s: %s views, rate %.2f, score %s",
+                    clip['id'], result['views'], result['rate'], result['score'])
+    return result
+
+
+def resolve(anomaly_id, approve, admin_id):
+    """Close an open flag and return its row; raises NotOpen if it is not open."""
+    from extensions import supabase
+    try:
+        rows = supabase.rpc('resolve_view_anomaly', {
+            'p_anomaly_id': anomaly_id, 'p_approve': approve, 'p_admin_id': admin_id
+        }).execute().data
+    except Exception as e:
+        if 'anomaly_not_open' in str(e):
+            raise NotOpen() from e
+        raise
+    return rows[0]
+
+
+def queue(status='open', limit=50, cursor=None):
+    """Flags newest first, with clip, campaign and creator details for the admin console."""
+    from extensions import supabase
+    query = supabase.table('view_anomaly').select(
+        'id, clip_id, campaign_id, creator_id, counted_views, held_views, rate, score, baseline, status, '
+        'created_at, updated_at, reviewed_at, clip:accepted_clips(clip_url), campaign:campaign(name, cpv), '
+        'creator:creator(username)').eq('status', status)
+    if cursor is not None:
+        query = query.lt('id', cursor)
+    rows = query.order('id', desc=True).limit(limit + 1).execute().data or []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    flags = []
+    for row in rows:
+        campaign = row.get('campaign') or {}
+        held = max(0, row['held_views'] - row['counted_views'])
+        flags.append({
+            'id': row['id'],
+            'clip_id': row['clip_id'],
+            'clip_url': (row.get('clip') or {}).get('clip_url'),
+            'campaign_id': row['campaign_id'],
+            'campaign_name': campaign.get('name'),
+            'creator_id': row['creator_id'],
+            'creator_name': (row.get('creator') or {}).get('username'),
+            'counted_views': row['counted_views'],
+            'held_views': row['held_views'],
+            'held_earnings': round(held * float(campaign.get('cpv') or 0), 2),
+            'rate': row['rate'],
+            'score': row['score'],
+            'baseline': row['baseline'],
+            'status': row['status'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'reviewed_at': row['reviewed_at']
+        })
+    return flags, (flags[-1]['id'] if has_more else None)
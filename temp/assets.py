@@ -0,0 +1,290 @@
+"""Content-addressed storage for uploaded campaign images.
+
+An upload is streamed to a temporary file in fixed-size chunks while its sha256 is computed,
+so the body is never held in memory. The bytes must decode as one of the CONTENT_TYPES formats
+(the client's Content-Type is not trusted); the detected type is recorded in the manifest and is
+the one the original is served with. The file is then moved to `<ASSET_DIR>/<hash>/original`.
+The first upload of some bytes claims the hash by creating `<hash>/.lock` (O_EXCL), writes a
+`rendering` manifest, and renders downscaled WebP variants in a process pool so resizing never
+holds the GIL of a request thread. A concurrent upload of the same bytes discards its copy and
+waits for that manifest to be finished instead of rendering again. If rendering outlives
+RESIZE_TIMEOUT the manifest records the variants written so far as `partial` and is completed
+when the render finishes. Because a URL names the content hash, a served file can never change
+and is cached for a year as immutable.
+
+Storage is the local disk of one host: ASSET_DIR must be a volume every web process of a single
+instance shares. It is not shared between instances and does not persist on serverless hosts
+(e.g. Vercel), so run uploads on one long-lived host until assets move to object storage.
+
+Pillow is optional: without it uploads are checked by their file signature only, and only the
+original is stored and served.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+log = logging.getLogger(__name__)
+
+ASSET_DIR = os.getenv('ASSET_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads'))
+MAX_UPLOAD_BYTES = int(os.getenv('ASSET_MAX_BYTES', str(10 * 1024 * 1024)))
+VARIANT_WIDTHS = tuple(int(w) for w in os.getenv('ASSET_VARIANT_WIDTHS', '320,640,1280').split(','))
+RESIZE_TIMEOUT = float(os.getenv('ASSET_RESIZE_TIMEOUT', '30'))
+CHUNK_SIZE = 64 * 1024
+# A claim older than this belongs to an upload that died mid-way and may be taken over
+STALE_CLAIM_SECONDS = RESIZE_TIMEOUT + 60
+
+CONTENT_TYPES = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp', 'image/gif': 'gif'}
+# Pillow format name -> content type
+IMAGE_FORMATS = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'WEBP': 'image/webp', 'GIF': 'image/gif'}
+CACHE_FOREVER = 'public, max-age=31536000, immutable'
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UnsupportedImage(Exception):
+    pass
+
+
+def _asset_dir(digest):
+    return os.path.join(ASSET_DIR, digest)
+
+
+def variant_name(width):
+    return f"w{width}.webp"
+
+
+def variant_path(digest, variant):
+    """Path of a stored variant ('original' or 'w<width>.webp'), or None if it doesn't exist."""
+    if variant != 'original' and variant not in {variant_name(w) for w in VARIANT_WIDTHS}:
+        return None
+    path = os.path.join(_asset_dir(digest), variant)
+    return path if os.path.isfile(path) else None
+
+
+def read_manifest(digest):
+    try:
+        with open(os.path.join(_asset_dir(digest), 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(manifest):
+    # Written to a temporary file and renamed, so readers never see half a manifest
+    directory = _asset_dir(manifest['hash'])
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(directory, 'manifest.json'))
+
+
+def _claim(digest):
+    """Try to become the upload that stores and renders `digest`. Returns True if we did."""
+    lock = os.path.join(_asset_dir(digest), '.lock')
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        # A claim that never got as far as a manifest died right after claiming
+        stale_after = STALE_CLAIM_SECONDS if read_manifest(digest) is not None else 10
+        try:
+            stale = time.time() - os.path.getmtime(lock) > stale_after
+        except OSError:
+            return _claim(digest)  # Released between the two calls
+        if not stale:
+            return False
+        log.warning("Taking over the abandoned upload of %s", digest)
+        try:
+            os.remove(lock)
+        except FileNotFoundError:
+            pass
+        return _claim(digest)
+
+
+def _wait_for_manifest(digest, timeout):
+    """Wait for the claiming upload to finish; returns the newest manifest seen (None if none)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        manifest = read_manifest(digest)
+        if (manifest is not None and manifest.get('status') != 'rendering') or time.monotonic() >= deadline:
+            return manifest
+        time.sleep(0.05)
+
+
+def detect_content_type(path):
+    """The content type of the image at `path`, or None unless it is a valid image of an allowed format."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return _sniff_content_type(path)
+    try:
+        with Image.open(path) as image:
+            content_type = IMAGE_FORMATS.get(image.format)
+            if content_type is None:
+                return None
+            # Checks the file's structure without decoding every pixel
+            image.verify()
+        return content_type
+    except Exception:
+        return None
+
+
+def _sniff_content_type(path):
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def store_stream(stream):
+    """Stream an upload to disk. Returns (manifest, deduplicated).
+
+    Raises UploadTooLarge, or UnsupportedImage if the bytes are not an image of an allowed format.
+    """
+    os.makedirs(os.path.join(ASSET_DIR, 'tmp'), exist_ok=True)
+    digest, size = hashlib.sha256(), 0
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.join(ASSET_DIR, 'tmp'))
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge(f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+                digest.update(chunk)
+                out.write(chunk)
+        content_type = detect_content_type(tmp_path)
+        if content_type is None:
+            raise UnsupportedImage(f"Upload is not a valid {', '.join(sorted(IMAGE_FORMATS))} image")
+        hexdigest = digest.hexdigest()
+        target = _asset_dir(hexdigest)
+        os.makedirs(target, exist_ok=True)
+        while True:
+            manifest = read_manifest(hexdigest)
+            if manifest is not None and manifest.get('status') != 'rendering':
+                return manifest, True
+            if _claim(hexdigest):
+                break
+            # Another upload of the same bytes is storing or rendering them
+            manifest = _wait_for_manifest(hexdigest, RESIZE_TIMEOUT + 5)
+            if manifest is not None:
+                return manifest, True
+        os.replace(tmp_path, os.path.join(target, 'original'))
+        tmp_path = None
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    manifest = {'hash': hexdigest, 'content_type': content_type, 'bytes': size, 'variants': [], 'status': 'rendering'}
+    try:
+        _write_manifest(manifest)
+        _render(manifest)
+    finally:
+        os.remove(os.path.join(target, '.lock'))
+    return manifest, False
+
+
+def _render(manifest):
+    """Render the variants in the process pool and wait for them (bounded by RESIZE_TIMEOUT).
+
+    Updates and writes `manifest`. On timeout it records the variants already on disk as
+    `partial` and writes the complete manifest once the render finishes in the background.
+    """
+    digest = manifest['hash']
+    future = _pool().submit(render_variants, os.path.join(_asset_dir(digest), 'original'), _asset_dir(digest), VARIANT_WIDTHS)
+    try:
+        manifest.update(variants=future.result(timeout=RESIZE_TIMEOUT), status='complete')
+    except TimeoutError:
+        log.warning("Variants for %s are still rendering after %ss", digest, RESIZE_TIMEOUT)
+        manifest.update(variants=_rendered(digest), status='partial')
+        _write_manifest(manifest)
+        # Registered after the partial manifest is written, so the complete one always lands last
+        future.add_done_callback(lambda f: _finish_late(dict(manifest), f))
+        return
+    except Exception as e:
+        log.warning("Could not render variants for %s: %s", digest, e)
+        manifest.update(variants=_rendered(digest), status='partial')
+    _write_manifest(manifest)
+
+
+def _rendered(digest):
+    return [variant_name(w) for w in VARIANT_WIDTHS if variant_path(digest, variant_name(w))]
+
+
+def _finish_late(manifest, future):
+    try:
+        variants, status = future.result(), 'complete'
+    except Exception as e:
+        log.warning("Could not render variants for %s: %s", manifest['hash'], e)
+        variants, status = _rendered(manifest['hash']), 'partial'
+    manifest.update(variants=variants, status=status)
+    _write_manifest(manifest)
+
+
+def render_variants(source, dest_dir, widths):
+    """Runs in a worker process. Returns the variant file names that were written."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return []
+    written = []
+    with Image.open(source) as image:
+        image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        for width in sorted(widths):
+            if width >= image.width and written:
+                break  # Never upscale; the original (or the last variant) already covers this width
+            resized = image.copy()
+            resized.thumbnail((width, width * image.height // image.width or 1))
+            name = variant_name(width)
+            tmp = os.path.join(dest_dir, name + '.tmp')
+            resized.save(tmp, 'WEBP', quality=82, method=4)
+            os.replace(tmp, os.path.join(dest_dir, name))
+            written.append(name)
+    return written
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=int(os.getenv('ASSET_RESIZE_WORKERS', '2')))
+    return _executor
+
+
+def public_urls(manifest, base_url):
+    """Absolute URLs for the original and every rendered variant."""
+    base = f"{base_url.rstrip('/')}/assets/{manifest['hash']}"
+    urls = {'original': f"{base}/original"}
+    for name in manifest.get('variants') or []:
+        urls[name.split('.')[0]] = f"{base}/{name}"
+    return urls
+
+
+def display_url(urls):
+    """The largest rendered variant, falling back to the original."""
+    widths = sorted((int(key[1:]), url) for key, url in urls.items() if key.startswith('w'))
+    return widths[-1][1] if widths else urls['original']
+
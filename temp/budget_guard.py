@@ -0,0 +1,58 @@
+"""Event-driven budget guard: pause a campaign as soon as its accrued spend reaches its budget.
+
+Accrued spend is `total_view_count * cpv`. Every code path that changes one of those three
+numbers (clip and campaign view syncs, clip deletion, budget edits) already holds the new
+values, so it calls `enforce()` with them instead of anything re-reading or scanning campaigns.
+The pause is a conditional update on `is_active = true`, so when several workers see the
+crossing at once only one of them pauses the campaign and notifies the brand.
+"""
+import logging
+
+import events
+import search
+
+log = logging.getLogger(__name__)
+
+
+def accrued_spend(total_view_count, cpv):
+    return (total_view_count or 0) * float(cpv or 0)
+
+
+def is_exhausted(campaign):
+    """True when a campaign with a positive budget has accrued at least that much spend."""
+    budget = float(campaign.get('budget') or 0)
+    return budget > 0 and accrued_spend(campaign.get('total_view_count'), campaign.get('cpv')) >= budget
+
+
+def enforce(campaign, **changes):
+    """Apply `changes` (new total_view_count / cpv / budget) to a campaign row and pause it if exhausted.
+
+    `campaign` needs id, budget, cpv and total_view_count; is_active, brand_id and name are used
+    when present. Returns True if this call paused the campaign.
+    """
+    from extensions import supabase
+    campaign = dict(campaign, **changes)
+    if campaign.get('is_active') is False or not is_exhausted(campaign):
+        return False
+
+    response = supabase.table('campaign').update({'is_active': False}).eq('id', campaign['id']).eq('is_active', True).execute()
+    if not response.data:
+        return False  # Already inactive, or another worker paused it first
+
+    search.index.patch(campaign['id'], {'is_active': False})
+    budget = float(campaign.get('budget') or 0)
+    notification = {
+        'campaign_id': campaign['id'],
+        'campaign_name': campaign.get('name'),
+        'budget': budget,
+        'accrued_spend': round(accrued_spend(campaign.get('total_view_count'), campaign.get('cpv')), 2),
+        'total_view_count': campaign.get('total_view_count') or 0,
+        'message': f"{campaign.get('name') or 'Your campaign'} has used its budget and was paused. Increase the budget to resume it."
+    }
+    brand_id = campaign.get('brand_id') or (response.data[0] or {}).get('brand_id')
+    if brand_id:
+        events.hub.publish(events.brand_channel(brand_id), events.BUDGET_EXHAUSTED, notification)
+    events.hub.publish(events.ADMIN_CHANNEL, events.BUDGET_EXHAUSTED, dict(notification, brand_id=brand_id))
+    log.info("Paused campaign %s: spend %s >= budget %s", campaign['id'], notification['accrued_spend'], budget,
+             extra={'campaign_id': campaign['id']})
+    return True
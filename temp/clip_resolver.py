@@ -0,0 +1,220 @@
+"""Background resolution of submitted clip URLs into Instagram media metadata.
+
+`submit_clip` calls `resolver.enqueue()`, which extracts the shortcode, records it as a
+`clip_media` row without `resolved_at` (migrations/0015_clip_media_queue.sql) and nudges a
+`clips.resolve_media` job. The job worker (see tasks.py) picks up every pending shortcode and
+resolves them through the Graph API batch endpoint, up to 50 per call and CLIP_RESOLVER_CONCURRENCY
+calls at a time. Results are persisted to `clip_media` (keyed by shortcode), so when an admin
+accepts the clip `media_id`, `caption` and `instagram_posted_at` are usually already known; a
+clip accepted before that is filled in by `apply_clip_media()` once its shortcode resolves.
+If a batch call fails the job raises, and the jobs module retries it with backoff.
+
+Clips are posted from the creators' own accounts, which the app has no token for, so each
+post is looked up through the oEmbed endpoint (`instagram_oembed`, app token in
+INSTAGRAM_ACCESS_TOKEN) rather than `/{media-id}`, which only serves the connected
+account's own media. The shortcode is not decoded into an id: that gives the legacy media
+pk, not a Graph media id. oEmbed has no timestamp field, so the post time is read from the
+`<time datetime>` in the embed HTML and left empty when the embed does not carry one.
+
+Point INSTAGRAM_API_BASE at `python mock_instagram.py` to run against a local mock.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+
+import jobs
+
+log = logging.getLogger(__name__)
+
+SHORTCODE_RE = re.compile(r'instagram\.com/(?:[\w.]+/)?(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)')
+TIME_RE = re.compile(r'<time[^>]*\sdatetime="([^"]+)"')
+
+# The Graph API accepts at most 50 requests per batch call
+GRAPH_BATCH_LIMIT = 50
+JOB_KIND = 'clips.resolve_media'
+
+
+def extract_shortcode(clip_url):
+    match = SHORTCODE_RE.search(clip_url or '')
+    return match.group(1) if match else None
+
+
+def post_url(shortcode):
+    """Canonical post URL for a shortcode; oEmbed accepts it for posts, reels and IGTV alike."""
+    return f"https://www.instagram.com/p/{shortcode}/"
+
+
+class GraphClient:
+    """Minimal Instagram oEmbed client using the Graph API batch endpoint."""
+
+    def __init__(self, base_url, access_token, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.access_token = access_token
+        self.timeout = timeout
+
+    def fetch_media(self, shortcodes):
+        """Return {shortcode: {'media_id', 'caption', 'timestamp'} or {'error': ...}} for up to 50 shortcodes."""
+        import requests
+        batch = [{'method': 'GET', 'relative_url': f"instagram_oembed?url={quote(post_url(shortcode), safe='')}"}
+                 for shortcode in shortcodes]
+        response = requests.post(self.base_url + '/', data={
+            'access_token': self.access_token,
+            'batch': json.dumps(batch)
+        }, timeout=self.timeout)
+        response.raise_for_status()
+
+        results = {}
+        for shortcode, item in zip(shortcodes, response.json()):
+            if item and item.get('code') == 200:
+                body = json.loads(item.get('body') or '{}')
+                posted = TIME_RE.search(body.get('html') or '')
+                results[shortcode] = {
+                    'media_id': body.get('media_id'),
+                    'caption': body.get('title'),
+                    'timestamp': posted.group(1) if posted else None
+                }
+            else:
+                results[shortcode] = {'error': (item or {}).get('body') or 'no response'}
+        return results
+
+
+class ClipResolver:
+    def __init__(self, client, batch_size=GRAPH_BATCH_LIMIT, concurrency=4, cache_size=10000):
+        self.client = client
+        self.batch_size = min(batch_size, GRAPH_BATCH_LIMIT)
+        self.concurrency = concurrency
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # shortcode -> resolved fields
+        self._lock = threading.Lock()
+
+    # --- Web process -----------------------------------------------------------
+
+    def enqueue(self, clip_url):
+        """Queue a clip URL for resolution. Never raises: an unqueued clip is just accepted without metadata."""
+        shortcode = extract_shortcode(clip_url)
+        if not shortcode:
+            return None
+        with self._lock:
+            if shortcode in self._cache:
+                return shortcode
+        from extensions import supabase
+        try:
+            # A shortcode that is already pending or resolved is left as it is
+            supabase.table('clip_media').upsert({'shortcode': shortcode, 'resolved_at': None},
+                                                on_conflict='shortcode', ignore_duplicates=True).execute()
+        except Exception as e:
+            log.warning("Could not queue clip %s for resolution: %s", shortcode, e)
+            return shortcode
+        jobs.nudge(JOB_KIND)
+        return shortcode
+
+    def lookup(self, clip_url, load=None):
+        """Return resolved fields for a clip URL from the cache, falling back to `load(shortcode)`."""
+        shortcode = extract_shortcode(clip_url)
+        if not shortcode:
+            return None
+        with self._lock:
+            cached = self._cache.get(shortcode)
+        if cached is None and load is not None:
+            cached = load(shortcode)
+            if cached:
+                self._remember(shortcode, cached)
+        if cached is None:
+            # Not resolved yet; the clip is accepted without metadata and filled in later
+            return {'shortcode': shortcode, 'media_id': None, 'caption': None, 'instagram_posted_at': None}
+        return cached
+
+    def _remember(self, shortcode, resolved):
+        with self._lock:
+            self._cache[shortcode] = resolved
+            self._cache.move_to_end(shortcode)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # --- Job worker ----------------------------------------------------------------
+
+    def resolve_pending(self):
+        """Resolve every pending shortcode. Returns how many were resolved.
+
+        Raises when a batch call failed, so the job is retried; its shortcodes stay pending.
+        """
+        from extensions import supabase
+        resolved = 0
+        limit = self.batch_size * self.concurrency
+        while True:
+            rows = supabase.table('clip_media').select('shortcode').is_('resolved_at', 'null').order(
+                'shortcode').limit(limit).execute().data or []
+            shortcodes = [row['shortcode'] for row in rows]
+            batches = [shortcodes[i:i + self.batch_size] for i in range(0, len(shortcodes), self.batch_size)]
+            errors = []
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='clip-resolver') as pool:
+                for future in [pool.submit(self._resolve, batch) for batch in batches]:
+                    try:
+                        resolved += future.result()
+                    except Exception as e:
+                        errors.append(e)
+            if errors:
+                raise RuntimeError(f"{len(errors)} of {len(batches)} clip batches failed: {errors[0]}") from errors[0]
+            if len(shortcodes) < limit:
+                return resolved
+
+    def _resolve(self, shortcodes):
+        results = self.client.fetch_media(list(shortcodes))
+        rows = []
+        for shortcode in shortcodes:
+            fields = results.get(shortcode) or {'error': 'unresolved'}
+            rows.append({
+                'shortcode': shortcode,
+                'media_id': fields.get('media_id'),
+                'caption': fields.get('caption'),
+                'instagram_posted_at': fields.get('timestamp'),
+                'error': fields.get('error'),
+                'resolved_at': datetime.utcnow().isoformat()
+            })
+        persist(rows)
+        found = [row['shortcode'] for row in rows if not row['error']]
+        if found:
+            backfilled = apply_to_accepted(found)
+            if backfilled:
+                log.info("Filled in media metadata for %s accepted clips", len(backfilled))
+        return len(found)
+
+
+def persist(rows):
+    from extensions import supabase
+    supabase.table('clip_media').upsert(rows, on_conflict='shortcode').execute()
+
+
+def apply_to_accepted(shortcodes):
+    """Fill in clips that were accepted before their shortcode resolved. Returns their ids."""
+    from extensions import supabase
+    return supabase.rpc('apply_clip_media', {'p_shortcodes': shortcodes}).execute().data or []
+
+
+def load_persisted(shortcode):
+    """Look up a shortcode resolved by the job worker. Never raises: a miss just means unresolved."""
+    from extensions import supabase
+    try:
+        response = supabase.table('clip_media').select('shortcode, media_id, caption, instagram_posted_at, resolved_at').eq(
+            'shortcode', shortcode).is_('error', 'null').limit(1).execute()
+    except Exception as e:
+        log.warning("Could not load resolved clip %s: %s", shortcode, e)
+        return None
+    row = response.data[0] if response.data else None
+    # A row without resolved_at is still pending
+    return {k: v for k, v in row.items() if k != 'resolved_at'} if row and row.get('resolved_at') else None
+
+
+resolver = ClipResolver(
+    GraphClient(
+        os.getenv('INSTAGRAM_API_BASE', 'https://graph.facebook.com/v19.0'),
+        os.getenv('INSTAGRAM_ACCESS_TOKEN', '')
+    ),
+    concurrency=int(os.getenv('CLIP_RESOLVER_CONCURRENCY', '4'))
+)
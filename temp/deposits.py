@@ -0,0 +1,187 @@
+"""Deposit pipeline: payment confirmations are queued, then credited to wallets in batches.
+
+Request handlers never wait on the gateway to confirm a payment. The Cashfree webhook and the
+browser's verify-deposit call both just upsert a row into `deposit_event` (one per order id,
+so duplicates collapse) and nudge a `deposits.process` job (see tasks.py). The processor claims due events with
+`claim_deposit_events()` (FOR UPDATE SKIP LOCKED plus a lease, so several processors can run),
+confirms each order, and credits every paid order of the batch with a single
+`credit_deposits()` call, which credits an order at most once.
+
+A signed PAYMENT_SUCCESS webhook is trusted as confirmation when its order id and amounts
+match the stored deposit_order; anything else is confirmed with GET /pg/orders/<id>. Orders
+that are still unpaid, and gateway errors, are retried with exponential backoff up to
+DEPOSIT_MAX_ATTEMPTS. A success webhook re-opens a failed event, and one that arrives while the
+event is being processed is not overwritten by that attempt's outcome (see
+enqueue_deposit_event()).
+
+    python deposits.py          # run the processor on its own, without the job worker
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import events
+import jobs
+import payment_gateway
+
+log = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = int(os.getenv('DEPOSIT_MAX_ATTEMPTS', '8'))
+BASE_BACKOFF_SECONDS = float(os.getenv('DEPOSIT_BACKOFF_SECONDS', '5'))
+MAX_BACKOFF_SECONDS = 600
+JOB_KIND = 'deposits.process'
+
+
+def backoff(attempts):
+    return min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def enqueue(order_id, source, payload=None):
+    from extensions import supabase
+    supabase.rpc('enqueue_deposit_event', {'p_order_id': order_id, 'p_source': source, 'p_payload': payload}).execute()
+    jobs.nudge(JOB_KIND)
+
+
+def _same_amount(value, expected):
+    try:
+        return round(float(value), 2) == round(float(expected), 2)
+    except (TypeError, ValueError):
+        return False
+
+
+def _webhook_confirmation(event, order):
+    """(paid, external id) from a signed webhook payload, or None if it doesn't settle `order`."""
+    payload = event.get('payload') or {}
+    data = payload.get('data') or {}
+    payment = data.get('payment') or {}
+    if event.get('source') != 'webhook' or payment.get('payment_status') != 'SUCCESS' or order is None:
+        return None
+    webhook_order = data.get('order') or {}
+    if (webhook_order.get('order_id') != order['order_id']
+            or not _same_amount(webhook_order.get('order_amount'), order['amount'])
+            or not _same_amount(payment.get('payment_amount'), order['amount'])):
+        log.warning("Webhook for deposit %s does not match the stored order; confirming with the gateway", order['order_id'])
+        return None
+    return True, str(payment.get('cf_payment_id') or '')
+
+
+class DepositProcessor:
+    def __init__(self, gateway, batch_size=50, lease_seconds=60, poll_interval=5.0, concurrency=8):
+        self.gateway = gateway
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def nudge(self):
+        self._wake.set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='deposit-processor', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                # Keep draining while batches come back full
+                while self.run_once() >= self.batch_size:
+                    pass
+            except Exception as e:
+                log.warning("Deposit batch failed: %s", e)
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _confirm(self, event, order):
+        """Returns ('paid', external_id) | ('pending', reason) | ('failed', reason)."""
+        confirmed = _webhook_confirmation(event, order)
+        if confirmed:
+            return 'paid', confirmed[1]
+        try:
+            order = self.gateway.get_order(event['order_id'])
+        except Exception as e:
+            return 'pending', str(e)
+        status = order.get('order_status')
+        if status == payment_gateway.ORDER_PAID:
+            return 'paid', str(order.get('cf_order_id') or '')
+        if status in payment_gateway.ORDER_TERMINAL_FAILURES:
+            return 'failed', f"order {status.lower()}"
+        return 'pending', f"order {str(status).lower()}"
+
+    def run_once(self):
+        """Claim and process one batch. Returns the number of events claimed."""
+        from extensions import supabase
+        claimed = supabase.rpc('claim_deposit_events', {'p_limit': self.batch_size, 'p_lease_seconds': self.lease_seconds}).execute().data or []
+        if not claimed:
+            return 0
+
+        orders = {row['order_id']: row for row in supabase.table('deposit_order').select('order_id, amount').in_(
+            'order_id', [event['order_id'] for event in claimed]).execute().data or []}
+        # Gateway lookups are I/O bound, so the batch is confirmed concurrently
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(claimed))) as pool:
+            outcomes = list(pool.map(lambda event: self._confirm(event, orders.get(event['order_id'])), claimed))
+
+        paid = [(event, detail) for event, (outcome, detail) in zip(claimed, outcomes) if outcome == 'paid']
+        if paid:
+            credited = supabase.rpc('credit_deposits', {
+                'p_order_ids': [event['order_id'] for event, _ in paid],
+                'p_external_ids': [external_id for _, external_id in paid]
+            }).execute().data or []
+            for row in credited:
+                events.hub.publish(events.brand_channel(row['brand_id']), events.DEPOSIT_CREDITED, {
+                    'order_id': row['order_id'],
+                    'amount': float(row['amount']),
+                    'new_balance': float(row['new_balance'])
+                })
+            supabase.table('deposit_event').update({
+                'status': 'done', 'locked_until': None, 'last_error': None, 'updated_at': datetime.utcnow().isoformat()
+            }).in_('id', [event['id'] for event, _ in paid]).execute()
+
+        now = datetime.utcnow().isoformat()
+        for event, (outcome, detail) in zip(claimed, outcomes):
+            if outcome == 'paid':
+                continue
+            if outcome == 'failed' or event['attempts'] >= MAX_ATTEMPTS:
+                update = {'status': 'failed', 'locked_until': None, 'last_error': detail, 'updated_at': now}
+            else:
+                next_attempt = datetime.utcnow() + timedelta(seconds=backoff(event['attempts']))
+                update = {'status': 'pending', 'locked_until': None, 'last_error': detail,
+                          'next_attempt_at': next_attempt.isoformat(), 'updated_at': now}
+            # Only if no confirmation arrived while we were working on it (it bumps updated_at)
+            settled = supabase.table('deposit_event').update(update).eq('id', event['id']).eq(
+                'updated_at', event['updated_at']).execute().data
+            if not settled:
+                supabase.table('deposit_event').update({
+                    'status': 'pending', 'locked_until': None, 'next_attempt_at': now, 'updated_at': now
+                }).eq('id', event['id']).eq('status', 'processing').execute()
+                continue
+            if update['status'] == 'failed':
+                supabase.table('deposit_order').update({'status': 'failed'}).eq('order_id', event['order_id']).neq('status', 'credited').execute()
+                log.warning("Deposit %s failed after %s attempts: %s", event['order_id'], event['attempts'], detail)
+        return len(claimed)
+
+
+processor = DepositProcessor(
+    payment_gateway.gateway,
+    batch_size=int(os.getenv('DEPOSIT_BATCH_SIZE', '50')),
+    poll_interval=float(os.getenv('DEPOSIT_POLL_SECONDS', '5'))
+)
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+    import logs
+    logs.configure()
+    # No SSE clients in this process: the web processes deliver what it publishes
+    events.forward_to_web(jobs.connect)
+    # Module-level clients were built before .env was loaded
+    processor.gateway = payment_gateway.gateway = payment_gateway.CashfreeClient.from_env()
+    processor.start()
+    threading.Event().wait()
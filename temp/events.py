@@ -0,0 +1,300 @@
+"""In-process pub/sub hub used to push live events to creators and brands over Server-Sent Events.
+
+A client is connected to one web process (one gunicorn worker) while the event it waits for can
+be published by any process, so publishes go through Postgres NOTIFY on RELAY_CHANNEL:
+
+  * Every web process runs a `RelayListener` (`start_relay()`) that delivers relayed events to
+    its own subscribers. While its LISTEN is up, the process's own publishes are relayed too,
+    so they reach clients on the other workers; while it is down they are delivered locally.
+  * Processes without clients (the job worker) call `forward_to_web()` and only relay.
+"""
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+# Event types pushed to the frontend. The first four match the `Notification['type']` union in src/lib/api.ts
+CLIP_APPROVED = 'clip_approved'
+CLIP_REJECTED = 'clip_rejected'
+EARNING_PAYOUT = 'earning_payout'
+WITHDRAWAL_INITIATED = 'withdrawal_initiated'
+VIEW_COUNT_UPDATED = 'view_count_updated'
+BUDGET_EXHAUSTED = 'budget_exhausted'
+DEPOSIT_CREDITED = 'deposit_credited'
+WITHDRAWAL_COMPLETED = 'withdrawal_completed'
+WITHDRAWAL_REVERTED = 'withdrawal_reverted'
+VIEW_ANOMALY_FLAGGED = 'view_anomaly_flagged'
+
+
+def creator_channel(creator_id):
+    return f"creator:{creator_id}"
+
+
+def brand_channel(brand_id):
+    return f"brand:{brand_id}"
+
+
+ADMIN_CHANNEL = 'admin'
+
+RELAY_CHANNEL = 'app_events'
+# NOTIFY payloads are limited to 8000 bytes; events are small, anything bigger is a bug
+MAX_RELAY_PAYLOAD = 7900
+
+
+class Subscription:
+    """A single subscriber (one open SSE connection) with its own bounded queue.
+
+    Each subscription owns its own lock so that a publish only contends with the
+    connections it is actually delivering to, and an idle connection costs one
+    sleeping thread/greenlet plus a small deque.
+    """
+
+    def __init__(self, hub, channels, max_queue):
+        self.hub = hub
+        self.channels = frozenset(channels)
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.closed = False
+        self._queue = deque()
+        self._cond = threading.Condition(threading.Lock())
+
+    def push(self, event):
+        with self._cond:
+            if self.closed:
+                return
+            # Backpressure: a slow consumer never blocks the publisher. We drop the
+            # oldest event and remember how many were lost so the client can resync.
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(event)
+            self._cond.notify()
+
+    def get(self, timeout):
+        """Block until an event is available or `timeout` seconds pass.
+
+        Returns a list of pending events (possibly empty on timeout) and the number of
+        events dropped since the previous call.
+        """
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self._queue)
+            self._queue.clear()
+            dropped, self.dropped = self.dropped, 0
+            return events, dropped
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    """Fan-out hub mapping channel names to the subscriptions listening on them."""
+
+    def __init__(self, max_connections=5000, max_queue=100):
+        self.max_connections = max_connections
+        self.max_queue = max_queue
+        self._channels = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # Relays a publish to every process (see start_relay() and forward_to_web()); returns False if it could not
+        self.forward = None
+
+    @property
+    def connection_count(self):
+        return self._count
+
+    def subscribe(self, channels):
+        """Register a new subscription, or return None when the worker is at capacity."""
+        with self._lock:
+            if self._count >= self.max_connections:
+                return None
+            subscription = Subscription(self, channels, self.max_queue)
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+            self._count += 1
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            removed = False
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers and subscription in subscribers:
+                    subscribers.discard(subscription)
+                    removed = True
+                    if not subscribers:
+                        del self._channels[channel]
+            if removed:
+                self._count -= 1
+
+    def publish(self, channel, event_type, payload):
+        """Send an event to every subscription on `channel`, in this process or (relayed) any other.
+
+        Returns the number of local subscriptions it was delivered to, 0 when relayed.
+        """
+        forward = self.forward
+        if forward is not None and forward(channel, event_type, payload):
+            return 0
+        return self.deliver(channel, event_type, payload)
+
+    def deliver(self, channel, event_type, payload):
+        """Deliver an event to this process's subscriptions on `channel`. Never blocks on consumers."""
+        event = {
+            'id': next(self._ids),
+            'type': event_type,
+            'data': dict(payload, type=event_type, timestamp=payload.get('timestamp') or datetime.utcnow().isoformat())
+        }
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.push(event)
+        return len(subscribers)
+
+
+class RelaySender:
+    """Sends published events to the web processes with pg_notify, over one shared connection."""
+
+    def __init__(self, connect):
+        self.connect = connect
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def send(self, channel, event_type, payload):
+        """Returns False if the event could not be relayed."""
+        message = json.dumps({'channel': channel, 'type': event_type, 'payload': payload}, default=str)
+        if len(message.encode()) > MAX_RELAY_PAYLOAD:
+            log.error("Event %s on %s is too large to relay (%d bytes)", event_type, channel, len(message))
+            return False
+        with self._lock:
+            # One retry on a fresh connection covers a connection the server closed while idle
+            for attempt in range(2):
+                try:
+                    if self._conn is None or self._conn.closed:
+                        self._conn = self.connect()
+                    self._conn.execute("select pg_notify(%s, %s)", (RELAY_CHANNEL, message))
+                    return True
+                except Exception as e:
+                    self._conn = None
+                    if attempt:
+                        # Events are best effort: clients refetch on reconnect, the write already happened
+                        log.warning("Could not relay %s on %s: %s", event_type, channel, e)
+        return False
+
+
+class RelayListener:
+    """Background thread LISTENing on RELAY_CHANNEL and delivering the events to `hub`'s subscribers.
+
+    With `forward`, the hub's own publishes are handed to it while the LISTEN is up.
+    """
+
+    def __init__(self, hub, connect, forward=None, reconnect_seconds=5):
+        self.hub = hub
+        self.connect = connect
+        self.forward = forward
+        self.reconnect_seconds = reconnect_seconds
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='event-relay', daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        """Block until the LISTEN is in place (used by tests and checks)."""
+        return self._ready.wait(timeout)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.hub.forward = None
+
+    def dispatch(self, message):
+        try:
+            event = json.loads(message)
+            self.hub.deliver(event['channel'], event['type'], event['payload'])
+        except (ValueError, KeyError, TypeError) as e:
+            log.warning("Dropping malformed relayed event: %s", e)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.connect() as conn:
+                    conn.execute(f"listen {RELAY_CHANNEL}")
+                    self.hub.forward = self.forward
+                    self._ready.set()
+                    while not self._stop.is_set():
+                        # The timeout lets the loop notice stop() even when no events arrive
+                        for notify in conn.notifies(timeout=1.0):
+                            self.dispatch(notify.payload)
+            except Exception as e:
+                # Relayed publishes would not come back to this process's clients: deliver them locally
+                self.hub.forward = None
+                self._ready.clear()
+                log.warning("Event relay connection lost, reconnecting in %ss: %s", self.reconnect_seconds, e)
+                self._stop.wait(self.reconnect_seconds)
+
+
+def forward_to_web(connect):
+    """Send this process's publishes to the web processes instead of delivering them locally."""
+    hub.forward = RelaySender(connect).send
+
+
+def start_relay(connect):
+    """Deliver events relayed by any process to this process's clients, and relay its own publishes."""
+    return RelayListener(hub, connect, forward=RelaySender(connect).send).start()
+
+
+def format_sse(event):
+    frame = f"event: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+    # Only real events carry an id so that control frames don't move the client's Last-Event-ID
+    if event.get('id'):
+        frame = f"id: {event['id']}\n" + frame
+    return frame
+
+
+def stream(subscription, heartbeat_interval=15):
+    """Generator yielding SSE frames for a subscription until the client disconnects.
+
+    A comment frame is written every `heartbeat_interval` seconds of silence so that
+    proxies keep the connection open and dead clients are detected by the failed write.
+    """
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        yield "retry: 5000\n\n"
+        last_write = time.monotonic()
+        while not subscription.closed:
+            events, dropped = subscription.get(timeout=heartbeat_interval)
+            if dropped:
+                yield format_sse({'type': 'overflow', 'data': {'dropped': dropped}})
+            for event in events:
+                yield format_sse(event)
+            if events or dropped:
+                last_write = time.monotonic()
+            elif time.monotonic() - last_write >= heartbeat_interval:
+                yield ": ping\n\n"
+                last_write = time.monotonic()
+    finally:
+        # GeneratorExit is raised here when the client goes away
+        subscription.close()
+
+
+# A single hub per worker process. Idle connections only hold a parked thread/greenlet, so run the
+# web process with a gevent/eventlet worker class to keep thousands of them open per worker.
+hub = EventHub(
+    max_connections=int(os.getenv('SSE_MAX_CONNECTIONS', '5000')),
+    max_queue=int(os.getenv('SSE_MAX_QUEUE', '100'))
+)
@@ -0,0 +1,225 @@
+"""Query-plan regression check for the queries the API sends through the Supabase client.
+
+Every filter the routes and jobs run is listed in SHAPES as the SQL PostgREST generates for it.
+The check runs `EXPLAIN` on each one against DATABASE_URL and fails if a plan reads a table of
+more than --threshold rows with a sequential scan. Shapes that are meant to read a whole table
+(batch jobs, the search index build) are marked `full_scan` and only reported.
+
+Run it against a scratch database, never production: restore the Supabase schema
+(`supabase db dump --schema-only`), apply migrations/*.sql, then
+
+    DATABASE_URL=postgresql://localhost/clip_explain python explain_check.py --seed
+    DATABASE_URL=postgresql://localhost/clip_explain python explain_check.py --threshold 1000
+
+--seed fills the (empty) tables with synthetic data shaped like production: most campaigns
+inactive, many clips per campaign and per creator, most withdrawals and jobs settled.
+"""
+import argparse
+import json
+import sys
+
+import jobs
+
+
+class Shape:
+    def __init__(self, name, origin, sql, full_scan=False):
+        self.name = name
+        self.origin = origin
+        self.sql = sql
+        self.full_scan = full_scan
+
+
+SHAPES = [
+    # Auth: an email lookup in each user table on signup and login
+    Shape('brand by email', 'routes/auth.py', "select id, username, email, password_hash from brand where email = %(brand_email)s limit 1"),
+    Shape('creator by email', 'routes/auth.py', "select id, username, email, password_hash, profile_completed from creator where email = %(creator_email)s limit 1"),
+    Shape('admin by email', 'routes/auth.py', "select id, username, email, password_hash from admin where email = %(admin_email)s limit 1"),
+
+    # Campaigns
+    Shape('campaigns of a brand', 'routes/brand.py', "select * from campaign where brand_id = %(brand_id)s"),
+    Shape('campaign owned by brand', 'routes/brand.py', "select id from campaign where id = %(campaign_id)s and brand_id = %(brand_id)s limit 1"),
+    Shape('active campaigns', 'routes/creator.py', "select * from campaign where is_active = true"),
+    Shape('active campaign by id', 'routes/creator.py', "select id, brand_id, name, is_active, budget, cpv, total_view_count from campaign where id = %(campaign_id)s and is_active = true limit 1"),
+    Shape('active campaigns by ids', 'routes/creator.py', "select * from campaign where id = any(%(campaign_ids)s) and is_active = true"),
+    Shape('expire campaign deadlines', 'tasks.py', "update campaign set is_active = false where is_active = true and deadline < current_date returning *"),
+    Shape('all campaigns (admin)', 'routes/admin.py', "select c.*, b.username from campaign c left join brand b on b.id = c.brand_id", full_scan=True),
+    Shape('search index build', 'search.py', "select id, name, brand_id, is_active from campaign order by id limit 1000 offset 0", full_scan=True),
+
+    # Submitted clips
+    Shape('submissions of creator', 'routes/creator.py', "select id, campaign_id, clip_url, submitted_at, is_deleted_by_admin, feedback from submitted_clips where creator_id = %(creator_id)s"),
+    Shape('submissions of creator in campaign', 'routes/creator.py', "select id, clip_url, submitted_at, is_deleted_by_admin, feedback from submitted_clips where campaign_id = %(campaign_id)s and creator_id = %(creator_id)s"),
+    Shape('submission count', 'routes/creator.py', "select count(*) from submitted_clips where creator_id = %(creator_id)s and campaign_id = %(campaign_id)s"),
+    Shape('submissions of campaign', 'routes/admin.py', "select id, creator_id, clip_url, submitted_at, is_deleted_by_admin, feedback from submitted_clips where campaign_id = %(campaign_id)s"),
+    Shape('submission with campaign', 'routes/admin.py', "select s.*, c.brand_id, c.name from submitted_clips s left join campaign c on c.id = s.campaign_id where s.id = %(clip_id)s limit 1"),
+    Shape('delete submissions of campaign', 'routes/brand.py', "delete from submitted_clips where campaign_id = %(campaign_id)s"),
+
+    # Accepted clips
+    Shape('accepted clips of campaign', 'routes/creator.py', "select * from accepted_clips where campaign_id = %(campaign_id)s"),
+    Shape('accepted clip views of campaign', 'routes/admin.py', "select view_count from accepted_clips where campaign_id = %(campaign_id)s"),
+    Shape('accepted clips of creator', 'routes/creator.py', "select id, campaign_id, clip_url, submitted_at, media_id, view_count, caption, instagram_posted_at from accepted_clips where creator_id = %(creator_id)s"),
+    Shape('accepted clips of creator in campaign', 'routes/creator.py', "select * from accepted_clips where creator_id = %(creator_id)s and campaign_id = %(campaign_id)s"),
+    Shape('accepted clip of creator', 'routes/creator.py', "select id, campaign_id, view_count from accepted_clips where id = %(clip_id)s and creator_id = %(creator_id)s limit 1"),
+    Shape('delete accepted clips of campaign', 'routes/brand.py', "delete from accepted_clips where campaign_id = %(campaign_id)s"),
+    Shape('recommendation scoring input', 'recommendations.py', "select campaign_id, creator_id, view_count from accepted_clips order by id limit 1000 offset 0", full_scan=True),
+
+    Shape('clips accepted before their media resolved', 'migrations/0015_clip_media_queue.sql', "select id from accepted_clips where media_id is null and substring(clip_url from 'instagram\\.com/(?:[\\w.]+/)?(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)') = 'abc'"),
+    Shape('pending clip media', 'clip_resolver.py', "select shortcode from clip_media where resolved_at is null order by shortcode limit 200"),
+
+    # Analytics and history
+    Shape('creator rollups of campaign', 'rollups.py', "select creator_id, clips, views from campaign_creator_rollup where campaign_id = %(campaign_id)s order by views desc"),
+    Shape('daily views of campaign', 'rollups.py', "select day, views from campaign_daily_views where campaign_id = %(campaign_id)s and day >= current_date - 90 order by day"),
+    Shape('view history since', 'view_history.py', "select id, clip_id, view_count, captured_at, removed from clip_view_history where campaign_id = %(campaign_id)s and id > 0 order by id limit 1000"),
+    Shape('view history load window', 'view_history.py', "select id, clip_id, view_count, captured_at, removed from clip_view_history where campaign_id = %(campaign_id)s and captured_at >= now() - interval '90 days' order by id limit 1000"),
+    Shape('view history baseline', 'migrations/0014_view_history_bounded_load.sql', "select * from clip_view_history_baseline(%(campaign_id)s, (now() - interval '90 days')::timestamp)"),
+    Shape('recommendations of creator', 'routes/creator.py', "select creator_id, campaign_ids, scores, computed_at from creator_recommendation where creator_id = any(array[%(creator_id)s, 0])"),
+    Shape('open view flag of clip', 'migrations/0010_view_anomalies.sql', "select id from view_anomaly where clip_id = %(clip_id)s and status = 'open' for update"),
+    Shape('view flag queue', 'anomalies.py', "select * from view_anomaly where status = 'open' order by id desc limit 51"),
+
+    # Payments
+    Shape('wallet balance', 'routes/payments.py', "select balance, currency from wallet where user_type = 'creator' and user_id = %(creator_id)s limit 1"),
+    Shape('deposit order of brand', 'routes/payments.py', "select order_id, amount, status from deposit_order where order_id = %(order_id)s and brand_id = %(brand_id)s limit 1"),
+    Shape('due deposit events', 'migrations/0005_deposits.sql', "select id from deposit_event where (status = 'pending' and next_attempt_at <= now()) or (status = 'processing' and locked_until < now()) order by next_attempt_at limit 50 for update skip locked"),
+    Shape('withdrawals of creator', 'routes/payments.py', "select * from withdrawal where creator_id = %(creator_id)s order by id desc limit 21"),
+    Shape('withdrawals of creator by status', 'routes/payments.py', "select * from withdrawal where creator_id = %(creator_id)s and status = 'success' and id < %(withdrawal_id)s order by id desc limit 21"),
+    Shape('due withdrawals', 'migrations/0006_withdrawals.sql', "select id from withdrawal where (status = 'pending' and next_attempt_at <= now()) or (status = 'processing' and locked_until < now()) order by next_attempt_at limit 100 for update skip locked"),
+    Shape('submitted withdrawals', 'withdrawals.py', "select id, creator_id, transaction_id, amount, reference_id, batch_id from withdrawal where status = 'submitted' and id > 0 order by id limit 500"),
+    Shape('withdrawal queue stats', 'migrations/0006_withdrawals.sql', "select status, count(*), min(created_at) from withdrawal where status in ('pending', 'processing', 'submitted', 'failed') group by status"),
+    Shape('recent payout batches', 'withdrawals.py', "select size, latency_ms, accepted, created_at from withdrawal_batch order by created_at desc limit 100"),
+    Shape('accepted clips for activity feed', 'routes/payments.py', "select id, campaign_id, submitted_at, accepted_at from accepted_clips where creator_id = %(creator_id)s order by id desc limit 20"),
+    Shape('rejected clips for activity feed', 'routes/payments.py', "select id, campaign_id, feedback, submitted_at, reviewed_at from submitted_clips where creator_id = %(creator_id)s and is_deleted_by_admin = true order by id desc limit 20"),
+    Shape('earnings for activity feed', 'routes/payments.py', "select id, amount, created_at from transactions where user_type = 'creator' and user_id = %(creator_id)s and type = 'earning' and status = 'success' order by created_at desc limit 20"),
+    Shape('transactions of user', 'routes/payments.py', "select * from transactions where user_type = 'creator' and user_id = %(creator_id)s order by created_at desc limit 50"),
+
+    # Jobs
+    Shape('due jobs', 'migrations/0007_jobs.sql', "select id from job where kind = any(array['deposits.process']) and ((status = 'queued' and run_at <= now()) or (status = 'running' and locked_until < now())) order by priority desc, run_at limit 1 for update skip locked"),
+    Shape('prune finished jobs', 'tasks.py', "delete from job where status in ('done', 'failed') and finished_at < now() - interval '48 hours'"),
+]
+
+# One representative value per parameter, read from the seeded data
+SAMPLES = {
+    'brand_email': "select email from brand order by id offset 17 limit 1",
+    'creator_email': "select email from creator order by id offset 17 limit 1",
+    'admin_email': "select email from admin order by id limit 1",
+    'brand_id': "select brand_id from campaign order by id offset 17 limit 1",
+    'campaign_id': "select id from campaign order by id offset 17 limit 1",
+    'campaign_ids': "select array_agg(id) from (select campaign_id as id from submitted_clips where creator_id = (select min(creator_id) from submitted_clips) limit 20) t",
+    'creator_id': "select creator_id from submitted_clips order by id offset 17 limit 1",
+    'clip_id': "select id from accepted_clips order by id offset 17 limit 1",
+    'order_id': "select order_id from deposit_order limit 1",
+    'withdrawal_id': "select max(id) from withdrawal",
+}
+
+SEED = """
+insert into brand (id, username, email, password_hash)
+    select i, 'brand' || i, 'brand' || i || '@example.com', 'x' from generate_series(1, 2000 * {scale}) i;
+insert into creator (id, username, email, password_hash, profile_completed)
+    select i, 'creator' || i, 'creator' || i || '@example.com', 'x', true from generate_series(1, 20000 * {scale}) i;
+insert into admin (id, username, email, password_hash)
+    select i, 'admin' || i, 'admin' || i || '@example.com', 'x' from generate_series(1, 20) i;
+-- 1 in 20 campaigns is still running; the rest expired over the last three years
+insert into campaign (id, brand_id, name, budget, cpv, deadline, is_active, total_view_count, view_threshold)
+    select i, 1 + i % (2000 * {scale}), 'campaign ' || i, 10000, 0.01,
+           current_date + (case when i % 20 = 0 then 30 else -(i % 1000) end), i % 20 = 0, i * 10, 1000
+    from generate_series(1, 10000 * {scale}) i;
+insert into submitted_clips (id, creator_id, campaign_id, clip_url, submitted_at)
+    select i, 1 + i % (20000 * {scale}), 1 + (i::bigint * 7919) % (10000 * {scale}), 'https://www.instagram.com/reel/' || i, now() - (i % 1000) * interval '1 hour'
+    from generate_series(1, 200000 * {scale}) i;
+insert into accepted_clips (id, creator_id, campaign_id, clip_url, submitted_at, view_count)
+    select id, creator_id, campaign_id, clip_url, submitted_at, (id * 37) % 100000 from submitted_clips where id % 2 = 0;
+insert into clip_view_history (clip_id, campaign_id, view_count, captured_at)
+    select 2 * (1 + i % (100000 * {scale})), 1 + (i::bigint * 7919) % (10000 * {scale}), i, now() - (i % 10000) * interval '1 minute'
+    from generate_series(1, 300000 * {scale}) i;
+insert into creator_recommendation (creator_id, campaign_ids, scores)
+    select i, array[1, 2, 3], array[0.3, 0.2, 0.1] from generate_series(0, 20000 * {scale}) i;
+insert into campaign_creator_rollup (campaign_id, creator_id, clips, views)
+    select campaign_id, creator_id, count(*), sum(view_count) from accepted_clips group by 1, 2;
+insert into campaign_daily_views (campaign_id, day, views)
+    select 1 + i % (10000 * {scale}), current_date - (i / (10000 * {scale})), i from generate_series(0, 100000 * {scale} - 1) i;
+insert into wallet (user_type, user_id, balance)
+    select 'creator', i, 100 from generate_series(1, 20000 * {scale}) i;
+insert into transactions (user_type, user_id, amount, type, status)
+    select 'creator', 1 + i % (20000 * {scale}), 10, 'earning', 'success' from generate_series(1, 100000 * {scale}) i;
+insert into deposit_order (order_id, brand_id, amount, status)
+    select 'dep_' || i, 1 + i % (2000 * {scale}), 100, 'credited' from generate_series(1, 20000 * {scale}) i;
+insert into deposit_event (order_id, source, status)
+    select order_id, 'webhook', 'done' from deposit_order;
+-- Almost every withdrawal and job is settled; the queues themselves stay short
+insert into withdrawal (creator_id, amount, payout_method, upi_id, reference_id, status, batch_id, created_at)
+    select 1 + i % (20000 * {scale}), 50, 'upi', 'creator@okaxis', 'wd_seed_' || i,
+           case when i % 500 = 0 then 'pending' when i % 500 = 1 then 'submitted' when i % 50 = 2 then 'reverted' else 'success' end,
+           'wb_' || (i / 100), now() - (i % 10000) * interval '1 minute'
+    from generate_series(1, 50000 * {scale}) i;
+insert into withdrawal_batch (batch_id, size, latency_ms, accepted, created_at)
+    select 'wb_' || i, 100, 20 + i % 50, true, now() - i * interval '1 minute' from generate_series(1, 500 * {scale}) i;
+insert into job (kind, status, finished_at, created_at)
+    select 'deposits.process', 'done', now() - (i % 2880) * interval '1 minute', now() - (i % 2880) * interval '1 minute'
+    from generate_series(1, 50000 * {scale}) i;
+"""
+
+SEEDED_WITH_IDS = ('brand', 'creator', 'admin', 'campaign', 'submitted_clips')
+
+
+def seed(conn, scale):
+    if conn.execute('select exists (select 1 from campaign) as seeded').fetchone()['seeded']:
+        raise SystemExit('--seed expects empty tables; use a scratch database')
+    with conn.transaction():
+        for statement in SEED.format(scale=scale).split(';\n'):
+            if statement.strip():
+                conn.execute(statement)
+        # Ids were seeded explicitly; move the sequences past them
+        for table in SEEDED_WITH_IDS:
+            conn.execute(f"select setval(pg_get_serial_sequence('{table}', 'id'), (select max(id) from {table}))")
+    conn.execute('analyze')
+
+
+def _scans(plan):
+    """Yield (node type, relation, index) for every scan node of an EXPLAIN (FORMAT JSON) plan."""
+    yield plan['Node Type'], plan.get('Relation Name'), plan.get('Index Name')
+    for child in plan.get('Plans', []):
+        yield from _scans(child)
+
+
+def check(conn, threshold):
+    row_counts = {row['relname']: row['rows'] for row in conn.execute(
+        "select relname, reltuples::bigint as rows from pg_class where relkind = 'r' and relnamespace = 'public'::regnamespace")}
+    params = {name: conn.execute(sql).fetchone() for name, sql in SAMPLES.items()}
+    params = {name: next(iter(row.values())) if row else None for name, row in params.items()}
+
+    failures = 0
+    for shape in SHAPES:
+        plan = conn.execute('explain (format json) ' + shape.sql, params).fetchone()
+        plan = plan['QUERY PLAN'] if isinstance(plan['QUERY PLAN'], list) else json.loads(plan['QUERY PLAN'])
+        scans = list(_scans(plan[0]['Plan']))
+        seq = [(relation, row_counts.get(relation, 0)) for node, relation, _ in scans if node == 'Seq Scan']
+        large = [(relation, rows) for relation, rows in seq if rows > threshold]
+        indexes = sorted({index for _, _, index in scans if index})
+        if large and shape.full_scan:
+            status = 'full'
+        elif large:
+            status, failures = 'FAIL', failures + 1
+        else:
+            status = 'ok'
+        detail = ', '.join(f"seq scan on {relation} (~{rows} rows)" for relation, rows in large) or ', '.join(indexes) or 'small tables only'
+        print(f"{status:4}  {shape.name:40} {shape.origin:32} {detail}")
+
+    print(f"\n{len(SHAPES)} query shapes, {failures} sequential scans above {threshold} rows")
+    return failures == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--seed', action='store_true', help='fill an empty scratch database with synthetic data first')
+    parser.add_argument('--scale', type=int, default=1, help='multiplier for the seeded row counts')
+    parser.add_argument('--threshold', type=int, default=1000, help='largest table a sequential scan may read')
+    args = parser.parse_args()
+
+    conn = jobs.connect()
+    if args.seed:
+        seed(conn, args.scale)
+    return 0 if check(conn, args.threshold) else 1
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+    sys.exit(main())
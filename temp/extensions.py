@@ -0,0 +1,82 @@
+"""Shared extension objects. Everything expensive is constructed on first use, not at import time,
+so a cold start (e.g. a fresh serverless instance) only pays for what the first request needs."""
+import logging
+import threading
+
+from flask import current_app, jsonify, request
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager
+
+log = logging.getLogger(__name__)
+
+cors = CORS()
+jwt = JWTManager()
+
+_lock = threading.Lock()
+_supabase_client = None
+_bcrypt_ready = False
+
+
+def get_supabase():
+    """Return the process-wide Supabase client, creating it on first use."""
+    global _supabase_client
+    if _supabase_client is None:
+        with _lock:
+            if _supabase_client is None:
+                # Imported here because the supabase package (and its httpx/gotrue/realtime deps) is
+                # the single largest import in the backend
+                from supabase import create_client
+                from config import Config
+                # The connection pool size is configured via SUPABASE_POOL_SIZE in config.py (default 10)
+                _supabase_client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+    return _supabase_client
+
+
+class _LazySupabase:
+    """Stand-in for the Supabase client so route modules can keep writing `supabase.table(...)`."""
+
+    def __getattr__(self, name):
+        return getattr(get_supabase(), name)
+
+
+supabase = _LazySupabase()
+
+
+def get_bcrypt():
+    """Return the Flask-Bcrypt instance from models, initialised against the current app on first use."""
+    global _bcrypt_ready
+    from models import bcrypt
+    if not _bcrypt_ready:
+        with _lock:
+            if not _bcrypt_ready:
+                bcrypt.init_app(current_app)
+                _bcrypt_ready = True
+    return bcrypt
+
+
+# Add explicit error handlers to help debug JWT related issues
+@jwt.invalid_token_loader
+def invalid_token_callback(reason):
+    """This will be invoked when an invalid JWT is received (causes 422)."""
+    # Log the exact reason for easier debugging; repeats are sampled so a storm of bad tokens stays cheap
+    log.info("Invalid token: %s", reason)
+    return jsonify({
+        'msg': 'Invalid token',
+        'error': reason
+    }), 422
+
+
+@jwt.unauthorized_loader
+def missing_token_callback(reason):
+    """This will be invoked when no JWT is present in a protected endpoint (causes 401)."""
+    log.info("Missing/Unauthorized token: %s", reason)
+    return jsonify({
+        'msg': 'Missing authorization header',
+        'error': reason
+    }), 401
+
+
+@jwt.token_verification_loader
+def stream_token_only_opens_the_stream(jwt_header, jwt_data):
+    """Stream tokens travel in URLs (see routes/system.py), so they are refused everywhere else."""
+    return jwt_data.get('scope') != 'stream' or request.endpoint == 'system.event_stream'
@@ -0,0 +1,126 @@
+"""Liveness/readiness support: a cached background database probe and an in-flight request gauge."""
+import os
+import threading
+import time
+from datetime import datetime
+
+from flask import g, request
+
+# Probe endpoints never touch the database on the request path
+PROBE_PATHS = frozenset(['/livez', '/readyz', '/api/health'])
+
+
+class InFlightGauge:
+    """Counts requests currently being served, used to report how saturated the Supabase pool is."""
+
+    def __init__(self, pool_size):
+        self.pool_size = max(1, pool_size)
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def exit(self):
+        with self._lock:
+            self.current = max(0, self.current - 1)
+
+    def snapshot(self):
+        with self._lock:
+            current, peak = self.current, self.peak
+            # Peak is reset on every read so it reflects the window between two probes
+            self.peak = current
+        return {
+            'in_flight': current,
+            'peak_in_flight': peak,
+            'size': self.pool_size,
+            'saturation': round(current / self.pool_size, 3)
+        }
+
+
+class ReadinessProbe:
+    """Runs `check` every `interval` seconds on a daemon thread and caches the outcome.
+
+    `/readyz` only reads the cached result, so load balancer probes cost nothing no
+    matter how often they arrive. A result older than `stale_after` seconds is treated
+    as not ready (the probe thread itself is stuck or dead).
+    """
+
+    def __init__(self, check, interval=5.0, stale_after=None):
+        self.check = check
+        self.interval = interval
+        self.stale_after = stale_after or interval * 3
+        self._result = {'ok': False, 'error': 'probe has not run yet', 'latency_ms': None, 'checked_at': None}
+        self._checked_monotonic = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='readiness-probe', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self):
+        started = time.perf_counter()
+        try:
+            self.check()
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        with self._lock:
+            self._result = {
+                'ok': ok,
+                'error': error,
+                'latency_ms': latency_ms,
+                'checked_at': datetime.utcnow().isoformat()
+            }
+            self._checked_monotonic = time.monotonic()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def status(self):
+        with self._lock:
+            result = dict(self._result)
+            checked = self._checked_monotonic
+        age = None if checked is None else time.monotonic() - checked
+        result['age_seconds'] = None if age is None else round(age, 2)
+        result['stale'] = age is None or age > self.stale_after
+        result['ready'] = result['ok'] and not result['stale']
+        return result
+
+
+def _probe_database():
+    # Imported lazily so that importing this module never builds the Supabase client
+    from extensions import supabase
+    supabase.table('brand').select('id').limit(1).execute()
+
+
+readiness_probe = ReadinessProbe(_probe_database, interval=float(os.getenv('READINESS_PROBE_INTERVAL', '5')))
+pool_gauge = InFlightGauge(int(os.getenv('SUPABASE_POOL_SIZE', '10')))
+
+
+def track_in_flight():
+    """before_request hook, registered after admission control so throttled requests are not counted."""
+    if request.path not in PROBE_PATHS:
+        pool_gauge.enter()
+        g.in_flight = True
+
+
+def untrack_in_flight(exc):
+    # Teardown also runs for requests an earlier before_request hook answered (e.g. a 429), which never entered
+    if g.pop('in_flight', False):
+        pool_gauge.exit()
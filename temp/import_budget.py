@@ -0,0 +1,91 @@
+"""Cold-start import budget check for the backend.
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter, writes a report of the
+slowest imports and exits non-zero when either
+
+  * importing `app` (which also runs create_app(), but starts no threads) takes longer than the
+    budget, or
+  * a module that is supposed to be loaded lazily shows up in the import trace.
+
+Usage (from this directory, suitable for CI):
+    python import_budget.py --budget-ms 400 --report importtime-report.txt
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Heavy modules that must only be imported on the request paths that need them. The bcrypt C
+# extension itself is not listed: PyJWT imports it through cryptography's ssh key support, so
+# flask_bcrypt (which builds the hasher) is what marks the password hashing stack as loaded.
+LAZY_MODULES = ('supabase', 'requests', 'models', 'flask_bcrypt')
+
+LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def measure(target):
+    """Return [(module, self_us, cumulative_us, depth)] for one cold import of `target`."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def build_report(rows, target, top):
+    total_us = next((cum for module, _, cum, depth in rows if module == target and depth == 0), 0)
+    lines = [f"Import of '{target}': {total_us / 1000:.1f} ms", '', f"Top {top} by cumulative time:"]
+    for module, _, cum, depth in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+        lines.append(f"  {cum / 1000:9.1f} ms  {'  ' * depth}{module}")
+    lines += ['', f"Top {top} by self time:"]
+    for module, self_us, _, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        lines.append(f"  {self_us / 1000:9.1f} ms  {module}")
+    return total_us, '\n'.join(lines) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', default='app')
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('IMPORT_BUDGET_MS', '400')))
+    parser.add_argument('--runs', type=int, default=3, help='take the fastest of N runs to reduce noise')
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--report', help='also write the report to this file')
+    args = parser.parse_args(argv)
+
+    best_total, best_rows = None, None
+    for _ in range(max(1, args.runs)):
+        rows = measure(args.target)
+        total_us, _ = build_report(rows, args.target, args.top)
+        if best_total is None or total_us < best_total:
+            best_total, best_rows = total_us, rows
+    _, report = build_report(best_rows, args.target, args.top)
+
+    imported = {module for module, _, _, _ in best_rows}
+    eager = sorted(m for m in imported if m.split('.')[0] in LAZY_MODULES)
+    failures = []
+    if best_total / 1000 > args.budget_ms:
+        failures.append(f"import took {best_total / 1000:.1f} ms, budget is {args.budget_ms:.0f} ms")
+    if eager:
+        failures.append(f"modules that should be lazy were imported at startup: {', '.join(eager)}")
+
+    report += '\n' + ('\n'.join(f"FAIL: {f}" for f in failures) if failures else 'OK: within import budget') + '\n'
+    print(report, end='')
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write(report)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
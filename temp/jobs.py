@@ -0,0 +1,338 @@
+"""Postgres-backed background jobs, safe to run on any number of workers and instances.
+
+Jobs are rows in `job` (migrations/0007_jobs.sql). The web process only enqueues them
+(`enqueue()` / `nudge()` go through the Supabase client); `python worker.py` runs them:
+
+  * Worker threads claim due jobs with `claim_jobs()` (FOR UPDATE SKIP LOCKED), so every job is
+    handed to exactly one worker. A claim is a lease: a heartbeat thread extends it every
+    JOBS_LEASE_SECONDS / 3 while the handler runs, and a job whose worker died is claimed again
+    once its lease runs out. Handlers must therefore be idempotent.
+  * Failed jobs are retried with exponential backoff until `max_attempts`.
+  * Periodic work is declared with `schedule()`. Only the leader enqueues scheduled jobs; the
+    leader is whichever worker holds a session-level advisory lock, so when it dies its
+    connection closes, the lock is released and another worker takes over. `job_schedule`
+    remembers when each schedule last fired, so a new leader neither repeats nor skips a run,
+    and a schedule's dedupe key keeps at most one run queued.
+
+Worker-side access uses psycopg directly (advisory locks need a real session) through
+DATABASE_URL, the Postgres connection string of the Supabase project.
+
+    python jobs.py --check      # exercise claiming, leases and leader election against DATABASE_URL
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+LEASE_SECONDS = int(os.getenv('JOBS_LEASE_SECONDS', '60'))
+POLL_SECONDS = float(os.getenv('JOBS_POLL_SECONDS', '1'))
+BASE_BACKOFF_SECONDS = float(os.getenv('JOBS_BACKOFF_SECONDS', '5'))
+MAX_BACKOFF_SECONDS = 3600
+LEADER_LOCK = 'jobs:scheduler'
+
+_handlers = {}    # kind -> callable(payload)
+_schedules = {}   # name -> Schedule
+
+
+class Schedule:
+    def __init__(self, name, every, kind, payload=None):
+        self.name = name
+        self.every = every
+        self.kind = kind
+        self.payload = payload or {}
+
+
+def job(kind):
+    """Register the decorated function as the handler of `kind`. It is called with the job's payload."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def schedule(name, every, kind, payload=None):
+    """Enqueue a `kind` job every `every` seconds, cluster-wide."""
+    _schedules[name] = Schedule(name, every, kind, payload)
+
+
+def backoff(attempts):
+    return min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def enqueue(kind, payload=None, run_at=None, dedupe_key=None, priority=0):
+    """Queue a job from the web process. Returns its id, or None if a job with `dedupe_key` is already queued."""
+    from extensions import supabase
+    return supabase.rpc('enqueue_job', {
+        'p_kind': kind,
+        'p_payload': payload or {},
+        'p_run_at': run_at.isoformat() if run_at else None,
+        'p_dedupe_key': dedupe_key,
+        'p_priority': priority
+    }).execute().data
+
+
+def nudge(kind):
+    """Ask for a `kind` run as soon as possible. Collapses with one already queued; never raises."""
+    try:
+        enqueue(kind, dedupe_key=kind)
+    except Exception as e:
+        log.warning("Could not enqueue %s job: %s", kind, e)
+
+
+def connect(dsn=None):
+    try:
+        import psycopg
+        from psycopg.rows import dict_row
+    except ImportError as e:
+        raise RuntimeError("The job worker needs psycopg: pip install 'psycopg[binary]'") from e
+    dsn = dsn or os.getenv('DATABASE_URL')
+    if not dsn:
+        raise RuntimeError('DATABASE_URL is not set')
+    return psycopg.connect(dsn, autocommit=True, row_factory=dict_row)
+
+
+def _lock_key(name):
+    # pg advisory locks take a bigint; crc32 is stable across processes (unlike hash())
+    return zlib.crc32(name.encode())
+
+
+class Scheduler:
+    """Leader election plus schedule firing, on its own connection (which holds the advisory lock)."""
+
+    def __init__(self, dsn, schedules, tick=1.0):
+        self.dsn = dsn
+        self.schedules = schedules
+        self.tick = tick
+        self.is_leader = False
+        self._conn = None
+
+    def run(self, stop):
+        while not stop.is_set():
+            try:
+                self._step()
+            except Exception as e:
+                log.warning("Scheduler step failed: %s", e)
+                self._reset()
+            stop.wait(self.tick)
+        self._reset()
+
+    def _reset(self):
+        if self.is_leader:
+            log.info("Gave up scheduler leadership")
+        self.is_leader = False
+        if self._conn is not None:
+            try:
+                self._conn.close()  # Closing the session releases the advisory lock
+            except Exception:
+                pass
+            self._conn = None
+
+    def _step(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = connect(self.dsn)
+            self.is_leader = False
+        if not self.is_leader:
+            self.is_leader = self._conn.execute('select pg_try_advisory_lock(%s) as locked', [_lock_key(LEADER_LOCK)]).fetchone()['locked']
+            if not self.is_leader:
+                return
+            log.info("Became scheduler leader")
+        for entry in self.schedules.values():
+            self._fire_if_due(entry)
+
+    def _fire_if_due(self, entry):
+        with self._conn.transaction():
+            self._conn.execute('insert into job_schedule (name) values (%s) on conflict (name) do nothing', [entry.name])
+            due = self._conn.execute(
+                'select 1 from job_schedule where name = %s and next_run_at <= now() for update', [entry.name]).fetchone()
+            if not due:
+                return
+            from psycopg.types.json import Jsonb
+            self._conn.execute('select enqueue_job(%s, %s, null, %s)', [entry.kind, Jsonb(entry.payload), f"schedule:{entry.name}"])
+            self._conn.execute(
+                'update job_schedule set last_run_at = now(), next_run_at = now() + make_interval(secs => %s) where name = %s',
+                [entry.every, entry.name])
+
+
+class Worker:
+    def __init__(self, dsn=None, concurrency=2, kinds=None, lease_seconds=LEASE_SECONDS, poll_interval=POLL_SECONDS,
+                 schedules=None, scheduler=True):
+        self.dsn = dsn or os.getenv('DATABASE_URL')
+        self.concurrency = concurrency
+        self.kinds = kinds
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.scheduler = Scheduler(self.dsn, _schedules if schedules is None else schedules) if scheduler else None
+        self._running = {}   # job id -> kind
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        targets = [(self._consume, f"job-worker-{i}") for i in range(self.concurrency)]
+        targets.append((self._heartbeat, 'job-heartbeat'))
+        if self.scheduler is not None:
+            targets.append((lambda: self.scheduler.run(self._stop), 'job-scheduler'))
+        for target, name in targets:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        log.info("Job worker %s started with %s threads for %s", self.worker_id, self.concurrency, sorted(self.kinds or _handlers))
+
+    def stop(self, timeout=30.0):
+        """Stop claiming and wait up to `timeout` seconds for running jobs. Unfinished jobs are re-claimed after their lease."""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+    def _consume(self):
+        conn = None
+        while not self._stop.is_set():
+            try:
+                if conn is None or conn.closed:
+                    conn = connect(self.dsn)
+                claimed = conn.execute('select * from claim_jobs(%s, %s, 1, %s)',
+                                       [self.worker_id, list(self.kinds or _handlers), self.lease_seconds]).fetchall()
+                if not claimed:
+                    self._stop.wait(self.poll_interval)
+                    continue
+                self._execute(conn, claimed[0])
+            except Exception as e:
+                log.warning("Job worker loop failed: %s", e)
+                conn = None
+                self._stop.wait(self.poll_interval)
+
+    def _execute(self, conn, row):
+        handler = _handlers.get(row['kind'])
+        if row['attempts'] > row['max_attempts']:
+            # Its lease expired on every attempt (e.g. the worker keeps getting killed while running it)
+            self._finish(conn, row, 'failed', f"gave up after {row['max_attempts']} attempts")
+            return
+        if handler is None:
+            self._finish(conn, row, 'failed', f"no handler for {row['kind']}")
+            return
+        with self._lock:
+            self._running[row['id']] = row['kind']
+        started = time.monotonic()
+        try:
+            handler(row['payload'])
+        except Exception as e:
+            log.exception("Job %s (%s) failed on attempt %s: %s", row['id'], row['kind'], row['attempts'], e)
+            self._retry(conn, row, str(e))
+        else:
+            self._finish(conn, row, 'done')
+            log.debug("Job %s (%s) done in %.3fs", row['id'], row['kind'], time.monotonic() - started)
+        finally:
+            with self._lock:
+                self._running.pop(row['id'], None)
+
+    def _finish(self, conn, row, status, error=None):
+        # Only while we still hold the lease: otherwise another worker owns the job now
+        conn.execute("""update job set status = %s, last_error = %s, locked_by = null, locked_until = null, finished_at = now()
+                        where id = %s and locked_by = %s and status = 'running'""", [status, error, row['id'], self.worker_id])
+
+    def _retry(self, conn, row, error):
+        if row['attempts'] >= row['max_attempts']:
+            self._finish(conn, row, 'failed', error)
+            return
+        import psycopg
+        try:
+            conn.execute("""update job set status = 'queued', last_error = %s, locked_by = null, locked_until = null,
+                                           run_at = now() + make_interval(secs => %s)
+                            where id = %s and locked_by = %s and status = 'running'""",
+                         [error, backoff(row['attempts']), row['id'], self.worker_id])
+        except psycopg.errors.UniqueViolation:
+            # A newer job with the same dedupe key is already queued and will do the work
+            self._finish(conn, row, 'failed', f"{error} (superseded by a queued job)")
+
+    def _heartbeat(self):
+        conn = None
+        while not self._stop.wait(max(1.0, self.lease_seconds / 3)):
+            with self._lock:
+                ids = list(self._running)
+            if not ids:
+                continue
+            try:
+                if conn is None or conn.closed:
+                    conn = connect(self.dsn)
+                extended = conn.execute("""update job set locked_until = now() + make_interval(secs => %s), heartbeat_at = now()
+                                           where id = any(%s) and locked_by = %s and status = 'running' returning id""",
+                                        [self.lease_seconds, ids, self.worker_id]).fetchall()
+                lost = set(ids) - {row['id'] for row in extended}
+                if lost:
+                    log.warning("Lost the lease on jobs %s; they may run again elsewhere", sorted(lost))
+            except Exception as e:
+                log.warning("Job heartbeat failed: %s", e)
+                conn = None
+
+    def stats(self):
+        with self._lock:
+            running = dict(self._running)
+        return {
+            'worker_id': self.worker_id,
+            'leader': bool(self.scheduler and self.scheduler.is_leader),
+            'running': running,
+            'checked_at': datetime.utcnow().isoformat()
+        }
+
+
+def _check(jobs_count=200, workers=3):
+    """Run against a scratch database: every job runs once, one leader at a time, dead leases are reclaimed."""
+    from psycopg.types.json import Jsonb
+    logging.basicConfig(level=logging.WARNING)
+    kind = f"jobs.check.{uuid.uuid4().hex[:8]}"
+    runs, runs_lock = {}, threading.Lock()
+
+    @job(kind)
+    def record(payload):
+        time.sleep(0.002)
+        with runs_lock:
+            runs[payload['n']] = runs.get(payload['n'], 0) + 1
+
+    conn = connect()
+    for n in range(jobs_count):
+        conn.execute('select enqueue_job(%s, %s)', [kind, Jsonb({'n': n})])
+    # A job claimed by a worker that died without heartbeating: its lease must expire and it must run elsewhere
+    conn.execute('select enqueue_job(%s, %s)', [kind, Jsonb({'n': -1})])
+    conn.execute('select * from claim_jobs(%s, %s, 1, 1)', ['dead-worker', [kind]])
+
+    schedule_name = f"check-{kind}"
+    pool = [Worker(concurrency=4, kinds=[kind], lease_seconds=3, poll_interval=0.05,
+                   schedules={schedule_name: Schedule(schedule_name, 3600, kind, {'n': -2})}) for _ in range(workers)]
+    for worker in pool:
+        worker.scheduler.tick = 0.1
+        worker.start()
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and len(runs) < jobs_count + 2:
+        time.sleep(0.1)
+    leaders = [worker for worker in pool if worker.scheduler.is_leader]
+    print(f"[Jobs] {len(runs)}/{jobs_count + 2} jobs ran, {sum(1 for c in runs.values() if c > 1)} more than once, "
+          f"dead lease reclaimed: {-1 in runs}, schedule fired: {runs.get(-2, 0)}x, leaders: {len(leaders)}")
+
+    leaders[0].stop(timeout=5)
+    time.sleep(1)
+    successors = [worker for worker in pool if worker is not leaders[0] and worker.scheduler.is_leader]
+    print(f"[Jobs] after stopping the leader: {len(successors)} new leader, schedule fired {runs.get(-2, 0)}x in total")
+    for worker in pool:
+        worker.stop(timeout=5)
+    conn.execute('delete from job where kind = %s', [kind])
+    conn.execute('delete from job_schedule where name = %s', [schedule_name])
+    ok = len(runs) == jobs_count + 2 and all(c == 1 for c in runs.values()) and len(leaders) == 1 and len(successors) == 1
+    print('[Jobs] OK' if ok else '[Jobs] FAILED')
+    return ok
+
+
+if __name__ == '__main__':
+    import sys
+    from dotenv import load_dotenv
+    load_dotenv()
+    if '--check' in sys.argv:
+        sys.exit(0 if _check() else 1)
+    print(__doc__)
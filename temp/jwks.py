@@ -0,0 +1,228 @@
+"""Local verification of Supabase and Google sign-in tokens against cached JSON Web Key Sets.
+
+`/api/auth/google-sync` trades the Supabase session token from the OAuth callback for the app's
+own tokens. Rather than asking Supabase's auth API about every token (a network hop per login),
+the signature is checked here against the issuer's published signing keys:
+
+  * Each issuer's key set is fetched by a background thread, at start-up and then every
+    JWKS_REFRESH_SECONDS (sooner if the response's Cache-Control max-age asks for it). Requests
+    only read the cached keys, so a slow or failing key fetch never blocks a login; the last good
+    keys stay in use for up to JWKS_MAX_STALE_SECONDS while fetches keep failing.
+  * Key rotation: a token signed with a key id that is not cached wakes the refresh thread (at
+    most once per JWKS_MIN_REFRESH_SECONDS) and raises KeysUnavailable, which the route answers
+    with 503 and Retry-After. Once the new keys are in, the same token verifies. A key id still
+    missing from a key set fetched after the token was issued is rejected as invalid.
+
+Trusted issuers:
+  * Supabase: `{SUPABASE_URL}/auth/v1`, keys from SUPABASE_JWKS_URL (default
+    `{SUPABASE_URL}/auth/v1/.well-known/jwks.json`), audience SUPABASE_JWT_AUDIENCE
+    (default `authenticated`). Projects still on the legacy shared secret can set
+    SUPABASE_JWT_SECRET to also accept HS256 tokens.
+  * Google ID tokens, only when GOOGLE_CLIENT_ID (their audience) is set.
+
+RS256/ES256 verification needs the `cryptography` package next to PyJWT.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+import jwt
+
+log = logging.getLogger(__name__)
+
+REFRESH_SECONDS = float(os.getenv('JWKS_REFRESH_SECONDS', '600'))
+MIN_REFRESH_SECONDS = float(os.getenv('JWKS_MIN_REFRESH_SECONDS', '30'))
+MAX_STALE_SECONDS = float(os.getenv('JWKS_MAX_STALE_SECONDS', '86400'))
+FETCH_TIMEOUT_SECONDS = float(os.getenv('JWKS_TIMEOUT_SECONDS', '5'))
+# Allowed clock skew on exp/iat/nbf
+LEEWAY_SECONDS = 30
+
+ASYMMETRIC_ALGORITHMS = frozenset(['RS256', 'RS384', 'RS512', 'ES256', 'ES384', 'ES512', 'EdDSA'])
+GOOGLE_ISSUERS = ('https://accounts.google.com', 'accounts.google.com')
+GOOGLE_JWKS_URL = 'https://www.googleapis.com/oauth2/v3/certs'
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class KeysUnavailable(Exception):
+    """No cached key can check the token yet (first fetch pending, keys too stale, or rotation)."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"signing keys unavailable, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JWKSCache:
+    """A JWKS endpoint's signing keys, refreshed by a daemon thread and read without blocking."""
+
+    def __init__(self, url, refresh_seconds=REFRESH_SECONDS, min_refresh_seconds=MIN_REFRESH_SECONDS,
+                 max_stale_seconds=MAX_STALE_SECONDS, timeout=FETCH_TIMEOUT_SECONDS):
+        self.url = url
+        self.refresh_seconds = refresh_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.timeout = timeout
+        # (kid -> PyJWK, wall-clock time of the fetch), swapped as one tuple so readers need no lock
+        self._state = ({}, None)
+        self.last_error = None
+        self._last_attempt = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='jwks-refresh', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        failures = 0
+        while True:
+            self._wake.clear()
+            self._last_attempt = time.monotonic()
+            try:
+                interval = self.refresh()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                self.last_error = str(e)
+                log.warning("JWKS refresh from %s failed (%s in a row): %s", self.url, failures, e)
+                interval = min(self.refresh_seconds, 2 ** failures)
+            self._wake.wait(interval)
+
+    def refresh(self):
+        """Fetch and swap in the key set. Returns the seconds until the next scheduled refresh."""
+        import requests
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        keys = {}
+        for data in response.json().get('keys', []):
+            if data.get('use', 'sig') != 'sig':
+                continue
+            try:
+                keys[data.get('kid')] = jwt.PyJWK(data)
+            except jwt.PyJWTError as e:
+                log.warning("Skipping unusable key %s from %s: %s", data.get('kid'), self.url, e)
+        self._state = (keys, time.time())
+        self.last_error = None
+
+        match = _MAX_AGE_RE.search(response.headers.get('Cache-Control', ''))
+        if match:
+            return max(self.min_refresh_seconds, min(self.refresh_seconds, int(match.group(1))))
+        return self.refresh_seconds
+
+    def request_refresh(self):
+        """Wake the refresh thread, at most once per min_refresh_seconds.
+
+        Returns roughly how many seconds until fresh keys can be expected.
+        """
+        last = self._last_attempt
+        wait = 0 if last is None else self.min_refresh_seconds - (time.monotonic() - last)
+        if wait <= 0:
+            self._wake.set()
+        return max(1, int(wait) + 1)
+
+    def get(self, kid, issued_at=None):
+        keys, fetched_at = self._state
+        if fetched_at is None or time.time() - fetched_at > self.max_stale_seconds:
+            raise KeysUnavailable(self.request_refresh())
+        key = keys.get(kid)
+        if key is not None:
+            return key
+        if isinstance(issued_at, (int, float)) and fetched_at > issued_at + LEEWAY_SECONDS:
+            raise InvalidToken(f"unknown signing key {kid!r}")
+        raise KeysUnavailable(self.request_refresh())
+
+    def status(self):
+        keys, fetched_at = self._state
+        return {
+            'url': self.url,
+            'keys': len(keys),
+            'age_seconds': round(time.time() - fetched_at, 1) if fetched_at else None,
+            'last_error': self.last_error
+        }
+
+
+Issuer = namedtuple('Issuer', 'name audience keys secret')
+
+_issuers = None
+_issuers_lock = threading.Lock()
+
+
+def _supabase_url():
+    url = os.getenv('SUPABASE_URL')
+    if not url:
+        from config import Config
+        url = Config.SUPABASE_URL
+    return url.rstrip('/')
+
+
+def issuers():
+    """Trusted issuers by `iss` claim, built from the configuration on first use."""
+    global _issuers
+    if _issuers is None:
+        with _issuers_lock:
+            if _issuers is None:
+                supabase_url = _supabase_url()
+                supabase = Issuer(
+                    name=f"{supabase_url}/auth/v1",
+                    audience=os.getenv('SUPABASE_JWT_AUDIENCE', 'authenticated'),
+                    keys=JWKSCache(os.getenv('SUPABASE_JWKS_URL') or f"{supabase_url}/auth/v1/.well-known/jwks.json"),
+                    secret=os.getenv('SUPABASE_JWT_SECRET'))
+                trusted = {supabase.name: supabase}
+                if os.getenv('GOOGLE_CLIENT_ID'):
+                    google_keys = JWKSCache(GOOGLE_JWKS_URL)
+                    for name in GOOGLE_ISSUERS:
+                        trusted[name] = Issuer(name, os.getenv('GOOGLE_CLIENT_ID'), google_keys, None)
+                _issuers = trusted
+    return _issuers
+
+
+def start():
+    """Start the background key refresh for every trusted issuer (no network I/O on this thread)."""
+    for issuer in issuers().values():
+        issuer.keys.start()
+
+
+def status():
+    return {name: issuer.keys.status() for name, issuer in issuers().items()}
+
+
+def verify(token):
+    """Return the claims of a Supabase or Google token after checking its signature, issuer,
+    audience and expiry. Raises InvalidToken, or KeysUnavailable if it cannot be checked yet."""
+    try:
+        header = jwt.get_unverified_header(token)
+        unverified = jwt.decode(token, options={'verify_signature': False})
+    except jwt.PyJWTError as e:
+        raise InvalidToken(str(e)) from e
+
+    issuer = issuers().get(unverified.get('iss'))
+    if issuer is None:
+        raise InvalidToken(f"untrusted issuer {unverified.get('iss')!r}")
+    algorithm = header.get('alg')
+    if algorithm == 'HS256' and issuer.secret:
+        key = issuer.secret
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        jwk = issuer.keys.get(header.get('kid'), unverified.get('iat'))
+        # The key decides the algorithm, so a token cannot pick a weaker one for a known key id
+        if jwk.algorithm_name != algorithm:
+            raise InvalidToken(f"algorithm {algorithm} does not match the signing key")
+        key = jwk.key
+    else:
+        raise InvalidToken(f"unsupported algorithm {algorithm!r}")
+
+    try:
+        return jwt.decode(token, key, algorithms=[algorithm], audience=issuer.audience, issuer=issuer.name,
+                          leeway=LEEWAY_SECONDS, options={'require': ['exp', 'iat', 'sub']})
+    except jwt.PyJWTError as e:
+        raise InvalidToken(str(e)) from e
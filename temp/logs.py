@@ -0,0 +1,197 @@
+"""Structured, non-blocking logging.
+
+Modules log through the standard library (`log = logging.getLogger(__name__)`). `configure()`
+puts a single QueueHandler on the root logger, so the request thread only:
+
+  * samples the record: the first LOG_SAMPLE_BURST records of each message class (logger,
+    level and message template) per LOG_SAMPLE_WINDOW seconds pass, the rest are dropped and
+    counted, and the next record of that class that passes carries `suppressed: <count>`,
+  * stamps it with the request context (request_id, route, method, path, role, user_id),
+  * and puts it on a bounded queue (dropping it if the queue is full rather than blocking).
+
+A QueueListener thread, started with the first record, formats each record as one JSON line and
+writes it to the sinks in LOG_SINKS, a comma separated list of `stdout`, `stderr` and `file:<path>`.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a field
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info and record.exc_info[0] is not None:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Copies the current request's context onto the record (runs in the request thread)."""
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        record.request_id = g.get('request_id')
+        record.route = request.endpoint
+        record.method = request.method
+        record.path = request.path
+        try:
+            from flask_jwt_extended import get_jwt, get_jwt_identity
+            record.role = get_jwt().get('role')
+            record.user_id = get_jwt_identity()
+        except Exception:
+            pass  # No verified token on this request
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Per message class: let `burst` records through per `window` seconds and count the rest."""
+
+    def __init__(self, burst=10, window=60.0, max_classes=10000):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.max_classes = max_classes
+        self._classes = {}  # (logger, level, template) -> [window_start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.burst <= 0:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            state = self._classes.get(key)
+            if state is None:
+                if len(self._classes) >= self.max_classes:
+                    self._classes.clear()
+                state = self._classes[key] = [now, 0, 0]
+            if now - state[0] >= self.window:
+                state[0], state[1] = now, 0
+            if state[1] >= self.burst:
+                state[2] += 1
+                return False
+            state[1] += 1
+            suppressed, state[2] = state[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue, listener=None):
+        super().__init__(log_queue)
+        self.listener = listener
+        self.dropped = 0
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Only merge the arguments here; JSON and traceback formatting happen on the listener thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if not self._started:
+            self._start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start_listener(self):
+        with self._start_lock:
+            if self._started or self.listener is None:
+                return
+            self.listener.start()
+            self._started = True
+
+    def close(self):
+        # logging.shutdown() closes this handler at exit before the sinks it writes to (they were
+        # created first), so stopping the listener here flushes what is still queued
+        with self._start_lock:
+            if self._started:
+                self.listener.stop()
+                self._started = False
+        super().close()
+
+
+def _build_sinks(spec):
+    sinks = []
+    for name in (part.strip() for part in spec.split(',')):
+        if name == 'stdout':
+            sinks.append(logging.StreamHandler(sys.stdout))
+        elif name == 'stderr':
+            sinks.append(logging.StreamHandler(sys.stderr))
+        elif name.startswith('file:'):
+            sinks.append(logging.handlers.WatchedFileHandler(name[len('file:'):]))
+    formatter = JsonFormatter()
+    for sink in sinks:
+        sink.setFormatter(formatter)
+    return sinks or [logging.NullHandler()]
+
+
+_handler = None
+_lock = threading.Lock()
+
+
+def configure():
+    """Install the queue handler on the root logger. Safe to call twice.
+
+    Starts no thread: the listener starts with the first record that is logged, so building the
+    app at import time leaves the process single-threaded.
+    """
+    global _handler
+    with _lock:
+        if _handler is not None:
+            return _handler
+        log_queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+        listener = logging.handlers.QueueListener(log_queue, *_build_sinks(os.getenv('LOG_SINKS', 'stdout')))
+        _handler = NonBlockingQueueHandler(log_queue, listener)
+        _handler.addFilter(SamplingFilter(
+            burst=int(os.getenv('LOG_SAMPLE_BURST', '10')),
+            window=float(os.getenv('LOG_SAMPLE_WINDOW', '60'))
+        ))
+        _handler.addFilter(RequestContextFilter())
+
+        root = logging.getLogger()
+        root.handlers = [_handler]
+        root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+        return _handler
+
+
+def assign_request_id():
+    """before_request hook: reuse the caller's X-Request-ID or generate one."""
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+
+def expose_request_id(response):
+    if g.get('request_id'):
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+
+def stats():
+    return {'dropped': _handler.dropped if _handler else 0, 'queued': _handler.queue.qsize() if _handler else 0}
@@ -0,0 +1,8 @@
+-- Precomputed top-K campaign recommendations, one compact row per creator.
+-- Written by `python recommendations.py`; creator_id 0 holds the cold-start ranking.
+create table if not exists creator_recommendation (
+    creator_id   bigint primary key,
+    campaign_ids bigint[] not null default '{}',
+    scores       double precision[] not null default '{}',
+    computed_at  timestamp not null default now()
+);
@@ -0,0 +1,10 @@
+-- Instagram media metadata resolved from submitted clip URLs, keyed by shortcode.
+-- Written by clip_resolver; read when an admin accepts a clip.
+create table if not exists clip_media (
+    shortcode           text primary key,
+    media_id            text not null,
+    caption             text,
+    instagram_posted_at timestamptz,
+    error               text,
+    resolved_at         timestamp not null default now()
+);
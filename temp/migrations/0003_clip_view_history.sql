@@ -0,0 +1,9 @@
+-- Append-only view-count snapshots, one row per clip per view sync.
+-- Durable copy of the in-memory series kept by view_history.py.
+create table if not exists clip_view_history (
+    id          bigint generated always as identity primary key,
+    clip_id     bigint not null,
+    campaign_id bigint not null,
+    view_count  bigint not null,
+    captured_at timestamp not null default now()
+);
@@ -0,0 +1,102 @@
+-- Incrementally maintained campaign analytics, read by /api/admin/analytics/campaign-performance.
+-- Updated through apply_campaign_rollup_delta() on clip acceptance, rejection, deletion and view sync,
+-- so concurrent workers never race on a read-modify-write.
+
+create table if not exists campaign_rollup (
+    campaign_id        bigint primary key references campaign(id) on delete cascade,
+    accepted_clips     integer not null default 0,
+    rejected_clips     integer not null default 0,
+    total_views        bigint not null default 0,
+    milestones_reached integer not null default 0,
+    updated_at         timestamp not null default now()
+);
+
+create table if not exists campaign_creator_rollup (
+    campaign_id bigint not null references campaign(id) on delete cascade,
+    creator_id  bigint not null references creator(id) on delete cascade,
+    clips       integer not null default 0,
+    views       bigint not null default 0,
+    primary key (campaign_id, creator_id)
+);
+
+create table if not exists campaign_daily_views (
+    campaign_id bigint not null references campaign(id) on delete cascade,
+    day         date not null,
+    views       bigint not null default 0,
+    primary key (campaign_id, day)
+);
+
+-- p_accepted: +1 when a clip is accepted, -1 when an accepted clip is deleted, 0 otherwise.
+-- p_old_views/p_new_views: the clip's view count before and after the change.
+create or replace function apply_campaign_rollup_delta(
+    p_campaign_id bigint,
+    p_creator_id  bigint,
+    p_accepted    integer,
+    p_rejected    integer,
+    p_old_views   bigint,
+    p_new_views   bigint
+) returns void
+language plpgsql as $$
+declare
+    v_threshold  bigint;
+    v_views      bigint := coalesce(p_new_views, 0) - coalesce(p_old_views, 0);
+    v_milestones integer;
+begin
+    select coalesce(view_threshold, 0) into v_threshold from campaign where id = p_campaign_id;
+    v_milestones := (case when coalesce(p_new_views, 0) > 0 and p_new_views >= v_threshold then 1 else 0 end)
+                  - (case when coalesce(p_old_views, 0) > 0 and p_old_views >= v_threshold then 1 else 0 end);
+
+    insert into campaign_rollup as r (campaign_id, accepted_clips, rejected_clips, total_views, milestones_reached)
+    values (p_campaign_id, p_accepted, p_rejected, v_views, v_milestones)
+    on conflict (campaign_id) do update set
+        accepted_clips     = greatest(0, r.accepted_clips + excluded.accepted_clips),
+        rejected_clips     = r.rejected_clips + excluded.rejected_clips,
+        total_views        = greatest(0, r.total_views + excluded.total_views),
+        milestones_reached = greatest(0, r.milestones_reached + excluded.milestones_reached),
+        updated_at         = now();
+
+    if p_creator_id is not null and (p_accepted <> 0 or v_views <> 0) then
+        insert into campaign_creator_rollup as c (campaign_id, creator_id, clips, views)
+        values (p_campaign_id, p_creator_id, p_accepted, v_views)
+        on conflict (campaign_id, creator_id) do update set
+            clips = greatest(0, c.clips + excluded.clips),
+            views = greatest(0, c.views + excluded.views);
+    end if;
+
+    if v_views <> 0 then
+        insert into campaign_daily_views as d (campaign_id, day, views)
+        values (p_campaign_id, current_date, v_views)
+        on conflict (campaign_id, day) do update set views = d.views + excluded.views;
+    end if;
+end;
+$$;
+
+-- Repair path: recompute a campaign's rollups from the source tables.
+-- Daily history cannot be reconstructed and is left untouched.
+create or replace function rebuild_campaign_rollup(p_campaign_id bigint) returns void
+language plpgsql as $$
+begin
+    delete from campaign_creator_rollup where campaign_id = p_campaign_id;
+    insert into campaign_creator_rollup (campaign_id, creator_id, clips, views)
+    select campaign_id, creator_id, count(*), coalesce(sum(view_count), 0)
+    from accepted_clips where campaign_id = p_campaign_id
+    group by campaign_id, creator_id;
+
+    insert into campaign_rollup as r (campaign_id, accepted_clips, rejected_clips, total_views, milestones_reached)
+    select p_campaign_id,
+           (select count(*) from accepted_clips where campaign_id = p_campaign_id),
+           (select count(*) from submitted_clips where campaign_id = p_campaign_id and is_deleted_by_admin),
+           (select coalesce(sum(view_count), 0) from accepted_clips where campaign_id = p_campaign_id),
+           (select count(*) from accepted_clips a join campaign c on c.id = a.campaign_id
+             where a.campaign_id = p_campaign_id and a.view_count > 0 and a.view_count >= coalesce(c.view_threshold, 0))
+    on conflict (campaign_id) do update set
+        accepted_clips     = excluded.accepted_clips,
+        rejected_clips     = excluded.rejected_clips,
+        total_views        = excluded.total_views,
+        milestones_reached = excluded.milestones_reached,
+        updated_at         = now();
+end;
+$$;
+
+-- Backfill campaigns that existed before the rollups, so deltas land on correct totals
+select rebuild_campaign_rollup(id) from campaign;
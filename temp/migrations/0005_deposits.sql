@@ -0,0 +1,127 @@
+-- Wallets, the transaction ledger and the deposit pipeline.
+-- Deposit orders are created through the gateway; payment confirmations (gateway webhooks
+-- and the browser's verify-deposit call) are queued in deposit_event, one row per order,
+-- and credited to the wallet in batches by deposits.py.
+
+create table if not exists wallet (
+    user_type  text not null check (user_type in ('brand', 'creator')),
+    user_id    bigint not null,
+    balance    numeric(14, 2) not null default 0 check (balance >= 0),
+    currency   text not null default 'INR',
+    updated_at timestamp not null default now(),
+    primary key (user_type, user_id)
+);
+
+create table if not exists transactions (
+    id              bigserial primary key,
+    user_type       text not null,
+    user_id         bigint not null,
+    campaign_id     bigint references campaign(id) on delete set null,
+    amount          numeric(14, 2) not null,
+    type            text not null,   -- deposit, allocation, reclaim, earning, payout, commission
+    status          text not null default 'success' check (status in ('pending', 'success', 'failed')),
+    external_txn_id text,
+    description     text,
+    created_at      timestamp not null default now()
+);
+create index if not exists transactions_user_idx on transactions (user_type, user_id, created_at desc);
+
+create table if not exists deposit_order (
+    order_id           text primary key,
+    brand_id           bigint not null references brand(id) on delete cascade,
+    amount             numeric(14, 2) not null check (amount > 0),
+    status             text not null default 'created' check (status in ('created', 'credited', 'failed')),
+    payment_session_id text,
+    created_at         timestamp not null default now(),
+    credited_at        timestamp
+);
+
+-- Durable work queue. order_id is unique, so repeated webhooks and verify calls collapse
+-- into one row; a repeat only pulls a waiting retry forward, except a success webhook (below).
+create table if not exists deposit_event (
+    id              bigserial primary key,
+    order_id        text not null unique references deposit_order(order_id) on delete cascade,
+    source          text not null,
+    payload         jsonb,
+    status          text not null default 'pending' check (status in ('pending', 'processing', 'done', 'failed')),
+    attempts        integer not null default 0,
+    next_attempt_at timestamp not null default now(),
+    locked_until    timestamp,
+    last_error      text,
+    created_at      timestamp not null default now(),
+    updated_at      timestamp not null default now()
+);
+create index if not exists deposit_event_due_idx on deposit_event (next_attempt_at) where status in ('pending', 'processing');
+
+-- A payment the gateway reports as successful is never dropped: it re-opens a failed event
+-- (the customer has paid), and on an event that is being processed it is stored and bumps
+-- updated_at, which keeps that attempt's processor from writing its pending/failed outcome
+-- over it (deposits.py then puts the event straight back in the queue).
+create or replace function enqueue_deposit_event(p_order_id text, p_source text, p_payload jsonb)
+returns void language sql as $$
+    insert into deposit_event (order_id, source, payload)
+    values (p_order_id, p_source, p_payload)
+    on conflict (order_id) do update set
+        status = case when deposit_event.status = 'failed' then 'pending' else deposit_event.status end,
+        attempts = case when deposit_event.status = 'failed' then 0 else deposit_event.attempts end,
+        next_attempt_at = least(deposit_event.next_attempt_at, now()),
+        source = case when excluded.payload is not null then excluded.source else deposit_event.source end,
+        payload = coalesce(excluded.payload, deposit_event.payload),
+        updated_at = clock_timestamp()
+    where deposit_event.status = 'pending'
+       or (deposit_event.status in ('failed', 'processing')
+           and excluded.source = 'webhook'
+           and excluded.payload #>> '{data,payment,payment_status}' = 'SUCCESS');
+$$;
+
+-- Claim up to p_limit due events. SKIP LOCKED lets several processors run side by side, and
+-- the lease lets another processor pick up an event whose processor died mid-batch.
+create or replace function claim_deposit_events(p_limit integer, p_lease_seconds integer)
+returns setof deposit_event language sql as $$
+    update deposit_event e set
+        status = 'processing',
+        attempts = e.attempts + 1,
+        locked_until = now() + make_interval(secs => p_lease_seconds),
+        updated_at = now()
+    where e.id in (
+        select id from deposit_event
+        where (status = 'pending' and next_attempt_at <= now())
+           or (status = 'processing' and locked_until < now())
+        order by next_attempt_at
+        limit p_limit
+        for update skip locked
+    )
+    returning e.*;
+$$;
+
+-- Credit confirmed orders to their brands' wallets. Each order is credited at most once:
+-- the status flip and the balance change happen in the same transaction.
+create or replace function credit_deposits(p_order_ids text[], p_external_ids text[])
+returns table (order_id text, brand_id bigint, amount numeric, new_balance numeric)
+language plpgsql as $$
+#variable_conflict use_column
+declare
+    v_order record;
+    v_balance numeric;
+begin
+    for i in 1 .. coalesce(array_length(p_order_ids, 1), 0) loop
+        update deposit_order o set status = 'credited', credited_at = now()
+        where o.order_id = p_order_ids[i] and o.status <> 'credited'
+        returning o.order_id, o.brand_id, o.amount into v_order;
+        if not found then
+            continue;
+        end if;
+
+        insert into wallet as w (user_type, user_id, balance) values ('brand', v_order.brand_id, v_order.amount)
+        on conflict (user_type, user_id) do update set balance = w.balance + excluded.balance, updated_at = now()
+        returning w.balance into v_balance;
+
+        insert into transactions (user_type, user_id, amount, type, status, external_txn_id, description)
+        values ('brand', v_order.brand_id, v_order.amount, 'deposit', 'success', p_external_ids[i],
+                'Wallet deposit ' || v_order.order_id);
+
+        order_id := v_order.order_id; brand_id := v_order.brand_id; amount := v_order.amount; new_balance := v_balance;
+        return next;
+    end loop;
+end;
+$$;
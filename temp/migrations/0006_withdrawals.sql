@@ -0,0 +1,127 @@
+-- Creator withdrawals. Funds are reserved (debited) when the creator asks to withdraw; the
+-- payout itself is sent later in batches by withdrawals.py, and a failed payout is reverted
+-- (re-credited) automatically.
+--
+-- status: pending    -> queued, not sent yet
+--         processing -> claimed by a processor (lease in locked_until)
+--         submitted  -> part of a provider batch, waiting for the final result
+--         success | failed | reverted
+
+alter table transactions drop constraint if exists transactions_status_check;
+alter table transactions add constraint transactions_status_check check (status in ('pending', 'success', 'failed', 'reverted'));
+
+create table if not exists withdrawal (
+    id              bigserial primary key,
+    creator_id      bigint not null references creator(id) on delete cascade,
+    transaction_id  bigint references transactions(id) on delete set null,
+    amount          numeric(14, 2) not null check (amount > 0),
+    payout_method   text not null check (payout_method in ('upi', 'bank')),
+    upi_id          text,
+    bank_account    text,
+    ifsc            text,
+    reference_id    text not null unique,
+    status          text not null default 'pending'
+                    check (status in ('pending', 'processing', 'submitted', 'success', 'failed', 'reverted')),
+    batch_id        text,
+    utr             text,
+    attempts        integer not null default 0,
+    next_attempt_at timestamp not null default now(),
+    locked_until    timestamp,
+    last_error      text,
+    created_at      timestamp not null default now(),
+    submitted_at    timestamp,
+    completed_at    timestamp
+);
+-- Keyset pagination of a creator's history (newest first) and the processor's due queue
+create index if not exists withdrawal_creator_idx on withdrawal (creator_id, id desc);
+create index if not exists withdrawal_due_idx on withdrawal (next_attempt_at) where status in ('pending', 'processing');
+create index if not exists withdrawal_submitted_idx on withdrawal (batch_id) where status = 'submitted';
+
+-- Debit the wallet and queue the payout in one transaction. Raises insufficient_funds.
+create or replace function reserve_withdrawal(
+    p_creator_id bigint, p_amount numeric, p_payout_method text,
+    p_upi_id text, p_bank_account text, p_ifsc text, p_reference_id text
+) returns table (withdrawal_id bigint, new_balance numeric)
+language plpgsql as $$
+#variable_conflict use_column
+declare
+    v_balance numeric;
+    v_txn_id bigint;
+begin
+    update wallet set balance = balance - p_amount, updated_at = now()
+    where user_type = 'creator' and user_id = p_creator_id and balance >= p_amount
+    returning balance into v_balance;
+    if not found then
+        raise exception 'insufficient_funds';
+    end if;
+
+    insert into transactions (user_type, user_id, amount, type, status, external_txn_id, description)
+    values ('creator', p_creator_id, p_amount, 'payout', 'pending', p_reference_id, 'Withdrawal via ' || p_payout_method)
+    returning id into v_txn_id;
+
+    insert into withdrawal (creator_id, transaction_id, amount, payout_method, upi_id, bank_account, ifsc, reference_id)
+    values (p_creator_id, v_txn_id, p_amount, p_payout_method, p_upi_id, p_bank_account, p_ifsc, p_reference_id)
+    returning id into withdrawal_id;
+
+    new_balance := v_balance;
+    return next;
+end;
+$$;
+
+create or replace function claim_withdrawals(p_limit integer, p_lease_seconds integer)
+returns setof withdrawal language sql as $$
+    update withdrawal w set
+        status = 'processing',
+        attempts = w.attempts + 1,
+        locked_until = now() + make_interval(secs => p_lease_seconds)
+    where w.id in (
+        select id from withdrawal
+        where (status = 'pending' and next_attempt_at <= now())
+           or (status = 'processing' and locked_until < now())
+        order by next_attempt_at
+        limit p_limit
+        for update skip locked
+    )
+    returning w.*;
+$$;
+
+-- Re-credit a withdrawal that will not be paid. Only withdrawals in one of p_from_statuses
+-- are reverted, so a payout can never be both paid and refunded. Returns the new balance,
+-- or no row if the withdrawal was not revertible.
+create or replace function revert_withdrawal(p_withdrawal_id bigint, p_reason text, p_from_statuses text[])
+returns table (creator_id bigint, amount numeric, new_balance numeric)
+language plpgsql as $$
+#variable_conflict use_column
+declare
+    v_w record;
+    v_balance numeric;
+begin
+    update withdrawal w set status = 'reverted', last_error = coalesce(p_reason, w.last_error),
+                            locked_until = null, completed_at = now()
+    where w.id = p_withdrawal_id and w.status = any(p_from_statuses)
+    returning w.creator_id, w.amount, w.transaction_id, w.reference_id into v_w;
+    if not found then
+        return;
+    end if;
+
+    insert into wallet as wl (user_type, user_id, balance) values ('creator', v_w.creator_id, v_w.amount)
+    on conflict (user_type, user_id) do update set balance = wl.balance + excluded.balance, updated_at = now()
+    returning wl.balance into v_balance;
+
+    update transactions set status = 'reverted' where id = v_w.transaction_id;
+    insert into transactions (user_type, user_id, amount, type, status, external_txn_id, description)
+    values ('creator', v_w.creator_id, v_w.amount, 'reversal', 'success', v_w.reference_id,
+            'Withdrawal reverted' || coalesce(': ' || p_reason, ''));
+
+    creator_id := v_w.creator_id; amount := v_w.amount; new_balance := v_balance;
+    return next;
+end;
+$$;
+
+-- Queue depth per in-flight status, with the age of the oldest row
+create or replace function withdrawal_queue_stats()
+returns table (status text, count bigint, oldest timestamp) language sql stable as $$
+    select status, count(*), min(created_at) from withdrawal
+    where status in ('pending', 'processing', 'submitted', 'failed')
+    group by status;
+$$;
@@ -0,0 +1,65 @@
+-- Background job queue consumed by `python worker.py` (see jobs.py).
+--
+-- status: queued  -> waiting for run_at
+--         running -> claimed by locked_by until locked_until; the worker heartbeats to extend it,
+--                    and a job whose lease ran out is claimed again by another worker
+--         done | failed
+
+create table if not exists job (
+    id           bigserial primary key,
+    kind         text not null,
+    payload      jsonb not null default '{}'::jsonb,
+    status       text not null default 'queued' check (status in ('queued', 'running', 'done', 'failed')),
+    priority     integer not null default 0,
+    run_at       timestamptz not null default now(),
+    attempts     integer not null default 0,
+    max_attempts integer not null default 5,
+    dedupe_key   text,
+    locked_by    text,
+    locked_until timestamptz,
+    heartbeat_at timestamptz,
+    last_error   text,
+    created_at   timestamptz not null default now(),
+    finished_at  timestamptz
+);
+create index if not exists job_queued_idx on job (priority desc, run_at) where status = 'queued';
+create index if not exists job_lease_idx on job (locked_until) where status = 'running';
+create index if not exists job_finished_idx on job (finished_at) where status in ('done', 'failed');
+-- At most one queued job per dedupe key, so repeated nudges and schedule ticks collapse
+create unique index if not exists job_dedupe_idx on job (dedupe_key) where status = 'queued';
+
+-- When each singleton schedule last fired; only the leader (see jobs.Scheduler) writes it
+create table if not exists job_schedule (
+    name        text primary key,
+    last_run_at timestamptz,
+    next_run_at timestamptz not null default now()
+);
+
+create or replace function enqueue_job(p_kind text, p_payload jsonb default '{}'::jsonb, p_run_at timestamptz default null,
+                                       p_dedupe_key text default null, p_priority integer default 0, p_max_attempts integer default 5)
+returns bigint language sql as $$
+    insert into job (kind, payload, run_at, dedupe_key, priority, max_attempts)
+    values (p_kind, coalesce(p_payload, '{}'::jsonb), coalesce(p_run_at, now()), p_dedupe_key, p_priority, p_max_attempts)
+    on conflict (dedupe_key) where status = 'queued' do nothing
+    returning id;
+$$;
+
+-- Claim due jobs of the given kinds, including running jobs whose lease expired (their worker died)
+create or replace function claim_jobs(p_worker text, p_kinds text[], p_limit integer, p_lease_seconds integer)
+returns setof job language sql as $$
+    update job j set
+        status = 'running',
+        attempts = j.attempts + 1,
+        locked_by = p_worker,
+        locked_until = now() + make_interval(secs => p_lease_seconds),
+        heartbeat_at = now()
+    where j.id in (
+        select id from job
+        where kind = any(p_kinds)
+          and ((status = 'queued' and run_at <= now()) or (status = 'running' and locked_until < now()))
+        order by priority desc, run_at
+        limit p_limit
+        for update skip locked
+    )
+    returning j.*;
+$$;
@@ -0,0 +1,12 @@
+-- One row per payout batch call, so withdrawal metrics can be read from any process (batches are
+-- sent by the job worker, the metrics endpoint is served by the web process).
+
+create table if not exists withdrawal_batch (
+    batch_id   text primary key,
+    size       integer not null,
+    latency_ms numeric(10, 1) not null,
+    accepted   boolean not null,
+    error      text,
+    created_at timestamp not null default now()
+);
+create index if not exists withdrawal_batch_created_idx on withdrawal_batch (created_at desc);
@@ -0,0 +1,29 @@
+-- Indexes for the filters the API runs on the core tables. Each one names the queries it serves;
+-- `python explain_check.py` replays those queries and fails if one of them goes back to a
+-- sequential scan, so add the query shape there when adding a new filter.
+
+-- Login and signup look an email up in all three user tables
+create index if not exists brand_email_idx on brand (email);
+create index if not exists creator_email_idx on creator (email);
+create index if not exists admin_email_idx on admin (email);
+
+-- Brand dashboard (campaigns of a brand) and every ownership check (id + brand_id)
+create index if not exists campaign_brand_idx on campaign (brand_id);
+-- Active campaign listing and the deadline expiry job (is_active and deadline < today)
+create index if not exists campaign_active_deadline_idx on campaign (is_active, deadline);
+
+-- A creator's submissions, optionally for one campaign (my campaigns, submission limit, clip lists)
+create index if not exists submitted_clips_creator_campaign_idx on submitted_clips (creator_id, campaign_id);
+-- Submissions of a campaign (admin review, campaign deletion)
+create index if not exists submitted_clips_campaign_idx on submitted_clips (campaign_id);
+
+-- Accepted clips of a campaign, optionally of one creator (leaderboard, view totals, clip lists)
+create index if not exists accepted_clips_campaign_creator_idx on accepted_clips (campaign_id, creator_id);
+-- A creator's accepted clips across campaigns (my campaigns)
+create index if not exists accepted_clips_creator_idx on accepted_clips (creator_id);
+
+-- View history of a campaign since a timestamp, in capture order (view_history catch-up)
+create index if not exists clip_view_history_campaign_idx on clip_view_history (campaign_id, captured_at);
+
+-- withdrawal_queue_stats() only counts the unsettled withdrawals
+create index if not exists withdrawal_open_idx on withdrawal (status) where status in ('pending', 'processing', 'submitted', 'failed');
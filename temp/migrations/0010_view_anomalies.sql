@@ -0,0 +1,184 @@
+-- Online anomaly detection on view syncs (see anomalies.py). Each sync is scored in O(1) against
+-- exponentially weighted growth-rate baselines of the clip, its creator and its campaign; an
+-- outlier jump is held in view_anomaly instead of being written to accepted_clips.view_count,
+-- so it never reaches the rollups, the campaign total or the budget until an admin approves it.
+
+-- Per-clip state. Rates are ln(1 + views gained per hour), which keeps viral-but-organic growth
+-- within a few standard deviations while a bought spike still stands out.
+create table if not exists clip_view_stats (
+    clip_id     bigint primary key references accepted_clips(id) on delete cascade,
+    last_views  bigint not null default 0,              -- last synced count, net of view_offset
+    last_at     timestamp not null default now(),
+    view_offset bigint not null default 0,              -- views rejected as inorganic, subtracted from every later sync
+    rate_mean   double precision not null default 0,
+    rate_var    double precision not null default 0,
+    samples     integer not null default 0
+);
+
+create table if not exists view_baseline (
+    scope      text not null check (scope in ('creator', 'campaign')),
+    scope_id   bigint not null,
+    rate_mean  double precision not null default 0,
+    rate_var   double precision not null default 0,
+    samples    integer not null default 0,
+    updated_at timestamp not null default now(),
+    primary key (scope, scope_id)
+);
+
+create table if not exists view_anomaly (
+    id            bigserial primary key,
+    clip_id       bigint not null references accepted_clips(id) on delete cascade,
+    campaign_id   bigint not null references campaign(id) on delete cascade,
+    creator_id    bigint not null references creator(id) on delete cascade,
+    counted_views bigint not null,   -- accepted_clips.view_count when flagged: what earnings still use
+    held_views    bigint not null,   -- latest synced count, held back until reviewed
+    rate          double precision not null,
+    score         double precision,  -- z-score against the baseline below; null when no baseline was warm yet
+    baseline      text,              -- clip, creator or campaign: the most lenient warm baseline
+    status        text not null default 'open' check (status in ('open', 'approved', 'rejected')),
+    created_at    timestamp not null default now(),
+    updated_at    timestamp not null default now(),
+    reviewed_at   timestamp,
+    reviewed_by   bigint
+);
+-- At most one open flag per clip; later syncs of a held clip update it
+create unique index if not exists view_anomaly_open_clip_idx on view_anomaly (clip_id) where status = 'open';
+-- The admin flag queue
+create index if not exists view_anomaly_queue_idx on view_anomaly (status, id desc);
+
+-- Score a sync and either fold it into the baselines or hold it.
+-- p_previous_views/p_previous_at seed the clip's state on its first sync (accepted_clips.view_count
+-- and submitted_at). Returns the count to store (net of rejected views), or held = true.
+-- A jump is an outlier when it is at least p_min_jump views and at least p_threshold standard
+-- deviations above every baseline that has p_min_samples samples; with no warm baseline, only
+-- jumps above p_cold_max_jump are held.
+create or replace function observe_clip_views(
+    p_clip_id        bigint,
+    p_campaign_id    bigint,
+    p_creator_id     bigint,
+    p_previous_views bigint,
+    p_previous_at    timestamp,
+    p_views          bigint,
+    p_at             timestamp,
+    p_alpha          double precision,
+    p_threshold      double precision,
+    p_min_samples    integer,
+    p_min_jump       bigint,
+    p_cold_max_jump  bigint,
+    p_min_std        double precision,
+    p_min_hours      double precision
+) returns table (views bigint, held boolean, anomaly_id bigint, rate double precision, score double precision)
+language plpgsql as $$
+declare
+    v_stats    clip_view_stats;
+    v_creator  view_baseline;
+    v_campaign view_baseline;
+    v_open_id  bigint;
+    v_views    bigint;
+    v_jump     bigint;
+    v_rate     double precision;
+    v_z        double precision;
+    v_score    double precision;
+    v_baseline text;
+    v_id       bigint;
+begin
+    insert into clip_view_stats (clip_id, last_views, last_at)
+    values (p_clip_id, coalesce(p_previous_views, 0), coalesce(p_previous_at, p_at))
+    on conflict (clip_id) do nothing;
+    select * into v_stats from clip_view_stats s where s.clip_id = p_clip_id for update;
+
+    v_views := greatest(0, p_views - v_stats.view_offset);
+    v_jump := v_views - v_stats.last_views;
+    v_rate := ln(1 + greatest(v_jump, 0) / greatest(extract(epoch from (p_at - v_stats.last_at)) / 3600.0, p_min_hours));
+    update clip_view_stats s set last_views = v_views, last_at = p_at where s.clip_id = p_clip_id;
+
+    -- Already held: keep the flag's count current, it stays out of earnings until reviewed
+    select a.id into v_open_id from view_anomaly a where a.clip_id = p_clip_id and a.status = 'open' for update;
+    if v_open_id is not null then
+        update view_anomaly a set held_views = v_views, updated_at = now() where a.id = v_open_id;
+        return query select v_views, true, v_open_id, v_rate, null::double precision;
+        return;
+    end if;
+
+    select * into v_creator from view_baseline b where b.scope = 'creator' and b.scope_id = p_creator_id;
+    select * into v_campaign from view_baseline b where b.scope = 'campaign' and b.scope_id = p_campaign_id;
+
+    if v_stats.samples >= p_min_samples then
+        v_score := (v_rate - v_stats.rate_mean) / greatest(sqrt(v_stats.rate_var), p_min_std);
+        v_baseline := 'clip';
+    end if;
+    if coalesce(v_creator.samples, 0) >= p_min_samples then
+        v_z := (v_rate - v_creator.rate_mean) / greatest(sqrt(v_creator.rate_var), p_min_std);
+        if v_score is null or v_z < v_score then
+            v_score := v_z;
+            v_baseline := 'creator';
+        end if;
+    end if;
+    if coalesce(v_campaign.samples, 0) >= p_min_samples then
+        v_z := (v_rate - v_campaign.rate_mean) / greatest(sqrt(v_campaign.rate_var), p_min_std);
+        if v_score is null or v_z < v_score then
+            v_score := v_z;
+            v_baseline := 'campaign';
+        end if;
+    end if;
+
+    if (v_score is null and v_jump > p_cold_max_jump)
+       or (v_score is not null and v_jump >= p_min_jump and v_score >= p_threshold) then
+        insert into view_anomaly (clip_id, campaign_id, creator_id, counted_views, held_views, rate, score, baseline)
+        values (p_clip_id, p_campaign_id, p_creator_id, coalesce(p_previous_views, 0), v_views, v_rate, v_score, v_baseline)
+        returning id into v_id;
+        return query select v_views, true, v_id, v_rate, v_score;
+        return;
+    end if;
+
+    -- Only growth is folded in (a flat or corrected count says nothing about the growth rate),
+    -- and held jumps never are, so a spike cannot drag the baselines up after itself
+    if v_jump > 0 then
+        update clip_view_stats s set
+            rate_mean = case when s.samples = 0 then v_rate else s.rate_mean + p_alpha * (v_rate - s.rate_mean) end,
+            rate_var  = case when s.samples = 0 then 0 else (1 - p_alpha) * (s.rate_var + p_alpha * (v_rate - s.rate_mean) ^ 2) end,
+            samples   = s.samples + 1
+        where s.clip_id = p_clip_id;
+
+        insert into view_baseline as b (scope, scope_id, rate_mean, rate_var, samples)
+        values ('creator', p_creator_id, v_rate, 0, 1), ('campaign', p_campaign_id, v_rate, 0, 1)
+        on conflict (scope, scope_id) do update set
+            rate_mean  = b.rate_mean + p_alpha * (excluded.rate_mean - b.rate_mean),
+            rate_var   = (1 - p_alpha) * (b.rate_var + p_alpha * (excluded.rate_mean - b.rate_mean) ^ 2),
+            samples    = b.samples + 1,
+            updated_at = now();
+    end if;
+
+    return query select v_views, false, null::bigint, v_rate, v_score;
+end;
+$$;
+
+-- Close an open flag. Rejecting discards everything synced while the flag was open, for good: it
+-- is added to the clip's view_offset, so the next sync (which still reports those views) is
+-- measured from the counted views.
+create or replace function resolve_view_anomaly(p_anomaly_id bigint, p_approve boolean, p_admin_id bigint)
+returns setof view_anomaly
+language plpgsql as $$
+declare
+    v_anomaly view_anomaly;
+begin
+    update view_anomaly a set
+        status      = case when p_approve then 'approved' else 'rejected' end,
+        reviewed_at = now(),
+        reviewed_by = p_admin_id,
+        updated_at  = now()
+    where a.id = p_anomaly_id and a.status = 'open'
+    returning * into v_anomaly;
+    if not found then
+        raise exception 'anomaly_not_open';
+    end if;
+
+    if not p_approve then
+        update clip_view_stats s set
+            view_offset = s.view_offset + greatest(0, v_anomaly.held_views - v_anomaly.counted_views),
+            last_views  = v_anomaly.counted_views
+        where s.clip_id = v_anomaly.clip_id;
+    end if;
+    return next v_anomaly;
+end;
+$$;
@@ -0,0 +1,4 @@
+-- clip_resolver now resolves clips through oEmbed, which may not return a media id. The ids
+-- stored so far were decoded from the shortcode: legacy media pks, not Graph media ids.
+alter table clip_media alter column media_id drop not null;
+update clip_media set media_id = null;
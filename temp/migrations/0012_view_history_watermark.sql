@@ -0,0 +1,7 @@
+-- view_history catches up on clip_view_history by id instead of captured_at (an app-clock
+-- timestamp, so rows could commit behind the watermark), and deleting a clip now writes a
+-- tombstone row that every worker, and every later load, applies.
+alter table clip_view_history add column if not exists removed boolean not null default false;
+create index if not exists clip_view_history_campaign_id_idx on clip_view_history (campaign_id, id);
+-- Replaced by the index above: nothing reads the history by captured_at any more
+drop index if exists clip_view_history_campaign_idx;
@@ -0,0 +1,4 @@
+-- withdrawals.reconcile() pages through submitted withdrawals by id, oldest first
+create index if not exists withdrawal_submitted_id_idx on withdrawal (id) where status = 'submitted';
+-- Replaced by the index above: nothing looks submitted withdrawals up by batch_id
+drop index if exists withdrawal_submitted_idx;
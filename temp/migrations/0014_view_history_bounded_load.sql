@@ -0,0 +1,11 @@
+-- view_history loads a campaign's recent snapshots only (VIEW_HISTORY_LOAD_DAYS). Everything
+-- older is summed up by this function: each clip's last snapshot, and its last tombstone,
+-- captured before the cutoff, so the campaign totals still start from the right values.
+create or replace function clip_view_history_baseline(p_campaign_id bigint, p_before timestamp)
+returns table (id bigint, clip_id bigint, view_count bigint, captured_at timestamp, removed boolean)
+language sql stable as $$
+    select distinct on (h.clip_id, h.removed) h.id, h.clip_id, h.view_count, h.captured_at, h.removed
+    from clip_view_history h
+    where h.campaign_id = p_campaign_id and h.captured_at < p_before
+    order by h.clip_id, h.removed, h.captured_at desc, h.id desc;
+$$;
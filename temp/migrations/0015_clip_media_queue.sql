@@ -0,0 +1,26 @@
+-- Clip URLs waiting to be resolved are clip_media rows without resolved_at. submit_clip inserts
+-- them and nudges a `clips.resolve_media` job; the job worker resolves them in batches.
+alter table clip_media alter column resolved_at drop not null;
+create index if not exists clip_media_pending_idx on clip_media (shortcode) where resolved_at is null;
+
+-- Clips accepted before their metadata was resolved, by the shortcode in their URL
+create index if not exists accepted_clips_unresolved_shortcode_idx
+    on accepted_clips ((substring(clip_url from 'instagram\.com/(?:[\w.]+/)?(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)')))
+    where media_id is null;
+
+-- Copy freshly resolved metadata onto accepted clips that were accepted without it.
+-- Returns the ids of the clips that were filled in.
+create or replace function apply_clip_media(p_shortcodes text[])
+returns setof bigint language sql as $$
+    update accepted_clips a set
+        media_id            = m.media_id,
+        caption             = coalesce(a.caption, m.caption),
+        instagram_posted_at = coalesce(a.instagram_posted_at, m.instagram_posted_at)
+    from clip_media m
+    where m.shortcode = any(p_shortcodes)
+      and m.resolved_at is not null
+      and m.error is null
+      and a.media_id is null and a.caption is null and a.instagram_posted_at is null
+      and substring(a.clip_url from 'instagram\.com/(?:[\w.]+/)?(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)') = m.shortcode
+    returning a.id;
+$$;
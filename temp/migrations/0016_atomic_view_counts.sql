@@ -0,0 +1,32 @@
+-- View syncs used to write a campaign total computed from a total read earlier in the request,
+-- so concurrent syncs of clips in the same campaign overwrote each other's increments.
+
+-- Move a campaign's total_view_count by p_delta (never below 0) and return the new total
+create or replace function increment_campaign_views(p_campaign_id bigint, p_delta bigint)
+returns bigint language sql as $$
+    update campaign set total_view_count = greatest(0, coalesce(total_view_count, 0) + p_delta)
+    where id = p_campaign_id
+    returning total_view_count;
+$$;
+
+-- Set an accepted clip's view count and move its campaign's total by the difference. The clip
+-- row is locked first, so concurrent syncs of one clip each apply their difference to the count
+-- the previous one wrote. Returns no row if the clip no longer exists.
+create or replace function apply_clip_view_count(p_clip_id bigint, p_view_count bigint)
+returns table (old_view_count bigint, total_view_count bigint)
+language plpgsql as $$
+declare
+    v_old      bigint;
+    v_campaign bigint;
+begin
+    select coalesce(a.view_count, 0), a.campaign_id into v_old, v_campaign
+    from accepted_clips a where a.id = p_clip_id
+    for update;
+    if not found then
+        return;
+    end if;
+
+    update accepted_clips set view_count = p_view_count where id = p_clip_id;
+    return query select v_old, increment_campaign_views(v_campaign, p_view_count - v_old);
+end;
+$$;
@@ -0,0 +1,5 @@
+-- When a clip was accepted or rejected, for the creator's activity feed (routes/payments.py).
+-- Rows reviewed before this migration keep null and fall back to their submission time.
+alter table accepted_clips add column if not exists accepted_at timestamp;
+alter table accepted_clips alter column accepted_at set default now();
+alter table submitted_clips add column if not exists reviewed_at timestamp;
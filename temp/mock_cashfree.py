@@ -0,0 +1,122 @@
+"""Local stand-in for the Cashfree Payment Gateway and Payouts APIs used by deposits / withdrawals.
+
+    python mock_cashfree.py             # listens on :5002
+    CASHFREE_API_BASE=http://localhost:5002 CASHFREE_PAYOUT_BASE=http://localhost:5002 \
+        CASHFREE_SECRET_KEY=mock-secret python app.py
+
+Orders start ACTIVE. `POST /mock/pay/<order_id>` plays the customer: it marks the order PAID
+(or `?status=EXPIRED`) and delivers a signed PAYMENT_SUCCESS webhook to
+MOCK_CASHFREE_WEBHOOK_URL. MOCK_CASHFREE_LATENCY_MS and MOCK_CASHFREE_FAILURE_RATE slow down
+or fail API calls to exercise the processor's retries.
+
+Payout transfers stay PENDING for MOCK_PAYOUT_SETTLE_MS, then settle as SUCCESS, or as FAILED
+with probability MOCK_PAYOUT_FAILURE_RATE (always for a VPA starting with `fail`).
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import time
+import uuid
+
+from flask import Flask, request, jsonify
+
+app = Flask(__name__)
+orders = {}
+transfers = {}   # transfer id -> transfer
+batches = {}     # batch id -> [transfer id]
+
+
+def _simulate_network():
+    time.sleep(float(os.getenv('MOCK_CASHFREE_LATENCY_MS', '100')) / 1000)
+    return random.random() < float(os.getenv('MOCK_CASHFREE_FAILURE_RATE', '0'))
+
+
+@app.route('/pg/orders', methods=['POST'])
+def create_order():
+    if _simulate_network():
+        return jsonify({'message': 'Mock transient failure', 'code': 'internal_error'}), 500
+    body = request.get_json()
+    order = dict(body, cf_order_id=str(random.randint(10**9, 10**10)), order_status='ACTIVE',
+                 payment_session_id='session_' + uuid.uuid4().hex)
+    orders[body['order_id']] = order
+    return jsonify(order), 200
+
+
+@app.route('/pg/orders/<order_id>', methods=['GET'])
+def get_order(order_id):
+    if _simulate_network():
+        return jsonify({'message': 'Mock transient failure', 'code': 'internal_error'}), 500
+    order = orders.get(order_id)
+    if not order:
+        return jsonify({'message': 'order not found', 'code': 'order_not_found'}), 404
+    return jsonify(order), 200
+
+
+@app.route('/mock/pay/<order_id>', methods=['POST'])
+def pay(order_id):
+    import requests
+    order = orders.get(order_id)
+    if not order:
+        return jsonify({'message': 'order not found'}), 404
+    order['order_status'] = request.args.get('status', 'PAID')
+    if order['order_status'] != 'PAID' or request.args.get('webhook') == 'false':
+        return jsonify(order), 200
+
+    body = json.dumps({
+        'type': 'PAYMENT_SUCCESS_WEBHOOK',
+        'data': {
+            'order': {'order_id': order_id, 'order_amount': order['order_amount'], 'order_currency': 'INR'},
+            'payment': {'cf_payment_id': random.randint(10**9, 10**10), 'payment_status': 'SUCCESS', 'payment_amount': order['order_amount']}
+        }
+    }).encode()
+    timestamp = str(int(time.time() * 1000))
+    signature = base64.b64encode(hmac.new(os.getenv('CASHFREE_SECRET_KEY', 'mock-secret').encode(), timestamp.encode() + body, hashlib.sha256).digest()).decode()
+    response = requests.post(os.getenv('MOCK_CASHFREE_WEBHOOK_URL', 'http://localhost:5000/api/payments/webhook/cashfree'), data=body, headers={
+        'Content-Type': 'application/json', 'x-webhook-timestamp': timestamp, 'x-webhook-signature': signature
+    }, timeout=10)
+    return jsonify(dict(order, webhook_status=response.status_code)), 200
+
+
+@app.route('/payout/v1/requestBatchTransfer', methods=['POST'])
+def request_batch_transfer():
+    if _simulate_network():
+        return jsonify({'status': 'ERROR', 'message': 'Mock transient failure'}), 500
+    body = request.get_json()
+    batch_id = body['batchTransferId']
+    if batch_id in batches:
+        return jsonify({'status': 'ERROR', 'message': 'Batch transfer id already exists'}), 409
+    settle_at = time.time() + float(os.getenv('MOCK_PAYOUT_SETTLE_MS', '2000')) / 1000
+    batches[batch_id] = []
+    for row in body['batch']:
+        # Transfer ids are idempotent: a resent transfer keeps its original outcome
+        transfer = transfers.setdefault(row['transferId'], dict(row, settle_at=settle_at, failed=(
+            str(row.get('vpa', '')).startswith('fail') or random.random() < float(os.getenv('MOCK_PAYOUT_FAILURE_RATE', '0')))))
+        batches[batch_id].append(transfer['transferId'])
+    return jsonify({'status': 'SUCCESS', 'subCode': '200', 'data': {'batchTransferId': batch_id}}), 200
+
+
+@app.route('/payout/v1/getBatchTransferStatus', methods=['GET'])
+def get_batch_transfer_status():
+    if _simulate_network():
+        return jsonify({'status': 'ERROR', 'message': 'Mock transient failure'}), 500
+    batch_id = request.args.get('batchTransferId')
+    if batch_id not in batches:
+        return jsonify({'status': 'ERROR', 'message': 'batch not found'}), 404
+    rows = []
+    for transfer_id in batches[batch_id]:
+        transfer = transfers[transfer_id]
+        row = {'transferId': transfer_id, 'amount': transfer['amount'], 'status': 'PENDING'}
+        if time.time() >= transfer['settle_at']:
+            if transfer['failed']:
+                row.update(status='FAILED', reason='Beneficiary account is invalid')
+            else:
+                row.update(status='SUCCESS', utr=transfer.setdefault('utr', str(random.randint(10**11, 10**12))))
+        rows.append(row)
+    return jsonify({'status': 'SUCCESS', 'data': {'batchTransferId': batch_id, 'rows': rows}}), 200
+
+
+if __name__ == '__main__':
+    app.run(port=int(os.getenv('MOCK_CASHFREE_PORT', '5002')), threaded=True)
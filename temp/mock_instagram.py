@@ -0,0 +1,57 @@
+"""Local stand-in for the Graph API batch endpoint, answering the instagram_oembed calls of clip_resolver.
+
+    python mock_instagram.py            # listens on :5001
+    INSTAGRAM_API_BASE=http://localhost:5001 python app.py
+
+MOCK_INSTAGRAM_LATENCY_MS adds a delay per batch call and MOCK_INSTAGRAM_FAILURE_RATE makes
+that share of batch calls fail with a 500, to exercise retries.
+"""
+import json
+import os
+import random
+import re
+import time
+import zlib
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+from flask import Flask, request, jsonify
+
+app = Flask(__name__)
+
+
+@app.route('/', methods=['POST'])
+def graph_batch():
+    time.sleep(float(os.getenv('MOCK_INSTAGRAM_LATENCY_MS', '50')) / 1000)
+    if random.random() < float(os.getenv('MOCK_INSTAGRAM_FAILURE_RATE', '0')):
+        return jsonify({'error': {'message': 'Mock transient failure', 'code': 2}}), 500
+
+    batch = json.loads(request.form.get('batch') or '[]')
+    responses = []
+    for item in batch:
+        url = parse_qs(urlparse(item['relative_url']).query).get('url', [''])[0]
+        match = re.search(r'/p/([A-Za-z0-9_-]+)', url)
+        if not match:
+            responses.append({'code': 400, 'body': json.dumps({'error': {'message': 'Invalid URL', 'code': 100}})})
+            continue
+        shortcode = match.group(1)
+        # Deterministic fake metadata so repeated runs give the same results
+        seed = zlib.crc32(shortcode.encode())
+        posted_at = datetime(2025, 1, 1) + timedelta(minutes=seed % 500000)
+        responses.append({
+            'code': 200,
+            'body': json.dumps({
+                'media_id': str(17800000000000000 + seed),
+                'title': f"Mock caption for {shortcode}",
+                'html': f'<blockquote class="instagram-media"><a href="{url}">View this post</a>'
+                        f'<time datetime="{posted_at.strftime("%Y-%m-%dT%H:%M:%S+00:00")}"></time></blockquote>',
+                'provider_name': 'Instagram',
+                'type': 'rich',
+                'version': '1.0'
+            })
+        })
+    return jsonify(responses), 200
+
+
+if __name__ == '__main__':
+    app.run(port=int(os.getenv('MOCK_INSTAGRAM_PORT', '5001')), threaded=True)
@@ -0,0 +1,132 @@
+"""Minimal Cashfree Payment Gateway and Payouts clients.
+
+Point CASHFREE_API_BASE and CASHFREE_PAYOUT_BASE at `python mock_cashfree.py` to run the
+whole deposit and withdrawal flow locally.
+"""
+import base64
+import hashlib
+import hmac
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+API_VERSION = '2023-08-01'
+
+# Gateway order states (GET /pg/orders/<id> -> order_status)
+ORDER_PAID = 'PAID'
+ORDER_ACTIVE = 'ACTIVE'
+ORDER_TERMINAL_FAILURES = frozenset(['EXPIRED', 'TERMINATED', 'TERMINATION_REQUESTED'])
+
+# Payout transfer states (batch status -> transfers[].status)
+TRANSFER_SUCCESS = 'SUCCESS'
+TRANSFER_FAILURES = frozenset(['FAILED', 'REJECTED', 'REVERSED'])
+
+
+class GatewayError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def rejected(self):
+        """The provider answered and refused the request (4xx), so it was not acted on.
+
+        409 is left out: it means a request with the same id was already taken.
+        """
+        return self.status_code is not None and 400 <= self.status_code < 500 and self.status_code != 409
+
+
+class CashfreeClient:
+    def __init__(self, base_url, client_id, client_secret, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv('CASHFREE_API_BASE', 'https://sandbox.cashfree.com'),
+            os.getenv('CASHFREE_APP_ID', ''),
+            os.getenv('CASHFREE_SECRET_KEY', '')
+        )
+
+    def _request(self, method, path, **kwargs):
+        import requests
+        response = requests.request(method, self.base_url + path, headers={
+            'x-client-id': self.client_id,
+            'x-client-secret': self.client_secret,
+            'x-api-version': API_VERSION,
+            'Content-Type': 'application/json'
+        }, timeout=self.timeout, **kwargs)
+        if response.status_code >= 400:
+            raise GatewayError(f"{method} {path} failed with {response.status_code}: {response.text[:200]}", response.status_code)
+        return response.json()
+
+    def create_order(self, order_id, amount, customer_id, customer_email=None, customer_phone=None, return_url=None, notify_url=None):
+        body = {
+            'order_id': order_id,
+            'order_amount': round(float(amount), 2),
+            'order_currency': 'INR',
+            'customer_details': {
+                'customer_id': str(customer_id),
+                'customer_email': customer_email,
+                'customer_phone': customer_phone or os.getenv('CASHFREE_DEFAULT_PHONE', '9999999999')
+            },
+            'order_meta': {'return_url': return_url, 'notify_url': notify_url}
+        }
+        return self._request('POST', '/pg/orders', json=body)
+
+    def get_order(self, order_id):
+        return self._request('GET', f"/pg/orders/{order_id}")
+
+    def verify_webhook(self, raw_body, timestamp, signature):
+        """Cashfree signs webhooks with base64(HMAC-SHA256(secret, timestamp + raw body))."""
+        if not self.client_secret:
+            # Anyone can compute an HMAC with an empty key, so nothing is accepted without one
+            log.error("CASHFREE_SECRET_KEY is not set; rejecting webhook")
+            return False
+        if not timestamp or not signature:
+            return False
+        expected = base64.b64encode(hmac.new(self.client_secret.encode(), timestamp.encode() + raw_body, hashlib.sha256).digest()).decode()
+        return hmac.compare_digest(expected, signature)
+
+
+class PayoutClient(CashfreeClient):
+    """Batch transfers. A transfer id is accepted once, so resending a batch never pays twice."""
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv('CASHFREE_PAYOUT_BASE', 'https://payout-gamma.cashfree.com'),
+            os.getenv('CASHFREE_PAYOUT_CLIENT_ID', os.getenv('CASHFREE_APP_ID', '')),
+            os.getenv('CASHFREE_PAYOUT_SECRET', os.getenv('CASHFREE_SECRET_KEY', ''))
+        )
+
+    def request_batch_transfer(self, batch_id, transfers):
+        """`transfers`: dicts with transfer_id, amount, and either vpa or bank_account + ifsc."""
+        batch = []
+        for transfer in transfers:
+            row = {'transferId': transfer['transfer_id'], 'amount': round(float(transfer['amount']), 2),
+                   'remarks': transfer.get('remarks') or 'Creator withdrawal'}
+            if transfer.get('vpa'):
+                row.update(transferMode='upi', vpa=transfer['vpa'])
+            else:
+                row.update(transferMode='banktransfer', bankAccount=transfer['bank_account'], ifsc=transfer['ifsc'])
+            batch.append(row)
+        return self._request('POST', '/payout/v1/requestBatchTransfer', json={'batchTransferId': batch_id, 'batch': batch})
+
+    def get_batch_status(self, batch_id):
+        """{transfer id: {'status', 'utr', 'reason'}} for every transfer the provider knows in the batch.
+
+        Raises GatewayError with status_code 404 for a batch the provider never accepted.
+        """
+        body = self._request('GET', '/payout/v1/getBatchTransferStatus', params={'batchTransferId': batch_id})
+        rows = (body.get('data') or {}).get('rows') or []
+        return {row['transferId']: {'status': row.get('status'), 'utr': row.get('utr'), 'reason': row.get('reason')}
+                for row in rows}
+
+
+gateway = CashfreeClient.from_env()
+payouts = PayoutClient.from_env()
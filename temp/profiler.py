@@ -0,0 +1,227 @@
+"""Opt-in statistical profiler for individual requests.
+
+A request is profiled when it is picked by PROFILE_SAMPLE_RATE (0 disables random sampling)
+or when an admin sends `X-Profile: 1`. While at least one request is being profiled, a single
+daemon thread wakes every PROFILE_INTERVAL_MS, reads the stacks of the profiled request
+threads from `sys._current_frames()` and counts them per route. Nothing is traced or
+instrumented, so unprofiled requests pay one dict lookup and profiled ones pay nothing on
+their own thread.
+
+Stacks are kept in memory in collapsed ("folded") form, `frame;frame;frame count`, which
+flamegraph.pl, speedscope and inferno read directly. Each worker process has its own profile.
+
+The sampler needs real OS threads: under gevent (or eventlet) monkey-patching, requests run as
+greenlets that share one OS thread, `threading.get_ident()` names the greenlet rather than a key
+of `sys._current_frames()`, and the sampler itself only runs when the request yields. The
+profiler therefore turns itself off in such a process (`summary()` says so) instead of
+reporting empty or misleading profiles.
+
+`python profiler.py` measures the overhead on a CPU-bound workload.
+"""
+import os
+import random
+import sys
+import threading
+import logging
+import time
+
+from flask import g, request
+
+log = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+MAX_DEPTH = 128
+# Per route; once reached, further new stacks are counted under a single truncated entry
+MAX_STACKS_PER_ROUTE = 5000
+_UNCHECKED = object()
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+        frame = frame.f_back
+    names.reverse()
+    return ';'.join(names)
+
+
+def _green_threads():
+    """The library that monkey-patched threading with green threads, if any."""
+    monkey = sys.modules.get('gevent.monkey')
+    if monkey is not None and monkey.is_module_patched('threading'):
+        return 'gevent'
+    patcher = sys.modules.get('eventlet.patcher')
+    if patcher is not None and patcher.is_monkey_patched('thread'):
+        return 'eventlet'
+    return None
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._threads = {}      # thread ident -> route being profiled on it
+        self._stacks = {}       # route -> {collapsed stack: samples}
+        self._requests = {}     # route -> profiled request count
+        self._samples = 0
+        self._sampler_cpu = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._disabled = _UNCHECKED  # checked on first use, after any monkey-patching
+
+    @property
+    def disabled_reason(self):
+        if self._disabled is _UNCHECKED:
+            green = _green_threads()
+            self._disabled = f"{green} green threads cannot be sampled" if green else None
+            if green:
+                log.warning("Request profiler disabled: %s", self._disabled)
+        return self._disabled
+
+    def begin(self, route):
+        if self.disabled_reason:
+            return
+        with self._lock:
+            self._threads[threading.get_ident()] = route
+            self._requests[route] = self._requests.get(route, 0) + 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def end(self):
+        with self._lock:
+            self._threads.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                if not self._threads:
+                    self._wake.clear()
+                    continue
+            started = time.thread_time()
+            self._sample()
+            self._sampler_cpu += time.thread_time() - started
+            time.sleep(self.interval)
+
+    def _sample(self):
+        with self._lock:
+            threads = dict(self._threads)
+        frames = sys._current_frames()
+        collapsed = [(route, _collapse(frames[ident])) for ident, route in threads.items() if ident in frames]
+        with self._lock:
+            for route, stack in collapsed:
+                stacks = self._stacks.setdefault(route, {})
+                if stack not in stacks and len(stacks) >= MAX_STACKS_PER_ROUTE:
+                    stack = '[truncated]'
+                stacks[stack] = stacks.get(stack, 0) + 1
+                self._samples += 1
+
+    def collapsed(self, route=None):
+        """Folded stacks for one route, or for all routes with the route as the root frame."""
+        with self._lock:
+            if route is not None:
+                return ''.join(f"{stack} {count}\n" for stack, count in self._stacks.get(route, {}).items())
+            return ''.join(f"{name};{stack} {count}\n" for name, stacks in self._stacks.items() for stack, count in stacks.items())
+
+    def summary(self):
+        with self._lock:
+            routes = {name: {'requests': self._requests.get(name, 0), 'samples': sum(stacks.values()), 'stacks': len(stacks)}
+                      for name, stacks in self._stacks.items()}
+            samples, cpu = self._samples, self._sampler_cpu
+            active = len(self._threads)
+        return {
+            'enabled': not self.disabled_reason,
+            'disabled_reason': self.disabled_reason,
+            'interval_ms': self.interval * 1000,
+            'active': active,
+            'samples': samples,
+            'sampler_cpu_ms': round(cpu * 1000, 3),
+            'cpu_us_per_sample': round(cpu / samples * 1e6, 2) if samples else None,
+            'routes': routes
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
+            self._samples, self._sampler_cpu = 0, 0.0
+
+
+profiler = SamplingProfiler(interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000)
+SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+
+
+def _admin_requested():
+    if request.headers.get(PROFILE_HEADER) != '1':
+        return False
+    try:
+        from flask_jwt_extended import get_jwt, verify_jwt_in_request
+        verify_jwt_in_request(optional=True)
+        return get_jwt().get('role') == 'admin'
+    except Exception:
+        return False
+
+
+def start_request():
+    """before_request hook: decide whether to profile this request."""
+    if request.endpoint is None or request.method == 'OPTIONS':
+        return
+    if profiler.disabled_reason:
+        return
+    if (SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE) or _admin_requested():
+        profiler.begin(request.endpoint)
+        g.profiled = True
+
+
+def finish_request(exc):
+    if g.pop('profiled', False):
+        profiler.end()
+
+
+def _benchmark(workers=4, seconds=2.0, rounds=5):
+    """Throughput of a CPU-bound loop on `workers` threads with and without profiling.
+
+    Rounds alternate and medians are compared, because thread scheduling noise on a busy
+    machine is larger than the effect being measured. The sampler's own CPU share is exact.
+    """
+    import statistics
+
+    def work(stop, counter, profiled):
+        if profiled:
+            profiler.begin('benchmark')
+        n = 0
+        while not stop.is_set():
+            sum(i * i for i in range(200))
+            n += 1
+        counter.append(n)
+        if profiled:
+            profiler.end()
+
+    def run(profiled):
+        stop, counter = threading.Event(), []
+        threads = [threading.Thread(target=work, args=(stop, counter, profiled)) for _ in range(workers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        return sum(counter)
+
+    results = {False: [], True: []}
+    for _ in range(rounds):
+        for profiled in (False, True):
+            results[profiled].append(run(profiled))
+    baseline, profiled = statistics.median(results[False]), statistics.median(results[True])
+    summary = profiler.summary()
+    print(f"[Profiler] median iterations: baseline {baseline:.0f}, profiled {profiled:.0f} "
+          f"({(1 - profiled / baseline) * 100:+.2f}% overhead)")
+    print(f"[Profiler] {summary['samples']} samples, {summary['cpu_us_per_sample']} us CPU per sample, "
+          f"sampler CPU {summary['sampler_cpu_ms'] / (rounds * seconds * 10):.2f}% of profiled wall time")
+
+
+if __name__ == '__main__':
+    _benchmark()
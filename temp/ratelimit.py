@@ -0,0 +1,183 @@
+"""Admission control: token buckets per client IP / account and concurrency caps per route class.
+
+The checks run as a before_request hook right after the request ID is assigned (see app.py),
+so a rejected request is answered with a 429 before any database query, bcrypt hash or
+deadline scan happens.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, jsonify, request
+
+log = logging.getLogger(__name__)
+
+# Bucket rules per route class: (rate in tokens/second, burst capacity)
+RULES = {
+    'login': {'ip': (10 / 60, 10), 'account': (5 / 60, 5)},
+    'register': {'ip': (5 / 60, 5), 'account': (3 / 60, 3)},
+    # The account is only known once the token is verified, so Google sign-in is limited per IP
+    'oauth': {'ip': (10 / 60, 10)},
+    'public_feed': {'ip': (1.0, 30)},
+}
+
+# Maximum number of requests of each route class served at once by this worker. Login and
+# register are bcrypt-bound, so a small cap keeps a burst from starving every other route.
+CONCURRENCY = {
+    'login': int(os.getenv('RATE_LIMIT_AUTH_CONCURRENCY', '8')),
+    'register': int(os.getenv('RATE_LIMIT_AUTH_CONCURRENCY', '8')),
+    'oauth': int(os.getenv('RATE_LIMIT_AUTH_CONCURRENCY', '8')),
+    'public_feed': int(os.getenv('RATE_LIMIT_FEED_CONCURRENCY', '32')),
+}
+
+# Flask endpoint name -> route class
+ROUTE_CLASSES = {
+    'auth.login': 'login',
+    'auth.register': 'register',
+    'auth.google_sync': 'oauth',
+    'creator.get_all_campaigns': 'public_feed',
+    'creator.search_campaigns': 'public_feed',
+}
+
+
+class MemoryBucketStore:
+    """Token buckets kept in this process. Bounded LRU so a spray of random IPs can't grow it forever."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, capacity, cost=1):
+        """Try to take `cost` tokens. Returns (allowed, retry_after_seconds)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                allowed, retry_after = True, 0
+            else:
+                allowed, retry_after = False, (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker and instance, stored in Redis.
+
+    The refill-and-take runs as one Lua script so concurrent workers can't double spend.
+    If Redis is unreachable we fall back to the local store rather than rejecting traffic.
+    """
+
+    SCRIPT = """
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local rate, capacity, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry_after = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(retry_after)}
+    """
+
+    def __init__(self, url, fallback=None):
+        # Optional dependency: only needed when a shared backend is configured
+        import redis
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self._script = self._client.register_script(self.SCRIPT)
+        self._fallback = fallback or MemoryBucketStore()
+
+    def take(self, key, rate, capacity, cost=1):
+        try:
+            allowed, retry_after = self._script(keys=[f"ratelimit:{key}"], args=[rate, capacity, cost, time.time()])
+            return bool(allowed), float(retry_after)
+        except Exception as e:
+            log.warning("Shared store unavailable, using local buckets: %s", e)
+            return self._fallback.take(key, rate, capacity, cost)
+
+
+class ConcurrencyLimiter:
+    """Non-blocking per-route-class semaphores: when a class is full we reject instead of queueing."""
+
+    def __init__(self, limits):
+        self._semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in limits.items()}
+
+    def try_acquire(self, route_class):
+        semaphore = self._semaphores.get(route_class)
+        return semaphore is None or semaphore.acquire(blocking=False)
+
+    def release(self, route_class):
+        semaphore = self._semaphores.get(route_class)
+        if semaphore is not None:
+            semaphore.release()
+
+
+def _build_store():
+    url = os.getenv('RATE_LIMIT_REDIS_URL')
+    if url:
+        try:
+            return RedisBucketStore(url)
+        except Exception as e:
+            log.warning("Could not set up shared store, using local buckets: %s", e)
+    return MemoryBucketStore()
+
+
+store = _build_store()
+concurrency = ConcurrencyLimiter(CONCURRENCY)
+
+
+def client_ip():
+    # Only trust X-Forwarded-For when we are known to sit behind a proxy that sets it
+    if os.getenv('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true' and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr or 'unknown'
+
+
+def _too_many(retry_after):
+    retry_after = max(1, int(retry_after + 0.999))
+    return jsonify({'msg': 'Too many requests, please try again later'}), 429, {'Retry-After': str(retry_after)}
+
+
+def admit_request():
+    """before_request hook: reject over-limit requests before they do any work."""
+    route_class = ROUTE_CLASSES.get(request.endpoint)
+    if route_class is None or request.method == 'OPTIONS':
+        return None
+
+    rules = RULES.get(route_class, {})
+    if 'ip' in rules:
+        allowed, retry_after = store.take(f"{route_class}:ip:{client_ip()}", *rules['ip'])
+        if not allowed:
+            return _too_many(retry_after)
+    if 'account' in rules:
+        data = request.get_json(silent=True)
+        # Any JSON value parses, and a list or string body has no email to key the bucket on
+        email = str(data.get('email') or '').strip().lower() if isinstance(data, dict) else ''
+        if email:
+            allowed, retry_after = store.take(f"{route_class}:account:{email}", *rules['account'])
+            if not allowed:
+                return _too_many(retry_after)
+
+    if not concurrency.try_acquire(route_class):
+        return jsonify({'msg': 'Server busy, please try again shortly'}), 429, {'Retry-After': '1'}
+    g.admitted_route_class = route_class
+    return None
+
+
+def release_request(exc):
+    route_class = g.pop('admitted_route_class', None)
+    if route_class is not None:
+        concurrency.release(route_class)
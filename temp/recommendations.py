@@ -0,0 +1,135 @@
+"""Per-creator campaign recommendations ranked by expected earnings.
+
+Scores are computed by a batch job (`python recommendations.py`) and stored as one compact
+top-K row per creator in `creator_recommendation`, so the API only does a single lookup.
+
+Expected earnings for creator c on campaign k:
+
+    p_threshold(c, k) * min(cpv_k * expected_views(c), remaining_budget_k / (competition_k + 1))
+
+where expected_views is the creator's smoothed median view count from `accepted_clips`,
+p_threshold is the smoothed share of their clips that reached the campaign's `view_threshold`,
+and competition is the number of clips already accepted on the campaign.
+"""
+import bisect
+import heapq
+import os
+import statistics
+import sys
+from datetime import datetime
+
+TOP_K = int(os.getenv('RECOMMENDATIONS_TOP_K', '20'))
+
+# Creators without history are scored with this id, and their lookup falls back to it
+DEFAULT_CREATOR_ID = 0
+
+# Weight (in pseudo-clips) given to the platform-wide prior when smoothing a creator's history
+PRIOR_WEIGHT = 3
+
+
+def _campaign_stats(campaigns, accepted_clips):
+    competition = {}
+    for clip in accepted_clips:
+        competition[clip['campaign_id']] = competition.get(clip['campaign_id'], 0) + 1
+
+    stats = []
+    for c in campaigns:
+        cpv = float(c.get('cpv') or 0)
+        budget = float(c.get('budget') or 0)
+        remaining = budget - (c.get('total_view_count') or 0) * cpv
+        if cpv <= 0 or remaining <= 0:
+            continue  # Nothing left to earn
+        stats.append((c['id'], cpv, remaining, c.get('view_threshold') or 0, competition.get(c['id'], 0)))
+    return stats
+
+
+def _creator_histories(accepted_clips):
+    histories = {}
+    for clip in accepted_clips:
+        views = clip.get('view_count')
+        if views is not None:
+            histories.setdefault(clip['creator_id'], []).append(views)
+    return histories
+
+
+def _score_creator(views, prior_views, prior_hit_rate, campaign_stats, top_k):
+    """Return the creator's top-K [(score, campaign_id)] list."""
+    n = len(views)
+    if n:
+        expected_views = (statistics.median(views) * n + prior_views * PRIOR_WEIGHT) / (n + PRIOR_WEIGHT)
+    else:
+        expected_views = prior_views
+    sorted_views = sorted(views)
+
+    scored = []
+    for campaign_id, cpv, remaining, threshold, competition in campaign_stats:
+        if n:
+            # Share of this creator's clips that would have cleared the threshold, smoothed toward the prior
+            hits = n - bisect.bisect_left(sorted_views, threshold)
+            p_threshold = (hits + prior_hit_rate(threshold) * PRIOR_WEIGHT) / (n + PRIOR_WEIGHT)
+        else:
+            p_threshold = prior_hit_rate(threshold)
+        earnings = p_threshold * min(cpv * expected_views, remaining / (competition + 1))
+        if earnings > 0:
+            scored.append((earnings, campaign_id))
+    return heapq.nlargest(top_k, scored)
+
+
+def compute_recommendations(campaigns, accepted_clips, top_k=TOP_K):
+    """Return {creator_id: [(campaign_id, score), ...]} including a DEFAULT_CREATOR_ID entry."""
+    campaign_stats = _campaign_stats(campaigns, accepted_clips)
+    histories = _creator_histories(accepted_clips)
+
+    all_views = sorted(v for views in histories.values() for v in views)
+    prior_views = statistics.median(all_views) if all_views else 0
+
+    def prior_hit_rate(threshold):
+        if not all_views:
+            return 1.0 if threshold <= 0 else 0.5
+        return (len(all_views) - bisect.bisect_left(all_views, threshold)) / len(all_views)
+
+    result = {}
+    for creator_id, views in list(histories.items()) + [(DEFAULT_CREATOR_ID, [])]:
+        top = _score_creator(views, prior_views, prior_hit_rate, campaign_stats, top_k)
+        result[creator_id] = [(campaign_id, round(score, 4)) for score, campaign_id in top]
+    return result
+
+
+def _fetch_all(query_builder, page_size=1000):
+    rows, start = [], 0
+    while True:
+        batch = query_builder().range(start, start + page_size - 1).execute().data or []
+        rows.extend(batch)
+        if len(batch) < page_size:
+            return rows
+        start += page_size
+
+
+def run_batch():
+    """Recompute every creator's top-K and upsert it into creator_recommendation."""
+    from extensions import supabase
+    campaigns = _fetch_all(lambda: supabase.table('campaign').select('id, budget, cpv, total_view_count, view_threshold').eq('is_active', True).order('id'))
+    accepted_clips = _fetch_all(lambda: supabase.table('accepted_clips').select('campaign_id, creator_id, view_count').order('id'))
+
+    recommendations = compute_recommendations(campaigns, accepted_clips)
+    computed_at = datetime.utcnow().isoformat()
+    rows = [{
+        'creator_id': creator_id,
+        'campaign_ids': [campaign_id for campaign_id, _ in top],
+        'scores': [score for _, score in top],
+        'computed_at': computed_at
+    } for creator_id, top in recommendations.items()]
+
+    for start in range(0, len(rows), 500):
+        supabase.table('creator_recommendation').upsert(rows[start:start + 500], on_conflict='creator_id').execute()
+    # Rows from previous runs for creators that no longer have history are stale
+    supabase.table('creator_recommendation').delete().lt('computed_at', computed_at).execute()
+    return len(rows)
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+    count = run_batch()
+    print(f"[Recommendations] Stored top-{TOP_K} recommendations for {count} creators")
+    sys.exit(0)
@@ -0,0 +1,132 @@
+"""Incrementally maintained campaign analytics.
+
+Instead of scanning `accepted_clips` on every analytics request, each event that changes a
+campaign's numbers (clip accepted, rejected or deleted, view count synced) applies a small
+delta to three rollup tables through `apply_campaign_rollup_delta()` (see
+migrations/0004_campaign_rollups.sql). The increments run inside Postgres, so workers never
+race on a read-modify-write, and the campaign-performance endpoint only reads a handful of
+precomputed rows.
+
+If a rollup ever drifts (e.g. a write failed), `rebuild_campaign_rollup(campaign_id)` recomputes
+it from the source tables: `python rollups.py <campaign_id> [...]`.
+"""
+import logging
+import sys
+from datetime import date, timedelta
+
+log = logging.getLogger(__name__)
+
+# How many days of daily view gains the analytics endpoint returns
+DAILY_HISTORY_DAYS = 90
+
+
+def _apply(campaign_id, creator_id=None, accepted=0, rejected=0, old_views=0, new_views=0):
+    """Apply a delta. Rollups are derived data, so a failure is logged rather than failing the request."""
+    from extensions import supabase
+    try:
+        supabase.rpc('apply_campaign_rollup_delta', {
+            'p_campaign_id': campaign_id,
+            'p_creator_id': creator_id,
+            'p_accepted': accepted,
+            'p_rejected': rejected,
+            'p_old_views': old_views or 0,
+            'p_new_views': new_views or 0
+        }).execute()
+    except Exception as e:
+        log.error("Could not update rollup for campaign %s: %s", campaign_id, e)
+
+
+def record_acceptance(campaign_id, creator_id, view_count=0):
+    _apply(campaign_id, creator_id, accepted=1, new_views=view_count)
+
+
+def record_rejection(campaign_id, creator_id):
+    _apply(campaign_id, creator_id, rejected=1)
+
+
+def record_removal(campaign_id, creator_id, view_count):
+    """An accepted clip was deleted: its clip and its views no longer count."""
+    _apply(campaign_id, creator_id, accepted=-1, old_views=view_count)
+
+
+def record_views(campaign_id, creator_id, old_views, new_views):
+    if old_views != new_views:
+        _apply(campaign_id, creator_id, old_views=old_views, new_views=new_views)
+
+
+def rebuild(campaign_id):
+    from extensions import supabase
+    supabase.rpc('rebuild_campaign_rollup', {'p_campaign_id': campaign_id}).execute()
+
+
+def campaign_performance(campaign, days=DAILY_HISTORY_DAYS):
+    """Build the campaign-performance payload for a campaign row from its rollups."""
+    from extensions import supabase
+    campaign_id = campaign['id']
+
+    rollup_rows = supabase.table('campaign_rollup').select('*').eq('campaign_id', campaign_id).limit(1).execute().data
+    rollup = rollup_rows[0] if rollup_rows else {}
+    creator_rows = supabase.table('campaign_creator_rollup').select(
+        'creator_id, clips, views, creator:creator(username)').eq('campaign_id', campaign_id).order('views', desc=True).execute().data or []
+    since = (date.today() - timedelta(days=days)).isoformat()
+    daily_rows = supabase.table('campaign_daily_views').select('day, views').eq(
+        'campaign_id', campaign_id).gte('day', since).order('day').execute().data or []
+
+    cpv = float(campaign.get('cpv') or 0)
+    budget = float(campaign.get('budget') or 0)
+    total_views = rollup.get('total_views') or 0
+    accepted = rollup.get('accepted_clips') or 0
+    rejected = rollup.get('rejected_clips') or 0
+
+    # Spend accrues at cpv per view but can never exceed the budget
+    accrued = total_views * cpv
+    total_earned = min(accrued, budget) if budget else accrued
+    funds_distributed = float(campaign.get('funds_distributed') or 0)
+    funds_allocated = float(campaign.get('funds_allocated') or budget)
+
+    creator_performance = []
+    for row in creator_rows:
+        if not row.get('clips') and not row.get('views'):
+            continue
+        creator_performance.append({
+            'creator_id': row['creator_id'],
+            'creator_name': (row.get('creator') or {}).get('username'),
+            'total_views': row.get('views') or 0,
+            'clips': row.get('clips') or 0,
+            'total_earned': round((row.get('views') or 0) * cpv, 2)
+        })
+
+    return {
+        'campaign_id': campaign_id,
+        'overview': {
+            'total_clips': accepted,
+            'total_creators': len(creator_performance),
+            'total_views': total_views,
+            'milestones_reached': rollup.get('milestones_reached') or 0,
+            'cpv': cpv,
+            'view_threshold': campaign.get('view_threshold') or 0,
+            'rejected_clips': rejected,
+            'acceptance_rate': round(accepted / (accepted + rejected), 4) if accepted + rejected else None,
+            'effective_cpv': round(total_earned / total_views, 6) if total_views else None
+        },
+        'financial': {
+            'funds_allocated': funds_allocated,
+            'funds_distributed': funds_distributed,
+            'total_earned': round(total_earned, 2),
+            'total_pending': round(max(0, total_earned - funds_distributed), 2),
+            'utilization_percentage': round(total_earned / budget * 100, 2) if budget else 0,
+            'remaining_budget': round(max(0, budget - total_earned), 2)
+        },
+        'daily_views': [{'date': row['day'], 'views': row['views']} for row in daily_rows],
+        'creator_performance': creator_performance,
+        'updated_at': rollup.get('updated_at')
+    }
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+    for arg in sys.argv[1:]:
+        rebuild(int(arg))
+        print(f"[Rollups] Rebuilt rollup for campaign {arg}")
+    sys.exit(0)
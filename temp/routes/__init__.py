@@ -0,0 +1,11 @@
+"""Blueprints, one per role plus shared auth and system routes."""
+from routes.auth import auth_bp
+from routes.brand import brand_bp
+from routes.creator import creator_bp
+from routes.admin import admin_bp
+from routes.system import system_bp
+from routes.assets import assets_bp
+from routes.payments import payments_bp
+from routes.bootstrap import bootstrap_bp
+
+blueprints = (auth_bp, brand_bp, creator_bp, admin_bp, system_bp, assets_bp, payments_bp, bootstrap_bp)
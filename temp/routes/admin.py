@@ -0,0 +1,437 @@
+"""Admin moderation routes."""
+import logging
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from datetime import datetime
+from extensions import supabase
+import anomalies
+import events
+import clip_resolver
+import view_history
+import rollups
+import budget_guard
+import profiler
+
+admin_bp = Blueprint('admin', __name__)
+log = logging.getLogger(__name__)
+
+@admin_bp.route('/api/admin/campaigns', methods=['GET'])
+@jwt_required()
+def admin_get_campaigns():
+    claims = get_jwt()
+    if claims.get('role') != 'admin':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    try:
+        response = supabase.table('campaign').select('*, brand:brand(username)').execute() # Fetch related brand username
+        campaigns_data = response.data
+        
+        if campaigns_data:
+            result = []
+            for c in campaigns_data:
+                # Fetch submitted clips for the current campaign
+                submitted_clips_response = supabase.table('submitted_clips').select('id, creator_id, clip_url, submitted_at, is_deleted_by_admin, feedback').eq('campaign_id', c['id']).execute()
+                submitted_clips_data = submitted_clips_response.data if submitted_clips_response.data else []
+
+                # Fetch accepted clips for the current campaign
+                accepted_clips_response = supabase.table('accepted_clips').select('id, creator_id, clip_url, submitted_at, media_id, view_count, caption, instagram_posted_at').eq('campaign_id', c['id']).execute()
+                accepted_clips_data = accepted_clips_response.data if accepted_clips_response.data else []
+
+                result.append({
+                    'id': c['id'],
+                    'name': c['name'],
+                    'platform': c['platform'],
+                    'budget': c['budget'],
+                    'cpv': c['cpv'],
+                    'hashtag': c['hashtag'],
+                    'audio': c['audio'],
+                    'deadline': c['deadline'],
+                    'brand_id': c['brand_id'],
+                    'brand_username': c['brand']['username'] if c.get('brand') else None,
+                    'is_active': c['is_active'],
+                    'total_view_count': c['total_view_count'],
+                    'requirements': c['requirements'],
+                    'view_threshold': c['view_threshold'],
+                    'submitted_clips': submitted_clips_data,
+                    'accepted_clips': accepted_clips_data
+                })
+            return jsonify(result), 200
+        else:
+            return jsonify([]), 200
+    except Exception as e:
+        log.exception("Admin get campaigns error: %s", e)
+        return jsonify({'msg': 'Failed to fetch campaigns', 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/clip/<int:clip_id>', methods=['PUT'])
+@jwt_required()
+def admin_update_clip(clip_id):
+    claims = get_jwt()
+    if claims.get('role') != 'admin':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    try:
+        data = request.json
+        status = data.get('status')
+
+        if status not in ['accepted', 'rejected']:
+            return jsonify({'msg': 'Invalid status'}), 400
+        
+        # Fetch the submitted clip along with its campaign's owner so we can notify both sides
+        submitted_clip_response = supabase.table('submitted_clips').select('*, campaign:campaign(brand_id, name)').eq('id', clip_id).limit(1).execute()
+        submitted_clip_data = submitted_clip_response.data[0] if submitted_clip_response.data else None
+
+        if not submitted_clip_data:
+            return jsonify({'msg': 'Clip not found'}), 404
+
+        campaign_info = submitted_clip_data.get('campaign') or {}
+        notification = {
+            'clip_id': clip_id,
+            'campaign_id': submitted_clip_data['campaign_id'],
+            'campaign_name': campaign_info.get('name')
+        }
+
+        if status == 'accepted':
+            # Media metadata was resolved in the background when the clip was submitted
+            resolved = clip_resolver.resolver.lookup(submitted_clip_data['clip_url'], load=clip_resolver.load_persisted) or {}
+            # Insert into accepted_clips table
+            new_accepted_clip = {
+                'id': submitted_clip_data['id'], # Use same ID as submitted clip
+                'creator_id': submitted_clip_data['creator_id'],
+                'campaign_id': submitted_clip_data['campaign_id'],
+                'clip_url': submitted_clip_data['clip_url'],
+                'submitted_at': submitted_clip_data['submitted_at'], # Original submission timestamp
+                'media_id': resolved.get('media_id'),
+                'view_count': None,
+                'caption': resolved.get('caption'),
+                'instagram_posted_at': resolved.get('instagram_posted_at'),
+                'accepted_at': datetime.utcnow().isoformat()
+            }
+            supabase.table('accepted_clips').insert([new_accepted_clip]).execute()
+
+            # Delete from submitted_clips table
+            supabase.table('submitted_clips').delete().eq('id', clip_id).execute()
+            rollups.record_acceptance(submitted_clip_data['campaign_id'], submitted_clip_data['creator_id'])
+
+            # Push the moderation result to the creator and the brand that owns the campaign
+            message = f"Your clip for {campaign_info.get('name') or 'a campaign'} was approved"
+            events.hub.publish(events.creator_channel(submitted_clip_data['creator_id']), events.CLIP_APPROVED, dict(notification, message=message))
+            if campaign_info.get('brand_id'):
+                events.hub.publish(events.brand_channel(campaign_info['brand_id']), events.CLIP_APPROVED, dict(notification, creator_id=submitted_clip_data['creator_id']))
+            return jsonify({'msg': 'Clip accepted and moved to accepted_clips'}), 200
+
+        elif status == 'rejected':
+            # Update submitted_clips to mark as rejected by admin and add feedback
+            update_fields = {
+                'is_deleted_by_admin': True,
+                'feedback': data.get('feedback'), # Use feedback from request
+                'reviewed_at': datetime.utcnow().isoformat()
+            }
+            # The update only matches while the clip is not rejected yet, so a repeated rejection
+            # (e.g. to change the feedback) is not counted again
+            newly_rejected = supabase.table('submitted_clips').update(update_fields).eq('id', clip_id).eq('is_deleted_by_admin', False).execute().data
+            if not newly_rejected:
+                supabase.table('submitted_clips').update(update_fields).eq('id', clip_id).execute()
+
+            # If the clip was previously accepted, delete it from accepted_clips table
+            # This handles cases where an accepted clip is later rejected (e.g., if brand finds an issue after acceptance)
+            removed = supabase.table('accepted_clips').delete().eq('id', clip_id).execute().data
+            if removed:
+                view_history.forget_clip(clip_id, submitted_clip_data['campaign_id'])
+                rollups.record_removal(removed[0]['campaign_id'], removed[0]['creator_id'], removed[0].get('view_count') or 0)
+                supabase.rpc('increment_campaign_views', {'p_campaign_id': removed[0]['campaign_id'],
+                                                          'p_delta': -(removed[0].get('view_count') or 0)}).execute()
+            if newly_rejected:
+                rollups.record_rejection(submitted_clip_data['campaign_id'], submitted_clip_data['creator_id'])
+
+            message = f"Your clip for {campaign_info.get('name') or 'a campaign'} was rejected"
+            events.hub.publish(events.creator_channel(submitted_clip_data['creator_id']), events.CLIP_REJECTED, dict(notification, message=message, feedback=data.get('feedback')))
+            return jsonify({'msg': 'Clip marked as rejected for creator'}), 200
+
+        else:
+            return jsonify({'msg': 'Invalid status'}), 400
+
+    except Exception as e:
+        log.exception("Admin update clip error: %s", e)
+        return jsonify({'msg': 'Failed to update clip', 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/clip/<int:clip_id>', methods=['DELETE', 'OPTIONS'])
+@jwt_required(optional=True) # Allow OPTIONS requests without JWT
+def delete_clip_admin(clip_id):
+    if request.method == 'OPTIONS':
+        # Preflight request, no need to process JWT
+        return jsonify({'msg': 'OK'}), 200
+
+    claims = get_jwt()
+    if not claims or claims.get('role') != 'admin':
+        return jsonify({'msg': 'Unauthorized'}), 403
+
+    try:
+        # Check if the clip exists in accepted_clips first (it has view_count)
+        accepted_clip_response = supabase.table('accepted_clips').select('id, campaign_id, creator_id, view_count').eq('id', clip_id).limit(1).execute()
+
+        if accepted_clip_response.data:
+            accepted_clip_data = accepted_clip_response.data[0]
+            campaign_id = accepted_clip_data['campaign_id']
+            clip_view_count = accepted_clip_data['view_count'] or 0
+
+            # Delete from accepted_clips; the deleted row has the count a concurrent sync may have just written
+            removed = supabase.table('accepted_clips').delete().eq('id', clip_id).execute().data
+            if removed:
+                clip_view_count = removed[0].get('view_count') or 0
+            view_history.forget_clip(clip_id, campaign_id)
+            rollups.record_removal(campaign_id, accepted_clip_data['creator_id'], clip_view_count)
+            
+            # Take the clip's views out of the campaign total
+            supabase.rpc('increment_campaign_views', {'p_campaign_id': campaign_id, 'p_delta': -clip_view_count}).execute()
+            
+            # Also try to delete from submitted_clips (in case it still exists for some reason, e.g., if re-accepted manually)
+            supabase.table('submitted_clips').delete().eq('id', clip_id).execute()
+
+            return jsonify({'msg': 'Accepted clip and associated submitted clip deleted successfully'}), 200
+        
+        # If not found in accepted_clips, check submitted_clips
+        submitted_clip_response = supabase.table('submitted_clips').select('id').eq('id', clip_id).limit(1).execute()
+        
+        if submitted_clip_response.data:
+            # If it's a submitted clip, just delete it (no view_count impact)
+            supabase.table('submitted_clips').delete().eq('id', clip_id).execute()
+            return jsonify({'msg': 'Submitted clip deleted successfully'}), 200
+        else:
+            # If response.count is 0, it means the clip was not found or already deleted.
+            # In this context, the desired state (clip not existing) is achieved.
+            return jsonify({'msg': 'Submitted clip already deleted or not found'}), 200
+
+        return jsonify({'msg': 'Clip not found'}), 404
+
+    except Exception as e:
+        log.exception("Admin delete clip error: %s", e)
+        return jsonify({'msg': 'Failed to delete clip', 'error': str(e)}), 500
+
+def _accepted_clip(clip_id):
+    response = supabase.table('accepted_clips').select(
+        'id, campaign_id, creator_id, view_count, submitted_at, campaign:campaign(id, brand_id, name, budget, cpv, is_active, total_view_count)').eq('id', clip_id).limit(1).execute()
+    return response.data[0] if response.data else None
+
+def apply_view_count(clip_data, new_view_count, captured_at):
+    """Store a clip's new view count with its history snapshot, the campaign total and the rollups.
+
+    The count and the campaign total are written in one `apply_clip_view_count()` call, which
+    returns the clip's previous count and the campaign's new total as they are in the database,
+    not as they were when `clip_data` was read. Returns (old view count, budget_paused), or
+    None if the clip was deleted in the meantime.
+    """
+    clip_id = clip_data['id']
+    campaign_id = clip_data['campaign_id']
+    campaign_info = clip_data.get('campaign') or {}
+
+    applied = supabase.rpc('apply_clip_view_count', {'p_clip_id': clip_id, 'p_view_count': new_view_count}).execute().data
+    if not applied:
+        return None
+    old_view_count, new_total = applied[0]['old_view_count'], applied[0]['total_view_count']
+    view_history.record_snapshot(clip_id, campaign_id, new_view_count, captured_at)
+    rollups.record_views(campaign_id, clip_data['creator_id'], old_view_count, new_view_count)
+    budget_paused = budget_guard.enforce(campaign_info, total_view_count=new_total) if campaign_info else False
+
+    update = {'clip_id': clip_id, 'campaign_id': campaign_id, 'view_count': new_view_count, 'total_view_count': new_total, 'timestamp': captured_at}
+    events.hub.publish(events.creator_channel(clip_data['creator_id']), events.VIEW_COUNT_UPDATED, update)
+    if campaign_info.get('brand_id'):
+        events.hub.publish(events.brand_channel(campaign_info['brand_id']), events.VIEW_COUNT_UPDATED, update)
+    return old_view_count, budget_paused
+
+@admin_bp.route('/api/admin/clip/<int:clip_id>/view-count', methods=['PUT'])
+@jwt_required()
+def admin_update_clip_view_count(clip_id):
+    """View sync for a single accepted clip: stores the new count, its history snapshot and the campaign total.
+
+    The sync is scored by the anomaly detector first; an outlier jump is held for review (202)
+    and not written, so it does not count towards earnings or the budget.
+    """
+    claims = get_jwt()
+    if claims.get('role') != 'admin':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    try:
+        data = request.json
+        new_view_count = data.get('view_count')
+        if new_view_count is None or not isinstance(new_view_count, int) or new_view_count < 0:
+            return jsonify({'msg': 'Missing or invalid view_count field (must be non-negative integer)'}), 400
+
+        clip_data = _accepted_clip(clip_id)
+        if not clip_data:
+            return jsonify({'msg': 'Accepted clip not found'}), 404
+
+        captured_at = datetime.utcnow().isoformat()
+        observation = anomalies.observe(clip_data, new_view_count, captured_at)
+        if observation['held']:
+            events.hub.publish(events.ADMIN_CHANNEL, events.VIEW_ANOMALY_FLAGGED, {
+                'anomaly_id': observation['anomaly_id'], 'clip_id': clip_id, 'campaign_id': clip_data['campaign_id'],
+                'creator_id': clip_data['creator_id'], 'held_views': observation['views'], 'score': observation['score']
+            })
+            return jsonify({
+                'msg': 'View count held for review',
+                'held': True,
+                'anomaly_id': observation['anomaly_id'],
+                'clip_id': clip_id,
+                'campaign_id': clip_data['campaign_id'],
+                'counted_view_count': clip_data['view_count'] or 0,
+                'held_view_count': observation['views']
+            }), 202
+
+        # Net of any views rejected earlier for this clip
+        new_view_count = observation['views']
+        applied = apply_view_count(clip_data, new_view_count, captured_at)
+        if applied is None:
+            return jsonify({'msg': 'Accepted clip not found'}), 404
+        old_view_count, budget_paused = applied
+        return jsonify({
+            'msg': 'Clip view count updated successfully',
+            'held': False,
+            'clip_id': clip_id,
+            'campaign_id': clip_data['campaign_id'],
+            'old_view_count': old_view_count,
+            'new_view_count': new_view_count,
+            'view_count_diff': new_view_count - old_view_count,
+            'budget_paused': budget_paused
+        }), 200
+    except Exception as e:
+        log.exception("Admin update clip view count error: %s", e)
+        return jsonify({'msg': 'Failed to update view count', 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/view-anomalies', methods=['GET'])
+@jwt_required()
+def admin_view_anomalies():
+    """Flagged view syncs, newest first. Pass the previous page's `next_cursor` as `cursor`."""
+    claims = get_jwt()
+    if claims.get('role') != 'admin':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    try:
+        status = request.args.get('status', 'open')
+        if status not in ('open', 'approved', 'rejected'):
+            return jsonify({'msg': 'status must be open, approved or rejected'}), 400
+        try:
+            limit = max(1, min(int(request.args.get('limit', 50)), anomalies.MAX_PAGE_SIZE))
+            cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+        except ValueError:
+            return jsonify({'msg': 'limit and cursor must be integers'}), 400
+        flags, next_cursor = anomalies.queue(status, limit, cursor)
+        return jsonify({'anomalies': flags, 'count': len(flags), 'limit': limit, 'next_cursor': next_cursor}), 200
+    except Exception as e:
+        log.exception("View anomalies error: %s", e)
+        return jsonify({'msg': 'Failed to fetch view anomalies', 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/view-anomalies/<int:anomaly_id>/<action>', methods=['POST'])
+@jwt_required()
+def admin_resolve_view_anomaly(anomaly_id, action):
+    """Approve (apply the held view count) or reject (discard the held views for good) a flag."""
+    claims = get_jwt()
+    if claims.get('role') != 'admin':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    if action not in ('approve', 'reject'):
+        return jsonify({'msg': 'Action must be approve or reject'}), 400
+    try:
+        try:
+            anomaly = anomalies.resolve(anomaly_id, action == 'approve', int(get_jwt_identity()))
+        except anomalies.NotOpen:
+            return jsonify({'msg': 'Flag not found or already reviewed'}), 409
+
+        budget_paused = False
+        if action == 'approve':
+            # If this fails the flag is already closed, so the clip's next sync applies its count
+            clip_data = _accepted_clip(anomaly['clip_id'])
+            applied = apply_view_count(clip_data, anomaly['held_views'], datetime.utcnow().isoformat()) if clip_data else None
+            budget_paused = bool(applied and applied[1])
+        return jsonify({
+            'msg': 'View count approved' if action == 'approve' else 'Held views rejected',
+            'anomaly_id': anomaly_id,
+            'clip_id': anomaly['clip_id'],
+            'status': anomaly['status'],
+            'view_count': anomaly['held_views'] if action == 'approve' else anomaly['counted_views'],
+            'budget_paused': budget_paused
+        }), 200
+    except Exception as e:
+        log.exception("Resolve view anomaly error: %s", e)
+        return jsonify({'msg': 'Failed to review view anomaly', 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/campaign/<int:campaign_id>/update-views', methods=['PUT'])
+@jwt_required()
+def admin_update_campaign_views(campaign_id):
+    """Set a campaign's total_view_count explicitly, or recompute it from its accepted clips."""
+    claims = get_jwt()
+    if claims.get('role') != 'admin':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    try:
+        data = request.json or {}
+        campaign_response = supabase.table('campaign').select('id, brand_id, name, budget, cpv, is_active, total_view_count').eq('id', campaign_id).limit(1).execute()
+        if not campaign_response.data:
+            return jsonify({'msg': 'Campaign not found'}), 404
+        campaign = campaign_response.data[0]
+        old_total = campaign['total_view_count'] or 0
+
+        clips_response = supabase.table('accepted_clips').select('view_count').eq('campaign_id', campaign_id).execute()
+        clips = clips_response.data or []
+        if data.get('total_view_count') is not None:
+            new_total = data['total_view_count']
+            if not isinstance(new_total, int) or new_total < 0:
+                return jsonify({'msg': 'Invalid total_view_count (must be non-negative integer)'}), 400
+        else:
+            new_total = sum(c['view_count'] or 0 for c in clips)
+            # A full recompute is also the moment to repair any drift in the analytics rollup
+            rollups.rebuild(campaign_id)
+
+        supabase.table('campaign').update({'total_view_count': new_total}).eq('id', campaign_id).execute()
+        budget_paused = budget_guard.enforce(campaign, total_view_count=new_total)
+        return jsonify({
+            'msg': 'Campaign view count updated successfully',
+            'campaign_id': campaign_id,
+            'old_total_views': old_total,
+            'new_total_views': new_total,
+            'view_diff': new_total - old_total,
+            'clip_count': len(clips),
+            'budget_paused': budget_paused
+        }), 200
+    except Exception as e:
+        log.exception("Admin update campaign views error: %s", e)
+        return jsonify({'msg': 'Failed to update campaign views', 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/analytics/campaign-performance/<int:campaign_id>', methods=['GET'])
+@jwt_required()
+def campaign_performance_analytics(campaign_id):
+    """Campaign analytics served from the precomputed rollups; never scans accepted_clips."""
+    claims = get_jwt()
+    role = claims.get('role')
+    if role not in ('admin', 'brand'):
+        return jsonify({'msg': 'Unauthorized'}), 403
+    try:
+        campaign_response = supabase.table('campaign').select('*').eq('id', campaign_id).limit(1).execute()
+        campaign = campaign_response.data[0] if campaign_response.data else None
+        if not campaign:
+            return jsonify({'msg': 'Campaign not found'}), 404
+        if role == 'brand' and str(campaign.get('brand_id')) != str(get_jwt_identity()):
+            return jsonify({'msg': 'Unauthorized'}), 403
+
+        analytics = rollups.campaign_performance(campaign)
+        return jsonify(dict(analytics, msg='Campaign analytics fetched successfully')), 200
+    except Exception as e:
+        log.exception("Campaign performance analytics error: %s", e)
+        return jsonify({'msg': 'Failed to fetch campaign analytics', 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/profiles', methods=['GET', 'DELETE'])
+@jwt_required()
+def admin_profiles():
+    """Per-route summary of the sampling profiler in this worker; DELETE clears collected stacks."""
+    claims = get_jwt()
+    if claims.get('role') != 'admin':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    if request.method == 'DELETE':
+        profiler.profiler.reset()
+        return jsonify({'msg': 'Profiles cleared'}), 200
+    return jsonify(dict(profiler.profiler.summary(), sample_rate=profiler.SAMPLE_RATE)), 200
+
+@admin_bp.route('/api/admin/profiles/collapsed', methods=['GET'])
+@jwt_required()
+def admin_download_profile():
+    """Collapsed stacks for flamegraph.pl / speedscope. `?route=<endpoint>` limits it to one route."""
+    claims = get_jwt()
+    if claims.get('role') != 'admin':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    route = request.args.get('route')
+    filename = f"{route or 'all-routes'}.folded"
+    return Response(profiler.profiler.collapsed(route), mimetype='text/plain',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
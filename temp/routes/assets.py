@@ -0,0 +1,26 @@
+"""Public, content-addressed campaign assets (see assets.py)."""
+from flask import Blueprint, jsonify, send_file
+import assets
+
+assets_bp = Blueprint('assets', __name__)
+
+@assets_bp.route('/assets/<string:digest>/<string:variant>', methods=['GET'])
+def serve_asset(digest, variant):
+    if len(digest) != 64 or not all(c in '0123456789abcdef' for c in digest):
+        return jsonify({'msg': 'Asset not found'}), 404
+    path = assets.variant_path(digest, variant)
+    if path is None:
+        return jsonify({'msg': 'Asset not found'}), 404
+
+    if variant == 'original':
+        # The type detected from the bytes at upload; anything else is served as opaque bytes
+        content_type = (assets.read_manifest(digest) or {}).get('content_type')
+        mimetype = content_type if content_type in assets.CONTENT_TYPES else 'application/octet-stream'
+    else:
+        mimetype = 'image/webp'
+    # The URL names the content hash, so the response can be cached forever
+    response = send_file(path, mimetype=mimetype, etag=digest + variant, max_age=31536000, conditional=True)
+    response.headers['Cache-Control'] = assets.CACHE_FOREVER
+    # Browsers must not second-guess the type, e.g. render uploaded bytes as HTML
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
@@ -0,0 +1,229 @@
+"""Registration and login routes shared by every role."""
+import logging
+import secrets
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt, get_jwt_identity
+from datetime import datetime
+from extensions import supabase, get_bcrypt
+import jwks
+
+auth_bp = Blueprint('auth', __name__)
+log = logging.getLogger(__name__)
+
+@auth_bp.route('/register', methods=['POST'])
+def register():
+    try:
+        bcrypt = get_bcrypt()
+        data = request.json
+        if not all(k in data for k in ['username', 'email', 'password', 'role']):
+            return jsonify({'msg': 'Missing required fields'}), 400
+
+        email = data['email']
+        username = data['username']
+        password = data['password']
+        role = data['role']
+        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+
+        # Cross-table email check using Supabase
+        # Check if email exists in any table (Brand, Creator, Admin)
+        brand_exists = supabase.table('brand').select('email').eq('email', email).limit(1).execute()
+        creator_exists = supabase.table('creator').select('email').eq('email', email).limit(1).execute()
+        admin_exists = supabase.table('admin').select('email').eq('email', email).limit(1).execute()
+
+        if brand_exists.data or creator_exists.data or admin_exists.data:
+            return jsonify({'msg': 'Email already registered'}), 400
+
+        if role == 'brand':
+            new_user = {'username': username, 'email': email, 'password_hash': hashed_password}
+            response = supabase.table('brand').insert([new_user]).execute()
+        elif role == 'creator':
+            new_user = {'username': username, 'email': email, 'password_hash': hashed_password, 'profile_completed': False, 'join_date': datetime.utcnow().date().isoformat()}
+            response = supabase.table('creator').insert([new_user]).execute()
+        elif role == 'admin':
+            # Ensure only one admin with the same email
+            new_user = {'username': username, 'email': email, 'password_hash': hashed_password}
+            response = supabase.table('admin').insert([new_user]).execute()
+        else:
+            return jsonify({'msg': 'Invalid role'}), 400
+
+        if response.data:
+            return jsonify({'msg': 'User registered successfully'}), 201
+        else:
+            log.error("Supabase registration error: %s - %s", response.status_code, response.count)
+            return jsonify({'msg': 'Registration failed', 'error': response.count}), 500
+
+    except Exception as e:
+        log.exception("Registration error: %s", e)
+        return jsonify({'msg': 'Registration failed', 'error': str(e)}), 500
+
+@auth_bp.route('/login', methods=['POST'])
+def login():
+    try:
+        # Models are only needed here, so they are imported on first login rather than at startup
+        from models import Brand, Creator, Admin
+        bcrypt = get_bcrypt()
+        data = request.json
+        if not all(k in data for k in ['email', 'password', 'role']):
+            return jsonify({'msg': 'Missing email, password, or role'}), 400
+
+        email = data['email']
+        password = data['password']
+        role = data['role']
+        user = None
+
+        if role == 'brand':
+            response = supabase.table('brand').select('id, username, email, password_hash').eq('email', email).limit(1).execute()
+            if response.data: # If brand not found, check if email exists as creator
+                user_data = response.data[0]
+                if bcrypt.check_password_hash(user_data['password_hash'], password):
+                    user = Brand(id=user_data['id'], username=user_data['username'], email=user_data['email'], password_hash=user_data['password_hash'])
+                else: return jsonify({'msg': 'Invalid credentials'}), 401
+            elif supabase.table('creator').select('email').eq('email', email).limit(1).execute().data: # Check if email exists as creator
+                    return jsonify({'msg': 'This email is not registered as a Brand.'}), 400
+            else:
+                return jsonify({'msg': 'Invalid credentials'}), 401
+
+        elif role == 'creator':
+            response = supabase.table('creator').select('id, username, email, password_hash, profile_completed').eq('email', email).limit(1).execute()
+            if response.data: # If creator not found, check if email exists as brand
+                user_data = response.data[0]
+                if bcrypt.check_password_hash(user_data['password_hash'], password):
+                    user = Creator(id=user_data['id'], username=user_data['username'], email=user_data['email'], password_hash=user_data['password_hash'], profile_completed=user_data['profile_completed'])
+                else: return jsonify({'msg': 'Invalid credentials'}), 401
+            elif supabase.table('brand').select('email').eq('email', email).limit(1).execute().data: # Check if email exists as brand
+                    return jsonify({'msg': 'This email is not registered as a Creator.'}), 400
+            else:
+                return jsonify({'msg': 'Invalid credentials'}), 401
+
+        elif role == 'admin':
+            response = supabase.table('admin').select('id, username, email, password_hash').eq('email', email).limit(1).execute()
+            if response.data:
+                user_data = response.data[0]
+                if bcrypt.check_password_hash(user_data['password_hash'], password):
+                    user = Admin(id=user_data['id'], username=user_data['username'], email=user_data['email'], password_hash=user_data['password_hash'])
+                else: return jsonify({'msg': 'Invalid credentials'}), 401
+            else:
+                return jsonify({'msg': 'Invalid credentials'}), 401
+        else:
+            return jsonify({'msg': 'Invalid role'}), 400
+
+        if user:
+            access_token = create_access_token(
+                identity=str(user.id),
+                additional_claims={'role': role}
+            )
+            response_data = {
+                'access_token': access_token,
+                'role': role,
+                'username': user.username,
+                'user_id': user.id
+            }
+            if role == 'creator':
+                response_data['profile_completed'] = user.profile_completed
+            return jsonify(response_data), 200
+        return jsonify({'msg': 'Invalid credentials'}), 401
+    except Exception as e:
+        log.exception("Login error: %s", e)
+        return jsonify({'msg': 'Login failed', 'error': str(e)}), 500
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    access_token = create_access_token(identity=get_jwt_identity(), additional_claims={'role': get_jwt().get('role')})
+    return jsonify({'access_token': access_token}), 200
+
+def _oauth_user(email, role, metadata):
+    """Find the creator or brand row for a verified OAuth email, creating it on first sign-in.
+
+    Returns (row, None), or (None, error message) if the email belongs to the other role.
+    """
+    creator = supabase.table('creator').select('id, username, profile_completed').eq('email', email).limit(1).execute().data
+    brand = supabase.table('brand').select('id, username').eq('email', email).limit(1).execute().data
+    if role == 'creator':
+        if creator:
+            return creator[0], None
+        if brand:
+            return None, 'This email is registered as a Brand.'
+    else:
+        if brand:
+            return brand[0], None
+        if creator:
+            return None, 'This email is registered as a Creator.'
+
+    username = metadata.get('full_name') or metadata.get('name') or email.split('@')[0]
+    # OAuth accounts have no password; a hash of a random secret keeps password login impossible
+    password_hash = get_bcrypt().generate_password_hash(secrets.token_urlsafe(32)).decode('utf-8')
+    new_user = {'username': username, 'email': email, 'password_hash': password_hash}
+    if role == 'creator':
+        new_user.update({'profile_completed': False, 'join_date': datetime.utcnow().date().isoformat()})
+    columns = 'id, username, profile_completed' if role == 'creator' else 'id, username'
+    try:
+        supabase.table(role).insert([new_user]).execute()
+    except Exception as e:
+        # The callback can run twice at once (e.g. React strict mode); the other insert won
+        log.warning("OAuth %s insert for %s failed, re-reading: %s", role, email, e)
+    rows = supabase.table(role).select(columns).eq('email', email).limit(1).execute().data
+    if not rows:
+        raise RuntimeError(f"Could not create {role} for OAuth sign-in")
+    return rows[0], None
+
+def _signed_in_with_google(claims):
+    """True for a Google ID token, or a Supabase token whose user signed in through Google.
+
+    Only app_metadata is checked: users can edit their own user_metadata, but not app_metadata.
+    """
+    if claims.get('iss') in jwks.GOOGLE_ISSUERS:
+        return True
+    app_metadata = claims.get('app_metadata') or {}
+    return app_metadata.get('provider') == 'google' or 'google' in (app_metadata.get('providers') or ())
+
+@auth_bp.route('/api/auth/google-sync', methods=['POST'])
+def google_sync():
+    """Trade the Supabase session token from the Google OAuth callback for the app's own tokens.
+
+    The token is verified locally against the cached signing keys (see jwks.py) and must come
+    from a Google sign-in with a verified email. Its email is matched to the creator (or brand) row, which is created on first sign-in for the role the
+    callback stored in the user's metadata.
+    """
+    auth_header = request.headers.get('Authorization', '')
+    token = auth_header[len('Bearer '):].strip() if auth_header.startswith('Bearer ') else ''
+    if not token:
+        return jsonify({'msg': 'Missing sign-in token'}), 401
+    try:
+        claims = jwks.verify(token)
+    except jwks.KeysUnavailable as e:
+        return jsonify({'msg': 'Sign-in is warming up, retry shortly'}), 503, {'Retry-After': str(e.retry_after)}
+    except jwks.InvalidToken as e:
+        log.warning("Rejected sign-in token: %s", e)
+        return jsonify({'msg': 'Invalid or expired sign-in token'}), 401
+
+    try:
+        metadata = claims.get('user_metadata') or {}
+        email = (claims.get('email') or '').strip()
+        if not email:
+            return jsonify({'msg': 'Sign-in token has no email'}), 400
+        # The email is matched to an existing account, so it must be one Google vouched for: a Supabase
+        # session from any other provider (e.g. an email signup in an auto-confirming project) is not proof
+        if not _signed_in_with_google(claims):
+            return jsonify({'msg': 'Sign-in token is not from Google'}), 403
+        if claims.get('email_verified') is not True and metadata.get('email_verified') is not True:
+            return jsonify({'msg': 'Email address is not verified'}), 403
+        role = metadata.get('role') if metadata.get('role') in ('creator', 'brand') else 'creator'
+
+        user, error = _oauth_user(email, role, metadata)
+        if error:
+            return jsonify({'msg': error}), 400
+
+        identity = str(user['id'])
+        return jsonify({
+            'msg': 'Signed in with Google',
+            'access_token': create_access_token(identity=identity, additional_claims={'role': role}),
+            'refresh_token': create_refresh_token(identity=identity, additional_claims={'role': role}),
+            'user_id': user['id'],
+            'username': user['username'],
+            'role': role,
+            'profile_completed': bool(user.get('profile_completed')) if role == 'creator' else True
+        }), 200
+    except Exception as e:
+        log.exception("Google sync error: %s", e)
+        return jsonify({'msg': 'Google sign-in failed', 'error': str(e)}), 500
@@ -0,0 +1,98 @@
+"""Dashboard bootstrap: everything a creator or brand dashboard loads on mount, in one request.
+
+The sections for the caller's role run concurrently on a shared thread pool, so the response takes
+about as long as the slowest section instead of the sum of them (and the dashboard pays for one JWT
+check and one round trip instead of four). A section that raises or misses BOOTSTRAP_TIMEOUT_SECONDS
+is reported under `errors` and left out of `sections`; the other sections are still returned.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from extensions import supabase
+from routes.brand import brand_campaigns
+from routes.creator import creator_profile, creator_campaigns
+from routes.payments import wallet_balance, creator_notifications
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+log = logging.getLogger(__name__)
+
+TIMEOUT_SECONDS = float(os.getenv('BOOTSTRAP_TIMEOUT_SECONDS', '3'))
+# Shared by all requests; each bootstrap request takes one thread per section
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv('BOOTSTRAP_WORKERS', '16')), thread_name_prefix='bootstrap')
+
+
+def brand_profile(brand_id):
+    response = supabase.table('brand').select('id, username, email').eq('id', brand_id).limit(1).execute()
+    return response.data[0] if response.data else None
+
+
+def _wallet(user_type):
+    def section(user_id):
+        balance, currency = wallet_balance(user_type, user_id)
+        return {'balance': balance, 'currency': currency}
+    return section
+
+
+# Section name -> function of the user id, per role
+SECTIONS = {
+    'creator': {
+        'profile': creator_profile,
+        'campaigns': creator_campaigns,
+        'wallet': _wallet('creator'),
+        'notifications': creator_notifications
+    },
+    'brand': {
+        'profile': brand_profile,
+        'campaigns': brand_campaigns,
+        'wallet': _wallet('brand')
+    }
+}
+
+
+def _timed(section, user_id):
+    started = time.perf_counter()
+    result = section(user_id)
+    return result, round((time.perf_counter() - started) * 1000, 1)
+
+
+@bootstrap_bp.route('/api/bootstrap', methods=['GET'])
+@jwt_required()
+def bootstrap():
+    role = get_jwt().get('role')
+    sections = SECTIONS.get(role)
+    if sections is None:
+        return jsonify({'msg': 'Unauthorized'}), 403
+    user_id = int(get_jwt_identity())
+
+    started = time.perf_counter()
+    futures = {name: _pool.submit(_timed, section, user_id) for name, section in sections.items()}
+    wait(futures.values(), timeout=TIMEOUT_SECONDS)
+
+    data, errors, timings = {}, {}, {}
+    for name, future in futures.items():
+        if not future.done():
+            # Drops it if it is still queued; a running section finishes in the background
+            future.cancel()
+            log.warning("Bootstrap section %s timed out after %ss", name, TIMEOUT_SECONDS)
+            errors[name] = 'Timed out'
+            continue
+        error = future.exception()
+        if error is not None:
+            log.error("Bootstrap section %s error: %s", name, error, exc_info=error)
+            errors[name] = f"Failed to fetch {name}"
+            continue
+        data[name], timings[name] = future.result()
+    took_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    body = {'role': role, 'user_id': user_id, 'sections': data, 'errors': errors, 'timings_ms': timings, 'took_ms': took_ms}
+    if not data:
+        body['msg'] = 'Failed to load dashboard'
+    response = jsonify(body)
+    response.status_code = 200 if data else 500
+    response.headers['Server-Timing'] = ', '.join(
+        [f"{name};dur={ms}" for name, ms in timings.items()] + [f"total;dur={took_ms}"])
+    return response
@@ -0,0 +1,382 @@
+"""Brand-facing campaign management routes."""
+import logging
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
+from datetime import datetime
+from extensions import supabase
+import search
+import budget_guard
+import assets
+import os
+import time
+import view_history
+
+brand_bp = Blueprint('brand', __name__)
+log = logging.getLogger(__name__)
+
+@brand_bp.route('/api/brand/campaigns', methods=['POST'])
+@jwt_required()
+def create_campaign():
+    claims = get_jwt()
+    if claims.get('role') != 'brand':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    brand_id = int(get_jwt_identity())
+    try:
+        data = request.json
+        required_fields = ['platform', 'budget', 'cpv', 'hashtag', 'audio', 'deadline', 'name', 'category']
+        if not all(k in data for k in required_fields):
+            return jsonify({'msg': 'Missing required fields'}), 400
+        
+        new_campaign = {
+            'brand_id': brand_id,
+            'platform': data['platform'],
+            'budget': float(data['budget']),
+            'cpv': float(data['cpv']),
+            'hashtag': data['hashtag'],
+            'audio': data['audio'],
+            'deadline': data['deadline'], # Ensure this is in YYYY-MM-DD format from frontend
+            'name': data['name'],
+            # Use the category as-is since it already matches the database constraint
+            'category': data['category'],
+            'requirements': data.get('requirements'),
+            'view_threshold': data.get('view_threshold', 0),
+            'asset_link': data.get('asset_link'),  # Add asset_link field
+            'is_active': True, # Default to active when created
+            'total_view_count': 0 # Initialize view count
+        }
+        response = supabase.table('campaign').insert([new_campaign]).execute()
+
+        if response.data:
+            campaign_id = response.data[0]['id']
+            search.index.upsert(response.data[0])
+            return jsonify({'msg': 'Campaign created successfully', 'campaign_id': campaign_id}), 201
+        else:
+            log.error("Supabase create campaign error: %s - %s", response.status_code, response.count)
+            return jsonify({'msg': 'Failed to create campaign', 'error': response.count}), 500
+    except Exception as e:
+        log.exception("Create campaign error: %s", e)
+        return jsonify({'msg': 'Failed to create campaign', 'error': str(e)}), 500
+
+def brand_campaigns(brand_id):
+    response = supabase.table('campaign').select('*').eq('brand_id', brand_id).execute()
+    return [{
+        'id': c['id'],
+        'name': c['name'],
+        'platform': c['platform'],
+        'budget': c['budget'],
+        'cpv': c['cpv'],
+        'hashtag': c['hashtag'],
+        'audio': c['audio'],
+        'deadline': c['deadline'], # Assuming Supabase returns YYYY-MM-DD
+        'is_active': c['is_active'],
+        'category': c['category'],
+        'total_view_count': c['total_view_count'],
+        'requirements': c['requirements'],
+        'view_threshold': c['view_threshold']
+    } for c in response.data or []]
+
+@brand_bp.route('/api/brand/campaigns', methods=['GET'])
+@jwt_required()
+def list_campaigns():
+    claims = get_jwt()
+    if claims.get('role') != 'brand':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    brand_id = int(get_jwt_identity())
+    try:
+        return jsonify(brand_campaigns(brand_id)), 200
+    except Exception as e:
+        log.exception("List campaigns error: %s", e)
+        return jsonify({'msg': 'Failed to fetch campaigns', 'error': str(e)}), 500
+
+@brand_bp.route('/api/brand/campaigns/<int:campaign_id>', methods=['DELETE', 'OPTIONS'])
+def delete_campaign(campaign_id):
+    # Handle OPTIONS request for CORS preflight
+    if request.method == 'OPTIONS':
+        return jsonify({}), 200
+
+    # For DELETE requests, verify JWT
+    verify_jwt_in_request()
+    claims = get_jwt()
+    if claims.get('role') != 'brand':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    brand_id = int(get_jwt_identity())
+
+    try:
+        # Verify the campaign belongs to the brand
+        campaign_response = supabase.table('campaign').select('id').eq('id', campaign_id).eq('brand_id', brand_id).limit(1).execute()
+        if not campaign_response.data:
+            return jsonify({'msg': 'Campaign not found or not authorized'}), 404
+
+        # Delete associated submitted clips first due to foreign key constraints
+        supabase.table('submitted_clips').delete().eq('campaign_id', campaign_id).execute()
+        # Delete associated accepted clips
+        supabase.table('accepted_clips').delete().eq('campaign_id', campaign_id).execute()
+
+        # Then delete the campaign
+        response = supabase.table('campaign').delete().eq('id', campaign_id).execute()
+
+        search.index.remove(campaign_id)
+        if response.count and response.count > 0:
+            return jsonify({'msg': 'Campaign and associated clips deleted successfully'}), 200
+        else:
+            return jsonify({'msg': 'Campaign not found or could not be deleted'}), 404
+
+    except Exception as e:
+        log.exception("Delete campaign error: %s", e)
+        return jsonify({'msg': 'Failed to delete campaign', 'error': str(e)}), 500
+
+@brand_bp.route('/api/brand/campaigns/<int:campaign_id>/budget', methods=['PUT'])
+@jwt_required()
+def update_campaign_budget(campaign_id):
+    claims = get_jwt()
+    if claims.get('role') != 'brand':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    brand_id = int(get_jwt_identity())
+
+    try:
+        data = request.json
+        new_budget = data.get('budget')
+        if new_budget is None:
+            return jsonify({'msg': 'Missing budget field'}), 400
+
+        # Verify the campaign belongs to the brand
+        campaign_response = supabase.table('campaign').select('id, brand_id, name, budget, cpv, is_active, total_view_count').eq('id', campaign_id).eq('brand_id', brand_id).limit(1).execute()
+        if not campaign_response.data:
+            return jsonify({'msg': 'Campaign not found or not authorized'}), 404
+
+        response = supabase.table('campaign').update({'budget': new_budget}).eq('id', campaign_id).execute()
+
+        if response.data:
+            search.index.patch(campaign_id, {'budget': new_budget})
+            # Lowering the budget below what has already accrued pauses the campaign right away
+            budget_paused = budget_guard.enforce(campaign_response.data[0], budget=new_budget)
+            return jsonify({'msg': 'Campaign budget updated successfully', 'budget_paused': budget_paused}), 200
+        else:
+            return jsonify({'msg': 'Failed to update campaign budget'}), 500
+
+    except Exception as e:
+        log.exception("Update campaign budget error: %s", e)
+        return jsonify({'msg': 'Failed to update campaign budget', 'error': str(e)}), 500
+
+@brand_bp.route('/api/brand/campaigns/<int:campaign_id>/requirements', methods=['PUT'])
+@jwt_required()
+def update_campaign_requirements(campaign_id):
+    claims = get_jwt()
+    if claims.get('role') != 'brand':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    brand_id = int(get_jwt_identity())
+
+    try:
+        data = request.json
+        new_requirements = data.get('requirements')
+
+        # Verify the campaign belongs to the brand
+        campaign_response = supabase.table('campaign').select('id').eq('id', campaign_id).eq('brand_id', brand_id).limit(1).execute()
+        if not campaign_response.data:
+            return jsonify({'msg': 'Campaign not found or not authorized'}), 404
+
+        response = supabase.table('campaign').update({'requirements': new_requirements}).eq('id', campaign_id).execute()
+
+        if response.data:
+            search.index.patch(campaign_id, {'requirements': new_requirements})
+            return jsonify({'msg': 'Campaign requirements updated successfully'}), 200
+        else:
+            return jsonify({'msg': 'Failed to update campaign requirements'}), 500
+
+    except Exception as e:
+        log.exception("Update campaign requirements error: %s", e)
+        return jsonify({'msg': 'Failed to update campaign requirements', 'error': str(e)}), 500
+
+@brand_bp.route('/api/brand/campaigns/<int:campaign_id>/status', methods=['PUT'])
+@jwt_required()
+def update_campaign_status(campaign_id):
+    claims = get_jwt()
+    if claims.get('role') != 'brand':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    brand_id = int(get_jwt_identity())
+
+    try:
+        data = request.json
+        new_status = data.get('is_active')
+        if new_status is None or not isinstance(new_status, bool):
+            return jsonify({'msg': 'Missing or invalid is_active field (must be boolean)'}), 400
+
+        # Verify the campaign belongs to the brand
+        campaign_response = supabase.table('campaign').select('id, budget, cpv, total_view_count').eq('id', campaign_id).eq('brand_id', brand_id).limit(1).execute()
+        if not campaign_response.data:
+            return jsonify({'msg': 'Campaign not found or not authorized'}), 404
+        if new_status and budget_guard.is_exhausted(campaign_response.data[0]):
+            return jsonify({'msg': 'Campaign budget is exhausted. Increase the budget before reactivating it.'}), 400
+
+        response = supabase.table('campaign').update({'is_active': new_status}).eq('id', campaign_id).execute()
+
+        if response.data:
+            search.index.patch(campaign_id, {'is_active': new_status})
+            return jsonify({'msg': 'Campaign status updated successfully'}), 200
+        else:
+            return jsonify({'msg': 'Failed to update campaign status'}), 500
+
+    except Exception as e:
+        log.exception("Update campaign status error: %s", e)
+        return jsonify({'msg': 'Failed to update campaign status', 'error': str(e)}), 500
+
+@brand_bp.route('/api/brand/campaigns/<int:campaign_id>/view_threshold', methods=['PUT'])
+@jwt_required()
+def update_campaign_view_threshold(campaign_id):
+    claims = get_jwt()
+    if claims.get('role') != 'brand':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    brand_id = int(get_jwt_identity())
+
+    try:
+        data = request.json
+        new_threshold = data.get('view_threshold')
+        if new_threshold is None or not isinstance(new_threshold, (int, float)) or new_threshold < 0:
+            return jsonify({'msg': 'Missing or invalid view_threshold field (must be non-negative number)'}), 400
+
+        # Verify the campaign belongs to the brand
+        campaign_response = supabase.table('campaign').select('id').eq('id', campaign_id).eq('brand_id', brand_id).limit(1).execute()
+        if not campaign_response.data:
+            return jsonify({'msg': 'Campaign not found or not authorized'}), 404
+
+        response = supabase.table('campaign').update({'view_threshold': new_threshold}).eq('id', campaign_id).execute()
+
+        if response.data:
+            search.index.patch(campaign_id, {'view_threshold': new_threshold})
+            return jsonify({'msg': 'Campaign view threshold updated successfully'}), 200
+        else:
+            return jsonify({'msg': 'Failed to update campaign view threshold'}), 500
+
+    except Exception as e:
+        log.exception("Update campaign view threshold error: %s", e)
+        return jsonify({'msg': 'Failed to update campaign view threshold', 'error': str(e)}), 500
+
+@brand_bp.route('/api/brand/campaigns/<int:campaign_id>/deadline', methods=['PUT'])
+@jwt_required()
+def update_campaign_deadline(campaign_id):
+    claims = get_jwt()
+    if claims.get('role') != 'brand':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    brand_id = int(get_jwt_identity())
+
+    try:
+        data = request.json
+        new_deadline_str = data.get('deadline')
+        if not new_deadline_str:
+            return jsonify({'msg': 'Missing deadline field'}), 400
+
+        # Validate date format
+        try:
+            datetime.strptime(new_deadline_str, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'msg': 'Invalid deadline format. Use YYYY-MM-DD.'}), 400
+
+        # Verify the campaign belongs to the brand
+        campaign_response = supabase.table('campaign').select('id').eq('id', campaign_id).eq('brand_id', brand_id).limit(1).execute()
+        if not campaign_response.data:
+            return jsonify({'msg': 'Campaign not found or not authorized'}), 404
+
+        response = supabase.table('campaign').update({'deadline': new_deadline_str}).eq('id', campaign_id).execute()
+
+        if response.data:
+            search.index.patch(campaign_id, {'deadline': new_deadline_str})
+            return jsonify({'msg': 'Campaign deadline updated successfully'}), 200
+        else:
+            return jsonify({'msg': 'Failed to update campaign deadline'}), 500
+
+    except Exception as e:
+        log.exception("Update campaign deadline error: %s", e)
+        return jsonify({'msg': 'Failed to update campaign deadline', 'error': str(e)}), 500
+
+@brand_bp.route('/api/brand/campaigns/<int:campaign_id>/image', methods=['POST', 'PUT'])
+@jwt_required()
+def update_campaign_image(campaign_id):
+    """POST: upload the image itself as the raw request body (Content-Type image/*).
+    PUT: point the campaign at an image that is already hosted, `{"image_url": ...}`.
+    """
+    claims = get_jwt()
+    if claims.get('role') != 'brand':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    brand_id = int(get_jwt_identity())
+
+    try:
+        # Verify the campaign belongs to the brand
+        campaign_response = supabase.table('campaign').select('id').eq('id', campaign_id).eq('brand_id', brand_id).limit(1).execute()
+        if not campaign_response.data:
+            return jsonify({'msg': 'Campaign not found or not authorized'}), 404
+
+        if request.method == 'PUT':
+            image_url = (request.json or {}).get('image_url')
+            if not image_url:
+                return jsonify({'msg': 'Missing image_url field'}), 400
+            supabase.table('campaign').update({'image_url': image_url}).eq('id', campaign_id).execute()
+            return jsonify({'msg': 'Campaign image updated successfully', 'image_url': image_url}), 200
+
+        content_type = (request.mimetype or '').lower()
+        if content_type not in assets.CONTENT_TYPES:
+            return jsonify({'msg': f"Unsupported image type, expected one of {', '.join(assets.CONTENT_TYPES)}"}), 415
+        if request.content_length and request.content_length > assets.MAX_UPLOAD_BYTES:
+            return jsonify({'msg': 'Image is too large'}), 413
+
+        # request.stream reads the body straight off the socket; it is never loaded whole
+        manifest, deduplicated = assets.store_stream(request.stream)
+        urls = assets.public_urls(manifest, os.getenv('ASSET_BASE_URL') or request.host_url)
+        updates = {'image_url': assets.display_url(urls), 'asset_link': urls['original']}
+        supabase.table('campaign').update(updates).eq('id', campaign_id).execute()
+        search.index.patch(campaign_id, {'asset_link': updates['asset_link']})
+
+        return jsonify({
+            'msg': 'Campaign image uploaded successfully',
+            'image_url': updates['image_url'],
+            'asset_link': updates['asset_link'],
+            'variants': urls,
+            'hash': manifest['hash'],
+            'bytes': manifest['bytes'],
+            'deduplicated': deduplicated
+        }), 200
+
+    except assets.UploadTooLarge:
+        return jsonify({'msg': 'Image is too large'}), 413
+    except assets.UnsupportedImage as e:
+        return jsonify({'msg': str(e)}), 415
+    except Exception as e:
+        log.exception("Update campaign image error: %s", e)
+        return jsonify({'msg': 'Failed to update campaign image', 'error': str(e)}), 500
+
+@brand_bp.route('/api/brand/campaigns/<int:campaign_id>/view-history', methods=['GET'])
+@jwt_required()
+def get_campaign_view_history(campaign_id):
+    """Downsampled view-count history for a campaign (or one of its clips) over a time range."""
+    claims = get_jwt()
+    if claims.get('role') not in ('brand', 'admin'):
+        return jsonify({'msg': 'Unauthorized'}), 403
+
+    try:
+        if claims.get('role') == 'brand':
+            # Verify the campaign belongs to the brand
+            brand_id = int(get_jwt_identity())
+            campaign_response = supabase.table('campaign').select('id').eq('id', campaign_id).eq('brand_id', brand_id).limit(1).execute()
+            if not campaign_response.data:
+                return jsonify({'msg': 'Campaign not found or not authorized'}), 404
+
+        now = int(time.time())
+        end = request.args.get('end', now, type=int)
+        start = request.args.get('start', end - 30 * 86400, type=int)
+        points = min(max(request.args.get('points', 200, type=int), 3), 2000)
+        mode = request.args.get('mode', 'lttb')
+        if mode not in ('lttb', 'buckets'):
+            return jsonify({'msg': 'Invalid mode (use lttb or buckets)'}), 400
+        clip_id = request.args.get('clip_id', type=int)
+
+        series = view_history.store.campaign_series(campaign_id, start, end, points=points, mode=mode, clip_id=clip_id)
+        return jsonify({
+            'campaign_id': campaign_id,
+            'clip_id': clip_id,
+            'start': start,
+            'end': end,
+            'mode': mode,
+            'points': [{'t': t, 'views': v} for t, v in series]
+        }), 200
+    except Exception as e:
+        log.exception("Get campaign view history error: %s", e)
+        return jsonify({'msg': 'Failed to fetch view history', 'error': str(e)}), 500
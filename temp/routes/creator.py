@@ -0,0 +1,561 @@
+"""Creator routes, including the public campaign listing creators browse."""
+import logging
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
+from datetime import datetime
+from extensions import supabase
+import search
+import recommendations
+import clip_resolver
+import view_history
+import rollups
+import budget_guard
+import time
+
+creator_bp = Blueprint('creator', __name__)
+log = logging.getLogger(__name__)
+
+@creator_bp.route('/api/campaigns', methods=['GET'])
+def get_all_campaigns():
+    try:
+        # Return only active (non-expired) campaigns
+        response = supabase.table('campaign').select('*').eq('is_active', True).execute()
+        campaigns_data = response.data
+        
+        if campaigns_data:
+            result = [
+                {
+                    'id': c['id'],
+                    'name': c['name'],
+                    'platform': c['platform'],
+                    'budget': c['budget'],
+                    'cpv': c['cpv'],
+                    'hashtag': c['hashtag'],
+                    'audio': c['audio'],
+                    'deadline': c['deadline'],
+                    'brand_id': c['brand_id'],
+                    'is_active': c['is_active'],
+                    'category': c.get('category'),  # Default to 'fashion_clothing' if not set
+                    'asset_link': c.get('asset_link'),  # Optional field
+                    'total_view_count': c['total_view_count'],
+                    'requirements': c['requirements'],
+                    'view_threshold': c['view_threshold']
+                }
+                for c in campaigns_data
+            ]
+            return jsonify(result), 200
+        else:
+            return jsonify([]), 200
+    except Exception as e:
+        log.exception("Get all campaigns error: %s", e)
+        return jsonify({'msg': 'Failed to fetch campaigns', 'error': str(e)}), 500
+
+@creator_bp.route('/api/campaigns/search', methods=['GET'])
+def search_campaigns():
+    """Full-text search over active campaigns, ranked by BM25 with category/platform facet counts."""
+    try:
+        query = request.args.get('q', '').strip()
+        filters = {
+            'category': request.args.get('category'),
+            'platform': request.args.get('platform')
+        }
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+
+        started = time.perf_counter()
+        search.index.ensure_built()
+        results, total, facets = search.index.search(query, filters, limit=limit, offset=offset)
+        took_ms = round((time.perf_counter() - started) * 1000, 3)
+
+        return jsonify({
+            'results': results,
+            'total': total,
+            'facets': facets,
+            'limit': limit,
+            'offset': offset,
+            'took_ms': took_ms
+        }), 200
+    except Exception as e:
+        log.exception("Search campaigns error: %s", e)
+        return jsonify({'msg': 'Failed to search campaigns', 'error': str(e)}), 500
+
+@creator_bp.route('/api/campaigns/<int:campaign_id>', methods=['GET'])
+def get_campaign_by_id(campaign_id):
+    try:
+        # Get campaign data
+        response = supabase.table('campaign').select('*').eq('id', campaign_id).limit(1).execute()
+        campaign_data = response.data[0] if response.data else None
+
+        if not campaign_data:
+            return jsonify({'msg': 'Campaign not found'}), 404
+            
+        # Get accepted clips for this campaign
+        accepted_clips_response = supabase.table('accepted_clips').select('*').eq('campaign_id', campaign_id).execute()
+        accepted_clips = []
+        
+        if accepted_clips_response.data:
+            for clip in accepted_clips_response.data:
+                # Get creator username
+                creator_response = supabase.table('creator').select('username').eq('id', clip['creator_id']).limit(1).execute()
+                creator_username = creator_response.data[0]['username'] if creator_response.data else 'Unknown Creator'
+                
+                accepted_clips.append({
+                    'id': clip['id'],
+                    'campaign_id': clip['campaign_id'],
+                    'creator_id': clip['creator_id'],
+                    'creator_name': creator_username,
+                    'clip_url': clip['clip_url'],
+                    'media_id': clip.get('media_id'),
+                    'view_count': clip.get('view_count', 0),
+                    'caption': clip.get('caption'),
+                    'instagram_posted_at': clip.get('instagram_posted_at'),
+                    'submitted_at': clip.get('submitted_at')
+                })
+        
+        # Separate clips with None, 0, or duplicate view counts
+        view_count_map = {}
+        clips_to_sort = []
+        clips_without_ranking = []
+        
+        # First pass: group clips by their view_count
+        for clip in accepted_clips:
+            view_count = clip.get('view_count')
+            if view_count is None or view_count == 0:
+                clips_without_ranking.append(clip)
+                continue
+                
+            if view_count not in view_count_map:
+                view_count_map[view_count] = []
+            view_count_map[view_count].append(clip)
+        
+        # Second pass: add clips to either sorted list or without_ranking list
+        for view_count, clips in view_count_map.items():
+            if len(clips) == 1:  # Only one clip with this view_count
+                clips_to_sort.append((view_count, clips[0]))
+            else:  # Multiple clips with same view_count
+                clips_without_ranking.extend(clips)
+        
+        # Sort the clips that have unique view counts
+        accepted_clips_sorted = [clip for _, clip in sorted(clips_to_sort, key=lambda x: x[0], reverse=True)]
+        
+        # Combine the sorted clips with the unranked ones
+        all_clips = accepted_clips_sorted + clips_without_ranking
+        
+        # Calculate creator rankings based on total views across all their clips in this campaign
+        creator_rankings = {}
+        for clip in accepted_clips_sorted:
+            creator_id = clip['creator_id']
+            if creator_id not in creator_rankings:
+                creator_rankings[creator_id] = {
+                    'creator_id': creator_id,
+                    'creator_name': clip['creator_name'],
+                    'total_views': 0,
+                    'clip_count': 0
+                }
+            creator_rankings[creator_id]['total_views'] += clip.get('view_count', 0)
+            creator_rankings[creator_id]['clip_count'] += 1
+        
+        # Convert to list and sort by total_views in descending order
+        creator_rankings_list = sorted(creator_rankings.values(), key=lambda x: x['total_views'], reverse=True)
+
+        return jsonify({
+            'id': campaign_data['id'],
+            'name': campaign_data['name'],
+            'platform': campaign_data['platform'],
+            'budget': campaign_data['budget'],
+            'cpv': campaign_data['cpv'],
+            'hashtag': campaign_data['hashtag'],
+            'audio': campaign_data['audio'],
+            'deadline': campaign_data['deadline'],
+            'brand_id': campaign_data['brand_id'],
+            'is_active': campaign_data['is_active'],
+            'asset_link': campaign_data['asset_link'],
+            'category': campaign_data['category'],
+            'total_view_count': campaign_data['total_view_count'],
+            'requirements': campaign_data['requirements'],
+            'view_threshold': campaign_data['view_threshold'],
+            'accepted_clips': accepted_clips_sorted,
+            'creator_rankings': creator_rankings_list
+        }), 200
+
+    except Exception as e:
+        log.exception("Get campaign by ID error: %s", e)
+        return jsonify({'msg': 'Failed to fetch campaign details', 'error': str(e)}), 500
+
+def creator_campaigns(creator_id):
+    """Active campaigns the creator has clips in, each with the creator's submitted and accepted clips.
+
+    The creator's clips are fetched once and grouped by campaign rather than queried per campaign.
+    """
+    submitted = supabase.table('submitted_clips').select('id, campaign_id, clip_url, submitted_at, is_deleted_by_admin, feedback').eq('creator_id', creator_id).execute().data or []
+    accepted = supabase.table('accepted_clips').select('id, campaign_id, clip_url, submitted_at, media_id, view_count, caption, instagram_posted_at').eq('creator_id', creator_id).execute().data or []
+
+    submitted_by_campaign = {}
+    for clip in submitted:
+        # Map to expected frontend structure. Frontend will infer status.
+        submitted_by_campaign.setdefault(clip['campaign_id'], []).append({
+            'id': clip['id'],
+            'clip_url': clip['clip_url'],
+            'submitted_at': clip['submitted_at'],
+            'is_deleted_by_admin': clip['is_deleted_by_admin'],
+            'feedback': clip['feedback'],
+            'status': 'pending' # Frontend expects a status, so we provide a placeholder
+        })
+    accepted_by_campaign = {}
+    for clip in accepted:
+        accepted_by_campaign.setdefault(clip['campaign_id'], []).append({
+            'id': clip['id'],
+            'clip_url': clip['clip_url'],
+            'submitted_at': clip['submitted_at'],
+            'media_id': clip['media_id'],
+            'view_count': clip['view_count'],
+            'caption': clip['caption'],
+            'instagram_posted_at': clip['instagram_posted_at'],
+            'status': 'accepted' # Frontend expects a status
+        })
+
+    all_relevant_campaign_ids = list(set(submitted_by_campaign) | set(accepted_by_campaign))
+    if not all_relevant_campaign_ids:
+        return []
+
+    # Fetch details of these campaigns that are also active
+    campaigns_data = supabase.table('campaign').select('*').in_('id', all_relevant_campaign_ids).eq('is_active', True).execute().data or []
+    return [{
+        'id': campaign_data['id'],
+        'name': campaign_data['name'],
+        'platform': campaign_data['platform'],
+        'budget': campaign_data['budget'],
+        'cpv': campaign_data['cpv'],
+        'hashtag': campaign_data['hashtag'],
+        'asset_link': campaign_data['asset_link'],
+        'category': campaign_data['category'],
+        'audio': campaign_data['audio'],
+        'deadline': campaign_data['deadline'],
+        'brand_id': campaign_data['brand_id'],
+        'is_active': campaign_data['is_active'],
+        'total_view_count': campaign_data['total_view_count'],
+        'requirements': campaign_data['requirements'],
+        'view_threshold': campaign_data['view_threshold'],
+        'submitted_clips': submitted_by_campaign.get(campaign_data['id'], []),
+        'accepted_clips': accepted_by_campaign.get(campaign_data['id'], [])
+    } for campaign_data in campaigns_data]
+
+@creator_bp.route('/api/creator/your-campaigns', methods=['GET'])
+@jwt_required()
+def get_creator_campaigns():
+    claims = get_jwt()
+    if claims.get('role') != 'creator':
+        log.warning("Unauthorized access to creator campaigns. Role in token: %s", claims.get('role'))
+        return jsonify({'msg': 'Unauthorized'}), 403
+    creator_id = int(get_jwt_identity())
+    try:
+        return jsonify(creator_campaigns(creator_id)), 200
+    except Exception as e:
+        log.exception("Get creator campaigns error: %s", e)
+        return jsonify({'msg': 'Failed to fetch creator campaigns', 'error': str(e)}), 500
+
+@creator_bp.route('/api/creator/recommended-campaigns', methods=['GET'])
+@jwt_required()
+def get_recommended_campaigns():
+    """Precomputed campaigns ranked by expected earnings for the current creator."""
+    claims = get_jwt()
+    if claims.get('role') != 'creator':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    creator_id = int(get_jwt_identity())
+    try:
+        # One lookup for the creator's own row and the cold-start row it falls back to
+        response = supabase.table('creator_recommendation').select('creator_id, campaign_ids, scores, computed_at').in_(
+            'creator_id', [creator_id, recommendations.DEFAULT_CREATOR_ID]).execute()
+        rows = {row['creator_id']: row for row in (response.data or [])}
+        row = rows.get(creator_id) or rows.get(recommendations.DEFAULT_CREATOR_ID)
+        if not row:
+            return jsonify({'campaigns': [], 'computed_at': None}), 200
+
+        # Campaign details come from the in-memory search index, so no further queries are needed.
+        # Campaigns that were paused or deleted since the batch ran are skipped.
+        search.index.ensure_built()
+        result = []
+        for campaign_id, score in zip(row['campaign_ids'], row['scores']):
+            campaign = search.index.get(campaign_id)
+            if campaign and campaign.get('is_active'):
+                campaign['expected_earnings'] = score
+                result.append(campaign)
+
+        return jsonify({'campaigns': result, 'computed_at': row['computed_at']}), 200
+    except Exception as e:
+        log.exception("Get recommended campaigns error: %s", e)
+        return jsonify({'msg': 'Failed to fetch recommended campaigns', 'error': str(e)}), 500
+
+@creator_bp.route('/api/creator/submit-clip', methods=['POST'])
+@jwt_required()
+def submit_clip():
+    claims = get_jwt()
+    if claims.get('role') != 'creator':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    creator_id = int(get_jwt_identity())
+    try:
+        data = request.json
+        required_fields = ['campaign_id', 'clip_url']
+        if not all(k in data for k in required_fields):
+            return jsonify({'msg': 'Missing required fields'}), 400
+
+        campaign_id = data['campaign_id']
+        clip_url = data['clip_url']
+
+        # Check if the campaign exists and is active
+        campaign_response = supabase.table('campaign').select('id, brand_id, name, is_active, budget, cpv, total_view_count').eq('id', campaign_id).eq('is_active', True).limit(1).execute()
+        if not campaign_response.data:
+            return jsonify({'msg': 'Campaign not found or not active'}), 404
+        # Campaigns that ran out of budget before a pause was recorded are paused on first contact
+        if budget_guard.is_exhausted(campaign_response.data[0]):
+            budget_guard.enforce(campaign_response.data[0])
+            return jsonify({'msg': 'Campaign has used its budget and is no longer accepting submissions'}), 400
+
+        # Check if creator has already submitted the maximum allowed clips (5) for this campaign
+        existing_clips_response = supabase.table('submitted_clips').select('id', count='exact').eq('creator_id', creator_id).eq('campaign_id', campaign_id).execute()
+        if len(existing_clips_response.data or []) >= 5:
+            return jsonify({'msg': 'You have reached the maximum limit of 5 submissions for this campaign.'}), 400
+
+        new_clip = {
+            'campaign_id': campaign_id,
+            'creator_id': creator_id,
+            'clip_url': clip_url,
+            'submitted_at': datetime.utcnow().isoformat(),
+            'is_deleted_by_admin': False,
+            'feedback': None
+        }
+        response = supabase.table('submitted_clips').insert([new_clip]).execute()
+
+        if response.data:
+            # Resolve the Instagram media metadata in the background so it is ready on acceptance
+            clip_resolver.resolver.enqueue(clip_url)
+            return jsonify({'msg': 'Clip submitted successfully', 'clip_id': response.data[0]['id']}), 201
+        else:
+            log.error("Supabase submit clip error: %s - %s", response.status_code, response.count)
+            return jsonify({'msg': 'Failed to submit clip', 'error': response.count}), 500
+    except Exception as e:
+        log.exception("Submit clip error: %s", e)
+        return jsonify({'msg': 'Failed to submit clip', 'error': str(e)}), 500
+
+@creator_bp.route('/api/creator/campaign-clips', methods=['GET'])
+@jwt_required()
+def get_creator_clips_for_campaign():
+    claims = get_jwt()
+    if claims.get('role') != 'creator':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    creator_id = int(get_jwt_identity())
+    campaign_id = request.args.get('campaign_id', type=int)
+
+    if not campaign_id:
+        return jsonify({'msg': 'Missing campaign_id parameter'}), 400
+
+    try:
+        # Fetch submitted clips for a specific campaign by the current creator
+        submitted_response = supabase.table('submitted_clips').select('id, campaign_id, creator_id, clip_url, submitted_at, is_deleted_by_admin, feedback').eq('creator_id', creator_id).eq('campaign_id', campaign_id).execute()
+        submitted_clips_data = submitted_response.data if submitted_response.data else []
+
+        # Fetch accepted clips for a specific campaign by the current creator
+        accepted_response = supabase.table('accepted_clips').select('id, campaign_id, creator_id, clip_url, submitted_at, media_id, view_count, caption, instagram_posted_at').eq('creator_id', creator_id).eq('campaign_id', campaign_id).execute()
+        accepted_clips_data = accepted_response.data if accepted_response.data else []
+
+        result = []
+
+        # Add submitted clips with 'in_review' or 'rejected' status
+        for c in submitted_clips_data:
+            status = 'rejected' if c.get('is_deleted_by_admin') else 'in_review'
+            result.append({
+                'id': c['id'],
+                'campaign_id': c['campaign_id'],
+                'creator_id': c['creator_id'],
+                'clip_url': c['clip_url'],
+                'submitted_at': c['submitted_at'],
+                'status': status, # Inferred status
+                'is_deleted_by_admin': c.get('is_deleted_by_admin', False),
+                'feedback': c.get('feedback'),
+                'media_id': None,
+                'view_count': None,
+                'caption': None,
+                'instagram_posted_at': None
+            })
+
+        # Add accepted clips with 'accepted' status
+        for c in accepted_clips_data:
+            result.append({
+                'id': c['id'],
+                'campaign_id': c['campaign_id'],
+                'creator_id': c['creator_id'],
+                'clip_url': c['clip_url'],
+                'submitted_at': c['submitted_at'],
+                'status': 'accepted', # Inferred status
+                'is_deleted_by_admin': False, # Accepted clips are not marked as deleted by admin
+                'feedback': None, # Accepted clips do not have feedback
+                'media_id': c.get('media_id'),
+                'view_count': c.get('view_count'),
+                'caption': c.get('caption'),
+                'instagram_posted_at': c.get('instagram_posted_at'),
+                'accepted_date': c.get('accepted_date') # Add accepted_date
+            })
+
+        return jsonify(result), 200
+    except Exception as e:
+        log.exception("Get creator clips for campaign error: %s", e)
+        return jsonify({'msg': 'Failed to fetch clips', 'error': str(e)}), 500
+
+@creator_bp.route('/api/creator/accepted-clip-details/<int:submitted_clip_id>', methods=['GET'])
+@jwt_required()
+def get_accepted_clip_details(submitted_clip_id):
+    claims = get_jwt()
+    if claims.get('role') != 'creator':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    creator_id = int(get_jwt_identity())
+
+    try:
+        # Fetch the accepted clip using the submitted_clip_id
+        # Note: accepted_clips table uses its own 'id', not 'submitted_clip_id'.
+        # The previous logic was incorrect if submitted_clip_id was meant to be the ID in accepted_clips.
+        # Assuming submitted_clip_id passed here is the clip's ID (common for both tables once a clip moves)
+        response = supabase.table('accepted_clips').select('*').eq('id', submitted_clip_id).eq('creator_id', creator_id).limit(1).execute()
+        accepted_clip_data = response.data[0] if response.data else None
+
+        if not accepted_clip_data:
+            return jsonify({'msg': 'Accepted clip not found'}), 404
+
+        return jsonify({
+            'id': accepted_clip_data['id'],
+            'campaign_id': accepted_clip_data['campaign_id'],
+            'creator_id': accepted_clip_data['creator_id'],
+            'clip_url': accepted_clip_data['clip_url'],
+            'submitted_at': accepted_clip_data['submitted_at'],
+            'media_id': accepted_clip_data['media_id'],
+            'view_count': accepted_clip_data['view_count'],
+            'caption': accepted_clip_data['caption'],
+            'instagram_posted_at': accepted_clip_data['instagram_posted_at'],
+        }), 200
+
+    except Exception as e:
+        log.exception("Get accepted clip details error: %s", e)
+        return jsonify({'msg': 'Failed to fetch accepted clip details', 'error': str(e)}), 500
+
+@creator_bp.route('/api/creator/clip/<int:clip_id>', methods=['DELETE', 'OPTIONS'])
+@jwt_required(optional=True) # Allow OPTIONS requests without JWT
+def delete_clip(clip_id):
+    if request.method == 'OPTIONS':
+        # Preflight request, no need to process JWT
+        return jsonify({'msg': 'OK'}), 200
+
+    verify_jwt_in_request() # Ensure JWT context is established
+    claims = get_jwt()
+    if not claims or claims.get('role') != 'creator':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    creator_id = int(get_jwt_identity())
+
+    try:
+        # Verify the clip belongs to the creator by checking submitted_clips
+        submitted_clip_response = supabase.table('submitted_clips').select('id').eq('id', clip_id).eq('creator_id', creator_id).limit(1).execute()
+
+        if submitted_clip_response.data:
+            # If it's a submitted clip, just delete it
+            response = supabase.table('submitted_clips').delete().eq('id', clip_id).execute()
+            if response.count and response.count > 0:
+                return jsonify({'msg': 'Submitted clip deleted successfully'}), 200
+            else:
+                # If response.count is 0, it means the clip was not found or already deleted.
+                # In this context, the desired state (clip not existing) is achieved.
+                return jsonify({'msg': 'Submitted clip already deleted or not found'}), 200
+        
+        # If not in submitted_clips, check accepted_clips
+        accepted_clip_response = supabase.table('accepted_clips').select('id, campaign_id, view_count').eq('id', clip_id).eq('creator_id', creator_id).limit(1).execute()
+
+        if accepted_clip_response.data:
+            accepted_clip_data = accepted_clip_response.data[0]
+            campaign_id = accepted_clip_data['campaign_id']
+            clip_view_count = accepted_clip_data['view_count'] or 0
+
+            response = supabase.table('accepted_clips').delete().eq('id', clip_id).execute()
+            # delete() returns the deleted rows; its count is only set when asked for with count=
+            if response.data:
+                # The deleted row has the count a concurrent sync may have written since the read above
+                clip_view_count = response.data[0].get('view_count') or 0
+                view_history.forget_clip(clip_id, campaign_id)
+                rollups.record_removal(campaign_id, creator_id, clip_view_count)
+                # Take the clip's views out of the campaign total
+                supabase.rpc('increment_campaign_views', {'p_campaign_id': campaign_id, 'p_delta': -clip_view_count}).execute()
+                return jsonify({'msg': 'Accepted clip deleted successfully'}), 200
+            else:
+                # Nothing was deleted: the clip was already gone.
+                # In this context, the desired state (clip not existing) is achieved.
+                return jsonify({'msg': 'Accepted clip already deleted or not found'}), 200
+
+        return jsonify({'msg': 'Clip not found or not authorized'}), 404
+
+    except Exception as e:
+        log.exception("Delete clip error: %s", e)
+        return jsonify({'msg': 'Failed to delete clip', 'error': str(e)}), 500
+
+def creator_profile(creator_id):
+    """The creator's profile fields, or None if there is no such creator."""
+    response = supabase.table('creator').select(
+        'id, username, email, profile_completed, phone, nickname, bio, join_date'
+    ).eq('id', creator_id).limit(1).execute()
+    creator_data = response.data[0] if response.data else None
+    if not creator_data:
+        return None
+    return {
+        'id': creator_data['id'],
+        'username': creator_data['username'],
+        'email': creator_data['email'],
+        'profile_completed': creator_data.get('profile_completed'),
+        'phone': creator_data.get('phone'),
+        'nickname': creator_data.get('nickname'),
+        'bio': creator_data.get('bio'),
+        'join_date': creator_data.get('join_date')
+    }
+
+@creator_bp.route('/api/creator/profile', methods=['GET'])
+@jwt_required()
+def get_creator_profile():
+    claims = get_jwt()
+    if claims.get('role') != 'creator':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    creator_id = int(get_jwt_identity())
+    try:
+        profile = creator_profile(creator_id)
+        if profile:
+            return jsonify(profile), 200
+        else:
+            return jsonify({'msg': 'Creator not found'}), 404
+    except Exception as e:
+        log.exception("Get creator profile error: %s", e)
+        return jsonify({'msg': 'Failed to fetch creator profile', 'error': str(e)}), 500
+
+@creator_bp.route('/api/creator/profile', methods=['PUT'])
+@jwt_required()
+def update_creator_profile():
+    claims = get_jwt()
+    if claims.get('role') != 'creator':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    creator_id = int(get_jwt_identity())
+    try:
+        data = request.json
+        update_fields = {}
+        # Only update fields relevant to initial profile completion
+        if 'phone' in data: update_fields['phone'] = data['phone'] # Changed phone_number to phone
+        if 'nickname' in data: update_fields['nickname'] = data['nickname']
+        if 'bio' in data: update_fields['bio'] = data['bio']
+
+        # Mark profile as completed after successful update
+        update_fields['profile_completed'] = True
+
+        if not update_fields:
+            return jsonify({'msg': 'No fields to update'}), 400
+
+        response = supabase.table('creator').update(update_fields).eq('id', creator_id).execute()
+
+        if response.data:
+            return jsonify({'msg': 'Creator profile updated successfully'}), 200
+        else:
+            log.error("Supabase update creator profile error: %s - %s", response.status_code, response.count)
+            return jsonify({'msg': 'Failed to update creator profile', 'error': response.count}), 500
+    except Exception as e:
+        log.exception("Update creator profile error: %s", e)
+        return jsonify({'msg': 'Failed to update creator profile', 'error': str(e)}), 500
@@ -0,0 +1,325 @@
+"""Wallet and payment routes."""
+import json
+import logging
+import os
+import re
+import uuid
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from extensions import supabase
+import deposits
+import events
+import payment_gateway
+import withdrawals
+
+payments_bp = Blueprint('payments', __name__)
+log = logging.getLogger(__name__)
+
+MIN_DEPOSIT = float(os.getenv('MIN_DEPOSIT_AMOUNT', '1'))
+MAX_DEPOSIT = float(os.getenv('MAX_DEPOSIT_AMOUNT', '1000000'))
+MIN_WITHDRAWAL = float(os.getenv('MIN_WITHDRAWAL_AMOUNT', '1'))
+MAX_WITHDRAWAL = float(os.getenv('MAX_WITHDRAWAL_AMOUNT', '100000'))
+MAX_PAGE_SIZE = 100
+
+UPI_ID_RE = re.compile(r'^[\w.\-]{2,256}@[a-zA-Z]{2,64}$')
+BANK_ACCOUNT_RE = re.compile(r'^\d{9,18}$')
+IFSC_RE = re.compile(r'^[A-Z]{4}0[A-Z0-9]{6}$')
+
+
+def wallet_balance(user_type, user_id):
+    response = supabase.table('wallet').select('balance, currency').eq('user_type', user_type).eq('user_id', user_id).limit(1).execute()
+    row = response.data[0] if response.data else {}
+    return float(row.get('balance') or 0), row.get('currency') or 'INR'
+
+@payments_bp.route('/api/payments/wallet-balance', methods=['GET'])
+@jwt_required()
+def get_wallet_balance():
+    claims = get_jwt()
+    role = claims.get('role')
+    if role not in ('brand', 'creator'):
+        return jsonify({'msg': 'Unauthorized'}), 403
+    try:
+        balance, currency = wallet_balance(role, int(get_jwt_identity()))
+        return jsonify({'role': role, 'balance': balance, 'currency': currency}), 200
+    except Exception as e:
+        log.exception("Get wallet balance error: %s", e)
+        return jsonify({'msg': 'Failed to fetch wallet balance', 'error': str(e)}), 500
+
+@payments_bp.route('/api/payments/create-deposit-order', methods=['POST'])
+@jwt_required()
+def create_deposit_order():
+    claims = get_jwt()
+    if claims.get('role') != 'brand':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    brand_id = int(get_jwt_identity())
+    try:
+        data = request.json or {}
+        try:
+            amount = round(float(data.get('amount')), 2)
+        except (TypeError, ValueError):
+            return jsonify({'msg': 'Missing or invalid amount'}), 400
+        if not MIN_DEPOSIT <= amount <= MAX_DEPOSIT:
+            return jsonify({'msg': f"Amount must be between {MIN_DEPOSIT:g} and {MAX_DEPOSIT:g}"}), 400
+
+        brand_response = supabase.table('brand').select('id, email').eq('id', brand_id).limit(1).execute()
+        brand = brand_response.data[0] if brand_response.data else {}
+        order_id = f"dep_{brand_id}_{uuid.uuid4().hex[:16]}"
+        notify_url = os.getenv('CASHFREE_NOTIFY_URL') or request.host_url.rstrip('/') + '/api/payments/webhook/cashfree'
+
+        order = payment_gateway.gateway.create_order(order_id, amount, f"brand_{brand_id}", customer_email=brand.get('email'), notify_url=notify_url)
+        supabase.table('deposit_order').insert([{
+            'order_id': order_id,
+            'brand_id': brand_id,
+            'amount': amount,
+            'payment_session_id': order.get('payment_session_id')
+        }]).execute()
+        return jsonify({'payment_session_id': order.get('payment_session_id'), 'order_id': order_id}), 200
+    except payment_gateway.GatewayError as e:
+        log.error("Create deposit order gateway error: %s", e)
+        return jsonify({'msg': 'Payment gateway is unavailable, please try again', 'error': str(e)}), 502
+    except Exception as e:
+        log.exception("Create deposit order error: %s", e)
+        return jsonify({'msg': 'Failed to create deposit order', 'error': str(e)}), 500
+
+@payments_bp.route('/api/payments/verify-deposit', methods=['POST'])
+@jwt_required()
+def verify_deposit():
+    """Queue the order for confirmation; the wallet is credited by the deposit processor, not here."""
+    claims = get_jwt()
+    if claims.get('role') != 'brand':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    brand_id = int(get_jwt_identity())
+    try:
+        order_id = (request.json or {}).get('order_id')
+        if not order_id:
+            return jsonify({'msg': 'Missing order_id'}), 400
+
+        order_response = supabase.table('deposit_order').select('order_id, amount, status').eq('order_id', order_id).eq('brand_id', brand_id).limit(1).execute()
+        order = order_response.data[0] if order_response.data else None
+        if not order:
+            return jsonify({'msg': 'Deposit order not found'}), 404
+        if order['status'] == 'failed':
+            return jsonify({'msg': 'Payment was not completed for this order'}), 400
+
+        if order['status'] != 'credited':
+            deposits.enqueue(order_id, 'verify')
+        balance, _ = wallet_balance('brand', brand_id)
+        if order['status'] == 'credited':
+            return jsonify({'msg': 'Deposit verified', 'new_balance': balance, 'status': 'credited', 'order_id': order_id}), 200
+        # Accepted: a deposit_credited event is pushed on the brand's stream once the wallet is credited
+        return jsonify({'msg': 'Payment is being verified; your balance will update shortly', 'new_balance': balance,
+                        'status': 'pending', 'order_id': order_id}), 202
+    except Exception as e:
+        log.exception("Verify deposit error: %s", e)
+        return jsonify({'msg': 'Failed to verify deposit', 'error': str(e)}), 500
+
+@payments_bp.route('/api/payments/webhook/cashfree', methods=['POST'])
+def cashfree_webhook():
+    """Gateway notification: verify the signature, queue the order and answer immediately."""
+    raw_body = request.get_data()
+    if not payment_gateway.gateway.verify_webhook(raw_body, request.headers.get('x-webhook-timestamp'), request.headers.get('x-webhook-signature')):
+        return jsonify({'msg': 'Invalid signature'}), 401
+    try:
+        payload = json.loads(raw_body or b'{}')
+        order_id = ((payload.get('data') or {}).get('order') or {}).get('order_id')
+        if not order_id or not order_id.startswith('dep_'):
+            return jsonify({'msg': 'Ignored'}), 200
+        deposits.enqueue(order_id, 'webhook', payload)
+        return jsonify({'msg': 'Queued'}), 200
+    except Exception as e:
+        # A non-2xx answer makes the gateway retry the webhook later
+        log.exception("Cashfree webhook error: %s", e)
+        return jsonify({'msg': 'Failed to queue webhook', 'error': str(e)}), 500
+
+@payments_bp.route('/api/payments/creator-withdraw', methods=['POST'])
+@jwt_required()
+def creator_withdraw():
+    """Reserve the amount and queue the payout; it is sent with the next payout batch."""
+    claims = get_jwt()
+    if claims.get('role') != 'creator':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    creator_id = int(get_jwt_identity())
+    try:
+        data = request.json or {}
+        try:
+            amount = round(float(data.get('amount')), 2)
+        except (TypeError, ValueError):
+            return jsonify({'msg': 'Missing or invalid amount'}), 400
+        if not MIN_WITHDRAWAL <= amount <= MAX_WITHDRAWAL:
+            return jsonify({'msg': f"Amount must be between {MIN_WITHDRAWAL:g} and {MAX_WITHDRAWAL:g}"}), 400
+
+        payout_method = data.get('payout_method')
+        upi_id = bank_account = ifsc = None
+        if payout_method == 'upi':
+            upi_id = (data.get('upi_id') or '').strip()
+            if not UPI_ID_RE.match(upi_id):
+                return jsonify({'msg': 'Invalid UPI ID'}), 400
+        elif payout_method == 'bank':
+            bank_account = (data.get('bank_account') or '').strip()
+            ifsc = (data.get('ifsc') or '').strip().upper()
+            if not BANK_ACCOUNT_RE.match(bank_account) or not IFSC_RE.match(ifsc):
+                return jsonify({'msg': 'Invalid bank account number or IFSC'}), 400
+        else:
+            return jsonify({'msg': "payout_method must be 'upi' or 'bank'"}), 400
+
+        try:
+            withdrawal_id, reference_id, new_balance = withdrawals.reserve(creator_id, amount, payout_method, upi_id, bank_account, ifsc)
+        except withdrawals.InsufficientFunds:
+            return jsonify({'msg': 'Insufficient wallet balance'}), 400
+        return jsonify({
+            'msg': 'Withdrawal queued; it will be paid out with the next payout batch',
+            'withdrawal_id': withdrawal_id,
+            'amount': amount,
+            'new_balance': new_balance,
+            'payout_method': payout_method,
+            'reference_id': reference_id,
+            'utr': None,
+            'status': 'pending'
+        }), 202
+    except Exception as e:
+        log.exception("Creator withdraw error: %s", e)
+        return jsonify({'msg': 'Failed to create withdrawal', 'error': str(e)}), 500
+
+@payments_bp.route('/api/payments/creator/withdrawals', methods=['GET'])
+@jwt_required()
+def creator_withdrawals():
+    """Newest first. Pass the previous page's `next_cursor` as `cursor`; `offset` still works but is slower."""
+    claims = get_jwt()
+    if claims.get('role') != 'creator':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    creator_id = int(get_jwt_identity())
+    try:
+        status = request.args.get('status')
+        try:
+            limit = max(1, min(int(request.args.get('limit', 20)), MAX_PAGE_SIZE))
+            offset = max(0, int(request.args.get('offset', 0)))
+            cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+        except ValueError:
+            return jsonify({'msg': 'limit, offset and cursor must be integers'}), 400
+
+        query = supabase.table('withdrawal').select(
+            'id, amount, status, payout_method, reference_id, utr, last_error, created_at, completed_at').eq('creator_id', creator_id)
+        if status == 'pending':
+            query = query.in_('status', list(withdrawals.IN_FLIGHT))
+        elif status:
+            query = query.eq('status', status)
+        if cursor is not None:
+            query = query.lt('id', cursor)
+        elif offset:
+            query = query.range(offset, offset + limit)
+        # One extra row tells whether there is a next page
+        rows = query.order('id', desc=True).limit(limit + 1).execute().data or []
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        records = [{
+            'id': row['id'],
+            'amount': float(row['amount']),
+            'status': withdrawals.public_status(row['status']),
+            'payout_method': row['payout_method'],
+            'reference_id': row['reference_id'],
+            'utr': row.get('utr'),
+            'failure_reason': row.get('last_error') if row['status'] in ('failed', 'reverted') else None,
+            'created_at': row['created_at'],
+            'completed_at': row.get('completed_at'),
+            'type': 'withdrawal'
+        } for row in rows]
+        return jsonify({
+            'msg': 'Withdrawals fetched',
+            'withdrawals': records,
+            'count': len(records),
+            'limit': limit,
+            'offset': offset,
+            'next_cursor': records[-1]['id'] if has_more else None
+        }), 200
+    except Exception as e:
+        log.exception("Withdrawal history error: %s", e)
+        return jsonify({'msg': 'Failed to fetch withdrawal history', 'error': str(e)}), 500
+
+def creator_notifications(creator_id, limit=20):
+    """Recent activity in the shape of the `Notification` type in src/lib/api.ts, newest first.
+
+    Built from the rows the events came from: accepted clips, rejected submissions, earning
+    transactions and withdrawals. Clips reviewed before their review time was recorded fall
+    back to their submission time.
+    """
+    accepted = supabase.table('accepted_clips').select('id, campaign_id, submitted_at, accepted_at, campaign:campaign(name)').eq(
+        'creator_id', creator_id).order('id', desc=True).limit(limit).execute().data or []
+    rejected = supabase.table('submitted_clips').select('id, campaign_id, feedback, submitted_at, reviewed_at, campaign:campaign(name)').eq(
+        'creator_id', creator_id).eq('is_deleted_by_admin', True).order('id', desc=True).limit(limit).execute().data or []
+    earnings = supabase.table('transactions').select('id, amount, created_at').eq('user_type', 'creator').eq(
+        'user_id', creator_id).eq('type', 'earning').eq('status', 'success').order('created_at', desc=True).limit(limit).execute().data or []
+    withdrawn = supabase.table('withdrawal').select('id, amount, payout_method, created_at').eq(
+        'creator_id', creator_id).order('id', desc=True).limit(limit).execute().data or []
+
+    def campaign_name(row):
+        return (row.get('campaign') or {}).get('name') or 'a campaign'
+
+    notifications = [{
+        'type': events.CLIP_APPROVED,
+        'message': f"Your clip for {campaign_name(row)} was approved",
+        'timestamp': row.get('accepted_at') or row['submitted_at'],
+        'campaign_id': row['campaign_id'],
+        'clip_id': row['id']
+    } for row in accepted]
+    notifications += [{
+        'type': events.CLIP_REJECTED,
+        'message': f"Your clip for {campaign_name(row)} was rejected",
+        'timestamp': row.get('reviewed_at') or row['submitted_at'],
+        'campaign_id': row['campaign_id'],
+        'clip_id': row['id'],
+        'feedback': row.get('feedback')
+    } for row in rejected]
+    notifications += [{
+        'type': events.EARNING_PAYOUT,
+        'message': f"Earnings of {float(row['amount']):.2f} credited",
+        'timestamp': row['created_at'],
+        'amount': float(row['amount'])
+    } for row in earnings]
+    notifications += [{
+        'type': events.WITHDRAWAL_INITIATED,
+        'message': f"Withdrawal of {float(row['amount']):.2f} initiated",
+        'timestamp': row['created_at'],
+        'amount': float(row['amount']),
+        'payout_method': row['payout_method']
+    } for row in withdrawn]
+    notifications.sort(key=lambda n: str(n['timestamp'] or ''), reverse=True)
+    return notifications[:limit]
+
+@payments_bp.route('/api/payments/creator/revert-withdrawal', methods=['POST'])
+@jwt_required()
+def creator_revert_withdrawal():
+    """Return a failed (or not yet sent) withdrawal to the wallet."""
+    claims = get_jwt()
+    if claims.get('role') != 'creator':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    creator_id = int(get_jwt_identity())
+    try:
+        withdrawal_id = (request.json or {}).get('transaction_id')
+        if not withdrawal_id:
+            return jsonify({'msg': 'Missing transaction_id'}), 400
+
+        response = supabase.table('withdrawal').select('id, status').eq('id', withdrawal_id).eq('creator_id', creator_id).limit(1).execute()
+        if not response.data:
+            return jsonify({'msg': 'Withdrawal not found'}), 404
+        # Only the states in which the provider can no longer pay it out
+        new_balance = withdrawals.revert(withdrawal_id, 'reverted by creator', ('failed', 'pending'))
+        if new_balance is None:
+            return jsonify({'msg': f"A {withdrawals.public_status(response.data[0]['status'])} withdrawal can't be reverted"}), 400
+        return jsonify({'msg': 'Withdrawal reverted', 'new_balance': new_balance}), 200
+    except Exception as e:
+        log.exception("Revert withdrawal error: %s", e)
+        return jsonify({'msg': 'Failed to revert withdrawal', 'error': str(e)}), 500
+
+@payments_bp.route('/api/payments/admin/withdrawal-metrics', methods=['GET'])
+@jwt_required()
+def admin_withdrawal_metrics():
+    """Withdrawal queue depth and payout batch latency."""
+    claims = get_jwt()
+    if claims.get('role') != 'admin':
+        return jsonify({'msg': 'Unauthorized'}), 403
+    try:
+        return jsonify(withdrawals.processor.metrics()), 200
+    except Exception as e:
+        log.exception("Withdrawal metrics error: %s", e)
+        return jsonify({'msg': 'Failed to fetch withdrawal metrics', 'error': str(e)}), 500
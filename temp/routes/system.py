@@ -0,0 +1,99 @@
+"""Operational routes: the live event stream and health probes."""
+from flask import Blueprint, jsonify, Response
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from datetime import datetime, timedelta
+import os
+import events
+import health
+import jwks
+import logs
+
+system_bp = Blueprint('system', __name__)
+
+STREAM_SCOPE = 'stream'
+STREAM_TOKEN_SECONDS = int(os.getenv('STREAM_TOKEN_SECONDS', '60'))
+
+@system_bp.route('/api/stream/token', methods=['POST'])
+@jwt_required()
+def stream_token():
+    """Issue the short-lived token that opens /api/stream.
+
+    EventSource cannot set headers, so the stream's token travels in the URL, where access and
+    proxy logs record it. It therefore only opens the stream (see extensions.py) and expires after
+    STREAM_TOKEN_SECONDS; an open stream stays open, and a dropped one fetches a new token.
+    """
+    token = create_access_token(identity=get_jwt_identity(), expires_delta=timedelta(seconds=STREAM_TOKEN_SECONDS),
+                                additional_claims={'role': get_jwt().get('role'), 'scope': STREAM_SCOPE})
+    return jsonify({'token': token, 'expires_in': STREAM_TOKEN_SECONDS}), 200
+
+@system_bp.route('/api/stream', methods=['GET'])
+@jwt_required(locations=['query_string']) # ?jwt=<stream token> from /api/stream/token
+def event_stream():
+    """Server-Sent Events channel pushing clip moderation, view count and payout events."""
+    claims = get_jwt()
+    if claims.get('scope') != STREAM_SCOPE:
+        return jsonify({'msg': 'Open the stream with a token from /api/stream/token'}), 401
+    role = claims.get('role')
+    user_id = get_jwt_identity()
+
+    if role == 'creator':
+        channels = [events.creator_channel(user_id)]
+    elif role == 'brand':
+        channels = [events.brand_channel(user_id)]
+    elif role == 'admin':
+        channels = [events.ADMIN_CHANNEL]
+    else:
+        return jsonify({'msg': 'Unauthorized'}), 403
+
+    subscription = events.hub.subscribe(channels)
+    if subscription is None:
+        # Worker is at its connection cap; the client should back off and retry (or fall back to polling)
+        return jsonify({'msg': 'Too many open streams, retry later'}), 503, {'Retry-After': '10'}
+
+    heartbeat = int(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+    response = Response(events.stream(subscription, heartbeat_interval=heartbeat), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no' # Disable proxy buffering so events are flushed immediately
+    })
+    # Release the subscription even if the client disconnects before the first frame is sent
+    response.call_on_close(subscription.close)
+    return response
+
+@system_bp.route('/livez', methods=['GET'])
+def liveness():
+    """Liveness probe: the process is up and serving requests. Does no I/O."""
+    return jsonify({'status': 'alive'}), 200
+
+@system_bp.route('/readyz', methods=['GET'])
+def readiness():
+    """Readiness probe backed by the cached background database check."""
+    probe = health.readiness_probe.status()
+    return jsonify({
+        'status': 'ready' if probe['ready'] else 'not_ready',
+        'database': probe,
+        'pool': health.pool_gauge.snapshot(),
+        'streams': events.hub.connection_count,
+        'logging': logs.stats(),
+        'auth_keys': jwks.status(),
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200 if probe['ready'] else 503
+
+@system_bp.route('/api/health', methods=['GET'])
+def health_check():
+    """Health check endpoint kept for existing callers; served from the cached readiness probe"""
+    probe = health.readiness_probe.status()
+    if probe['ready']:
+        return jsonify({
+            'status': 'healthy',
+            'database': 'connected',
+            'probe_latency_ms': probe['latency_ms'],
+            'pool': health.pool_gauge.snapshot(),
+            'timestamp': datetime.utcnow().isoformat()
+        }), 200
+
+    return jsonify({
+        'status': 'error',
+        'error': probe['error'] or 'readiness probe is stale',
+        'database': 'connection failed',
+        'timestamp': datetime.utcnow().isoformat()
+    }), 500
@@ -0,0 +1,270 @@
+"""In-memory inverted index over campaigns with BM25 ranking and category/platform facets.
+
+The index is built from the `campaign` table on first use (and warmed in the background at
+startup), then kept current by the campaign write routes calling `upsert`, `patch` and
+`remove`. Writes handled by other workers are picked up by the periodic rebuild.
+"""
+import heapq
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Field boosts: a match in the name counts more than one buried in the requirements text
+FIELD_WEIGHTS = {'name': 3.0, 'hashtag': 2.0, 'audio': 1.5, 'requirements': 1.0}
+FACETS = ('category', 'platform')
+
+# Columns kept per document; the same projection `/api/campaigns` returns
+STORED_FIELDS = (
+    'id', 'name', 'platform', 'budget', 'cpv', 'hashtag', 'audio', 'deadline', 'brand_id',
+    'is_active', 'category', 'asset_link', 'total_view_count', 'requirements', 'view_threshold'
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+class CampaignIndex:
+    def __init__(self, loader=None, refresh_seconds=300):
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self.built_at = None
+        self._docs = {}           # campaign id -> stored fields
+        self._terms = {}          # campaign id -> {term: weighted tf}
+        self._postings = {}       # term -> {campaign id: precomputed BM25 term impact}
+        self._lengths = {}        # campaign id -> weighted document length
+        self._total_length = 0.0
+        self._facets = {facet: {} for facet in FACETS}  # facet -> value -> set(campaign ids)
+        self._active = set()
+        self._avg_length = None
+        self._pending = None      # mutations made while a rebuild is loading, replayed onto it
+        self._lock = threading.RLock()
+        self._build_lock = threading.RLock()
+
+    # --- Building -----------------------------------------------------------
+
+    def ensure_built(self):
+        if self.built_at is None:
+            with self._build_lock:
+                if self.built_at is None:
+                    self.rebuild()
+
+    def rebuild(self):
+        """Replace the whole index with a fresh load from the database.
+
+        The load runs outside the lock, so searches and writes carry on meanwhile. Writes made
+        during the load are logged and replayed onto the fresh index before it is swapped in;
+        otherwise a write that landed after the loader read its row would be lost until the
+        next rebuild.
+        """
+        with self._build_lock:
+            with self._lock:
+                self._pending = []
+            try:
+                rows = self.loader() if self.loader else []
+                fresh = CampaignIndex()
+                # Two passes so every impact is computed against the final average document length
+                fresh._avg_length = self._average_length(rows)
+                for row in rows:
+                    fresh._add(row)
+                with self._lock:
+                    for method, args in self._pending:
+                        getattr(fresh, method)(*args)
+                    self._docs, self._terms, self._postings = fresh._docs, fresh._terms, fresh._postings
+                    self._lengths, self._total_length, self._facets = fresh._lengths, fresh._total_length, fresh._facets
+                    self._active, self._avg_length = fresh._active, fresh._avg_length
+                    self.built_at = time.time()
+            finally:
+                with self._lock:
+                    self._pending = None
+
+    def start_background_refresh(self):
+        def run():
+            while True:
+                try:
+                    if self.built_at is None:
+                        self.ensure_built()
+                    else:
+                        self.rebuild()
+                except Exception as e:
+                    log.warning("Index rebuild failed: %s", e)
+                time.sleep(self.refresh_seconds)
+        threading.Thread(target=run, name='search-index-refresh', daemon=True).start()
+
+    # --- Incremental updates -------------------------------------------------
+
+    def upsert(self, campaign):
+        with self._lock:
+            self._log('upsert', campaign)
+            self._remove(campaign['id'])
+            self._add(campaign)
+
+    def patch(self, campaign_id, fields):
+        """Apply a partial update (e.g. a new budget or is_active flag) to an indexed campaign."""
+        with self._lock:
+            self._log('patch', campaign_id, fields)
+            doc = self._docs.get(campaign_id)
+            if doc is None:
+                return
+            self._remove(campaign_id)
+            self._add(dict(doc, **fields))
+
+    def remove(self, campaign_id):
+        with self._lock:
+            self._log('remove', campaign_id)
+            self._remove(campaign_id)
+
+    def _log(self, method, *args):
+        if self._pending is not None:
+            self._pending.append((method, args))
+
+    def _add(self, campaign):
+        campaign_id = campaign['id']
+        doc = {field: campaign.get(field) for field in STORED_FIELDS}
+        terms = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(doc.get(field)):
+                terms[token] = terms.get(token, 0.0) + weight
+        length = sum(terms.values())
+
+        self._docs[campaign_id] = doc
+        self._terms[campaign_id] = terms
+        self._lengths[campaign_id] = length
+        self._total_length += length
+        # The length normalisation is folded into each posting at write time, so a query is just
+        # a sum of idf * impact. Incremental adds use the average from the last rebuild, which
+        # the periodic rebuild corrects.
+        avg_length = self._avg_length or (self._total_length / len(self._docs)) or 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+        for token, tf in terms.items():
+            self._postings.setdefault(token, {})[campaign_id] = tf * (BM25_K1 + 1) / (tf + norm)
+        for facet in FACETS:
+            self._facets[facet].setdefault(doc.get(facet), set()).add(campaign_id)
+        if doc.get('is_active'):
+            self._active.add(campaign_id)
+
+    def _remove(self, campaign_id):
+        doc = self._docs.pop(campaign_id, None)
+        if doc is None:
+            return
+        for token in self._terms.pop(campaign_id):
+            postings = self._postings[token]
+            del postings[campaign_id]
+            if not postings:
+                del self._postings[token]
+        self._total_length -= self._lengths.pop(campaign_id)
+        self._active.discard(campaign_id)
+        for facet in FACETS:
+            members = self._facets[facet].get(doc.get(facet))
+            if members is not None:
+                members.discard(campaign_id)
+                if not members:
+                    del self._facets[facet][doc.get(facet)]
+
+    # --- Querying -------------------------------------------------------------
+
+    def get(self, campaign_id):
+        with self._lock:
+            doc = self._docs.get(campaign_id)
+            return dict(doc) if doc is not None else None
+
+    def search(self, query='', filters=None, limit=20, offset=0, active_only=True):
+        """Return (results, total, facet_counts).
+
+        Facet counts are disjunctive: the counts for `category` respect every filter except
+        the category filter itself, so the UI can show how many results each option would give.
+        """
+        filters = {k: v for k, v in (filters or {}).items() if k in FACETS and v}
+        with self._lock:
+            scores = self._score(tokenize(query))
+            if scores is None:
+                # No text query: every document matches with the same score
+                candidates = set(self._active) if active_only else set(self._docs)
+            else:
+                candidates = set(scores) & self._active if active_only else set(scores)
+
+            facet_counts = {}
+            for facet in FACETS:
+                others = self._apply_filters(candidates, filters, skip=facet)
+                counts = {}
+                for value, members in self._facets[facet].items():
+                    n = len(members & others)
+                    if n and value is not None:
+                        counts[value] = n
+                facet_counts[facet] = counts
+
+            matched = self._apply_filters(candidates, filters)
+            total = len(matched)
+            if scores is None:
+                # Newest campaigns first when browsing without a query
+                ranked = heapq.nlargest(offset + limit, matched)
+                page = [(cid, None) for cid in ranked[offset:]]
+            else:
+                ranked = heapq.nlargest(offset + limit, matched, key=scores.__getitem__)
+                page = [(cid, scores[cid]) for cid in ranked[offset:]]
+            results = [dict(self._docs[cid], score=None if score is None else round(score, 4)) for cid, score in page]
+        return results, total, facet_counts
+
+    def _apply_filters(self, candidates, filters, skip=None):
+        matched = candidates
+        for facet, value in filters.items():
+            if facet != skip:
+                matched = matched & self._facets[facet].get(value, set())
+        return matched
+
+    def _score(self, tokens):
+        if not tokens:
+            return None
+        n_docs = len(self._docs)
+        scores = None
+        for token in set(tokens):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            if scores is None:
+                # First term: build the accumulator in one comprehension instead of per-key updates
+                scores = {cid: idf * impact for cid, impact in postings.items()}
+                continue
+            get = scores.get
+            for cid, impact in postings.items():
+                scores[cid] = get(cid, 0.0) + idf * impact
+        return scores if scores is not None else {}
+
+    @staticmethod
+    def _average_length(rows):
+        if not rows:
+            return None
+        total = 0.0
+        for row in rows:
+            for field, weight in FIELD_WEIGHTS.items():
+                total += weight * len(tokenize(row.get(field)))
+        return (total / len(rows)) or None
+
+
+def _load_campaigns(page_size=1000):
+    # Imported lazily so that importing this module never builds the Supabase client
+    from extensions import supabase
+    rows, start = [], 0
+    while True:
+        response = supabase.table('campaign').select(', '.join(STORED_FIELDS)).order('id').range(start, start + page_size - 1).execute()
+        batch = response.data or []
+        rows.extend(batch)
+        if len(batch) < page_size:
+            return rows
+        start += page_size
+
+
+index = CampaignIndex(loader=_load_campaigns, refresh_seconds=int(os.getenv('SEARCH_INDEX_REFRESH_SECONDS', '300')))
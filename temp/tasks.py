@@ -0,0 +1,80 @@
+"""Background jobs run by `python worker.py`, and the schedules that enqueue them.
+
+Every handler is idempotent (see jobs.py): deposit and withdrawal batches claim their own rows
+with SKIP LOCKED, and the other jobs are plain recomputations.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+
+import clip_resolver
+import deposits
+import jobs
+import recommendations
+import withdrawals
+
+log = logging.getLogger(__name__)
+
+EXPIRE_CAMPAIGNS = 'campaigns.expire_deadlines'
+PROCESS_DEPOSITS = deposits.JOB_KIND
+PROCESS_WITHDRAWALS = 'withdrawals.process'
+REBUILD_RECOMMENDATIONS = 'recommendations.rebuild'
+PRUNE_JOBS = 'jobs.prune'
+RESOLVE_CLIP_MEDIA = clip_resolver.JOB_KIND
+
+JOB_RETENTION_HOURS = float(os.getenv('JOBS_RETENTION_HOURS', '48'))
+
+
+@jobs.job(EXPIRE_CAMPAIGNS)
+def expire_campaign_deadlines(payload):
+    """Set campaigns to inactive once their deadline has passed.
+
+    Web processes pick the change up with their next search index refresh.
+    """
+    from extensions import supabase
+    today = datetime.utcnow().date().isoformat()
+    expired = supabase.table('campaign').update({'is_active': False}).eq('is_active', True).lt('deadline', today).execute().data or []
+    if expired:
+        log.info("Deactivated %s campaigns past their deadline", len(expired))
+
+
+@jobs.job(PROCESS_DEPOSITS)
+def process_deposits(payload):
+    # Keep draining while batches come back full
+    while deposits.processor.run_once() >= deposits.processor.batch_size:
+        pass
+
+
+@jobs.job(PROCESS_WITHDRAWALS)
+def process_withdrawals(payload):
+    withdrawals.processor.run_once()
+
+
+@jobs.job(REBUILD_RECOMMENDATIONS)
+def rebuild_recommendations(payload):
+    count = recommendations.run_batch()
+    log.info("Stored top-%s recommendations for %s creators", recommendations.TOP_K, count)
+
+
+@jobs.job(RESOLVE_CLIP_MEDIA)
+def resolve_clip_media(payload):
+    count = clip_resolver.resolver.resolve_pending()
+    if count:
+        log.info("Resolved media metadata for %s clips", count)
+
+
+@jobs.job(PRUNE_JOBS)
+def prune_jobs(payload):
+    from extensions import supabase
+    cutoff = (datetime.utcnow() - timedelta(hours=JOB_RETENTION_HOURS)).isoformat()
+    supabase.table('job').delete().in_('status', ['done', 'failed']).lt('finished_at', cutoff).execute()
+
+
+jobs.schedule('campaign-deadlines', float(os.getenv('CAMPAIGN_DEADLINE_SECONDS', '60')), EXPIRE_CAMPAIGNS)
+# Deposits are also nudged by every webhook / verify call; the schedule picks up retries
+jobs.schedule('deposits', deposits.processor.poll_interval, PROCESS_DEPOSITS)
+jobs.schedule('withdrawals', withdrawals.processor.interval, PROCESS_WITHDRAWALS)
+jobs.schedule('recommendations', float(os.getenv('RECOMMENDATIONS_INTERVAL_SECONDS', '3600')), REBUILD_RECOMMENDATIONS)
+# Submissions nudge clip resolution; the schedule picks up shortcodes whose job ran out of attempts
+jobs.schedule('clip-media', float(os.getenv('CLIP_RESOLVER_INTERVAL_SECONDS', '600')), RESOLVE_CLIP_MEDIA)
+jobs.schedule('prune-jobs', 3600, PRUNE_JOBS)
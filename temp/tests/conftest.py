@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other as top-level modules (run from temp/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Point every `supabase.table(...)` in the backend at an in-memory FakeSupabase."""
+    import extensions
+    from fakes import FakeSupabase
+    db = FakeSupabase()
+    monkeypatch.setattr(extensions, '_supabase_client', db)
+    return db
+
+
+@pytest.fixture
+def make_app():
+    """Build a bare Flask app with JWT set up and the given blueprints, without config.py."""
+    from flask import Flask
+    from extensions import jwt
+
+    def build(*blueprints):
+        app = Flask(__name__)
+        app.config.update(JWT_SECRET_KEY='app-jwt-secret-used-only-by-the-tests', TESTING=True)
+        jwt.init_app(app)
+        for blueprint in blueprints:
+            app.register_blueprint(blueprint)
+        return app
+    return build
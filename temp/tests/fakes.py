@@ -0,0 +1,137 @@
+"""An in-memory stand-in for the parts of the Supabase client the backend uses.
+
+Tables are lists of dicts; rpc() calls are answered by Python functions registered in `rpcs`.
+"""
+import itertools
+from types import SimpleNamespace
+
+
+class Query:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.action = ('select', None)
+        self.ordering = []
+        self.limit_to = None
+        self.offset = 0
+
+    def select(self, columns='*', count=None):
+        self.action = ('select', None)
+        return self
+
+    def insert(self, rows):
+        self.action = ('insert', rows if isinstance(rows, list) else [rows])
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self.action = ('upsert', (rows if isinstance(rows, list) else [rows], on_conflict, ignore_duplicates))
+        return self
+
+    def update(self, values):
+        self.action = ('update', values)
+        return self
+
+    def delete(self):
+        self.action = ('delete', None)
+        return self
+
+    def _filter(self, test):
+        self.filters.append(test)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda row: row.get(column) == value)
+
+    def neq(self, column, value):
+        return self._filter(lambda row: row.get(column) != value)
+
+    def gt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row[column] > value)
+
+    def gte(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row[column] >= value)
+
+    def lt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row[column] < value)
+
+    def lte(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row[column] <= value)
+
+    def in_(self, column, values):
+        values = list(values)
+        return self._filter(lambda row: row.get(column) in values)
+
+    def is_(self, column, value):
+        value = None if value in ('null', None) else value
+        return self._filter(lambda row: row.get(column) is value)
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.limit_to = count
+        return self
+
+    def range(self, start, end):
+        self.offset, self.limit_to = start, end - start + 1
+        return self
+
+    def _matches(self):
+        return [row for row in self.db.tables.setdefault(self.table, []) if all(test(row) for test in self.filters)]
+
+    def execute(self):
+        kind, arg = self.action
+        rows = self.db.tables.setdefault(self.table, [])
+        if kind == 'insert':
+            data = [self.db.add(self.table, row) for row in arg]
+        elif kind == 'upsert':
+            new_rows, on_conflict, ignore_duplicates = arg
+            keys = (on_conflict or 'id').split(',')
+            data = []
+            for new in new_rows:
+                existing = next((row for row in rows if all(row.get(k) == new.get(k) for k in keys)), None)
+                if existing is None:
+                    data.append(self.db.add(self.table, new))
+                elif not ignore_duplicates:
+                    existing.update(new)
+                    data.append(dict(existing))
+        elif kind == 'update':
+            data = []
+            for row in self._matches():
+                row.update(arg)
+                data.append(dict(row))
+        elif kind == 'delete':
+            data = self._matches()
+            self.db.tables[self.table] = [row for row in rows if row not in data]
+            data = [dict(row) for row in data]
+        else:
+            data = self._matches()
+            for column, desc in reversed(self.ordering):
+                data.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            data = data[self.offset:]
+            if self.limit_to is not None:
+                data = data[:self.limit_to]
+            data = [dict(row) for row in data]
+        return SimpleNamespace(data=data, count=len(data))
+
+
+class FakeSupabase:
+    def __init__(self, **tables):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in tables.items()}
+        self.rpcs = {}
+        self._ids = itertools.count(1000)
+
+    def add(self, table, row):
+        row = dict(row)
+        row.setdefault('id', next(self._ids))
+        self.tables.setdefault(table, []).append(row)
+        return dict(row)
+
+    def table(self, name):
+        return Query(self, name)
+
+    def rpc(self, name, params=None):
+        result = self.rpcs[name](**(params or {}))
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=result, count=None))
@@ -0,0 +1,70 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import anomalies
+
+
+def flag(id, counted=1000, held=50000):
+    return {'id': id, 'clip_id': 10 + id, 'campaign_id': 1, 'creator_id': 5, 'counted_views': counted, 'held_views': held,
+            'rate': 9.1, 'score': 6.2, 'baseline': 'creator', 'status': 'open', 'created_at': None, 'updated_at': None,
+            'reviewed_at': None, 'campaign': {'name': 'Launch', 'cpv': 0.01}, 'creator': {'username': 'ana'},
+            'clip': {'clip_url': f'https://instagram.com/reel/c{id}/'}}
+
+
+def test_queue_pages_newest_first_by_cursor(fake_db):
+    fake_db.tables['view_anomaly'] = [flag(i) for i in range(1, 6)] + [dict(flag(6), status='rejected')]
+
+    pages, cursor = [], None
+    while True:
+        flags, cursor = anomalies.queue('open', limit=2, cursor=cursor)
+        pages.append([f['id'] for f in flags])
+        if cursor is None:
+            break
+    assert pages == [[5, 4], [3, 2], [1]]
+
+    [first] = anomalies.queue('open', limit=1)[0]
+    assert first['held_earnings'] == 490.0 and first['creator_name'] == 'ana'
+
+
+ARGS = "%(clip)s, %(campaign)s, %(creator)s, %(prev)s, %(prev_at)s, %(views)s, %(at)s, 0.2, 4, 5, 1000, 100000, 0.5, 0.25"
+
+
+@pytest.mark.skipif(not os.getenv('DATABASE_URL'), reason='needs DATABASE_URL')
+def test_held_jump_is_offset_from_later_syncs_once_rejected():
+    import psycopg
+    with psycopg.connect(os.environ['DATABASE_URL']) as conn:
+        try:
+            creator = conn.execute("insert into creator (username, email) values ('anomaly-test', 'anomaly-test@example.com') returning id").fetchone()[0]
+            campaign = conn.execute("insert into campaign (name) values ('anomaly-test') returning id").fetchone()[0]
+            clip = conn.execute("insert into accepted_clips (id, campaign_id, creator_id, view_count) values (-500, %s, %s, 0) returning id",
+                                (campaign, creator)).fetchone()[0]
+            start = datetime(2026, 10, 1)
+            params = {'clip': clip, 'campaign': campaign, 'creator': creator, 'prev': 0, 'prev_at': start}
+
+            def sync(views, hours):
+                # Like the route: the stored count is passed along and replaced unless the sync is held
+                result = conn.execute(f"select views, held, anomaly_id from observe_clip_views({ARGS})",
+                                      dict(params, views=views, at=start + timedelta(hours=hours))).fetchone()
+                if not result[1]:
+                    params['prev'] = result[0]
+                return result
+
+            # Steady organic growth warms the clip's baseline
+            for hour in range(1, 8):
+                assert sync(1000 * hour, hour) == (1000 * hour, False, None)
+
+            views, held, anomaly_id = sync(500000, 8)
+            assert held and views == 500000
+            # A later sync of a held clip only moves the flag
+            assert sync(510000, 9) == (510000, True, anomaly_id)
+
+            status, held_views = conn.execute("select status, held_views from resolve_view_anomaly(%s, false, 1)", (anomaly_id,)).fetchone()
+            assert (status, held_views) == ('rejected', 510000)
+            # The platform still reports the bought views; only the organic gain since counts
+            assert sync(512000, 10) == (9000, False, None)
+            with pytest.raises(psycopg.errors.RaiseException, match='anomaly_not_open'):
+                conn.execute("select * from resolve_view_anomaly(%s, true, 1)", (anomaly_id,))
+        finally:
+            conn.rollback()
@@ -0,0 +1,82 @@
+import io
+import threading
+import time
+
+import pytest
+
+import assets
+from routes.assets import assets_bp
+
+PIL = pytest.importorskip('PIL.Image')
+
+
+def png_bytes(width=40, height=20, color=(200, 10, 10)):
+    out = io.BytesIO()
+    PIL.new('RGB', (width, height), color).save(out, 'PNG')
+    return out.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def asset_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, 'ASSET_DIR', str(tmp_path))
+    monkeypatch.setattr(assets, 'VARIANT_WIDTHS', (16,))
+    return tmp_path
+
+
+def test_type_is_detected_from_the_bytes():
+    manifest, deduplicated = assets.store_stream(io.BytesIO(png_bytes()))
+    assert manifest['content_type'] == 'image/png' and manifest['status'] == 'complete'
+    assert manifest['variants'] == ['w16.webp'] and not deduplicated
+
+    again, deduplicated = assets.store_stream(io.BytesIO(png_bytes()))
+    assert deduplicated and again['hash'] == manifest['hash']
+
+
+def test_non_image_and_truncated_uploads_are_refused(asset_dir):
+    with pytest.raises(assets.UnsupportedImage):
+        assets.store_stream(io.BytesIO(b'<html><script>alert(1)</script></html>'))
+    with pytest.raises(assets.UnsupportedImage):
+        assets.store_stream(io.BytesIO(png_bytes()[:60]))
+    # Nothing but the scratch directory is left behind
+    assert [p.name for p in asset_dir.iterdir()] == ['tmp'] and not list((asset_dir / 'tmp').iterdir())
+
+
+def test_oversized_upload_is_refused(monkeypatch):
+    monkeypatch.setattr(assets, 'MAX_UPLOAD_BYTES', 100)
+    with pytest.raises(assets.UploadTooLarge):
+        assets.store_stream(io.BytesIO(png_bytes(400, 400) + b'\0' * 200))
+
+
+def test_concurrent_uploads_of_the_same_bytes_render_once(monkeypatch):
+    renders = []
+    real_render = assets._render
+
+    def slow_render(manifest):
+        renders.append(manifest['hash'])
+        time.sleep(0.2)
+        real_render(manifest)
+
+    monkeypatch.setattr(assets, '_render', slow_render)
+    body = png_bytes(color=(1, 2, 3))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(assets.store_stream(io.BytesIO(body)))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(renders) == 1
+    assert sorted(deduplicated for _, deduplicated in results) == [False, True, True, True]
+    assert all(manifest['status'] == 'complete' for manifest, _ in results)
+
+
+def test_original_is_served_with_the_detected_type_and_nosniff(make_app):
+    manifest, _ = assets.store_stream(io.BytesIO(png_bytes()))
+    client = make_app(assets_bp).test_client()
+
+    response = client.get(f"/assets/{manifest['hash']}/original")
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
+    assert client.get(f"/assets/{manifest['hash']}/w16.webp").mimetype == 'image/webp'
+    assert client.get(f"/assets/{manifest['hash']}/manifest.json").status_code == 404
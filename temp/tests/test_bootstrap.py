@@ -0,0 +1,90 @@
+import time
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+import events
+import routes.bootstrap
+from routes.bootstrap import bootstrap_bp
+
+
+def clip(id, creator_id=5, **fields):
+    return dict({'id': id, 'creator_id': creator_id, 'campaign_id': 3, 'clip_url': f'https://instagram.com/reel/c{id}/',
+                 'media_id': None, 'view_count': 0, 'caption': None, 'instagram_posted_at': None, 'feedback': None}, **fields)
+
+
+@pytest.fixture
+def db(fake_db):
+    launch = {'name': 'Launch'}
+    fake_db.tables.update(
+        campaign=[{'id': 3, 'name': 'Launch', 'platform': 'instagram', 'budget': 500, 'cpv': 0.01, 'hashtag': '#go', 'asset_link': None,
+                   'category': 'music', 'audio': None, 'deadline': None, 'brand_id': 2, 'is_active': True, 'total_view_count': 0,
+                   'requirements': None, 'view_threshold': 1000}],
+        creator=[{'id': 5, 'username': 'ana', 'email': 'ana@example.com'}],
+        wallet=[{'user_type': 'creator', 'user_id': 5, 'balance': 120.5, 'currency': 'INR'}],
+        accepted_clips=[
+            clip(1, submitted_at='2026-10-10T09:00:00', accepted_at='2026-10-12T09:00:00', campaign=launch),
+            # Accepted before accepted_at was recorded
+            clip(2, submitted_at='2026-10-11T09:00:00', accepted_at=None, campaign=launch),
+            clip(3, creator_id=6, submitted_at='2026-10-18T09:00:00', accepted_at='2026-10-18T10:00:00')],
+        submitted_clips=[
+            clip(4, submitted_at='2026-10-13T09:00:00', reviewed_at='2026-10-14T09:00:00', is_deleted_by_admin=True,
+                 feedback='wrong audio', campaign=launch),
+            clip(5, submitted_at='2026-10-15T09:00:00', is_deleted_by_admin=False)],
+        transactions=[
+            {'id': 7, 'user_type': 'creator', 'user_id': 5, 'amount': 40, 'type': 'earning', 'status': 'success', 'created_at': '2026-10-16T09:00:00'},
+            {'id': 8, 'user_type': 'creator', 'user_id': 5, 'amount': 10, 'type': 'earning', 'status': 'pending', 'created_at': '2026-10-17T09:00:00'}],
+        withdrawal=[{'id': 9, 'creator_id': 5, 'amount': 25, 'payout_method': 'upi', 'created_at': '2026-10-17T12:00:00'}])
+    return fake_db
+
+
+@pytest.fixture
+def get(make_app):
+    app = make_app(bootstrap_bp)
+
+    def request(role='creator', identity='5'):
+        with app.app_context():
+            token = create_access_token(identity=identity, additional_claims={'role': role})
+        return app.test_client().get('/api/bootstrap', headers={'Authorization': f'Bearer {token}'})
+    return request
+
+
+def test_creator_notifications_cover_reviews_earnings_and_withdrawals(db, get):
+    response = get()
+
+    assert response.status_code == 200 and response.json['errors'] == {}
+    sections = response.json['sections']
+    assert sections['wallet'] == {'balance': 120.5, 'currency': 'INR'}
+    assert [len(c['accepted_clips']) for c in sections['campaigns']] == [2]
+    assert [(n['type'], n['timestamp']) for n in sections['notifications']] == [
+        (events.WITHDRAWAL_INITIATED, '2026-10-17T12:00:00'),
+        (events.EARNING_PAYOUT, '2026-10-16T09:00:00'),
+        (events.CLIP_REJECTED, '2026-10-14T09:00:00'),
+        (events.CLIP_APPROVED, '2026-10-12T09:00:00'),
+        (events.CLIP_APPROVED, '2026-10-11T09:00:00')]
+    rejected = sections['notifications'][2]
+    assert (rejected['clip_id'], rejected['feedback'], rejected['message']) == (4, 'wrong audio', 'Your clip for Launch was rejected')
+    assert sections['notifications'][1]['amount'] == 40.0
+
+
+def test_a_failing_section_is_reported_without_failing_the_rest(db, get, monkeypatch):
+    def broken(creator_id):
+        raise RuntimeError('db down')
+    monkeypatch.setitem(routes.bootstrap.SECTIONS['creator'], 'notifications', broken)
+
+    response = get()
+
+    assert response.status_code == 200
+    assert response.json['errors'] == {'notifications': 'Failed to fetch notifications'}
+    assert response.json['sections']['profile']['username'] == 'ana'
+
+
+def test_slow_sections_time_out(db, get, monkeypatch):
+    monkeypatch.setattr(routes.bootstrap, 'TIMEOUT_SECONDS', 0.05)
+    monkeypatch.setitem(routes.bootstrap.SECTIONS['brand'], 'profile', lambda brand_id: time.sleep(0.5))
+
+    response = get(role='brand', identity='2')
+
+    assert response.json['errors'] == {'profile': 'Timed out'}
+    assert 'wallet' in response.json['sections']
+    assert get(role='admin').status_code == 403
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+import clip_resolver
+
+
+class StubGraph:
+    def __init__(self, missing=(), fail=False):
+        self.calls = []
+        self.missing = set(missing)
+        self.fail = fail
+
+    def fetch_media(self, shortcodes):
+        self.calls.append(list(shortcodes))
+        if self.fail:
+            raise ConnectionError('graph api unreachable')
+        return {s: {'error': 'not found'} if s in self.missing else
+                {'media_id': f'm_{s}', 'caption': f'caption {s}', 'timestamp': '2026-10-01T10:00:00+00:00'}
+                for s in shortcodes}
+
+
+@pytest.fixture
+def db(fake_db):
+    fake_db.jobs = []
+    fake_db.applied = []
+    fake_db.rpcs['enqueue_job'] = lambda **job: fake_db.jobs.append(job) or len(fake_db.jobs)
+    fake_db.rpcs['apply_clip_media'] = lambda p_shortcodes: fake_db.applied.append(p_shortcodes) or []
+    return fake_db
+
+
+def pending(db):
+    return sorted(row['shortcode'] for row in db.tables.get('clip_media', []) if row['resolved_at'] is None)
+
+
+def test_submission_queues_the_shortcode_and_nudges_the_job(db):
+    resolver = clip_resolver.ClipResolver(StubGraph())
+
+    assert resolver.enqueue('https://www.instagram.com/reel/AbC_1/?igsh=x') == 'AbC_1'
+    assert resolver.enqueue('https://instagram.com/someone/p/AbC_1/') == 'AbC_1'
+    assert resolver.enqueue('https://example.com/video') is None
+
+    assert pending(db) == ['AbC_1']
+    assert [job['p_kind'] for job in db.jobs] == [clip_resolver.JOB_KIND] * 2
+    assert all(job['p_dedupe_key'] == clip_resolver.JOB_KIND for job in db.jobs)
+
+
+def test_pending_shortcodes_resolve_in_bounded_batches(db):
+    resolver = clip_resolver.ClipResolver(StubGraph(missing={'c3'}), batch_size=2, concurrency=2)
+    for i in range(5):
+        resolver.enqueue(f'https://instagram.com/p/c{i}/')
+    # Already resolved earlier: submitting it again does not queue it a second time
+    db.tables['clip_media'].append({'shortcode': 'done', 'media_id': 'm_done', 'error': None, 'resolved_at': '2026-10-01'})
+    resolver.enqueue('https://instagram.com/p/done/')
+
+    assert resolver.resolve_pending() == 4
+
+    assert sorted(map(len, resolver.client.calls)) == [1, 2, 2]
+    assert pending(db) == []
+    rows = {row['shortcode']: row for row in db.tables['clip_media']}
+    assert rows['c0']['media_id'] == 'm_c0' and rows['c3']['error'] == 'not found'
+    assert sorted(s for batch in db.applied for s in batch) == ['c0', 'c1', 'c2', 'c4']
+    assert clip_resolver.load_persisted('c3') is None
+    assert clip_resolver.load_persisted('c4')['caption'] == 'caption c4'
+
+
+def test_failed_batches_stay_pending_and_fail_the_job(db):
+    resolver = clip_resolver.ClipResolver(StubGraph(fail=True))
+    resolver.enqueue('https://instagram.com/reel/xyz/')
+
+    with pytest.raises(RuntimeError):
+        resolver.resolve_pending()
+    assert pending(db) == ['xyz']
+    # Pending is not resolved: acceptance must not pick up empty metadata as final
+    assert clip_resolver.load_persisted('xyz') is None
+
+
+@pytest.mark.skipif(not os.getenv('DATABASE_URL'), reason='needs DATABASE_URL')
+def test_apply_clip_media_fills_in_clips_accepted_without_metadata():
+    import psycopg
+    with psycopg.connect(os.environ['DATABASE_URL']) as conn:
+        try:
+            conn.execute("insert into clip_media (shortcode, media_id, caption, resolved_at) values ('Zz9', 'm1', 'hi', now())")
+            conn.execute("insert into accepted_clips (id, clip_url) values (-1, 'https://www.instagram.com/reel/Zz9/'), "
+                         "(-2, 'https://www.instagram.com/p/Zz9/'), (-3, 'https://www.instagram.com/p/other/')")
+            conn.execute("update accepted_clips set media_id = 'kept' where id = -2")
+
+            filled = conn.execute("select * from apply_clip_media(array['Zz9'])").fetchall()
+            assert filled == [(-1,)]
+            assert conn.execute("select media_id, caption from accepted_clips where id = -1").fetchone() == ('m1', 'hi')
+        finally:
+            conn.rollback()
@@ -0,0 +1,26 @@
+from deposits import _webhook_confirmation
+
+ORDER = {'order_id': 'dep_1_abc', 'amount': '500.00'}
+
+
+def webhook(order_id='dep_1_abc', order_amount=500, payment_amount=500, status='SUCCESS'):
+    return {'order_id': 'dep_1_abc', 'source': 'webhook', 'payload': {'data': {
+        'order': {'order_id': order_id, 'order_amount': order_amount},
+        'payment': {'cf_payment_id': 991, 'payment_status': status, 'payment_amount': payment_amount}
+    }}}
+
+
+def test_matching_success_webhook_confirms_the_order():
+    assert _webhook_confirmation(webhook(), ORDER) == (True, '991')
+
+
+def test_mismatched_webhook_falls_back_to_the_gateway():
+    assert _webhook_confirmation(webhook(order_id='dep_1_other'), ORDER) is None
+    assert _webhook_confirmation(webhook(order_amount=1), ORDER) is None
+    assert _webhook_confirmation(webhook(payment_amount=1), ORDER) is None
+    assert _webhook_confirmation(webhook(), None) is None
+
+
+def test_only_success_webhooks_confirm():
+    assert _webhook_confirmation(webhook(status='FAILED'), ORDER) is None
+    assert _webhook_confirmation(dict(webhook(), source='verify'), ORDER) is None
@@ -0,0 +1,57 @@
+import pytest
+from flask import Blueprint, jsonify
+from flask_jwt_extended import create_access_token, jwt_required
+
+import events
+from routes.system import system_bp
+
+other_bp = Blueprint('other', __name__)
+
+
+@other_bp.route('/api/other')
+@jwt_required()
+def other():
+    return jsonify({'msg': 'ok'}), 200
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(system_bp, other_bp)
+
+
+def access_token(app, role='creator', identity='5'):
+    with app.app_context():
+        return create_access_token(identity=identity, additional_claims={'role': role})
+
+
+def stream_token(client, bearer):
+    response = client.post('/api/stream/token', headers={'Authorization': f'Bearer {bearer}'})
+    assert response.status_code == 200
+    return response.json['token']
+
+
+def test_stream_opens_with_a_stream_token(app):
+    client = app.test_client()
+    token = stream_token(client, access_token(app))
+
+    response = client.get(f'/api/stream?jwt={token}', buffered=False)
+    try:
+        assert response.status_code == 200
+        assert next(response.response) == b'retry: 5000\n\n'
+        assert events.hub.connection_count == 1
+    finally:
+        response.close()
+    assert events.hub.connection_count == 0
+
+
+def test_access_token_in_the_url_does_not_open_the_stream(app):
+    client = app.test_client()
+    assert client.get(f'/api/stream?jwt={access_token(app)}').status_code == 401
+
+
+def test_stream_token_opens_nothing_else(app):
+    client = app.test_client()
+    token = stream_token(client, access_token(app))
+    assert client.get('/api/other', headers={'Authorization': f'Bearer {token}'}).status_code == 400
+    assert client.post('/api/stream/token', headers={'Authorization': f'Bearer {token}'}).status_code == 400
+    assert client.get('/api/other', headers={'Authorization': f'Bearer {access_token(app)}'}).status_code == 200
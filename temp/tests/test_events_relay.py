@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+import events
+
+
+def test_forwarding_hub_hands_events_off_instead_of_delivering():
+    hub = events.EventHub()
+    subscription = hub.subscribe([events.brand_channel(7)])
+    sent = []
+    hub.forward = lambda *event: sent.append(event) or True
+
+    assert hub.publish(events.brand_channel(7), events.DEPOSIT_CREDITED, {'amount': 500}) == 0
+    assert sent == [(events.brand_channel(7), events.DEPOSIT_CREDITED, {'amount': 500})]
+    assert subscription.get(timeout=0) == ([], 0)
+
+
+def test_events_that_cannot_be_relayed_are_delivered_locally():
+    hub = events.EventHub()
+    subscription = hub.subscribe([events.brand_channel(7)])
+    hub.forward = lambda *event: False
+
+    assert hub.publish(events.brand_channel(7), events.BUDGET_EXHAUSTED, {'campaign_id': 1}) == 1
+    delivered, _ = subscription.get(timeout=0)
+    assert [e['type'] for e in delivered] == [events.BUDGET_EXHAUSTED]
+
+
+def test_listener_delivers_relayed_events_without_relaying_them_again():
+    hub = events.EventHub()
+    subscription = hub.subscribe([events.creator_channel(3)])
+    hub.forward = lambda *event: pytest.fail('a relayed event was relayed again')
+    listener = events.RelayListener(hub, connect=None)
+
+    listener.dispatch('{"channel": "creator:3", "type": "withdrawal_completed", "payload": {"withdrawal_id": 9}}')
+    listener.dispatch('not json')
+
+    delivered, _ = subscription.get(timeout=0)
+    assert [(e['type'], e['data']['withdrawal_id']) for e in delivered] == [(events.WITHDRAWAL_COMPLETED, 9)]
+
+
+@pytest.mark.skipif(not os.getenv('DATABASE_URL'), reason='needs DATABASE_URL')
+def test_publishes_reach_subscribers_of_every_web_process():
+    import jobs
+
+    # Two web processes, each with its own hub and relay, plus a job worker that only relays
+    web = [events.EventHub(), events.EventHub()]
+    listeners = [events.RelayListener(hub, jobs.connect, forward=events.RelaySender(jobs.connect).send).start() for hub in web]
+    worker = events.EventHub()
+    worker.forward = events.RelaySender(jobs.connect).send
+    try:
+        assert all(listener.wait_ready(timeout=10) for listener in listeners)
+        subscriptions = [hub.subscribe([events.brand_channel(1)]) for hub in web]
+
+        web[0].publish(events.brand_channel(1), events.BUDGET_EXHAUSTED, {'campaign_id': 4})
+        worker.publish(events.brand_channel(1), events.DEPOSIT_CREDITED, {'amount': 250})
+
+        for subscription in subscriptions:
+            received = []
+            while len(received) < 2:
+                delivered, _ = subscription.get(timeout=10)
+                assert delivered, 'timed out waiting for relayed events'
+                received.extend(e['type'] for e in delivered)
+            assert sorted(received) == sorted([events.BUDGET_EXHAUSTED, events.DEPOSIT_CREDITED])
+    finally:
+        for listener in listeners:
+            listener.stop(timeout=5)
@@ -0,0 +1,68 @@
+import re
+
+import explain_check
+
+
+def plan(node, relation=None, index=None, *children):
+    return {'Node Type': node, 'Relation Name': relation, 'Index Name': index, 'Plans': list(children)}
+
+
+class Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+class PlanConnection:
+    """Answers the catalog, sample and EXPLAIN queries check() sends with canned results."""
+
+    def __init__(self, row_counts, plans):
+        self.row_counts = row_counts
+        self.plans = plans
+
+    def execute(self, sql, params=None):
+        if sql.startswith('explain'):
+            shape = sql[len('explain (format json) '):]
+            return Result([{'QUERY PLAN': [{'Plan': self.plans.get(shape, plan('Result'))}]}])
+        if 'from pg_class' in sql:
+            return Result([{'relname': name, 'rows': rows} for name, rows in self.row_counts.items()])
+        return Result([{'value': 1}])
+
+
+def test_scans_walks_every_node():
+    nested = plan('Nested Loop', None, None,
+                  plan('Index Scan', 'campaign', 'campaign_pkey'),
+                  plan('Hash', None, None, plan('Seq Scan', 'brand')))
+
+    assert list(explain_check._scans(nested)) == [
+        ('Nested Loop', None, None), ('Index Scan', 'campaign', 'campaign_pkey'),
+        ('Hash', None, None), ('Seq Scan', 'brand', None)]
+
+
+def test_only_large_sequential_scans_fail(monkeypatch, capsys):
+    monkeypatch.setattr(explain_check, 'SHAPES', [
+        explain_check.Shape('indexed', 'a.py', 'select 1'),
+        explain_check.Shape('small table', 'b.py', 'select 2'),
+        explain_check.Shape('batch job', 'c.py', 'select 3', full_scan=True),
+    ])
+    conn = PlanConnection({'admin': 5, 'accepted_clips': 50000}, {
+        'select 1': plan('Index Scan', 'accepted_clips', 'accepted_clips_pkey'),
+        'select 2': plan('Seq Scan', 'admin'),
+        'select 3': plan('Seq Scan', 'accepted_clips'),
+    })
+    assert explain_check.check(conn, threshold=1000)
+
+    explain_check.SHAPES.append(explain_check.Shape('missing index', 'd.py', 'select 4'))
+    conn.plans['select 4'] = plan('Limit', None, None, plan('Seq Scan', 'accepted_clips'))
+    assert not explain_check.check(conn, threshold=1000)
+    assert 'FAIL  missing index' in capsys.readouterr().out
+
+
+def test_every_shape_parameter_has_a_sample():
+    for shape in explain_check.SHAPES:
+        assert set(re.findall(r'%\((\w+)\)s', shape.sql)) <= set(explain_check.SAMPLES), shape.name
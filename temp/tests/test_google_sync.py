@@ -0,0 +1,59 @@
+import time
+
+import jwt as pyjwt
+import pytest
+
+import jwks
+from routes.auth import auth_bp
+
+ISSUER = 'https://project.supabase.co/auth/v1'
+SECRET = 'supabase-jwt-secret-used-only-by-these-tests'
+
+
+@pytest.fixture(autouse=True)
+def trusted_issuer(monkeypatch):
+    monkeypatch.setattr(jwks, '_issuers', {ISSUER: jwks.Issuer(ISSUER, 'authenticated', None, SECRET)})
+
+
+@pytest.fixture
+def client(make_app, fake_db):
+    fake_db.tables['creator'] = [{'id': 7, 'username': 'victim', 'email': 'victim@example.com', 'profile_completed': True}]
+    fake_db.tables['brand'] = []
+    return make_app(auth_bp).test_client()
+
+
+def token(provider='google', email_verified=True, secret=SECRET, **claims):
+    now = int(time.time())
+    body = {'iss': ISSUER, 'aud': 'authenticated', 'sub': 'user-1', 'iat': now, 'exp': now + 600,
+            'email': 'victim@example.com', 'app_metadata': {'provider': provider, 'providers': [provider]},
+            'user_metadata': {'email_verified': email_verified}}
+    body.update(claims)
+    return pyjwt.encode(body, secret, algorithm='HS256')
+
+
+def sync(client, bearer):
+    return client.post('/api/auth/google-sync', headers={'Authorization': f'Bearer {bearer}'})
+
+
+def test_google_token_signs_in_the_existing_creator(client):
+    response = sync(client, token())
+    assert response.status_code == 200
+    assert response.json['user_id'] == 7 and response.json['access_token']
+
+
+def test_non_google_token_for_an_existing_email_is_rejected(client):
+    response = sync(client, token(provider='email'))
+    assert response.status_code == 403
+    assert 'access_token' not in response.json
+
+
+def test_unverified_or_unstated_email_is_rejected(client):
+    assert sync(client, token(email_verified=False)).status_code == 403
+    assert sync(client, token(email_verified=None)).status_code == 403
+
+
+def test_wrong_issuer_audience_or_signature_is_rejected(client):
+    assert sync(client, token(iss='https://other.supabase.co/auth/v1')).status_code == 401
+    assert sync(client, token(aud='anon')).status_code == 401
+    assert sync(client, token(secret='a-different-secret-of-the-same-length-ok')).status_code == 401
+    assert sync(client, token(exp=int(time.time()) - 3600)).status_code == 401
@@ -0,0 +1,63 @@
+import pytest
+
+import health
+import jwks
+from routes.system import system_bp
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    calls = []
+    probe = health.ReadinessProbe(lambda: calls.append(1), interval=60)
+    probe.calls = calls
+    monkeypatch.setattr(health, 'readiness_probe', probe)
+    return probe
+
+
+def test_readiness_is_cached_and_never_probes_on_request(probe, make_app, monkeypatch):
+    monkeypatch.setenv('SUPABASE_URL', 'https://project.supabase.co')
+    monkeypatch.setattr(jwks, '_issuers', None)
+    client = make_app(system_bp).test_client()
+
+    response = client.get('/readyz')
+    assert response.status_code == 503 and response.get_json()['database']['error'] == 'probe has not run yet'
+
+    probe.run_once()
+    for _ in range(3):
+        response = client.get('/readyz')
+        assert response.status_code == 200 and response.get_json()['status'] == 'ready'
+    assert len(probe.calls) == 1
+    assert client.get('/livez').get_json() == {'status': 'alive'}
+
+
+def test_failed_or_stale_checks_are_not_ready(monkeypatch):
+    def down():
+        raise ConnectionError('database unreachable')
+    probe = health.ReadinessProbe(down, interval=1)
+    probe.run_once()
+    assert probe.status()['ready'] is False and probe.status()['error'] == 'database unreachable'
+
+    probe.check = lambda: None
+    probe.run_once()
+    assert probe.status()['ready'] is True
+    # A probe thread that stopped refreshing the result no longer reports ready
+    monkeypatch.setattr(probe, '_checked_monotonic', probe._checked_monotonic - probe.stale_after - 1)
+    assert probe.status()['stale'] is True and probe.status()['ready'] is False
+
+
+def test_in_flight_gauge_skips_probes(monkeypatch, make_app):
+    gauge = health.InFlightGauge(4)
+    monkeypatch.setattr(health, 'pool_gauge', gauge)
+    app = make_app(system_bp)
+    seen = []
+    app.before_request(health.track_in_flight)
+    app.teardown_request(health.untrack_in_flight)
+    app.add_url_rule('/api/work', 'work', lambda: seen.append(gauge.current) or 'ok')
+    client = app.test_client()
+
+    client.get('/api/work')
+    client.get('/livez')
+    assert seen == [1] and gauge.current == 0
+    assert gauge.snapshot() == {'in_flight': 0, 'peak_in_flight': 1, 'size': 4, 'saturation': 0.0}
+    # The peak only covers the window since the previous read
+    assert gauge.snapshot()['peak_in_flight'] == 0
@@ -0,0 +1,20 @@
+import pytest
+
+import import_budget
+
+
+def test_app_import_is_within_budget(tmp_path):
+    # config.py holds deployment secrets and is not checked in
+    pytest.importorskip('config')
+    report = tmp_path / 'importtime.txt'
+    assert import_budget.main(['--runs', '3', '--report', str(report)]) == 0
+
+    text = report.read_text()
+    assert 'OK: within import budget' in text
+    # Startup threads used to interleave their imports with the trace and zero this out
+    assert not text.startswith("Import of 'app': 0.0 ms")
+
+
+def test_eager_lazy_module_fails_the_check(capsys):
+    assert import_budget.main(['--target', 'requests', '--runs', '1']) == 1
+    assert 'should be lazy were imported at startup: requests' in capsys.readouterr().out
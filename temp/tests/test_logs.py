@@ -0,0 +1,67 @@
+import json
+import logging
+import threading
+
+import pytest
+from flask import Flask
+
+import logs
+
+
+@pytest.fixture
+def configured(tmp_path, monkeypatch):
+    sink = tmp_path / 'app.log'
+    monkeypatch.setenv('LOG_SINKS', f'file:{sink}')
+    monkeypatch.setenv('LOG_SAMPLE_BURST', '2')
+    monkeypatch.setattr(logs, '_handler', None)
+    root = logging.getLogger()
+    saved = root.handlers, root.level
+    handler = logs.configure()
+    try:
+        yield handler, sink
+    finally:
+        handler.close()
+        root.handlers, root.level = saved
+
+
+def lines(sink):
+    return [json.loads(line) for line in sink.read_text().splitlines()]
+
+
+def test_configure_starts_no_thread_until_something_is_logged(configured):
+    handler, sink = configured
+    threads = threading.active_count()
+    assert logs.configure() is handler and threading.active_count() == threads and not handler._started
+
+    logging.getLogger('clips').info("clip %s accepted", 9, extra={'campaign_id': 1})
+    assert handler._started
+    handler.close()
+
+    [entry] = lines(sink)
+    assert entry['msg'] == 'clip 9 accepted' and entry['campaign_id'] == 1 and entry['logger'] == 'clips'
+
+
+def test_repeated_messages_are_sampled_and_counted(configured):
+    handler, sink = configured
+    log = logging.getLogger('views')
+    for i in range(5):
+        log.warning("sync failed for clip %s", i)
+    handler.filters[0].window = 0  # the next record opens a new window
+    log.warning("sync failed for clip %s", 5)
+    handler.close()
+
+    entries = lines(sink)
+    assert [e['msg'] for e in entries] == ['sync failed for clip 0', 'sync failed for clip 1', 'sync failed for clip 5']
+    assert entries[-1]['suppressed'] == 3
+
+
+def test_records_carry_the_request_context(configured):
+    handler, sink = configured
+    app = Flask(__name__)
+    with app.test_request_context('/api/clips', headers={'X-Request-ID': 'req-1'}):
+        logs.assign_request_id()
+        logging.getLogger('clips').error("boom")
+    handler.close()
+
+    [entry] = lines(sink)
+    assert (entry['request_id'], entry['path'], entry['method']) == ('req-1', '/api/clips', 'GET')
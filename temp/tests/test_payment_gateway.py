@@ -0,0 +1,38 @@
+import base64
+import hashlib
+import hmac
+
+from payment_gateway import CashfreeClient
+
+BODY = b'{"type":"PAYMENT_SUCCESS_WEBHOOK","data":{"order":{"order_id":"dep_1_abc"}}}'
+TIMESTAMP = '1700000000'
+
+
+def sign(secret, timestamp=TIMESTAMP, body=BODY):
+    return base64.b64encode(hmac.new(secret.encode(), timestamp.encode() + body, hashlib.sha256).digest()).decode()
+
+
+def client(secret):
+    return CashfreeClient('http://gateway.invalid', 'app', secret)
+
+
+def test_valid_signature_is_accepted():
+    assert client('secret').verify_webhook(BODY, TIMESTAMP, sign('secret'))
+
+
+def test_tampered_body_timestamp_or_key_is_rejected():
+    gateway = client('secret')
+    assert not gateway.verify_webhook(BODY.replace(b'abc', b'xyz'), TIMESTAMP, sign('secret'))
+    assert not gateway.verify_webhook(BODY, '1700000001', sign('secret'))
+    assert not gateway.verify_webhook(BODY, TIMESTAMP, sign('other'))
+
+
+def test_missing_headers_are_rejected():
+    gateway = client('secret')
+    assert not gateway.verify_webhook(BODY, None, sign('secret'))
+    assert not gateway.verify_webhook(BODY, TIMESTAMP, None)
+
+
+def test_nothing_is_accepted_without_a_secret():
+    # An HMAC with an empty key is computable by anyone
+    assert not client('').verify_webhook(BODY, TIMESTAMP, sign(''))
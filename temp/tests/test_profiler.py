@@ -0,0 +1,52 @@
+import sys
+import threading
+import types
+
+import profiler
+
+
+def busy_route(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(100))
+
+
+def test_samples_the_stacks_of_profiled_threads():
+    sampler = profiler.SamplingProfiler(interval=0.001)
+    sampler._thread = object()  # sample by hand instead of from the background thread
+    stop, ready = threading.Event(), threading.Event()
+
+    def request_thread():
+        sampler.begin('clips.submit')
+        ready.set()
+        busy_route(stop)
+        sampler.end()
+
+    thread = threading.Thread(target=request_thread)
+    thread.start()
+    ready.wait()
+    try:
+        for _ in range(5):
+            sampler._sample()
+    finally:
+        stop.set()
+        thread.join()
+
+    summary = sampler.summary()
+    assert summary['enabled'] and summary['samples'] == 5 and summary['active'] == 0
+    assert summary['routes']['clips.submit']['requests'] == 1
+    stacks = sampler.collapsed('clips.submit')
+    assert 'test_profiler:busy_route' in stacks and sum(int(line.rsplit(' ', 1)[1]) for line in stacks.splitlines()) == 5
+
+
+def test_turns_itself_off_under_gevent_monkey_patching(monkeypatch):
+    monkey = types.ModuleType('gevent.monkey')
+    monkey.is_module_patched = lambda name: name == 'threading'
+    monkeypatch.setitem(sys.modules, 'gevent.monkey', monkey)
+    sampler = profiler.SamplingProfiler()
+
+    sampler.begin('clips.submit')
+    sampler.end()
+
+    assert sampler._thread is None
+    summary = sampler.summary()
+    assert not summary['enabled'] and 'gevent' in summary['disabled_reason'] and summary['routes'] == {}
@@ -0,0 +1,108 @@
+import pytest
+from flask import Blueprint, Flask, jsonify
+
+import health
+import ratelimit
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, 'monotonic', clock)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_refills_at_its_rate(clock):
+    store = ratelimit.MemoryBucketStore()
+    assert [store.take('k', 0.5, 3)[0] for _ in range(3)] == [True, True, True]
+
+    allowed, retry_after = store.take('k', 0.5, 3)
+    assert not allowed and retry_after == pytest.approx(2.0)
+
+    clock.now += 2
+    assert store.take('k', 0.5, 3) == (True, 0)
+    assert not store.take('k', 0.5, 3)[0]
+
+    # Refill is capped at the burst capacity
+    clock.now += 3600
+    assert [store.take('k', 0.5, 3)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_store_evicts_the_least_recently_used_key(clock):
+    store = ratelimit.MemoryBucketStore(max_keys=2)
+    store.take('a', 1, 1)
+    store.take('b', 1, 1)
+    store.take('a', 1, 1)
+    store.take('c', 1, 1)
+    assert list(store._buckets) == ['a', 'c']
+
+
+@pytest.fixture
+def app(monkeypatch, clock):
+    monkeypatch.setattr(ratelimit, 'store', ratelimit.MemoryBucketStore())
+    monkeypatch.setattr(ratelimit, 'concurrency', ratelimit.ConcurrencyLimiter({'login': 1}))
+    monkeypatch.setattr(health, 'pool_gauge', health.InFlightGauge(10))
+    monkeypatch.setitem(ratelimit.RULES, 'login', {'ip': (1 / 60, 2), 'account': (1 / 60, 5)})
+
+    auth = Blueprint('auth', __name__)
+
+    @auth.route('/login', methods=['POST'])
+    def login():
+        return jsonify({'in_flight': health.pool_gauge.current}), 200
+
+    app = Flask(__name__)
+    app.before_request(ratelimit.admit_request)
+    app.teardown_request(ratelimit.release_request)
+    app.before_request(health.track_in_flight)
+    app.teardown_request(health.untrack_in_flight)
+    app.register_blueprint(auth)
+    return app
+
+
+def test_over_limit_requests_get_429_with_retry_after(app):
+    client = app.test_client()
+    assert client.post('/login', json={'email': 'a@example.com'}).status_code == 200
+    assert client.post('/login', json={'email': 'b@example.com'}).status_code == 200
+
+    response = client.post('/login', json={'email': 'c@example.com'})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '60'
+
+
+def test_account_bucket_is_shared_across_ips(app, monkeypatch):
+    monkeypatch.setitem(ratelimit.RULES, 'login', {'ip': (1, 100), 'account': (1 / 60, 2)})
+    client = app.test_client()
+    codes = [client.post('/login', json={'email': ' A@example.com'}, environ_base={'REMOTE_ADDR': f'10.0.0.{i}'}).status_code
+             for i in range(3)]
+    assert codes == [200, 200, 429]
+    # A body that is not an object has no account to limit, and does not crash the limiter
+    assert client.post('/login', json=['a@example.com']).status_code == 200
+
+
+def test_throttled_requests_leave_the_in_flight_gauge_alone(app):
+    client = app.test_client()
+    assert client.post('/login', json={}).json == {'in_flight': 1}
+    assert health.pool_gauge.current == 0
+
+    health.pool_gauge.enter()  # a request still being served elsewhere
+    for _ in range(3):
+        client.post('/login', json={})
+    assert health.pool_gauge.current == 1
+
+
+def test_concurrency_cap_rejects_instead_of_queueing(app):
+    ratelimit.concurrency.try_acquire('login')
+    try:
+        response = app.test_client().post('/login', json={})
+        assert response.status_code == 429 and response.headers['Retry-After'] == '1'
+    finally:
+        ratelimit.concurrency.release('login')
+    assert app.test_client().post('/login', json={}).status_code == 200
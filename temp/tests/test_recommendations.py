@@ -0,0 +1,46 @@
+import pytest
+
+import recommendations
+
+
+def clips(campaign_id, creator_id, *views):
+    return [{'campaign_id': campaign_id, 'creator_id': creator_id, 'view_count': v} for v in views]
+
+
+CAMPAIGNS = [
+    {'id': 1, 'cpv': 0.01, 'budget': 10000, 'total_view_count': 0, 'view_threshold': 0},
+    {'id': 2, 'cpv': 0.001, 'budget': 10000, 'total_view_count': 0, 'view_threshold': 0},
+    # Plenty per view, but a small remaining budget shared with the clips already accepted on it
+    {'id': 3, 'cpv': 0.05, 'budget': 60, 'total_view_count': 0, 'view_threshold': 0},
+    # Only pays out on clips that reach 50k views
+    {'id': 4, 'cpv': 0.02, 'budget': 10000, 'total_view_count': 0, 'view_threshold': 50000},
+    # Exhausted: 0.01 * 100000 already spent the whole budget
+    {'id': 5, 'cpv': 0.01, 'budget': 1000, 'total_view_count': 100000, 'view_threshold': 0},
+]
+ACCEPTED = clips(3, 7, 20000, 20000) + clips(1, 8, 60000, 80000, 90000) + clips(2, 9, 500, 800)
+
+
+def test_campaigns_rank_by_expected_earnings():
+    result = recommendations.compute_recommendations(CAMPAIGNS, ACCEPTED)
+    ranked = {creator: [campaign for campaign, _ in top] for creator, top in result.items()}
+
+    # The exhausted campaign is never recommended
+    assert all(5 not in top for top in ranked.values())
+    # Big-view creators are sent to the threshold campaign, and the shared budget drops campaign 3
+    # below even the low-paying campaign 2
+    assert ranked[8] == [4, 1, 2, 3]
+    assert ranked[9][0] == 1 and ranked[9].index(4) > ranked[9].index(1)
+    assert dict(result[7])[3] == pytest.approx(60 / 3, rel=0.01)
+    for top in result.values():
+        scores = [score for _, score in top]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_creators_without_history_get_the_default_row():
+    result = recommendations.compute_recommendations(CAMPAIGNS, ACCEPTED, top_k=2)
+
+    assert set(result) == {7, 8, 9, recommendations.DEFAULT_CREATOR_ID}
+    assert all(len(top) == 2 for top in result.values())
+    # The default row is scored from the platform-wide median views
+    assert result[recommendations.DEFAULT_CREATOR_ID] == [(1, 200.0), (4, 171.4286)]
+    assert recommendations.compute_recommendations(CAMPAIGNS, []) == {recommendations.DEFAULT_CREATOR_ID: []}
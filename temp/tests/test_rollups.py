@@ -0,0 +1,55 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+import rollups
+from routes.admin import admin_bp
+
+
+@pytest.fixture
+def deltas(fake_db):
+    applied = []
+    fake_db.rpcs['apply_campaign_rollup_delta'] = lambda **delta: applied.append(delta) or None
+    fake_db.rpcs['increment_campaign_views'] = lambda p_campaign_id, p_delta: applied.append({'views': p_delta}) or 0
+    return applied
+
+
+def test_campaign_performance_reads_only_the_rollups(fake_db):
+    fake_db.tables.update(
+        campaign_rollup=[{'campaign_id': 1, 'accepted_clips': 3, 'rejected_clips': 1, 'total_views': 30000, 'milestones_reached': 2}],
+        campaign_creator_rollup=[{'campaign_id': 1, 'creator_id': 5, 'clips': 2, 'views': 20000, 'creator': {'username': 'ana'}},
+                                 {'campaign_id': 1, 'creator_id': 6, 'clips': 1, 'views': 10000, 'creator': {'username': 'bo'}},
+                                 {'campaign_id': 1, 'creator_id': 7, 'clips': 0, 'views': 0}])
+    campaign = {'id': 1, 'cpv': 0.01, 'budget': 250, 'funds_distributed': 100, 'view_threshold': 1000}
+
+    result = rollups.campaign_performance(campaign)
+
+    assert result['overview']['total_clips'] == 3 and result['overview']['acceptance_rate'] == 0.75
+    # 30000 views at 0.01 would be 300, but spend stops at the budget
+    assert result['financial']['total_earned'] == 250 and result['financial']['total_pending'] == 150
+    assert result['overview']['effective_cpv'] == pytest.approx(250 / 30000, abs=1e-6)
+    assert result['creator_performance'] == [
+        {'creator_id': 5, 'creator_name': 'ana', 'total_views': 20000, 'clips': 2, 'total_earned': 200.0},
+        {'creator_id': 6, 'creator_name': 'bo', 'total_views': 10000, 'clips': 1, 'total_earned': 100.0}]
+
+
+def test_rejecting_an_accepted_clip_removes_it_from_the_rollups(fake_db, deltas, make_app):
+    fake_db.tables.update(
+        submitted_clips=[{'id': 9, 'campaign_id': 1, 'creator_id': 5, 'clip_url': 'https://instagram.com/reel/abc',
+                          'is_deleted_by_admin': False, 'campaign': {'brand_id': 2, 'name': 'Launch'}}],
+        accepted_clips=[{'id': 9, 'campaign_id': 1, 'creator_id': 5, 'view_count': 1200}])
+    app = make_app(admin_bp)
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'role': 'admin'})
+    client = app.test_client()
+
+    reject = lambda: client.put('/api/admin/clip/9', json={'status': 'rejected', 'feedback': 'wrong audio'},
+                                headers={'Authorization': f'Bearer {token}'})
+    assert reject().status_code == 200
+    assert fake_db.tables['accepted_clips'] == []
+    assert sorted((d['p_accepted'], d['p_rejected'], d['p_old_views']) for d in deltas if 'views' not in d) == [(-1, 0, 1200), (0, 1, 0)]
+    # Its views leave the campaign total as well
+    assert [d['views'] for d in deltas if 'views' in d] == [-1200]
+
+    # Changing the feedback later neither counts the rejection again nor removes anything twice
+    assert reject().status_code == 200
+    assert len(deltas) == 3
@@ -0,0 +1,82 @@
+import search
+
+
+def campaign(id, name='', category='music', platform='instagram', is_active=True, **fields):
+    return dict({'id': id, 'name': name, 'category': category, 'platform': platform, 'is_active': is_active}, **fields)
+
+
+def built(rows):
+    index = search.CampaignIndex(loader=lambda: [dict(row) for row in rows])
+    index.rebuild()
+    return index
+
+
+def test_bm25_ranks_name_matches_and_rare_terms_first():
+    index = built([
+        campaign(1, 'Summer sale', requirements='dance to the summer track'),
+        campaign(2, 'Dance challenge', requirements='any summer vibe'),
+        campaign(3, 'Winter promo', requirements='show the dance, mention summer'),
+        campaign(4, 'Summer launch', is_active=False),
+    ])
+
+    results, total, _ = index.search('dance')
+    assert total == 3 and [r['id'] for r in results] == [2, 1, 3]
+
+    # "summer" is in every active campaign, "winter" only in one: the rare term decides
+    results, _, _ = index.search('summer winter')
+    assert results[0]['id'] == 3
+
+    assert 4 in {r['id'] for r in index.search('launch', active_only=False)[0]}
+    assert index.search('launch')[1] == 0
+    assert index.search('nothing matches')[1] == 0
+
+
+def test_facet_counts_ignore_their_own_filter():
+    index = built([
+        campaign(1, 'a', category='music', platform='instagram'),
+        campaign(2, 'b', category='music', platform='youtube'),
+        campaign(3, 'c', category='gaming', platform='instagram'),
+        campaign(4, 'd', category='gaming', platform='instagram', is_active=False),
+    ])
+
+    results, total, facets = index.search(filters={'category': 'music', 'platform': 'instagram'})
+    assert total == 1 and [r['id'] for r in results] == [1]
+    # Category options given platform=instagram, platform options given category=music
+    assert facets == {'category': {'music': 1, 'gaming': 1}, 'platform': {'instagram': 1, 'youtube': 1}}
+
+
+def test_incremental_updates_keep_postings_and_facets_in_step():
+    index = built([campaign(1, 'Dance'), campaign(2, 'Dance')])
+    index.patch(1, {'category': 'gaming', 'name': 'Speedrun'})
+    index.remove(2)
+    index.upsert(campaign(3, 'Dance battle'))
+
+    assert [r['id'] for r in index.search('dance')[0]] == [3]
+    assert index.search('speedrun')[2]['category'] == {'gaming': 1}
+    assert 'dance' in index._postings and set(index._postings['dance']) == {3}
+
+
+def test_writes_made_while_a_rebuild_loads_are_not_lost():
+    rows = [campaign(1, 'Dance', budget=100), campaign(2, 'Sing'), campaign(3, 'Draw')]
+    index = built(rows)
+
+    def load_then_race():
+        stale = [dict(row) for row in rows]
+        # Writes land on the live index after the loader has read its rows
+        index.patch(1, {'budget': 500})
+        index.remove(2)
+        index.upsert(campaign(4, 'Juggle'))
+        return stale
+
+    index.loader = load_then_race
+    index.rebuild()
+
+    assert index.get(1)['budget'] == 500
+    assert index.get(2) is None and index.search('sing')[1] == 0
+    assert [r['id'] for r in index.search('juggle')[0]] == [4]
+    assert index._pending is None
+
+    # Once the rebuild is done, writes are no longer logged
+    index.loader = lambda: [dict(row) for row in rows]
+    index.patch(3, {'budget': 7})
+    assert index._pending is None
@@ -0,0 +1,97 @@
+import os
+import threading
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+import search
+from routes.admin import admin_bp
+
+
+@pytest.fixture
+def db(fake_db, monkeypatch):
+    monkeypatch.setattr(search, 'index', search.CampaignIndex())
+    campaign = {'id': 1, 'brand_id': 2, 'name': 'Launch', 'budget': 200, 'cpv': 0.01, 'is_active': True, 'total_view_count': 0}
+    fake_db.tables.update(
+        campaign=[dict(campaign, total_view_count=19000)],
+        # The joined campaign is what the route read; its total is already stale
+        accepted_clips=[{'id': 9, 'campaign_id': 1, 'creator_id': 5, 'view_count': 50, 'submitted_at': '2026-10-01T00:00:00',
+                         'campaign': campaign}])
+
+    def apply_clip_view_count(p_clip_id, p_view_count):
+        clip = next((c for c in fake_db.tables['accepted_clips'] if c['id'] == p_clip_id), None)
+        if clip is None:
+            return []
+        old, clip['view_count'] = clip['view_count'] or 0, p_view_count
+        row = fake_db.tables['campaign'][0]
+        row['total_view_count'] = max(0, row['total_view_count'] + p_view_count - old)
+        return [{'old_view_count': old, 'total_view_count': row['total_view_count']}]
+
+    fake_db.rpcs.update(
+        apply_clip_view_count=apply_clip_view_count,
+        observe_clip_views=lambda p_views, **_: [{'views': p_views, 'held': False, 'anomaly_id': None, 'rate': 0, 'score': 0}],
+        apply_campaign_rollup_delta=lambda **_: None)
+    return fake_db
+
+
+@pytest.fixture
+def sync(make_app):
+    app = make_app(admin_bp)
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'role': 'admin'})
+    client = app.test_client()
+    return lambda clip_id, views: client.put(f'/api/admin/clip/{clip_id}/view-count', json={'view_count': views},
+                                             headers={'Authorization': f'Bearer {token}'})
+
+
+def test_budget_guard_sees_the_total_the_database_returned(db, sync):
+    # Another sync moved the clip to 1000 after the route read it at 50
+    db.tables['accepted_clips'][0]['view_count'] = 1000
+
+    response = sync(9, 2500)
+
+    assert response.status_code == 200
+    assert (response.json['old_view_count'], response.json['view_count_diff']) == (1000, 1500)
+    # 19000 + 1500 views at 0.01 reaches the 200 budget; the stale joined total (0) would not
+    assert db.tables['campaign'][0]['total_view_count'] == 20500
+    assert response.json['budget_paused'] and db.tables['campaign'][0]['is_active'] is False
+
+
+def test_sync_of_a_clip_deleted_meanwhile_is_a_404(db, sync, monkeypatch):
+    import routes.admin
+    clip = dict(db.tables['accepted_clips'][0])
+    monkeypatch.setattr(routes.admin, '_accepted_clip', lambda clip_id: clip)
+    db.tables['accepted_clips'] = []
+
+    assert sync(9, 2500).status_code == 404
+    assert db.tables['campaign'][0]['total_view_count'] == 19000
+
+
+@pytest.mark.skipif(not os.getenv('DATABASE_URL'), reason='needs DATABASE_URL')
+def test_concurrent_syncs_never_lose_an_increment():
+    import psycopg
+    dsn = os.environ['DATABASE_URL']
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        campaign_id = conn.execute("insert into campaign (name, total_view_count) values ('views-test', 0) returning id").fetchone()[0]
+        clip_ids = [conn.execute("insert into accepted_clips (id, campaign_id, view_count) values (%s, %s, 0) returning id",
+                                 (-100 - i, campaign_id)).fetchone()[0] for i in range(8)]
+    try:
+        def worker(clip_id):
+            with psycopg.connect(dsn, autocommit=True) as conn:
+                for views in range(10, 210, 10):
+                    conn.execute("select * from apply_clip_view_count(%s, %s)", (clip_id, views))
+
+        threads = [threading.Thread(target=worker, args=(clip_id,)) for clip_id in clip_ids + clip_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with psycopg.connect(dsn) as conn:
+            total = conn.execute("select total_view_count from campaign where id = %s", (campaign_id,)).fetchone()[0]
+            counts = conn.execute("select sum(view_count) from accepted_clips where campaign_id = %s", (campaign_id,)).fetchone()[0]
+        assert total == counts == 8 * 200
+    finally:
+        with psycopg.connect(dsn, autocommit=True) as conn:
+            conn.execute("delete from accepted_clips where campaign_id = %s", (campaign_id,))
+            conn.execute("delete from campaign where id = %s", (campaign_id,))
@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta, timezone
+
+import view_history
+from view_history import Series, ViewHistoryStore
+
+DAY = 86400
+T0 = 1_700_000_000
+
+
+class Table:
+    """Stands in for clip_view_history: rows with a DB-assigned id, read back by id.
+
+    `begin()` takes an id without committing the row, like an insert in an open transaction.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.next_id = 1
+
+    def begin(self, clip_id, campaign_id, view_count, captured_at, removed=False):
+        row = {'id': self.next_id, 'clip_id': clip_id, 'campaign_id': campaign_id,
+               'view_count': view_count, 'captured_at': captured_at, 'removed': removed}
+        self.next_id += 1
+        return row
+
+    def commit(self, row):
+        self.rows.append(row)
+        return row
+
+    def insert(self, *args, **kwargs):
+        return self.commit(self.begin(*args, **kwargs))
+
+    def load(self, campaign_id, since_id):
+        return [r for r in self.rows if r['campaign_id'] == campaign_id and r['id'] > (since_id or 0)]
+
+
+def record(table, store, *args, **kwargs):
+    row = table.insert(*args, **kwargs)
+    store.append(row['clip_id'], row['campaign_id'], row['view_count'], row['captured_at'],
+                 row_id=row['id'], removed=row['removed'])
+
+
+def totals(store, campaign_id=1):
+    return store.campaign_series(campaign_id, 0, T0 + 30 * DAY, points=1000)
+
+
+def test_series_append_and_coalesce():
+    series = Series()
+    assert series.append(T0, 10)
+    assert series.append(T0 + 120, 30)
+    assert not series.append(T0 + 120, 40)
+    assert series.append(T0 + 150, 35, coalesce_within=60)
+    assert series.points() == [(T0, 10), (T0 + 150, 35)]
+
+
+def test_series_insert_keeps_time_order():
+    series = Series()
+    for t, v in [(T0, 1), (T0 + 200, 3), (T0 + 300, 4)]:
+        series.append(t, v)
+    series.insert(T0 + 100, 2)
+    assert series.points() == [(T0, 1), (T0 + 100, 2), (T0 + 200, 3), (T0 + 300, 4)]
+    assert (series.last_t, series.last_v) == (T0 + 300, 4)
+
+
+def test_snapshot_before_first_load_keeps_older_history():
+    table = Table()
+    store = ViewHistoryStore(loader=table.load)
+    for day in range(3):
+        table.insert(7, 1, 100 * (day + 1), T0 + day * DAY)
+    # Synced by this worker before the campaign was ever queried
+    record(table, store, 7, 1, 400, T0 + 3 * DAY)
+
+    assert totals(store) == [(T0 + day * DAY, 100 * (day + 1)) for day in range(4)]
+
+
+def test_own_snapshot_is_not_counted_twice():
+    table = Table()
+    store = ViewHistoryStore(loader=table.load)
+    table.insert(7, 1, 100, T0)
+    totals(store)
+    record(table, store, 7, 1, 150, T0 + DAY)
+    record(table, store, 8, 1, 50, T0 + DAY + 300)
+
+    assert totals(store) == [(T0, 100), (T0 + DAY, 150), (T0 + DAY + 300, 200)]
+
+
+def test_late_row_with_older_timestamp_is_caught_up():
+    table = Table()
+    store = ViewHistoryStore(loader=table.load)
+    table.insert(7, 1, 100, T0)
+    table.insert(8, 1, 10, T0)
+    table.insert(7, 1, 300, T0 + 2 * DAY)
+    totals(store)
+    # Committed after the catch-up above, with an earlier app-clock timestamp
+    table.insert(8, 1, 20, T0 + DAY)
+    table.insert(7, 1, 200, T0 + DAY - 600)
+
+    assert totals(store) == [(T0, 110), (T0 + DAY - 600, 210), (T0 + DAY, 220), (T0 + 2 * DAY, 320)]
+    assert store.campaign_series(1, 0, T0 + 30 * DAY, clip_id=7) == [(T0, 100), (T0 + DAY - 600, 200), (T0 + 2 * DAY, 300)]
+
+
+def test_deleted_clip_stays_deleted_across_workers_and_restarts():
+    table = Table()
+    worker_a = ViewHistoryStore(loader=table.load)
+    worker_b = ViewHistoryStore(loader=table.load)
+    table.insert(7, 1, 100, T0)
+    table.insert(8, 1, 50, T0)
+    totals(worker_a)
+    totals(worker_b)
+    record(table, worker_a, 7, 1, 0, T0 + DAY, removed=True)
+    # A sync that raced the deletion does not bring the clip back
+    table.insert(7, 1, 120, T0 + 2 * DAY)
+
+    expected = [(T0, 150), (T0 + DAY, 50)]
+    restarted = ViewHistoryStore(loader=table.load)
+    for store in (worker_a, worker_b, restarted):
+        assert totals(store) == expected
+        assert store.campaign_series(1, 0, T0 + 30 * DAY, clip_id=7) == []
+
+
+def test_row_committed_after_a_higher_id_was_read_is_caught_up():
+    table = Table()
+    store = ViewHistoryStore(loader=table.load)
+    table.insert(7, 1, 100, T0)
+    slow = table.begin(8, 1, 40, T0 + 60)   # id 2, still uncommitted
+    table.insert(7, 1, 150, T0 + 120)       # id 3 commits first
+    assert totals(store) == [(T0, 100), (T0 + 120, 150)]
+
+    table.commit(slow)
+    assert totals(store) == [(T0, 100), (T0 + 60, 140), (T0 + 120, 190)]
+    # Re-reading the overlap window does not count anything twice
+    assert totals(store) == [(T0, 100), (T0 + 60, 140), (T0 + 120, 190)]
+
+
+def test_least_recently_queried_campaign_is_evicted_and_reloaded():
+    table = Table()
+    store = ViewHistoryStore(loader=table.load, max_campaigns=2)
+    for campaign_id in (1, 2, 3):
+        table.insert(10 + campaign_id, campaign_id, 100 * campaign_id, T0)
+    totals(store, 1)
+    totals(store, 2)
+    totals(store, 1)
+    totals(store, 3)
+
+    assert store.stats()['campaigns'] == 2 and store.stats()['clips'] == 2
+    assert 2 not in store._loaded_through
+    # Appends for an evicted campaign wait for its next load
+    record(table, store, 12, 2, 250, T0 + DAY)
+    assert totals(store, 2) == [(T0, 200), (T0 + DAY, 250)]
+
+
+def iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def test_first_load_reads_recent_rows_plus_a_baseline(fake_db, monkeypatch):
+    now = int(datetime.now(timezone.utc).timestamp())
+    old, recent = now - (view_history.LOAD_DAYS + 30) * DAY, now - DAY
+    rows = [
+        (7, 100, old), (7, 150, old + DAY), (8, 40, old), (9, 10, old), (9, 0, old + DAY, True),
+        (7, 180, recent), (8, 60, recent + 60),
+    ]
+    fake_db.tables['clip_view_history'] = [
+        {'id': i + 1, 'clip_id': clip_id, 'campaign_id': 1, 'view_count': views, 'captured_at': iso(t), 'removed': bool(removed)}
+        for i, (clip_id, views, t, *removed) in enumerate(rows)]
+
+    def baseline(p_campaign_id, p_before):
+        latest = {}
+        for row in sorted(fake_db.tables['clip_view_history'], key=lambda row: row['captured_at']):
+            if row['campaign_id'] == p_campaign_id and row['captured_at'] < p_before:
+                latest[(row['clip_id'], row['removed'])] = row
+        return list(latest.values())
+    fake_db.rpcs['clip_view_history_baseline'] = baseline
+
+    loaded = view_history._load_rows(1, None)
+    # Clip 7's oldest snapshot is summed up by its newer baseline and never leaves the database
+    assert sorted(row['id'] for row in loaded) == [2, 3, 4, 5, 6, 7]
+
+    store = ViewHistoryStore(loader=view_history._load_rows)
+    series = store.campaign_series(1, recent - 1, now, points=1000)
+    assert series == [(recent - 1, 190), (recent, 220), (recent + 60, 240)]
@@ -0,0 +1,153 @@
+import os
+
+import pytest
+
+import payment_gateway
+import withdrawals
+
+
+class StubPayouts:
+    """Payout provider that takes batches and can be told to fail after (or instead of) taking them."""
+
+    def __init__(self):
+        self.batches = {}
+        self.calls = 0
+        self.fail_after_accepting = None
+        self.reject = None
+        self.status_error = None
+
+    def request_batch_transfer(self, batch_id, transfers):
+        self.calls += 1
+        if self.reject:
+            raise self.reject
+        self.batches[batch_id] = {t['transfer_id']: {'status': 'PENDING', 'utr': None, 'reason': None} for t in transfers}
+        if self.fail_after_accepting:
+            raise self.fail_after_accepting
+
+    def get_batch_status(self, batch_id):
+        if self.status_error:
+            raise self.status_error
+        if batch_id not in self.batches:
+            raise payment_gateway.GatewayError('batch not found', 404)
+        return self.batches[batch_id]
+
+
+def withdrawal(id, attempts=0, status='pending', batch_id=None):
+    return {'id': id, 'creator_id': 1, 'transaction_id': None, 'amount': 100, 'payout_method': 'upi',
+            'upi_id': 'c@upi', 'bank_account': None, 'ifsc': None, 'reference_id': f'wd_{id}',
+            'status': status, 'batch_id': batch_id, 'attempts': attempts}
+
+
+@pytest.fixture
+def db(fake_db):
+    reverted = []
+
+    def claim_withdrawals(p_limit, p_lease_seconds):
+        claimed = []
+        for row in fake_db.tables['withdrawal']:
+            if row['status'] == 'pending' and len(claimed) < p_limit:
+                row.update(status='processing', attempts=row['attempts'] + 1)
+                claimed.append(dict(row))
+        return claimed
+
+    def revert_withdrawal(p_withdrawal_id, p_reason, p_from_statuses):
+        row = next(r for r in fake_db.tables['withdrawal'] if r['id'] == p_withdrawal_id)
+        if row['status'] not in p_from_statuses:
+            return []
+        row['status'] = 'reverted'
+        reverted.append(p_withdrawal_id)
+        return [{'creator_id': row['creator_id'], 'amount': row['amount'], 'new_balance': row['amount']}]
+
+    fake_db.rpcs.update(claim_withdrawals=claim_withdrawals, revert_withdrawal=revert_withdrawal)
+    fake_db.reverted = reverted
+    return fake_db
+
+
+def row(db, id):
+    return next(r for r in db.tables['withdrawal'] if r['id'] == id)
+
+
+def test_timeout_after_the_provider_took_the_batch_marks_it_submitted(db):
+    # Last allowed attempt: a wrong "not accepted" guess here would refund a paid creator
+    db.tables['withdrawal'] = [withdrawal(1, attempts=withdrawals.MAX_ATTEMPTS - 1)]
+    payouts = StubPayouts()
+    payouts.fail_after_accepting = TimeoutError('read timed out')
+
+    withdrawals.WithdrawalProcessor(payouts).submit()
+
+    assert row(db, 1)['status'] == 'submitted'
+    assert row(db, 1)['batch_id'] in payouts.batches
+    assert db.reverted == []
+
+
+def test_unknown_outcome_waits_and_is_checked_before_resending(db):
+    db.tables['withdrawal'] = [withdrawal(1, attempts=withdrawals.MAX_ATTEMPTS - 1)]
+    payouts = StubPayouts()
+    payouts.fail_after_accepting = payment_gateway.GatewayError('upstream error', 502)
+    payouts.status_error = TimeoutError('status timed out')
+    processor = withdrawals.WithdrawalProcessor(payouts)
+
+    processor.submit()
+    first_batch = row(db, 1)['batch_id']
+    assert row(db, 1)['status'] == 'pending' and first_batch in payouts.batches
+    assert db.reverted == []
+
+    payouts.status_error = payouts.fail_after_accepting = None
+    processor.submit()
+    assert row(db, 1)['status'] == 'submitted' and row(db, 1)['batch_id'] == first_batch
+    assert payouts.calls == 1
+
+
+def test_batch_from_a_worker_that_died_before_sending_is_sent_again(db):
+    db.tables['withdrawal'] = [withdrawal(1, attempts=1, batch_id='wb_never_sent')]
+    payouts = StubPayouts()
+
+    withdrawals.WithdrawalProcessor(payouts).submit()
+
+    assert row(db, 1)['status'] == 'submitted'
+    assert row(db, 1)['batch_id'] != 'wb_never_sent' and row(db, 1)['batch_id'] in payouts.batches
+
+
+def test_rejected_batch_is_retried_then_reverted(db):
+    db.tables['withdrawal'] = [withdrawal(1), withdrawal(2, attempts=withdrawals.MAX_ATTEMPTS - 1)]
+    payouts = StubPayouts()
+    payouts.reject = payment_gateway.GatewayError('invalid vpa', 400)
+
+    withdrawals.WithdrawalProcessor(payouts).submit()
+
+    assert row(db, 1)['status'] == 'pending' and row(db, 1)['batch_id'] is None
+    if withdrawals.AUTO_REVERT:
+        assert db.reverted == [2]
+
+
+def test_reconcile_settles_only_what_the_provider_reports(db):
+    payouts = StubPayouts()
+    payouts.batches['wb_1'] = {'wd_1': {'status': 'SUCCESS', 'utr': 'UTR1', 'reason': None},
+                               'wd_2': {'status': 'FAILED', 'utr': None, 'reason': 'account closed'},
+                               'wd_3': {'status': 'PENDING', 'utr': None, 'reason': None}}
+    db.tables['withdrawal'] = [withdrawal(i, status='submitted', batch_id='wb_1') for i in (1, 2, 3)]
+
+    assert withdrawals.WithdrawalProcessor(payouts).reconcile() == 2
+
+    assert row(db, 1)['status'] == 'success' and row(db, 1)['utr'] == 'UTR1'
+    assert row(db, 2)['status'] == ('reverted' if withdrawals.AUTO_REVERT else 'failed')
+    assert row(db, 3)['status'] == 'submitted'
+
+
+@pytest.mark.skipif(not os.getenv('DATABASE_URL'), reason='needs DATABASE_URL')
+def test_revert_withdrawal_only_from_allowed_statuses():
+    import psycopg
+    with psycopg.connect(os.environ['DATABASE_URL']) as conn:
+        try:
+            creator_id = conn.execute("insert into creator (username, email) values ('wd-test', 'wd-test@example.com') returning id").fetchone()[0]
+            conn.execute("insert into wallet (user_type, user_id, balance) values ('creator', %s, 500)", (creator_id,))
+            withdrawal_id, _ = conn.execute("select * from reserve_withdrawal(%s, 200, 'upi', 'c@upi', null, null, 'wd_test_revert')",
+                                            (creator_id,)).fetchone()
+            conn.execute("update withdrawal set status = 'submitted' where id = %s", (withdrawal_id,))
+
+            assert conn.execute("select * from revert_withdrawal(%s, 'nope', array['failed', 'pending'])", (withdrawal_id,)).fetchall() == []
+            reverted = conn.execute("select new_balance from revert_withdrawal(%s, 'failed', array['submitted'])", (withdrawal_id,)).fetchall()
+            assert [float(balance) for (balance,) in reverted] == [500.0]
+            assert conn.execute("select * from revert_withdrawal(%s, 'again', array['submitted'])", (withdrawal_id,)).fetchall() == []
+        finally:
+            conn.rollback()
@@ -0,0 +1,335 @@
+"""Compact per-clip view-count history with downsampled range queries.
+
+Every view sync appends a snapshot. In memory each clip's history is a pair of `array('q')`
+columns holding deltas (seconds since the previous snapshot, views gained since the previous
+snapshot), which keeps a month of snapshots for a 10k-clip campaign in a few MB. A per-campaign
+total series is maintained alongside on every append (coalesced to one point per minute), so a
+campaign chart never has to merge 10k clip series at query time.
+
+Snapshots are also written to `clip_view_history`, which is the durable copy:
+
+  * A campaign is loaded into memory on its first query, and only its last VIEW_HISTORY_LOAD_DAYS
+    of snapshots are: older history is summed up by `clip_view_history_baseline()` (each clip's
+    last snapshot before the cutoff, see migrations/0014). Until its first query a campaign is not
+    held in memory at all; its snapshots are picked up by that first load.
+  * Later queries catch up with rows written by other workers by id. An identity value is taken
+    at insert, not at commit, so a row can commit after a higher id was read: every catch-up
+    therefore re-reads the trailing VIEW_HISTORY_CATCH_UP_OVERLAP ids and skips the ids it has
+    already applied. A row that commits more than that many inserts late is missed until the
+    campaign is loaded again.
+  * At most VIEW_HISTORY_MAX_CAMPAIGNS campaigns are kept; the least recently queried one is
+    dropped and loaded again on its next query.
+
+A snapshot older than the clip's newest point is inserted in time order and the campaign total
+is rebuilt from the clip series before it is next read. Deleting a clip writes a tombstone row
+(`removed`), so every worker, and every later load, stops counting the clip from that point on.
+"""
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+# Campaign totals closer together than this are merged into one point
+CAMPAIGN_RESOLUTION_SECONDS = 60
+LOAD_DAYS = int(os.getenv('VIEW_HISTORY_LOAD_DAYS', '90'))
+CATCH_UP_OVERLAP = int(os.getenv('VIEW_HISTORY_CATCH_UP_OVERLAP', '10000'))
+MAX_CAMPAIGNS = int(os.getenv('VIEW_HISTORY_MAX_CAMPAIGNS', '500'))
+
+
+class Series:
+    """Append-only (timestamp, value) series stored as delta-encoded 64-bit columns."""
+
+    __slots__ = ('_dt', '_dv', 'first_t', 'first_v', 'last_t', 'last_v')
+
+    def __init__(self):
+        self._dt = array('q')
+        self._dv = array('q')
+        self.first_t = self.first_v = self.last_t = self.last_v = None
+
+    def __len__(self):
+        return 0 if self.first_t is None else len(self._dt) + 1
+
+    def append(self, t, v, coalesce_within=0):
+        """Append a point; returns False if it is not newer than the last one."""
+        if self.first_t is None:
+            self.first_t = self.last_t = t
+            self.first_v = self.last_v = v
+            return True
+        if coalesce_within and self.last_t <= t < self.last_t + coalesce_within:
+            # Fold into the previous point instead of growing the series
+            if self._dt:
+                self._dt[-1] += t - self.last_t
+                self._dv[-1] += v - self.last_v
+            else:
+                self.first_t, self.first_v = t, v
+        elif t <= self.last_t:
+            return False
+        else:
+            self._dt.append(t - self.last_t)
+            self._dv.append(v - self.last_v)
+        self.last_t, self.last_v = t, v
+        return True
+
+    def insert(self, t, v):
+        """Add a point that is not newer than the last one, keeping time order. O(n): rebuilds the columns."""
+        points = self.points()
+        points.insert(bisect_right(points, t, key=lambda p: p[0]), (t, v))
+        self._dt, self._dv = array('q'), array('q')
+        self.first_t = self.first_v = self.last_t = self.last_v = None
+        for pt, pv in points:
+            self._extend(pt, pv)
+
+    def _extend(self, t, v):
+        if self.first_t is None:
+            self.first_t, self.first_v = t, v
+        else:
+            self._dt.append(t - self.last_t)
+            self._dv.append(v - self.last_v)
+        self.last_t, self.last_v = t, v
+
+    def points(self, start=None, end=None):
+        if self.first_t is None:
+            return []
+        ts = accumulate(self._dt, initial=self.first_t)
+        vs = accumulate(self._dv, initial=self.first_v)
+        return [(t, v) for t, v in zip(ts, vs) if (start is None or t >= start) and (end is None or t <= end)]
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling; keeps the visual shape with `threshold` points."""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return points
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        # Average of the next bucket is the third triangle vertex
+        next_bucket = points[end:next_end] or [points[-1]]
+        avg_t = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_v = sum(p[1] for p in next_bucket) / len(next_bucket)
+        at, av = points[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            t, v = points[j]
+            area = abs((at - avg_t) * (v - av) - (at - t) * (avg_v - av))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def fixed_buckets(points, start, end, buckets):
+    """Last known value at the end of each of `buckets` equal intervals (step semantics)."""
+    if not points or buckets < 1 or end <= start:
+        return []
+    width = (end - start) / buckets
+    result, i, value = [], 0, None
+    for b in range(buckets):
+        bucket_end = start + width * (b + 1)
+        while i < len(points) and points[i][0] <= bucket_end:
+            value = points[i][1]
+            i += 1
+        if value is not None:
+            result.append((int(bucket_end), value))
+    return result
+
+
+def _to_epoch(value):
+    if isinstance(value, (int, float)):
+        return int(value)
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+class ViewHistoryStore:
+    def __init__(self, loader=None, overlap=CATCH_UP_OVERLAP, max_campaigns=MAX_CAMPAIGNS):
+        """`loader(campaign_id, since_id)` returns rows with an id above `since_id`; with None, the first load."""
+        self.loader = loader
+        self.overlap = overlap
+        self.max_campaigns = max_campaigns
+        self._clips = {}             # clip id -> Series
+        self._campaign_clips = {}    # campaign id -> set(clip ids), removed clips included
+        self._campaign_totals = {}   # campaign id -> Series of summed views
+        self._stale_totals = set()   # campaign ids whose totals must be rebuilt before the next read
+        self._removed_at = {}        # clip id -> time of its tombstone
+        self._loaded_through = {}    # campaign id -> highest clip_view_history id read from the database
+        self._applied = {}           # campaign id -> ids in the re-read window that are already applied
+        self._recent = OrderedDict() # loaded campaign ids, least recently queried first
+        self._lock = threading.Lock()
+
+    def append(self, clip_id, campaign_id, view_count, captured_at, row_id=None, removed=False):
+        """Apply a snapshot (or tombstone) this worker just wrote, if the campaign is loaded."""
+        with self._lock:
+            through = self._loaded_through.get(campaign_id)
+            # Not loaded yet: the first query loads the campaign, this row included
+            if through is None:
+                return
+            applied = self._applied[campaign_id]
+            if row_id is not None and (row_id in applied or row_id <= through - self.overlap):
+                return
+            self._apply(clip_id, campaign_id, int(view_count or 0), _to_epoch(captured_at), removed)
+            if row_id is not None:
+                applied.add(row_id)
+
+    def _apply(self, clip_id, campaign_id, view_count, t, removed=False):
+        removed_at = self._removed_at.get(clip_id)
+        if removed_at is not None and t >= removed_at:
+            return
+        series = self._clips.get(clip_id)
+        if series is None:
+            if removed:
+                return
+            series = self._clips[clip_id] = Series()
+            self._campaign_clips.setdefault(campaign_id, set()).add(clip_id)
+        if removed:
+            # The tombstone is always the clip's last point: it stops counting from here on
+            t = max(t, series.last_t)
+            view_count = 0
+            self._removed_at[clip_id] = t
+        elif series.last_t is not None and t <= series.last_t:
+            series.insert(t, view_count)
+            self._stale_totals.add(campaign_id)
+            return
+        previous = series.last_v or 0
+        series.append(t, view_count)
+        if campaign_id in self._stale_totals:
+            return
+        totals = self._campaign_totals.setdefault(campaign_id, Series())
+        if totals.last_t is not None and t < totals.last_t:
+            # A first snapshot of a clip, older than the campaign's newest point
+            self._stale_totals.add(campaign_id)
+            return
+        new_total = (totals.last_v or 0) + view_count - previous
+        totals.append(max(t, totals.last_t or t), new_total, coalesce_within=CAMPAIGN_RESOLUTION_SECONDS)
+
+    def _rebuild_totals(self, campaign_id):
+        changes = sorted((t, clip_id, v) for clip_id in self._campaign_clips.get(campaign_id, ())
+                         for t, v in self._clips[clip_id].points())
+        totals, last, total = Series(), {}, 0
+        for t, clip_id, v in changes:
+            total += v - last.get(clip_id, 0)
+            last[clip_id] = v
+            totals.append(max(t, totals.last_t or t), total, coalesce_within=CAMPAIGN_RESOLUTION_SECONDS)
+        self._campaign_totals[campaign_id] = totals
+        self._stale_totals.discard(campaign_id)
+
+    def _catch_up(self, campaign_id):
+        """Load snapshots for a campaign written since we last looked (by any worker)."""
+        if self.loader is None:
+            return
+        with self._lock:
+            through = self._loaded_through.get(campaign_id)
+        # Rows just below the watermark may have committed since it was read: look at them again
+        rows = self.loader(campaign_id, None if through is None else max(0, through - self.overlap))
+        with self._lock:
+            # Another request may have applied some of these rows while we were loading them
+            through = self._loaded_through.get(campaign_id)
+            applied = self._applied.setdefault(campaign_id, set())
+            floor = None if through is None else through - self.overlap
+            for row in sorted(rows, key=lambda row: row['id']):
+                if row['id'] in applied or (floor is not None and row['id'] <= floor):
+                    continue
+                self._apply(row['clip_id'], campaign_id, int(row['view_count'] or 0),
+                            _to_epoch(row['captured_at']), row.get('removed', False))
+                applied.add(row['id'])
+            through = max([through or 0] + [row['id'] for row in rows])
+            self._loaded_through[campaign_id] = through
+            self._applied[campaign_id] = {row_id for row_id in applied if row_id > through - self.overlap}
+            self._recent[campaign_id] = None
+            self._recent.move_to_end(campaign_id)
+            while len(self._recent) > self.max_campaigns:
+                self._evict(next(iter(self._recent)))
+
+    def _evict(self, campaign_id):
+        """Drop a campaign from memory; its next query loads it again."""
+        self._recent.pop(campaign_id, None)
+        for clip_id in self._campaign_clips.pop(campaign_id, ()):
+            self._clips.pop(clip_id, None)
+            self._removed_at.pop(clip_id, None)
+        self._campaign_totals.pop(campaign_id, None)
+        self._stale_totals.discard(campaign_id)
+        self._loaded_through.pop(campaign_id, None)
+        self._applied.pop(campaign_id, None)
+
+    def campaign_series(self, campaign_id, start, end, points=200, mode='lttb', clip_id=None):
+        self._catch_up(campaign_id)
+        with self._lock:
+            if clip_id is not None:
+                if clip_id not in self._campaign_clips.get(campaign_id, ()) or clip_id in self._removed_at:
+                    return []
+                raw = self._clips[clip_id].points()
+            else:
+                if campaign_id in self._stale_totals:
+                    self._rebuild_totals(campaign_id)
+                totals = self._campaign_totals.get(campaign_id)
+                raw = totals.points() if totals else []
+        # Carry the last value from before the window so the chart doesn't start at zero
+        before = [p for p in raw if p[0] < start][-1:]
+        window = [p for p in raw if start <= p[0] <= end]
+        if before:
+            window = [(start, before[0][1])] + window
+        if mode == 'buckets':
+            return fixed_buckets(window, start, end, points)
+        return lttb(window, points)
+
+    def stats(self):
+        with self._lock:
+            snapshots = sum(len(s) for s in self._clips.values())
+            return {
+                'campaigns': len(self._recent),
+                'clips': len(self._clips),
+                'snapshots': snapshots,
+                'approx_bytes': sum(s._dt.itemsize * 2 * len(s._dt) for s in self._clips.values())
+            }
+
+
+def _insert(row):
+    from extensions import supabase
+    row['captured_at'] = row.get('captured_at') or datetime.utcnow().isoformat()
+    inserted = supabase.table('clip_view_history').insert([row]).execute().data
+    store.append(row['clip_id'], row['campaign_id'], row['view_count'], row['captured_at'],
+                 row_id=inserted[0]['id'] if inserted else None, removed=row.get('removed', False))
+
+
+def record_snapshot(clip_id, campaign_id, view_count, captured_at=None):
+    """Persist a snapshot and apply it to this worker's in-memory store."""
+    _insert({'clip_id': clip_id, 'campaign_id': campaign_id, 'view_count': view_count, 'captured_at': captured_at})
+
+
+def forget_clip(clip_id, campaign_id):
+    """Tombstone a deleted clip: campaign totals keep its history but stop counting it from now on."""
+    _insert({'clip_id': clip_id, 'campaign_id': campaign_id, 'view_count': 0, 'removed': True})
+
+
+def _load_rows(campaign_id, since_id, page_size=1000):
+    """Rows above `since_id`; with None, the baseline before the load window plus the rows in it."""
+    from extensions import supabase
+    rows, loaded_after = [], None
+    if since_id is None:
+        loaded_after = (datetime.utcnow() - timedelta(days=LOAD_DAYS)).isoformat()
+        rows = supabase.rpc('clip_view_history_baseline', {'p_campaign_id': campaign_id, 'p_before': loaded_after}).execute().data or []
+    while True:
+        query = supabase.table('clip_view_history').select('id, clip_id, view_count, captured_at, removed').eq('campaign_id', campaign_id)
+        if since_id:
+            query = query.gt('id', since_id)
+        if loaded_after:
+            query = query.gte('captured_at', loaded_after)
+        batch = query.order('id').limit(page_size).execute().data or []
+        rows.extend(batch)
+        if len(batch) < page_size:
+            return rows
+        since_id = batch[-1]['id']
+
+
+store = ViewHistoryStore(loader=_load_rows)
@@ -0,0 +1,365 @@
+"""Creator withdrawals: funds are reserved immediately, payouts are sent in scheduled batches.
+
+`reserve()` runs `reserve_withdrawal()` (see migrations/0006_withdrawals.sql), which debits the
+creator's wallet and queues a `withdrawal` row in one transaction, so a request handler never
+waits on the payout provider and a balance can't be withdrawn twice.
+
+Every WITHDRAWAL_BATCH_SECONDS the worker (a `withdrawals.process` job, see tasks.py):
+
+  1. reconciles the batches it submitted earlier: transfers the provider reports as paid are
+     marked `success`, failed ones are reverted (the amount goes back to the wallet). Each cycle
+     checks up to WITHDRAWAL_RECONCILE_LIMIT submitted withdrawals, oldest first, and the next
+     cycle continues after the last one checked (wrapping around at the end),
+  2. claims up to WITHDRAWAL_BATCH_SIZE due withdrawals with `claim_withdrawals()` (FOR UPDATE
+     SKIP LOCKED plus a lease) and sends them as one batch transfer.
+
+The batch id is written to the claimed rows before the provider is called. A batch the provider
+rejects (4xx) is retried with backoff; after WITHDRAWAL_MAX_ATTEMPTS its withdrawals are
+reverted. When the outcome is unknown (a timeout or 5xx, or a worker that died mid-call) the
+provider is asked for the batch's status first: transfers it has are marked submitted, and only
+transfers it reports as unknown are sent again or reverted. If it cannot be asked, the
+withdrawals wait and are never reverted. The withdrawal's reference id is the provider's
+transfer id, so a resent transfer is never paid twice. With WITHDRAWAL_AUTO_REVERT=0 failed payouts stay
+`failed` until the creator reverts them from the wallet page.
+
+    python withdrawals.py       # run the processor on its own, without the job worker
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import events
+import payment_gateway
+
+log = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = int(os.getenv('WITHDRAWAL_MAX_ATTEMPTS', '5'))
+BASE_BACKOFF_SECONDS = float(os.getenv('WITHDRAWAL_BACKOFF_SECONDS', '60'))
+MAX_BACKOFF_SECONDS = 3600
+AUTO_REVERT = os.getenv('WITHDRAWAL_AUTO_REVERT', '1') != '0'
+
+# Internal states the frontend shows as 'pending'
+IN_FLIGHT = ('pending', 'processing', 'submitted')
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+def backoff(attempts):
+    return min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def public_status(status):
+    return 'pending' if status in IN_FLIGHT else status
+
+
+def reserve(creator_id, amount, payout_method, upi_id=None, bank_account=None, ifsc=None):
+    """Debit the wallet and queue the payout. Returns (withdrawal id, reference id, new balance)."""
+    from extensions import supabase
+    reference_id = f"wd_{creator_id}_{uuid.uuid4().hex[:16]}"
+    try:
+        rows = supabase.rpc('reserve_withdrawal', {
+            'p_creator_id': creator_id,
+            'p_amount': amount,
+            'p_payout_method': payout_method,
+            'p_upi_id': upi_id,
+            'p_bank_account': bank_account,
+            'p_ifsc': ifsc,
+            'p_reference_id': reference_id
+        }).execute().data
+    except Exception as e:
+        if 'insufficient_funds' in str(e):
+            raise InsufficientFunds() from e
+        raise
+    row = rows[0]
+    events.hub.publish(events.creator_channel(creator_id), events.WITHDRAWAL_INITIATED, {
+        'withdrawal_id': row['withdrawal_id'], 'amount': amount, 'reference_id': reference_id
+    })
+    return row['withdrawal_id'], reference_id, float(row['new_balance'])
+
+
+def revert(withdrawal_id, reason, from_statuses):
+    """Re-credit a withdrawal that is in one of `from_statuses`. Returns the new balance, or None."""
+    from extensions import supabase
+    rows = supabase.rpc('revert_withdrawal', {
+        'p_withdrawal_id': withdrawal_id, 'p_reason': reason, 'p_from_statuses': list(from_statuses)
+    }).execute().data
+    if not rows:
+        return None
+    row = rows[0]
+    events.hub.publish(events.creator_channel(row['creator_id']), events.WITHDRAWAL_REVERTED, {
+        'withdrawal_id': withdrawal_id, 'amount': float(row['amount']), 'new_balance': float(row['new_balance']), 'reason': reason
+    })
+    return float(row['new_balance'])
+
+
+class WithdrawalProcessor:
+    def __init__(self, client, batch_size=100, interval=60.0, lease_seconds=300, latency_window=100, reconcile_limit=500):
+        self.client = client
+        self.batch_size = batch_size
+        self.reconcile_limit = reconcile_limit
+        self._reconcile_cursor = None
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self.latency_window = latency_window
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def nudge(self):
+        self._wake.set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='withdrawal-processor', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                log.warning("Withdrawal batch failed: %s", e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def run_once(self):
+        """Reconcile submitted batches, then send one new batch. Returns the number sent."""
+        self.reconcile()
+        return self.submit()
+
+    def _record_batch(self, batch_id, size, started, error=None):
+        """Batch metrics are stored, not kept in memory, because the worker sends and the web process reports."""
+        from extensions import supabase
+        try:
+            supabase.table('withdrawal_batch').insert([{
+                'batch_id': batch_id, 'size': size, 'latency_ms': round((time.monotonic() - started) * 1000, 1),
+                'accepted': error is None, 'error': error
+            }]).execute()
+        except Exception as e:
+            log.warning("Could not record payout batch %s: %s", batch_id, e)
+
+    def submit(self):
+        from extensions import supabase
+        claimed = supabase.rpc('claim_withdrawals', {'p_limit': self.batch_size, 'p_lease_seconds': self.lease_seconds}).execute().data or []
+        if not claimed:
+            return 0
+        count = len(claimed)
+        # A row that still has a batch id was sent before without a definite answer (the call failed
+        # ambiguously, or the worker died mid-call): find out whether that batch took it first
+        claimed = self._settle_previous(claimed)
+        if not claimed:
+            return count
+
+        batch_id = f"wb_{uuid.uuid4().hex[:20]}"
+        # Recorded before the call, so a worker that dies mid-call leaves a batch to check, not to guess
+        supabase.table('withdrawal').update({'batch_id': batch_id}).in_('id', [w['id'] for w in claimed]).eq(
+            'status', 'processing').execute()
+        transfers = [{
+            'transfer_id': w['reference_id'],
+            'amount': w['amount'],
+            'vpa': w['upi_id'] if w['payout_method'] == 'upi' else None,
+            'bank_account': w['bank_account'],
+            'ifsc': w['ifsc']
+        } for w in claimed]
+        started = time.monotonic()
+        try:
+            self.client.request_batch_transfer(batch_id, transfers)
+        except Exception as e:
+            self._record_batch(batch_id, len(claimed), started, str(e)[:500])
+            if isinstance(e, payment_gateway.GatewayError) and e.rejected:
+                log.warning("Payout batch %s of %s withdrawals was rejected: %s", batch_id, len(claimed), e)
+                self._retry_or_fail(claimed, str(e))
+                return count
+            # A timeout or a 5xx says nothing about whether the provider took the batch: ask it
+            log.warning("Payout batch %s of %s withdrawals failed, checking whether it was accepted: %s", batch_id, len(claimed), e)
+            self._settle_sent(batch_id, claimed, str(e))
+            return count
+        self._record_batch(batch_id, len(claimed), started)
+        self._mark_submitted(batch_id, claimed)
+        log.info("Submitted payout batch %s with %s withdrawals", batch_id, len(claimed))
+        return count
+
+    def _batch_transfers(self, batch_id):
+        """The provider's view of a batch, or None if it never accepted it. Raises if it cannot tell."""
+        try:
+            return self.client.get_batch_status(batch_id)
+        except payment_gateway.GatewayError as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    def _settle_previous(self, claimed):
+        """Mark withdrawals an earlier batch already carried as submitted; return the ones to send."""
+        unsent = [w for w in claimed if not w.get('batch_id')]
+        previous = {}
+        for w in claimed:
+            if w.get('batch_id'):
+                previous.setdefault(w['batch_id'], []).append(w)
+        for batch_id, withdrawals in previous.items():
+            unsent.extend(self._settle_sent(batch_id, withdrawals, None))
+        return unsent
+
+    def _settle_sent(self, batch_id, withdrawals, error):
+        """Resolve withdrawals whose batch may or may not have reached the provider.
+
+        Transfers the provider has are marked submitted (reconcile settles them). Transfers it
+        reports as unknown were not sent: with `error` (the batch call just failed) they are
+        retried or failed as usual, otherwise they are returned to be sent again. If the provider
+        cannot be asked, the withdrawals wait for the next attempt and are never reverted.
+        """
+        try:
+            known = self._batch_transfers(batch_id)
+        except Exception as e:
+            log.warning("Could not check payout batch %s, will ask again: %s", batch_id, e)
+            self._reschedule(withdrawals, f"outcome of payout batch {batch_id} unknown: {error or e}")
+            return []
+        known = known or {}
+        accepted = [w for w in withdrawals if w['reference_id'] in known]
+        if accepted:
+            self._mark_submitted(batch_id, accepted)
+            log.info("Payout batch %s had already taken %s withdrawals", batch_id, len(accepted))
+        unknown = [w for w in withdrawals if w['reference_id'] not in known]
+        if error is not None and unknown:
+            self._retry_or_fail(unknown, error)
+            return []
+        return unknown
+
+    def _mark_submitted(self, batch_id, withdrawals):
+        from extensions import supabase
+        supabase.table('withdrawal').update({
+            'status': 'submitted', 'batch_id': batch_id, 'locked_until': None, 'last_error': None,
+            'submitted_at': datetime.utcnow().isoformat()
+        }).in_('id', [w['id'] for w in withdrawals]).eq('status', 'processing').execute()
+
+    def _reschedule(self, withdrawals, error):
+        """Put withdrawals back for a later attempt, keeping their batch id so it is checked first."""
+        from extensions import supabase
+        for w in withdrawals:
+            next_attempt = datetime.utcnow() + timedelta(seconds=backoff(w['attempts']))
+            supabase.table('withdrawal').update({
+                'status': 'pending', 'locked_until': None, 'last_error': error, 'next_attempt_at': next_attempt.isoformat()
+            }).eq('id', w['id']).eq('status', 'processing').execute()
+
+    def _retry_or_fail(self, withdrawals, error):
+        """Only for transfers the provider is known not to have: they can be sent again, or reverted."""
+        from extensions import supabase
+        for w in withdrawals:
+            if w['attempts'] >= MAX_ATTEMPTS:
+                self._fail(w, f"payout not accepted after {w['attempts']} attempts: {error}", ('processing',))
+            else:
+                next_attempt = datetime.utcnow() + timedelta(seconds=backoff(w['attempts']))
+                supabase.table('withdrawal').update({
+                    'status': 'pending', 'batch_id': None, 'locked_until': None, 'last_error': error,
+                    'next_attempt_at': next_attempt.isoformat()
+                }).eq('id', w['id']).eq('status', 'processing').execute()
+
+    def _fail(self, withdrawal, reason, from_statuses):
+        from extensions import supabase
+        log.warning("Withdrawal %s failed: %s", withdrawal['id'], reason)
+        if AUTO_REVERT:
+            revert(withdrawal['id'], reason, from_statuses)
+            return
+        supabase.table('withdrawal').update({
+            'status': 'failed', 'locked_until': None, 'last_error': reason, 'completed_at': datetime.utcnow().isoformat()
+        }).eq('id', withdrawal['id']).in_('status', list(from_statuses)).execute()
+        if withdrawal.get('transaction_id'):
+            supabase.table('transactions').update({'status': 'failed'}).eq('id', withdrawal['transaction_id']).execute()
+
+    def reconcile(self):
+        """Settle one page of submitted withdrawals from the provider's batch status. Returns the number settled."""
+        from extensions import supabase
+        query = supabase.table('withdrawal').select(
+            'id, creator_id, transaction_id, amount, reference_id, batch_id').eq('status', 'submitted')
+        if self._reconcile_cursor is not None:
+            query = query.gt('id', self._reconcile_cursor)
+        submitted = query.order('id').limit(self.reconcile_limit).execute().data or []
+        # Keyset cursor: the next cycle continues after this page, or starts over after the last one
+        self._reconcile_cursor = submitted[-1]['id'] if len(submitted) == self.reconcile_limit else None
+        batches = {}
+        for w in submitted:
+            batches.setdefault(w['batch_id'], []).append(w)
+
+        settled = 0
+        for batch_id, withdrawals in batches.items():
+            try:
+                results = self.client.get_batch_status(batch_id)
+            except Exception as e:
+                log.warning("Could not fetch status of payout batch %s: %s", batch_id, e)
+                continue
+            for w in withdrawals:
+                result = results.get(w['reference_id']) or {}
+                status = result.get('status')
+                if status == payment_gateway.TRANSFER_SUCCESS:
+                    self._succeed(w, result.get('utr'))
+                elif status in payment_gateway.TRANSFER_FAILURES:
+                    self._fail(w, result.get('reason') or f"transfer {status.lower()}", ('submitted',))
+                else:
+                    continue
+                settled += 1
+        return settled
+
+    def _succeed(self, withdrawal, utr):
+        from extensions import supabase
+        updated = supabase.table('withdrawal').update({
+            'status': 'success', 'utr': utr, 'completed_at': datetime.utcnow().isoformat()
+        }).eq('id', withdrawal['id']).eq('status', 'submitted').execute().data
+        if not updated:
+            return
+        if withdrawal.get('transaction_id'):
+            supabase.table('transactions').update({'status': 'success'}).eq('id', withdrawal['transaction_id']).execute()
+        events.hub.publish(events.creator_channel(withdrawal['creator_id']), events.WITHDRAWAL_COMPLETED, {
+            'withdrawal_id': withdrawal['id'], 'amount': float(withdrawal['amount']), 'utr': utr
+        })
+
+    def metrics(self):
+        """Queue depth per status and provider batch latency over the last `latency_window` batches."""
+        from extensions import supabase
+        rows = supabase.rpc('withdrawal_queue_stats', {}).execute().data or []
+        queue = {row['status']: {'count': row['count'], 'oldest': row['oldest']} for row in rows}
+        batches = supabase.table('withdrawal_batch').select('size, latency_ms, accepted, created_at').order(
+            'created_at', desc=True).limit(self.latency_window).execute().data or []
+        latencies = sorted(float(batch['latency_ms']) for batch in batches)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else None
+
+        return {
+            'queue_depth': sum(queue.get(status, {}).get('count', 0) for status in ('pending', 'processing')),
+            'awaiting_settlement': queue.get('submitted', {}).get('count', 0),
+            'queue': queue,
+            'batch_latency_ms': {'last': float(batches[0]['latency_ms']) if batches else None,
+                                 'p50': percentile(0.5), 'p95': percentile(0.95), 'samples': len(latencies)},
+            'recent_batches': {'count': len(batches), 'rejected': sum(1 for batch in batches if not batch['accepted']),
+                               'withdrawals': sum(batch['size'] for batch in batches)},
+            'last_batch_at': batches[0]['created_at'] if batches else None,
+            'batch_size': self.batch_size,
+            'interval_seconds': self.interval
+        }
+
+
+processor = WithdrawalProcessor(
+    payment_gateway.payouts,
+    batch_size=int(os.getenv('WITHDRAWAL_BATCH_SIZE', '100')),
+    interval=float(os.getenv('WITHDRAWAL_BATCH_SECONDS', '60')),
+    reconcile_limit=int(os.getenv('WITHDRAWAL_RECONCILE_LIMIT', '500'))
+)
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+    import logs
+    logs.configure()
+    import jobs
+    # No SSE clients in this process: the web processes deliver what it publishes
+    events.forward_to_web(jobs.connect)
+    # Module-level clients were built before .env was loaded
+    processor.client = payment_gateway.payouts = payment_gateway.PayoutClient.from_env()
+    processor.start()
+    threading.Event().wait()
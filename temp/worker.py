@@ -0,0 +1,36 @@
+"""Background job worker, run separately from the web process:
+
+    DATABASE_URL=postgresql://... python worker.py
+
+Run as many copies as needed: jobs are claimed with SKIP LOCKED and schedules fire only on the
+elected leader (see jobs.py). JOBS_CONCURRENCY sets the number of job threads per process.
+"""
+import os
+import signal
+import threading
+
+from dotenv import load_dotenv
+
+
+def main():
+    load_dotenv()
+    # Imported after load_dotenv(): these modules build their clients and settings from the environment
+    import events
+    import jobs
+    import logs
+    import tasks  # noqa: F401  (registers the handlers and schedules)
+    logs.configure()
+    # No SSE clients in this process: the web processes deliver what the tasks publish
+    events.forward_to_web(jobs.connect)
+
+    worker = jobs.Worker(concurrency=int(os.getenv('JOBS_CONCURRENCY', '4')))
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    worker.start()
+    stopping.wait()
+    worker.stop(timeout=float(os.getenv('JOBS_SHUTDOWN_SECONDS', '30')))
+
+
+if __name__ == '__main__':
+    main()